@@ -10,6 +10,7 @@ import cv2 as _
 
 # Public classes
 from buzzard._footprint import Footprint
+from buzzard._footprint_array import FootprintArray
 from buzzard._dataset import (
     Dataset,
     open_raster,
@@ -54,14 +55,19 @@ from buzzard._numpy_raster import NumpyRaster
 from buzzard._gdal_file_vector import GDALFileVector
 from buzzard._gdal_memory_vector import GDALMemoryVector
 
+from buzzard._nocache_raster_recipe import NocacheRasterRecipe
 from buzzard._cached_raster_recipe import CachedRasterRecipe
 
 # Misc classes
 # Public methods, but always instanciated by Dataset, never by user.
 from buzzard._dataset_pools_container import PoolsContainer
 
+# Cache formats of CachedRasterRecipe
+from buzzard._cache_format import ACacheFormat, GTiffCacheFormat, RawCacheFormat
+
 # Misc
 from buzzard._env import env
+from buzzard._debug_chrome_trace import ChromeTraceObserver
 
 # Public submodules
 import buzzard.utils
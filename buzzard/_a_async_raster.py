@@ -10,6 +10,8 @@ from buzzard._debug_observers_manager import DebugObserversManager
 
 QUEUE_POLL_DISTANCE = 0.1
 
+_aio = None # lazy import, the asyncio API requires python>=3.6
+
 class AAsyncRaster(ASourceRaster):
     """Base abstract class defining the common behavior of all rasters that are managed by the
     Dataset's scheduler.
@@ -18,10 +20,11 @@ class AAsyncRaster(ASourceRaster):
     ----------------
     - Has a `queue_data`, a low level method that can be used to query several arrays at once.
     - Has an `iter_data`, a higher level wrapper of `queue_data`.
+    - Has an `aqueue_data`, an `aiter_data` and an `aget_data`, their counterparts for asyncio.
     """
 
     def queue_data(self, fps, channels=None, dst_nodata=None, interpolation='cv_area',
-                   max_queue_size=5, **kwargs):
+                   max_queue_size=5, ordered=True, **kwargs):
         """Read several rectangles of data on several channels from the source raster.
 
         Using `queue_data` instead of multiple calls to `get_data` allows more parallelism.
@@ -58,11 +61,18 @@ class AAsyncRaster(ASourceRaster):
             see `get_data` method
         max_queue_size: int
             Maximum number of arrays to prepare in advance in the underlying queue.
+        ordered: bool
+            If True: The arrays are produced in the same order as in the `fps` parameter.
+            If False: Each array is produced as soon as it is ready, as a tuple
+            `(index of its Footprint in fps, array)`. A slow array does not hold back the
+            others, and `max_queue_size` bounds the number of arrays being prepared or waiting
+            in the queue.
 
         Returns
         -------
-        queue: queue.Queue of ndarray
-            The arrays are put into the queue in the same order as in the `fps` parameter.
+        queue: queue.Queue of ndarray (or of (int, ndarray) if not `ordered`)
+            The arrays are put into the queue in the same order as in the `fps` parameter,
+            unless `ordered` is False.
 
         """
         for fp in fps:
@@ -75,12 +85,13 @@ class AAsyncRaster(ASourceRaster):
             parent_uid=None,
             key_in_parent=None,
             **_tools.parse_queue_data_parameters(
-                'queue_data', self, channels, dst_nodata, interpolation, max_queue_size, **kwargs
+                'queue_data', self, channels, dst_nodata, interpolation, max_queue_size, ordered,
+                **kwargs
             )
         )
 
     def iter_data(self, fps, channels=None, dst_nodata=None, interpolation='cv_area',
-                  max_queue_size=5, **kwargs):
+                  max_queue_size=5, ordered=True, **kwargs):
         """Read several rectangles of data on several channels from the source raster.
 
         The `iter_data` method is a higher level wrapper around the `queue_data` method. It
@@ -105,11 +116,18 @@ class AAsyncRaster(ASourceRaster):
             see `get_data` method
         max_queue_size: int
             Maximum number of arrays to prepare in advance in the underlying queue.
+        ordered: bool
+            If True: The arrays are produced in the same order as in the `fps` parameter.
+            If False: Each array is produced as soon as it is ready, as a tuple
+            `(index of its Footprint in fps, array)`. A slow array does not hold back the
+            others, and `max_queue_size` bounds the number of arrays being prepared or waiting
+            in the queue.
 
         Returns
         -------
-        iterable: iterable of ndarray
-            The arrays are yielded into the generator in the same order as in the `fps` parameter.
+        iterable: iterable of ndarray (or of (int, ndarray) if not `ordered`)
+            The arrays are yielded into the generator in the same order as in the `fps` parameter,
+            unless `ordered` is False.
 
         """
         for fp in fps:
@@ -121,10 +139,160 @@ class AAsyncRaster(ASourceRaster):
         return self._back.iter_data(
             fps=fps,
             **_tools.parse_queue_data_parameters(
-                'iter_data', self, channels, dst_nodata, interpolation, max_queue_size, **kwargs
+                'iter_data', self, channels, dst_nodata, interpolation, max_queue_size, ordered,
+                **kwargs
+            )
+        )
+
+    def aqueue_data(self, fps, channels=None, dst_nodata=None, interpolation='cv_area',
+                    max_queue_size=5, ordered=True, **kwargs):
+        """Read several rectangles of data on several channels from the source raster, from an
+        asyncio event loop.
+
+        Same as `queue_data`, but the returned queue has a coroutine `get` method. The scheduler
+        hands the arrays to the event loop with `call_soon_threadsafe`, no thread is blocked
+        while waiting for an array.
+
+        This method should be called from a coroutine running in the event loop, a RuntimeError
+        is raised otherwise. If you wish to cancel your request, loose the reference to the queue
+        and the scheduler will gracefully cancel the query.
+
+        see `queue_data` documentation, it shares most of the concepts
+
+        Parameters
+        ----------
+        fps: sequence of Footprint
+            The Footprints at which the raster should be sampled.
+        channels:
+            see `get_data` method
+        dst_nodata:
+            see `get_data` method
+        interpolation:
+            see `get_data` method
+        max_queue_size: int
+            Maximum number of arrays to prepare in advance in the underlying queue.
+        ordered: bool
+            If True: The arrays are produced in the same order as in the `fps` parameter.
+            If False: Each array is produced as soon as it is ready, as a tuple
+            `(index of its Footprint in fps, array)`. A slow array does not hold back the
+            others, and `max_queue_size` bounds the number of arrays being prepared or waiting
+            in the queue.
+
+        Returns
+        -------
+        queue: object with a `get` coroutine method, returning ndarray (or (int, ndarray))
+            The arrays are put into the queue in the same order as in the `fps` parameter,
+            unless `ordered` is False.
+
+        Example
+        -------
+        >>> q = r.aqueue_data(fps)
+        ... for _ in fps:
+        ...     arr = await q.get()
+
+        """
+        for fp in fps:
+            if not isinstance(fp, Footprint):
+                raise ValueError('element of `fps` parameter should be a Footprint (not {})'.format(
+                    fp
+                )) # pragma: no cover
+
+        return self._back.aqueue_data(
+            fps=fps,
+            parent_uid=None,
+            key_in_parent=None,
+            loop=_lazy_import_aio().get_running_loop('aqueue_data'),
+            **_tools.parse_queue_data_parameters(
+                'aqueue_data', self, channels, dst_nodata, interpolation, max_queue_size, ordered,
+                **kwargs
+            )
+        )
+
+    def aiter_data(self, fps, channels=None, dst_nodata=None, interpolation='cv_area',
+                   max_queue_size=5, ordered=True, **kwargs):
+        """Read several rectangles of data on several channels from the source raster, from an
+        asyncio event loop.
+
+        Same as `iter_data`, but returns an asynchronous generator. The query is sent to the
+        scheduler when the iteration starts.
+
+        If you wish to cancel your request, cancel the task, or close the generator, and the
+        scheduler will gracefully cancel the query.
+
+        see `iter_data` documentation, it shares most of the concepts
+
+        Parameters
+        ----------
+        fps: sequence of Footprint
+            The Footprints at which the raster should be sampled.
+        channels:
+            see `get_data` method
+        dst_nodata:
+            see `get_data` method
+        interpolation:
+            see `get_data` method
+        max_queue_size: int
+            Maximum number of arrays to prepare in advance in the underlying queue.
+        ordered: bool
+            If True: The arrays are produced in the same order as in the `fps` parameter.
+            If False: Each array is produced as soon as it is ready, as a tuple
+            `(index of its Footprint in fps, array)`. A slow array does not hold back the
+            others, and `max_queue_size` bounds the number of arrays being prepared or waiting
+            in the queue.
+
+        Returns
+        -------
+        iterable: asynchronous iterable of ndarray (or of (int, ndarray) if not `ordered`)
+            The arrays are yielded into the generator in the same order as in the `fps` parameter,
+            unless `ordered` is False.
+
+        Example
+        -------
+        >>> async for arr in r.aiter_data(fps):
+        ...     pass
+
+        """
+        for fp in fps:
+            if not isinstance(fp, Footprint):
+                raise ValueError('element of `fps` parameter should be a Footprint (not {})'.format(
+                    fp
+                )) # pragma: no cover
+
+        return _lazy_import_aio().aiter_data(
+            self._back,
+            fps=fps,
+            **_tools.parse_queue_data_parameters(
+                'aiter_data', self, channels, dst_nodata, interpolation, max_queue_size, ordered,
+                **kwargs
             )
         )
 
+    def aget_data(self, fp=None, channels=None, dst_nodata=None, interpolation='cv_area',
+                  **kwargs):
+        """Read a rectangle of data on several channels from the source raster, from an asyncio
+        event loop.
+
+        Same as `get_data`, but returns a coroutine. If you wish to cancel your request, cancel
+        the task and the scheduler will gracefully cancel the query.
+
+        see `get_data` documentation, it shares all of the concepts
+
+        Example
+        -------
+        >>> arr = await r.aget_data(fp)
+
+        """
+        if fp is None:
+            fp = self.fp
+        elif not isinstance(fp, Footprint): # pragma: no cover
+            raise ValueError('`fp` parameter should be a Footprint (not {})'.format(fp))
+        params = _tools.parse_queue_data_parameters(
+            'aget_data', self, channels, dst_nodata, interpolation, 1, **kwargs
+        )
+        del params['max_queue_size'], params['ordered']
+
+        return _lazy_import_aio().aget_data(self._back, fp=fp, **params)
+
 class ABackAsyncRaster(ABackSourceRaster):
     """Implementation of AAsyncRaster's specifications"""
 
@@ -142,12 +310,32 @@ class ABackAsyncRaster(ABackSourceRaster):
         super().__init__(**kwargs)
 
     def queue_data(self, fps, channel_ids, dst_nodata, interpolation, max_queue_size, is_flat,
-                   parent_uid, key_in_parent):
-        q = queue.Queue(max_queue_size)
+                   ordered, parent_uid, key_in_parent):
+        # The scheduler is woken up each time an array is pulled from the queue, and when the
+        # queue is collected.
+        q = _OutputQueue(max_queue_size, self.back_ds.wake_up_scheduler)
+        self._put_query(q, fps, channel_ids, dst_nodata, interpolation, max_queue_size, is_flat,
+                        ordered, parent_uid, key_in_parent)
+        return q
+
+    def aqueue_data(self, fps, channel_ids, dst_nodata, interpolation, max_queue_size, is_flat,
+                    ordered, parent_uid, key_in_parent, loop):
+        q = _lazy_import_aio().AsyncioOutputQueue(
+            max_queue_size, self.back_ds.wake_up_scheduler, loop,
+            self.back_ds.ensure_scheduler_still_alive, QUEUE_POLL_DISTANCE,
+        )
+        self._put_query(q, fps, channel_ids, dst_nodata, interpolation, max_queue_size, is_flat,
+                        ordered, parent_uid, key_in_parent)
+        return q
+
+    def _put_query(self, q, fps, channel_ids, dst_nodata, interpolation, max_queue_size, is_flat,
+                   ordered, parent_uid, key_in_parent):
+        wake_up_scheduler = self.back_ds.wake_up_scheduler
+        fps = self.back_ds.footprint_interner.intern_many(fps)
         self.back_ds.put_message(Msg(
             '/Raster{}/QueriesHandler'.format(self.uid),
             'new_query',
-            weakref.ref(q),
+            weakref.ref(q, lambda _: wake_up_scheduler()),
             max_queue_size,
             fps,
             channel_ids,
@@ -155,13 +343,14 @@ class ABackAsyncRaster(ABackSourceRaster):
             dst_nodata,
             interpolation,
             parent_uid,
-            key_in_parent
+            key_in_parent,
+            ordered,
         ))
-        return q
 
-    def iter_data(self, fps, channel_ids, dst_nodata, interpolation, max_queue_size, is_flat):
+    def iter_data(self, fps, channel_ids, dst_nodata, interpolation, max_queue_size, is_flat,
+                  ordered):
         q = self.queue_data(fps, channel_ids, dst_nodata, interpolation, max_queue_size, is_flat,
-                            None, None)
+                            ordered, None, None)
         def _iter_data_generator():
             i = 0
             while True:
@@ -183,6 +372,7 @@ class ABackAsyncRaster(ABackSourceRaster):
         it = self.iter_data(
             [fp], channel_ids, dst_nodata, interpolation, 1,
             False, # `is_flat` is not important since caller reshapes output
+            True,
         )
         return next(it)
 
@@ -202,3 +392,21 @@ class ABackAsyncRaster(ABackSourceRaster):
         # TODO: just sending a kill_raster message may not be enough. Need synchro?
         self.back_ds.deactivate_many(self.async_dict_path_of_cache_fp.values())
         super().close()
+
+class _OutputQueue(queue.Queue):
+    """Output queue of a query, it notifies the scheduler when an array is pulled"""
+
+    def __init__(self, maxsize, on_get):
+        self._on_get = on_get
+        super().__init__(maxsize)
+
+    def get(self, block=True, timeout=None):
+        obj = super().get(block, timeout)
+        self._on_get()
+        return obj
+
+def _lazy_import_aio():
+    global _aio
+    if _aio is None:
+        from buzzard import _a_async_raster_asyncio as _aio
+    return _aio
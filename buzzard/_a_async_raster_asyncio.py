@@ -0,0 +1,86 @@
+"""asyncio side of the AAsyncRaster's queries. Lazily imported because it requires python>=3.6"""
+
+import asyncio
+import collections
+import threading
+
+def get_running_loop(method_name):
+    """The event loop running the caller, a clear error if there is none"""
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        raise RuntimeError(
+            '`{}` should be called from a coroutine running in an asyncio event loop'.format(
+                method_name
+            )
+        ) from None
+
+class AsyncioOutputQueue(object):
+    """Output queue of a query, consumed from an asyncio event loop.
+
+    The scheduler puts the arrays from its own thread with `put_nowait` and reads the queue size
+    with `qsize`, like with a `queue.Queue`. Each `put_nowait` wakes the consumer up through
+    `loop.call_soon_threadsafe`, no thread is ever blocked waiting for an array.
+    """
+
+    def __init__(self, maxsize, on_get, loop, ensure_scheduler_still_alive, poll_distance):
+        self.maxsize = maxsize
+        self._on_get = on_get
+        self._loop = loop
+        self._ensure_scheduler_still_alive = ensure_scheduler_still_alive
+        self._poll_distance = poll_distance
+        self._lock = threading.Lock()
+        self._arrays = collections.deque()
+        self._waiter = None
+
+    def qsize(self):
+        with self._lock:
+            return len(self._arrays)
+
+    def put_nowait(self, array):
+        """Called from the scheduler's thread"""
+        with self._lock:
+            self._arrays.append(array)
+        self._loop.call_soon_threadsafe(self._wake_up)
+
+    async def get(self):
+        """Wait for the next array. While waiting, the scheduler is periodically probed to reraise
+        an exception if it crashed.
+        """
+        while True:
+            with self._lock:
+                if self._arrays:
+                    array = self._arrays.popleft()
+                    break
+            # `put_nowait` schedules `_wake_up` on the loop, it can't run before the waiter is set
+            self._waiter = self._loop.create_future()
+            try:
+                done, _ = await asyncio.wait([self._waiter], timeout=self._poll_distance)
+            finally:
+                self._waiter = None
+            if not done:
+                self._ensure_scheduler_still_alive()
+        self._on_get()
+        return array
+
+    def _wake_up(self):
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+async def aiter_data(back_raster, fps, channel_ids, dst_nodata, interpolation, max_queue_size,
+                     is_flat, ordered):
+    # The query is only sent when the iteration starts. The queue is dropped when the
+    # generator is closed or when the task is cancelled, and the scheduler then cancels the query
+    q = back_raster.aqueue_data(
+        fps, channel_ids, dst_nodata, interpolation, max_queue_size, is_flat, ordered,
+        None, None, asyncio.get_running_loop(),
+    )
+    for _ in range(len(fps)):
+        yield await q.get()
+
+async def aget_data(back_raster, fp, channel_ids, dst_nodata, interpolation, is_flat):
+    q = back_raster.aqueue_data(
+        [fp], channel_ids, dst_nodata, interpolation, 1, is_flat, True,
+        None, None, asyncio.get_running_loop(),
+    )
+    return await q.get()
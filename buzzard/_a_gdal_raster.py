@@ -41,21 +41,75 @@ class ABackGDALRaster(ABackStoredRaster):
         assert rtly >= 0 and rtly < self.fp.rsizey, '{} >= 0 and {} < {}'.format(rtly, rtly, self.fp.rsizey)
 
         dstarray = np.empty(np.r_[fp.shape, len(channel_ids)], self.dtype)
-        for i, channel_id in enumerate(channel_ids):
-            gdal_band = gdal_ds.GetRasterBand(channel_id + 1)
-            success, payload = GDALErrorCatcher(gdal_band.ReadAsArray, none_is_error=True)(
-                int(rtlx),
-                int(rtly),
-                int(fp.rsizex),
-                int(fp.rsizey),
-                buf_obj=dstarray[..., i],
-            )
-            if not success: # pragma: no cover
-                raise ValueError('Could not read array (gdal error: `{}`)'.format(
-                    payload[1]
-                ))
+        self.read_bands_driver(gdal_ds, int(rtlx), int(rtly), channel_ids, dstarray)
         return dstarray
 
+    @staticmethod
+    def read_bands_driver(gdal_ds, x, y, channel_ids, dst):
+        """Read several bands of `gdal_ds` in a single call, starting at pixel (x, y), to the
+        (Y, X, C) array `dst`.
+
+        A C-contiguous `dst` is pixel interleaved, GDAL writes to it directly. Otherwise GDAL
+        reads to a pixel interleaved buffer that is then copied to `dst`.
+        """
+        ysize, xsize, count = dst.shape
+        itemsize = dst.dtype.itemsize
+        kwargs = dict(
+            buf_xsize=xsize,
+            buf_ysize=ysize,
+            buf_type=conv.gdt_of_any_equiv(dst.dtype),
+            band_list=[int(channel_id) + 1 for channel_id in channel_ids],
+            buf_pixel_space=itemsize * count,
+            buf_line_space=itemsize * count * xsize,
+            buf_band_space=itemsize,
+        )
+        if dst.flags.c_contiguous:
+            try:
+                success, payload = GDALErrorCatcher(gdal_ds.ReadRaster, none_is_error=True)(
+                    x, y, xsize, ysize, buf_obj=dst, **kwargs
+                )
+            except TypeError: # pragma: no cover
+                # `buf_obj` is not supported by older gdal bindings
+                pass
+            else:
+                if not success: # pragma: no cover
+                    raise ValueError('Could not read array (gdal error: `{}`)'.format(
+                        payload[1]
+                    ))
+                return
+
+        success, payload = GDALErrorCatcher(gdal_ds.ReadRaster, none_is_error=True)(
+            x, y, xsize, ysize, **kwargs
+        )
+        if not success: # pragma: no cover
+            raise ValueError('Could not read array (gdal error: `{}`)'.format(
+                payload[1]
+            ))
+        dst[...] = np.frombuffer(payload, dst.dtype).reshape(dst.shape)
+
+    @staticmethod
+    def write_bands_driver(gdal_ds, x, y, channel_ids, array):
+        """Write the (Y, X, C) array `array` to several bands of `gdal_ds` in a single call,
+        starting at pixel (x, y).
+        """
+        array = np.ascontiguousarray(array)
+        ysize, xsize, count = array.shape
+        itemsize = array.dtype.itemsize
+        success, payload = GDALErrorCatcher(gdal_ds.WriteRaster, nonzero_int_is_error=True)(
+            x, y, xsize, ysize, array,
+            buf_xsize=xsize,
+            buf_ysize=ysize,
+            buf_type=conv.gdt_of_any_equiv(array.dtype),
+            band_list=[int(channel_id) + 1 for channel_id in channel_ids],
+            buf_pixel_space=itemsize * count,
+            buf_line_space=itemsize * count * xsize,
+            buf_band_space=itemsize,
+        )
+        if not success: # pragma: no cover
+            raise ValueError('Could not write array (gdal error: `{}`)'.format(
+                payload[1]
+            ))
+
     # set_data implementation ******************************************************************* **
     def set_data(self, array, fp, channel_ids, interpolation, mask):
         if not fp.share_area(self.fp):
@@ -88,20 +142,17 @@ class ABackGDALRaster(ABackStoredRaster):
         # Write ****************************************************************
         # TODO: Close all but 1 driver? Or let user do this
         with self.acquire_driver_object() as gdal_ds:
-            for i, channel_id in enumerate(channel_ids):
-                leftx, topy = self.fp.spatial_to_raster(fp.tl)
-                gdalband = gdal_ds.GetRasterBand(channel_id + 1)
-
-                for sl in _tools.slices_of_matrix(mask):
-                    a = array[:, :, i][sl]
-                    assert a.ndim == 2
-                    x = int(sl[1].start + leftx)
-                    y = int(sl[0].start + topy)
-                    assert x >= 0
-                    assert y >= 0
-                    assert x + a.shape[1] <= self.fp.rsizex
-                    assert y + a.shape[0] <= self.fp.rsizey
-                    gdalband.WriteArray(a, x, y)
+            leftx, topy = self.fp.spatial_to_raster(fp.tl)
+            for sl in _tools.slices_of_matrix(mask):
+                a = array[sl]
+                assert a.ndim == 3
+                x = int(sl[1].start + leftx)
+                y = int(sl[0].start + topy)
+                assert x >= 0
+                assert y >= 0
+                assert x + a.shape[1] <= self.fp.rsizex
+                assert y + a.shape[0] <= self.fp.rsizey
+                self.write_bands_driver(gdal_ds, x, y, channel_ids, a)
 
     # fill implementation *********************************************************************** **
     def fill(self, value, channel_ids):
@@ -84,7 +84,7 @@ class ABackSourceRasterRemapMixin(object):
         arr_mode = array is not None, mask is not None
         fp_mode = (
             src_fp.same_grid(dst_fp),
-            src_fp.poly.contains(dst_fp.poly),
+            src_fp.contains(dst_fp),
         )
 
         # Check array / mask ***************************************************
@@ -17,6 +17,9 @@ class ActorCacheExtractor(object):
         self._reads_waiting_for_cache_fp = (
             collections.defaultdict(lambda: collections.defaultdict(set))
         ) # type: Mapping[Footprint, Mapping[CachedQueryInfos, Set[int]]]
+        self._precomputes_waiting_for_cache_fp = (
+            collections.defaultdict(lambda: collections.defaultdict(set))
+        ) # type: Mapping[Footprint, Mapping[CachedQueryInfos, Set[int]]]
         self.address = '/Raster{}/CacheExtractor'.format(self._raster.uid)
 
     @property
@@ -44,6 +47,27 @@ class ActorCacheExtractor(object):
 
         return msgs
 
+    def receive_notify_those_cache_files_ready(self, qi):
+        """Receive message: A precomputation started, notify the QueriesHandler when each of its
+        cache tiles is ready.
+
+        Parameters
+        ----------
+        qi: _actors.cached.query_infos.QueryInfos
+        """
+        msgs = []
+
+        for prod_idx, cache_fp in enumerate(qi.list_of_cache_fp):
+            assert qi.prod[prod_idx].cache_fps == {cache_fp}
+            if cache_fp in self._path_of_cache_files_ready:
+                msgs += [Msg(
+                    'QueriesHandler', 'precomputed_this_cache_file', qi, prod_idx,
+                )]
+            else:
+                self._precomputes_waiting_for_cache_fp[cache_fp][qi].add(prod_idx)
+
+        return msgs
+
     def receive_cache_files_ready(self, path_of_cache_files_ready):
         """Receive message: A cache file is ready, you might already know it.
 
@@ -65,9 +89,26 @@ class ActorCacheExtractor(object):
                     )]
             del self._reads_waiting_for_cache_fp[cache_fp]
 
+            for qi, prod_idxs in self._precomputes_waiting_for_cache_fp.pop(cache_fp, {}).items():
+                for prod_idx in prod_idxs:
+                    msgs += [Msg(
+                        'QueriesHandler', 'precomputed_this_cache_file', qi, prod_idx,
+                    )]
 
         return msgs
 
+    def receive_cache_files_evicted(self, cache_fps):
+        """Receive message: Those cache files were removed to respect the cache budget, they will be
+        computed again if needed
+
+        Parameters
+        ----------
+        cache_fps: sequence of Footprint
+        """
+        for cache_fp in cache_fps:
+            del self._path_of_cache_files_ready[cache_fp]
+        return []
+
     def receive_sampled_a_cache_file_to_the_array(self, qi, prod_idx, cache_fp, array):
         """Receive message: A cache file was read for that output array"""
         return [Msg(
@@ -87,6 +128,11 @@ class ActorCacheExtractor(object):
                 del self._reads_waiting_for_cache_fp[cache_fp][qi]
                 if len(self._reads_waiting_for_cache_fp[cache_fp]) == 0:
                     del self._reads_waiting_for_cache_fp[cache_fp]
+        for cache_fp in self._precomputes_waiting_for_cache_fp.keys() & qi.list_of_cache_fp:
+            if qi in self._precomputes_waiting_for_cache_fp[cache_fp]:
+                del self._precomputes_waiting_for_cache_fp[cache_fp][qi]
+                if len(self._precomputes_waiting_for_cache_fp[cache_fp]) == 0:
+                    del self._precomputes_waiting_for_cache_fp[cache_fp]
         return []
 
     def receive_die(self):
@@ -94,6 +140,7 @@ class ActorCacheExtractor(object):
         assert self._alive
         self._alive = False
         self._reads_waiting_for_cache_fp.clear()
+        self._precomputes_waiting_for_cache_fp.clear()
         self._raster = None
         return []
 
@@ -3,12 +3,22 @@ import collections
 import itertools
 import logging
 import os
+import time
 
 from buzzard._actors.message import Msg
 from buzzard._actors.cached.query_infos import CacheComputationInfos
+from buzzard._cache_checksum import CacheManifest
+from buzzard._cache_lock import CacheTileLocks
 
 LOGGER = logging.getLogger(__name__)
 
+# Seconds between two checks of the cache tiles locked by other processes
+LOCK_POLL_INTERVAL = 1 / 2
+
+# Minimum seconds between two scans of the cache directory looking for the files written by other
+# processes
+DIRECTORY_SCAN_INTERVAL = 5
+
 class ActorCacheSupervisor(object):
     """Actor that takes care of tracking, checking and scheduling computation of cache files"""
 
@@ -28,6 +38,40 @@ class ActorCacheSupervisor(object):
         self.address = '/Raster{}/CacheSupervisor'.format(self._raster.uid)
         self._directory_primed = False
 
+        # Files found in the cache directory for each cache tile, keyed by tile indices. Scanning
+        # the directory once is much cheaper than once per cache tile.
+        self._path_candidates_per_indices = {} # type: Mapping[Tuple[int, int], List[str]]
+
+        # With `trust_mtime_size`, the cache files verified in a previous session that did not
+        # change since are not checked again
+        if raster.trust_mtime_size:
+            self._manifest = CacheManifest(raster.cache_dir, raster.checksum)
+        else:
+            self._manifest = None
+
+        # With `lock_cache_files`, a cache tile is only computed after its lock file was locked.
+        # The tiles locked by other processes are polled until their lock is released.
+        if raster.lock_cache_files:
+            self._locks = CacheTileLocks(raster.cache_dir)
+        else:
+            self._locks = None
+        self._foreign_cache_fps = set()
+        self._last_poll_time = 0.
+        self._last_scan_time = 0.
+        self._claiming_queries_per_cache_fp = collections.defaultdict(set) # type: Mapping[CacheFootprint, Set[CachedQueryInfos]]
+
+        # The locked cache tiles that are not needed by the queries anymore, but whose computations
+        # may be ongoing. They stay locked and `absent` until they are written or abandoned.
+        self._dropped_cache_fps = set() # type: Set[CacheFootprint]
+
+        # With `max_cache_bytes`, the cache files read the least recently are removed when the
+        # budget is exceeded. The cache tiles of the arrays not yet made for the queries are pinned.
+        self._max_cache_bytes = raster.max_cache_bytes
+        self._nbytes_of_cache_fp = collections.OrderedDict() # type: Mapping[CacheFootprint, int]
+        self._cache_nbytes = 0
+        self._pin_count_of_cache_fp = collections.Counter() # type: Mapping[CacheFootprint, int]
+        self._pinning_prod_idxs_per_query = {} # type: Mapping[CachedQueryInfos, Set[int]]
+
         # Should contain the path to all files that will be opened using the Dataset's activation
         # pool. It means all cache files in those status:
         # - _CacheTileStatus.checking
@@ -52,6 +96,8 @@ class ActorCacheSupervisor(object):
         if not self._directory_primed:
             self._directory_primed = True
             os.makedirs(self._raster.cache_dir, exist_ok=True)
+            if self._manifest is not None:
+                self._manifest.load()
             if self._raster.overwrite:
                 file_list = self._raster.list_cache_path_candidates()
                 LOGGER.info('Removing {} cache files'.format(
@@ -59,6 +105,24 @@ class ActorCacheSupervisor(object):
                 ))
                 for path in file_list:
                     os.remove(path)
+                if self._manifest is not None:
+                    self._manifest.clear()
+            else:
+                self._path_candidates_per_indices = self._raster.index_cache_path_candidates()
+                self._last_scan_time = time.monotonic()
+            if self._max_cache_bytes is not None:
+                self._account_existing_files()
+
+        elif (self._locks is not None and
+              time.monotonic() - self._last_scan_time >= DIRECTORY_SCAN_INTERVAL and
+              any(
+                  self._cache_fps_status[cache_fp] == _CacheTileStatus.unknown
+                  for cache_fp in qi.list_of_cache_fp
+              )):
+            # Other processes may have written cache files since the last scan. Between two scans,
+            # the files of a tile missing from the index are looked for after locking it.
+            self._path_candidates_per_indices = self._raster.index_cache_path_candidates()
+            self._last_scan_time = time.monotonic()
 
         msgs = []
         cache_fps = qi.list_of_cache_fp
@@ -67,6 +131,11 @@ class ActorCacheSupervisor(object):
         self._queries[qi] = query
 
         for cache_fp in cache_fps:
+            if self._cache_fps_status[cache_fp] == _CacheTileStatus.unknown:
+                indices = self._raster.indices_of_cache_fp[cache_fp]
+                path_candidates = self._path_candidates_per_indices.get(indices, [])
+                msgs += self._infer_status_from_paths(cache_fp, path_candidates)
+
             status = self._cache_fps_status[cache_fp]
 
             if status == _CacheTileStatus.ready:
@@ -77,26 +146,12 @@ class ActorCacheSupervisor(object):
 
             elif status == _CacheTileStatus.absent:
                 query.cache_fps_to_compute.add(cache_fp)
+                if self._locks is not None:
+                    self._claim(qi, cache_fp)
+
+            elif status == _CacheTileStatus.foreign:
+                query.cache_fps_foreign.add(cache_fp)
 
-            elif status == _CacheTileStatus.unknown:
-                path_candidates = self._raster.list_cache_path_candidates(cache_fp)
-                if len(path_candidates) == 1:
-                    self._cache_fps_status[cache_fp] = _CacheTileStatus.checking
-                    self._path_of_cache_fp[cache_fp] = path_candidates[0]
-                    self._raster.debug_mngr.event('cache_file_update', self._raster.facade_proxy, cache_fp, 'unknown')
-                    query.cache_fps_checking.add(cache_fp)
-                    msgs += [
-                        Msg('FileChecker', 'infer_cache_file_status', cache_fp, path_candidates[0])
-                    ]
-                else:
-                    self._cache_fps_status[cache_fp] = _CacheTileStatus.absent
-                    self._raster.debug_mngr.event('cache_file_update', self._raster.facade_proxy, cache_fp, 'absent')
-                    for path in path_candidates: # pragma: no cover
-                        LOGGER.warning(
-                            'Removing {} because {} tiles with the same prefix'.format(path, len(path_candidates))
-                        )
-                        os.remove(path)
-                    query.cache_fps_to_compute.add(cache_fp)
             else: # pragma: no cover
                 assert False
 
@@ -108,14 +163,13 @@ class ActorCacheSupervisor(object):
                     for fp in query.cache_fps_ensured
                 })
             ]
-        if len(query.cache_fps_checking) == 0:
-            # CacheSupervisor is now done working on this query
-            del self._queries[qi]
+        msgs += self._update_query(qi, query)
 
-            if len(query.cache_fps_to_compute) > 0:
-                # Some tiles need to be computed and none need to be checked, launching collection right
-                # now
-                msgs += self._query_start_collection(qi, query)
+        if self._max_cache_bytes is not None:
+            if not qi.precompute:
+                # A precomputation does not read its cache tiles
+                self._pin_query(qi)
+            msgs += self._evict()
 
         return msgs
 
@@ -142,36 +196,22 @@ class ActorCacheSupervisor(object):
             self._path_of_cache_fp[cache_fp] = path
             self._cache_fps_status[cache_fp] = _CacheTileStatus.ready
             self._raster.debug_mngr.event('cache_file_update', self._raster.facade_proxy, cache_fp, 'ready')
+            if self._manifest is not None:
+                self._manifest.trust(path)
             msgs += [
                 Msg('CacheExtractor', 'cache_files_ready', {cache_fp: path})
             ]
         else:
             # This cache tile was corrupted and removed
-            self._cache_fps_status[cache_fp] = _CacheTileStatus.absent
+            self._path_candidates_per_indices.pop(self._raster.indices_of_cache_fp[cache_fp], None)
+            if self._manifest is not None:
+                self._manifest.forget(path)
             del self._path_of_cache_fp[cache_fp]
-            self._raster.debug_mngr.event('cache_file_update', self._raster.facade_proxy, cache_fp, 'absent')
-
-        queries_treated = []
-        for qi, query in self._queries.items():
-            if cache_fp in query.cache_fps_checking:
-                query.cache_fps_checking.remove(cache_fp)
-                if status:
-                    query.cache_fps_ensured.add(cache_fp)
-                else:
-                    query.cache_fps_to_compute.add(cache_fp)
-
-                if len(query.cache_fps_checking) == 0:
-                    # CacheSupervisor is now done working on this query
-                    queries_treated.append(qi)
-
-                    if len(query.cache_fps_to_compute) > 0:
-                        # Some tiles need to be computed and none need to be checked, launching collection right
-                        # now
-                        msgs += self._query_start_collection(qi, query)
-
-        for qi in queries_treated:
-            del self._queries[qi]
+            self._forget_nbytes(cache_fp)
+            self._cache_fps_status[cache_fp] = _CacheTileStatus.unknown
+            msgs += self._infer_status_from_paths(cache_fp, [])
 
+        msgs += self._update_queries_waiting_for(cache_fp)
         return msgs
 
     def receive_cache_file_written(self, cache_fp, path):
@@ -183,16 +223,63 @@ class ActorCacheSupervisor(object):
         path: str
         """
         msgs = []
+
+        # With `lock_cache_files`, the lock of a cache tile is only released once it can't be
+        # written anymore, see `receive_cache_tiles_abandoned`
         assert self._cache_fps_status[cache_fp] == _CacheTileStatus.absent
 
+        self._path_candidates_per_indices[self._raster.indices_of_cache_fp[cache_fp]] = [path]
+        if self._manifest is not None:
+            self._manifest.trust(path)
         self._path_of_cache_fp[cache_fp] = path
         self._cache_fps_status[cache_fp] = _CacheTileStatus.ready
         self._raster.debug_mngr.event('cache_file_update', self._raster.facade_proxy, cache_fp, 'ready')
+        if self._locks is not None:
+            # The cache file is in place, the other processes can read it
+            self._claiming_queries_per_cache_fp.pop(cache_fp, None)
+            self._dropped_cache_fps.discard(cache_fp)
+            self._locks.release(self._raster.fname_prefix_of_cache_fp(cache_fp))
         msgs += [
             Msg('CacheExtractor', 'cache_files_ready', {cache_fp: path})
         ]
+        if self._max_cache_bytes is not None:
+            self._forget_nbytes(cache_fp)
+            self._nbytes_of_cache_fp[cache_fp] = os.path.getsize(path)
+            self._cache_nbytes += self._nbytes_of_cache_fp[cache_fp]
+            msgs += self._evict()
         return msgs
 
+    def receive_cache_files_read(self, cache_fps):
+        """Receive message: Those cache files were read (or taken from the tile cache) to make an
+        array
+
+        Parameters
+        ----------
+        cache_fps: set of Footprint
+        """
+        for cache_fp in cache_fps:
+            if cache_fp in self._nbytes_of_cache_fp:
+                self._nbytes_of_cache_fp.move_to_end(cache_fp)
+        return []
+
+    def receive_array_made(self, qi, prod_idx):
+        """Receive message: An array of a query was made, its cache tiles are not needed for it
+        anymore
+
+        Parameters
+        ----------
+        qi: _actors.cached.query_infos.QueryInfos
+        prod_idx: int
+        """
+        prod_idxs = self._pinning_prod_idxs_per_query.get(qi)
+        if prod_idxs is None or prod_idx not in prod_idxs:
+            return []
+        prod_idxs.remove(prod_idx)
+        if len(prod_idxs) == 0:
+            del self._pinning_prod_idxs_per_query[qi]
+        self._unpin(qi.prod[prod_idx].cache_fps)
+        return self._evict()
+
     def receive_cancel_this_query(self, qi):
         """Receive message: One query was dropped
 
@@ -200,22 +287,310 @@ class ActorCacheSupervisor(object):
         ----------
         qi: _actors.cached.query_infos.QueryInfos
         """
-        if qi in self._queries:
-            del self._queries[qi]
+        msgs = []
+        query = self._queries.pop(qi, None)
+
+        if self._locks is not None:
+            # The cache tiles that are not needed by this process anymore keep their lock until
+            # the Computer, that already unscheduled the computations of this query, tells which
+            # ones won't be written
+            cache_fps = set()
+            if query is not None:
+                cache_fps |= query.cache_fps_to_compute
+            if qi.cache_computation is not None:
+                cache_fps |= set(qi.cache_computation.list_of_cache_fp)
+            dropped_cache_fps = []
+            for cache_fp in cache_fps:
+                claiming_queries = self._claiming_queries_per_cache_fp.get(cache_fp)
+                if claiming_queries is None:
+                    # Already written
+                    continue
+                claiming_queries.discard(qi)
+                if len(claiming_queries) == 0:
+                    del self._claiming_queries_per_cache_fp[cache_fp]
+                    self._dropped_cache_fps.add(cache_fp)
+                    dropped_cache_fps.append(cache_fp)
+            if dropped_cache_fps:
+                msgs += [Msg('Computer', 'cache_tiles_dropped', dropped_cache_fps)]
+
+        for prod_idx in self._pinning_prod_idxs_per_query.pop(qi, ()):
+            self._unpin(qi.prod[prod_idx].cache_fps)
+        msgs += self._evict()
+        return msgs
+
+    def receive_cache_tiles_abandoned(self, cache_fps):
+        """Receive message: Those dropped cache tiles won't be written, some of their computations
+        were never launched
+
+        Parameters
+        ----------
+        cache_fps: sequence of Footprint
+        """
+        for cache_fp in cache_fps:
+            if cache_fp not in self._dropped_cache_fps:
+                # Claimed again by a query
+                continue
+            # Another process may compute it, it will be looked for again by the next query
+            self._dropped_cache_fps.remove(cache_fp)
+            self._locks.release(self._raster.fname_prefix_of_cache_fp(cache_fp))
+            self._cache_fps_status[cache_fp] = _CacheTileStatus.unknown
+            self._path_candidates_per_indices.pop(
+                self._raster.indices_of_cache_fp[cache_fp], None
+            )
         return []
 
+    def ext_receive_nothing(self):
+        """Receive message sent by something else than an actor, still treated synchronously: What's
+        up?
+        Were the cache tiles locked by other processes released?
+        """
+        msgs = []
+        if self._locks is None or not self._foreign_cache_fps:
+            return msgs
+        now = time.monotonic()
+        if now - self._last_poll_time < LOCK_POLL_INTERVAL:
+            return msgs
+        self._last_poll_time = now
+
+        for cache_fp in list(self._foreign_cache_fps):
+            if self._locks.is_locked(self._raster.fname_prefix_of_cache_fp(cache_fp)):
+                continue
+            self._foreign_cache_fps.remove(cache_fp)
+            self._cache_fps_status[cache_fp] = _CacheTileStatus.unknown
+            if not any(cache_fp in query.cache_fps_foreign for query in self._queries.values()):
+                # Not needed anymore, it will be looked for again by the next query
+                continue
+            msgs += self._infer_status_from_paths(
+                cache_fp, self._raster.cache_path_candidates_of_cache_fp(cache_fp),
+            )
+            if self._cache_fps_status[cache_fp] == _CacheTileStatus.ready:
+                msgs += [
+                    Msg('CacheExtractor', 'cache_files_ready', {
+                        cache_fp: self._path_of_cache_fp[cache_fp]
+                    })
+                ]
+            msgs += self._update_queries_waiting_for(cache_fp)
+
+        return msgs
+
     def receive_die(self):
         """Receive message: The raster was killed"""
         assert self._alive
         self._alive = False
 
+        if self._manifest is not None:
+            self._manifest.close()
+            self._manifest = None
+        if self._locks is not None:
+            self._locks.release_all()
+            self._locks = None
         self._queries.clear()
+        self._foreign_cache_fps.clear()
+        self._claiming_queries_per_cache_fp.clear()
+        self._dropped_cache_fps.clear()
+        self._nbytes_of_cache_fp.clear()
+        self._pin_count_of_cache_fp.clear()
+        self._pinning_prod_idxs_per_query.clear()
+        self._path_candidates_per_indices.clear()
         self._path_of_cache_fp = None
         self._cache_fps_status.clear()
         self._raster = None
         return []
 
     # ******************************************************************************************* **
+    def _is_trusted(self, path):
+        return self._manifest is not None and self._manifest.is_trusted(path)
+
+    def _infer_status_from_paths(self, cache_fp, path_candidates):
+        """Leave the `unknown` status of a cache tile using the files found for it. The caller
+        notifies the CacheExtractor if the tile is ready."""
+        assert self._cache_fps_status[cache_fp] == _CacheTileStatus.unknown
+        msgs = []
+
+        if len(path_candidates) == 1 and self._is_trusted(path_candidates[0]):
+            self._cache_fps_status[cache_fp] = _CacheTileStatus.ready
+            self._path_of_cache_fp[cache_fp] = path_candidates[0]
+            self._raster.debug_mngr.event('cache_file_update', self._raster.facade_proxy, cache_fp, 'ready')
+        elif len(path_candidates) == 1:
+            self._cache_fps_status[cache_fp] = _CacheTileStatus.checking
+            self._path_of_cache_fp[cache_fp] = path_candidates[0]
+            self._raster.debug_mngr.event('cache_file_update', self._raster.facade_proxy, cache_fp, 'unknown')
+            msgs += [
+                Msg('FileChecker', 'infer_cache_file_status', cache_fp, path_candidates[0])
+            ]
+        else:
+            for path in path_candidates: # pragma: no cover
+                LOGGER.warning(
+                    'Removing {} because {} tiles with the same prefix'.format(path, len(path_candidates))
+                )
+                os.remove(path)
+                if self._manifest is not None:
+                    self._manifest.forget(path)
+            self._path_candidates_per_indices.pop(self._raster.indices_of_cache_fp[cache_fp], None)
+            self._forget_nbytes(cache_fp)
+
+            if self._locks is not None:
+                prefix = self._raster.fname_prefix_of_cache_fp(cache_fp)
+                if not self._locks.try_acquire(prefix):
+                    # Another process is computing this cache tile
+                    self._cache_fps_status[cache_fp] = _CacheTileStatus.foreign
+                    self._foreign_cache_fps.add(cache_fp)
+                    self._raster.debug_mngr.event('cache_file_update', self._raster.facade_proxy, cache_fp, 'locked')
+                    return msgs
+                path_candidates = self._raster.cache_path_candidates_of_cache_fp(cache_fp)
+                if path_candidates:
+                    # Another process wrote it between the scan and the lock
+                    self._locks.release(prefix)
+                    return self._infer_status_from_paths(cache_fp, path_candidates)
+
+            self._cache_fps_status[cache_fp] = _CacheTileStatus.absent
+            self._raster.debug_mngr.event('cache_file_update', self._raster.facade_proxy, cache_fp, 'absent')
+
+        return msgs
+
+    def _update_queries_waiting_for(self, cache_fp):
+        """The status of a cache tile that was `checking` or `foreign` changed"""
+        msgs = []
+        status = self._cache_fps_status[cache_fp]
+        orphan = False
+
+        for qi, query in list(self._queries.items()):
+            if cache_fp in query.cache_fps_checking:
+                query.cache_fps_checking.remove(cache_fp)
+            elif cache_fp in query.cache_fps_foreign:
+                query.cache_fps_foreign.remove(cache_fp)
+            else:
+                continue
+
+            if status == _CacheTileStatus.ready:
+                query.cache_fps_ensured.add(cache_fp)
+            elif status == _CacheTileStatus.checking:
+                query.cache_fps_checking.add(cache_fp)
+            elif status == _CacheTileStatus.foreign:
+                query.cache_fps_foreign.add(cache_fp)
+            elif status == _CacheTileStatus.absent:
+                if qi.cache_computation is None:
+                    query.cache_fps_to_compute.add(cache_fp)
+                    if self._locks is not None:
+                        self._claim(qi, cache_fp)
+                else:
+                    orphan = True
+            else: # pragma: no cover
+                assert False
+
+            msgs += self._update_query(qi, query)
+
+        if orphan:
+            msgs += self._compute_orphan(cache_fp)
+        return msgs
+
+    def _update_query(self, qi, query):
+        """Start the collection of a query once all its cache tiles were checked, forget the query
+        once it does not wait for any cache tile"""
+        msgs = []
+        if len(query.cache_fps_checking) == 0:
+            if len(query.cache_fps_to_compute) > 0 and qi.cache_computation is None:
+                # Some tiles need to be computed and none need to be checked, launching collection
+                # right now
+                msgs += self._query_start_collection(qi, query)
+            if len(query.cache_fps_foreign) == 0:
+                # CacheSupervisor is now done working on this query
+                del self._queries[qi]
+        return msgs
+
+    def _compute_orphan(self, cache_fp):
+        """Compute a cache tile that was expected from another process, for the queries that
+        already started their collection. It happens when another process released a lock without
+        writing the cache file, or wrote a corrupted file.
+
+        The cache tile is precomputed by a new query, without output queue.
+        """
+        LOGGER.info('Computing {} that was abandoned by another process'.format(
+            self._raster.fname_prefix_of_cache_fp(cache_fp)
+        ))
+        return [Msg('QueriesHandler', 'precompute_those_cache_files', [cache_fp])]
+
+    def _claim(self, qi, cache_fp):
+        """A query computes this locked cache tile"""
+        self._claiming_queries_per_cache_fp[cache_fp].add(qi)
+        self._dropped_cache_fps.discard(cache_fp)
+
+    def _account_existing_files(self):
+        """Count the cache files found in the cache directory in the budget, the most recently
+        modified being considered the most recently read"""
+        nbytes_mtime_per_cache_fp = {}
+        for indices, paths in self._path_candidates_per_indices.items():
+            stats = [os.stat(path) for path in paths]
+            nbytes_mtime_per_cache_fp[self._raster.cache_fps[indices]] = (
+                sum(stat.st_size for stat in stats),
+                max(stat.st_mtime for stat in stats),
+            )
+        for cache_fp, (nbytes, _) in sorted(
+                nbytes_mtime_per_cache_fp.items(), key=lambda item: item[1][1]
+        ):
+            self._nbytes_of_cache_fp[cache_fp] = nbytes
+            self._cache_nbytes += nbytes
+
+    def _forget_nbytes(self, cache_fp):
+        self._cache_nbytes -= self._nbytes_of_cache_fp.pop(cache_fp, 0)
+
+    def _pin_query(self, qi):
+        prod_idxs = set()
+        for cache_fp, cache_fp_prod_idxs in qi.dict_of_prod_idxs_per_cache_fp.items():
+            prod_idxs |= cache_fp_prod_idxs
+            self._pin_count_of_cache_fp[cache_fp] += len(cache_fp_prod_idxs)
+        if prod_idxs:
+            self._pinning_prod_idxs_per_query[qi] = prod_idxs
+
+    def _unpin(self, cache_fps):
+        for cache_fp in cache_fps:
+            self._pin_count_of_cache_fp[cache_fp] -= 1
+            if self._pin_count_of_cache_fp[cache_fp] == 0:
+                del self._pin_count_of_cache_fp[cache_fp]
+
+    def _evict(self):
+        """Remove the cache files read the least recently until the budget is respected"""
+        msgs = []
+        if self._max_cache_bytes is None or self._cache_nbytes <= self._max_cache_bytes:
+            return msgs
+
+        evicted_cache_fps = []
+        for cache_fp in list(self._nbytes_of_cache_fp.keys()):
+            if self._cache_nbytes <= self._max_cache_bytes:
+                break
+            if cache_fp in self._pin_count_of_cache_fp:
+                continue
+            status = self._cache_fps_status[cache_fp]
+            indices = self._raster.indices_of_cache_fp[cache_fp]
+            if status == _CacheTileStatus.ready:
+                paths = [self._path_of_cache_fp.pop(cache_fp)]
+                self._raster.back_ds.deactivate(paths[0])
+                self._cache_fps_status[cache_fp] = _CacheTileStatus.absent
+                self._raster.debug_mngr.event('cache_file_update', self._raster.facade_proxy, cache_fp, 'evicted')
+                evicted_cache_fps.append(cache_fp)
+            elif status == _CacheTileStatus.unknown:
+                # Found in the cache directory and never used
+                paths = self._path_candidates_per_indices.get(indices, [])
+            else:
+                # Being checked or computed
+                continue
+            self._path_candidates_per_indices.pop(indices, None)
+            for path in paths:
+                LOGGER.debug('Removing {} to respect the cache budget'.format(path))
+                os.remove(path)
+                if self._manifest is not None:
+                    self._manifest.forget(path)
+            self._forget_nbytes(cache_fp)
+
+        if evicted_cache_fps:
+            # The cache tiles will be computed again if needed
+            msgs += [
+                Msg('CacheExtractor', 'cache_files_evicted', evicted_cache_fps),
+                Msg('Computer', 'cache_files_evicted', evicted_cache_fps),
+                Msg('ComputationAccumulator', 'cache_files_evicted', evicted_cache_fps),
+            ]
+        return msgs
+
     def _query_start_collection(self, qi, query):
         assert len(query.cache_fps_checking) == 0
         assert len(query.cache_fps_to_compute) > 0
@@ -241,9 +616,11 @@ class _CacheTileStatus(enum.Enum):
     checking = 1
     absent = 2
     ready = 3
+    foreign = 4
 
 class _Query(object):
     def __init__(self):
         self.cache_fps_checking = set()
         self.cache_fps_ensured = set()
         self.cache_fps_to_compute = set()
+        self.cache_fps_foreign = set()
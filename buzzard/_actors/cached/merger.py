@@ -1,12 +1,14 @@
 import functools
 import collections
-import multiprocessing as mp
-import multiprocessing.pool
 
 import numpy as np
 
 from buzzard._actors.message import Msg
 from buzzard._actors.pool_job import CacheJobWaiting, PoolJobWorking
+from buzzard._dataset_shared_array_arena import (
+    SharedArrayHandle, call_into_shared_array
+)
+from buzzard import _tools
 
 class ActorMerger(object):
     """Actor that takes care of merging several arrays into one fp"""
@@ -18,12 +20,13 @@ class ActorMerger(object):
         if merge_pool is not None:
             self._waiting_room_address = '/Pool{}/WaitingRoom'.format(id(merge_pool))
             self._working_room_address = '/Pool{}/WorkingRoom'.format(id(merge_pool))
-            if isinstance(merge_pool, mp.pool.ThreadPool):
-                self._same_address_space = True
-            elif isinstance(merge_pool, mp.pool.Pool):
-                self._same_address_space = False
-            else: # pragma: no cover
-                assert False, 'Type should be checked in facade'
+            self._same_address_space = _tools.pool_same_address_space(merge_pool)
+        arena = raster.back_ds.shared_array_arena
+        if merge_pool is not None and not self._same_address_space and arena.available:
+            # Arrays are exchanged with the process pool through shared memory instead of pipes
+            self._shared_array_arena = arena
+        else:
+            self._shared_array_arena = None
         self._waiting_jobs = set()
         self._working_jobs = set()
 
@@ -67,6 +70,10 @@ class ActorMerger(object):
 
     def receive_job_done(self, job, result):
         self._working_jobs.remove(job)
+        if isinstance(result, SharedArrayHandle):
+            # The worker wrote the result to shared memory
+            result = job.dst_array
+        result = self._normalize_user_result(job.cache_fp, result)
         return self._commit_work_result(job, result)
 
     def receive_die(self):
@@ -82,6 +89,7 @@ class ActorMerger(object):
         self._waiting_jobs.clear()
         self._working_jobs.clear()
         self._raster = None
+        self._shared_array_arena = None
 
         return msgs
 
@@ -136,13 +144,26 @@ class Work(PoolJobWorking):
                 array_per_fp,
                 actor._raster.facade_proxy,
             )
-        else:
+        elif actor._shared_array_arena is None:
             func = functools.partial(
                 actor._raster.merge_arrays,
                 cache_fp,
                 array_per_fp,
                 None
             )
+        else:
+            arena = actor._shared_array_arena
+            self.dst_array = arena.empty(
+                np.r_[cache_fp.shape, len(actor._raster)], actor._raster.dtype,
+            )
+            func = functools.partial(
+                call_into_shared_array,
+                arena.handle_of(self.dst_array),
+                actor._raster.merge_arrays,
+                cache_fp,
+                {fp: arena.share(arr) for fp, arr in array_per_fp.items()},
+                None,
+            )
         actor._raster.debug_mngr.event('object_allocated', func)
 
         super().__init__(actor.address, func)
@@ -3,13 +3,21 @@ from buzzard._actors.message import Msg
 import collections
 
 class ActorProducer(object):
-    """Actor that takes care of waiting for cache tiles reads and launching resamplings"""
+    """Actor that takes care of waiting for cache tiles reads and launching resamplings
+
+    The identical productions of the concurrent queries (same footprint, channels, nodata and
+    interpolation) are coalesced: only the first one (the leader) is made, the other ones (the
+    followers) receive a copy of its array. When the query of a leader is dropped, its first
+    follower takes over the production.
+    """
 
     def __init__(self, raster):
         self._raster = raster
         self._alive = True
 
         self._produce_per_query = collections.defaultdict(dict) # type: Mapping[CachedQueryInfos, Mapping[int, _ProdArray]]
+        self._leader_per_key = {} # type: Mapping[tuple, Tuple[CachedQueryInfos, int]]
+        self._followed_per_query = collections.defaultdict(dict) # type: Mapping[CachedQueryInfos, Mapping[int, _ProdArray]]
         self.address = '/Raster{}/Producer'.format(self._raster.uid)
 
     @property
@@ -25,32 +33,18 @@ class ActorProducer(object):
         qi: _actors.cached.query_infos.QueryInfos
         prod_idx: int
         """
-        msgs = []
-
-        pi = qi.prod[prod_idx] # type: CacheProduceInfos
-        assert pi.share_area is (len(pi.cache_fps) != 0)
-
-        if pi.share_area:
-            # If this prod_idx requires some cache file reads (this is the case most of the time)
-            msgs += [Msg(
-                'CacheExtractor', 'sample_those_cache_files_to_an_array', qi, prod_idx,
-            )]
-
-        for resample_fp in pi.resample_fps:
-            sample_fp = pi.resample_sample_dep_fp[resample_fp]
-            if sample_fp is None:
-                # Start the 'resampling' step of the resample_fp fully outside of raster
-                assert (
-                    resample_fp not in pi.resample_cache_deps_fps or
-                    len(pi.resample_cache_deps_fps[resample_fp]) == 0
-                )
-                msgs += [Msg(
-                    'Resampler', 'resample_and_accumulate',
-                    qi, prod_idx, None, resample_fp, None,
-                )]
-
-        self._produce_per_query[qi][prod_idx] = _ProdArray(pi)
-        return msgs
+        key = _production_key(qi, prod_idx)
+        leader = self._leader_per_key.get(key)
+        if leader is not None:
+            # The same array is already being made for another query, wait for it
+            pr = self._produce_per_query[leader[0]][leader[1]]
+            pr.followers.append((qi, prod_idx))
+            self._followed_per_query[qi][prod_idx] = pr
+            self._raster.debug_mngr.event(
+                'production_coalesced', self._raster.facade_proxy, qi.prod[prod_idx].fp,
+            )
+            return []
+        return self._start_production(qi, prod_idx, key, [])
 
     def receive_sampled_a_cache_file_to_the_array(self, qi, prod_idx, cache_fp, array):
         """Receive message: A cache file was read for that output array
@@ -95,12 +89,21 @@ class ActorProducer(object):
 
     def receive_made_this_array(self, qi, prod_idx, array):
         """Receive message: Done creating an output array"""
-        del self._produce_per_query[qi][prod_idx]
+        pr = self._produce_per_query[qi].pop(prod_idx)
         if len(self._produce_per_query[qi]) == 0:
             del self._produce_per_query[qi]
-        return [Msg(
+        del self._leader_per_key[pr.key]
+
+        msgs = [Msg(
             'QueriesHandler', 'made_this_array', qi, prod_idx, array
         )]
+        for follower_qi, follower_prod_idx in pr.followers:
+            self._forget_follower(follower_qi, follower_prod_idx)
+            # Each consumer gets its own array, they may be written to
+            msgs += [Msg(
+                'QueriesHandler', 'made_this_array', follower_qi, follower_prod_idx, array.copy()
+            )]
+        return msgs
 
     def receive_cancel_this_query(self, qi):
         """Receive message: One query was dropped
@@ -109,9 +112,22 @@ class ActorProducer(object):
         ----------
         qi: _actors.cached.query_infos.QueryInfos
         """
-        if qi in self._produce_per_query:
-            del self._produce_per_query[qi]
-        return []
+        msgs = []
+
+        # Stop waiting for the productions of the other queries
+        for prod_idx, pr in self._followed_per_query.pop(qi, {}).items():
+            pr.followers.remove((qi, prod_idx))
+
+        # Hand the productions of this query over to their followers
+        for pr in self._produce_per_query.pop(qi, {}).values():
+            del self._leader_per_key[pr.key]
+            if pr.followers:
+                new_qi, new_prod_idx = pr.followers[0]
+                for follower_qi, follower_prod_idx in pr.followers:
+                    self._forget_follower(follower_qi, follower_prod_idx)
+                msgs += self._start_production(new_qi, new_prod_idx, pr.key, pr.followers[1:])
+
+        return msgs
 
     def receive_die(self):
         """Receive message: The raster was killed"""
@@ -119,14 +135,61 @@ class ActorProducer(object):
         self._alive = False
 
         self._produce_per_query.clear()
+        self._leader_per_key.clear()
+        self._followed_per_query.clear()
         self._raster = None
         return []
 
     # ******************************************************************************************* **
+    def _start_production(self, qi, prod_idx, key, followers):
+        msgs = []
+
+        pi = qi.prod[prod_idx] # type: CacheProduceInfos
+        assert pi.share_area is (len(pi.cache_fps) != 0)
+
+        if pi.share_area:
+            # If this prod_idx requires some cache file reads (this is the case most of the time)
+            msgs += [Msg(
+                'CacheExtractor', 'sample_those_cache_files_to_an_array', qi, prod_idx,
+            )]
+
+        for resample_fp in pi.resample_fps:
+            sample_fp = pi.resample_sample_dep_fp[resample_fp]
+            if sample_fp is None:
+                # Start the 'resampling' step of the resample_fp fully outside of raster
+                assert (
+                    resample_fp not in pi.resample_cache_deps_fps or
+                    len(pi.resample_cache_deps_fps[resample_fp]) == 0
+                )
+                msgs += [Msg(
+                    'Resampler', 'resample_and_accumulate',
+                    qi, prod_idx, None, resample_fp, None,
+                )]
+
+        pr = _ProdArray(pi, key, followers)
+        self._produce_per_query[qi][prod_idx] = pr
+        self._leader_per_key[key] = (qi, prod_idx)
+        for follower_qi, follower_prod_idx in followers:
+            self._followed_per_query[follower_qi][follower_prod_idx] = pr
+        return msgs
+
+    def _forget_follower(self, qi, prod_idx):
+        followed = self._followed_per_query[qi]
+        del followed[prod_idx]
+        if len(followed) == 0:
+            del self._followed_per_query[qi]
+
+    # ******************************************************************************************* **
+
+def _production_key(qi, prod_idx):
+    """Two productions with the same key output the same array"""
+    return (qi.prod[prod_idx].fp, tuple(qi.channel_ids), qi.dst_nodata, qi.interpolation)
 
 class _ProdArray(object):
-    def __init__(self, pi):
+    def __init__(self, pi, key, followers):
         self.resample_needs = {
             resample_fp: set(cache_fps)
             for resample_fp, cache_fps in pi.resample_cache_deps_fps.items()
         }
+        self.key = key
+        self.followers = followers # type: List[Tuple[CachedQueryInfos, int]]
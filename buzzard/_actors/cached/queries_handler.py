@@ -1,3 +1,4 @@
+import collections
 import logging
 
 from buzzard._actors.message import Msg, DroppableMsg, AgingMsg
@@ -15,6 +16,7 @@ class ActorQueriesHandler(object):
         raster: _a_recipe_raster.ABackRecipeRaster
         """
         self._raster = raster
+        self._memory_budget = raster.back_ds.memory_budget
         self._queries = {}
         self._alive = True
         self.address = '/Raster{}/QueriesHandler'.format(self._raster.uid)
@@ -26,7 +28,7 @@ class ActorQueriesHandler(object):
     # ******************************************************************************************* **
     def ext_receive_new_query(self, queue_wref, max_queue_size, produce_fps,
                               channel_ids, is_flat, dst_nodata, interpolation, parent_uid,
-                              key_in_parent):
+                              key_in_parent, ordered):
         """Receive message sent by something else than an actor, still treated synchronously: There
         is a new query.
 
@@ -55,6 +57,10 @@ class ActorQueriesHandler(object):
            identity of this query in the parent query
            if None: This query comes directly from the user
            else: This query was issued by another raster
+        ordered: bool
+           Parameter of the underlying `(get|iter|queue)_data`
+           if False: The arrays are put in the output queue as soon as they are ready, along with
+           their index
         """
         msgs = []
 
@@ -66,7 +72,7 @@ class ActorQueriesHandler(object):
         )
         self._raster.debug_mngr.event('object_allocated', qi)
 
-        q = _Query(queue_wref)
+        q = _Query(queue_wref, ordered)
         self._queries[qi] = q
         msgs += [
             Msg('ProductionGate', 'make_those_arrays', qi),
@@ -76,6 +82,31 @@ class ActorQueriesHandler(object):
 
         return msgs
 
+    def ext_receive_new_precompute(self, queue_wref, cache_fps):
+        """Receive message sent by something else than an actor, still treated synchronously: There
+        is a new precomputation. It is a query whose footprints are cache tiles, that skips the
+        production of arrays. A cache tile is put in the output queue as soon as its cache file is
+        ready.
+
+        Parameters
+        ----------
+        queue_wref: weakref.ref of queue.Queue
+           Queue returned by the underlying `precompute`
+        cache_fps: sequence of Footprint
+           Cache tiles to precompute, in the order they should be computed
+        """
+        return self._new_precompute(queue_wref, cache_fps)
+
+    def receive_precompute_those_cache_files(self, cache_fps):
+        """Receive message: Those cache tiles are missing and no query is going to compute them,
+        precompute them without an output queue.
+
+        Parameters
+        ----------
+        cache_fps: sequence of Footprint
+        """
+        return self._new_precompute(None, cache_fps)
+
     def ext_receive_nothing(self):
         """Receive message sent by something else than an actor, still treated synchronously: What's
         up?
@@ -86,6 +117,9 @@ class ActorQueriesHandler(object):
 
         killed_queries = []
         for qi, q in self._queries.items():
+            if q.queue_wref is None:
+                # Nobody pulls from the output of this query
+                continue
             queue = q.queue_wref()
             if queue is None:
                 killed_queries.append(qi)
@@ -93,15 +127,17 @@ class ActorQueriesHandler(object):
                 new_queue_size = queue.qsize()
                 assert new_queue_size <= q.queue_size, "Don't put data in that queue..."
                 if new_queue_size != q.queue_size:
-                    q.queue_size = new_queue_size
-                    msgs += [
-                        AgingMsg('/Global/GlobalPrioritiesWatcher', 'output_queue_update',
-                                 (self._raster.uid, qi), (q.produced_count, q.queue_size)),
-                        AgingMsg('ProductionGate', 'output_queue_update',
-                                 (qi,), (q.produced_count, q.queue_size)),
-                        AgingMsg('ComputationGate1', 'output_queue_update',
-                                 (qi,), (q.produced_count, q.queue_size)),
+                    # The output queue is FIFO, the oldest arrays were pulled
+                    pulled_prod_idxs = [
+                        q.queued_prod_idxs.popleft()
+                        for _ in range(q.queue_size - new_queue_size)
                     ]
+                    q.queue_size = new_queue_size
+                    if self._memory_budget.enabled:
+                        msgs += self._memory_released(
+                            self._memory_budget.release(qi, pulled_prod_idxs)
+                        )
+                    msgs += self._output_queue_updated(qi, q)
             del q
 
         for qi in killed_queries:
@@ -122,11 +158,13 @@ class ActorQueriesHandler(object):
         msgs = []
         q = self._queries[qi]
         assert prod_idx not in q.produce_arrays_dict, 'This array was already computed'
-        assert prod_idx >= q.produced_count, 'This array was already sent'
+        assert not q.ordered or prod_idx >= q.produced_count, 'This array was already sent'
         q.produce_arrays_dict[prod_idx] = array
+        if self._raster.max_cache_bytes is not None:
+            # The cache tiles of this array can be evicted
+            msgs += [Msg('CacheSupervisor', 'array_made', qi, prod_idx)]
 
         # Send arrays ready ****************************************************
-        prod_idx = q.produced_count
         queue = q.queue_wref()
         if queue is None:
             # Queue is None (Queue was collected upstream by gc) -> Ignore the problem,
@@ -135,9 +173,10 @@ class ActorQueriesHandler(object):
         else:
             update = False
 
-            # Put arrays in queue in the right order
+            # Put arrays in queue in the right order (or as soon as they are ready if unordered)
             while True:
-                if prod_idx not in q.produce_arrays_dict:
+                prod_idx = q.next_prod_idx()
+                if prod_idx is None:
                     # Next array is not ready yet
                     break
                 array = q.produce_arrays_dict.pop(prod_idx)
@@ -149,23 +188,18 @@ class ActorQueriesHandler(object):
                 # The way this is all designed, the system does not start to work on a `prod_idx` if
                 # it cannot be inserted in the output queue. It means that the `queue.Full`
                 # exception cannot be raised by the following `put_nowait`.
-                queue.put_nowait(array)
+                if q.ordered:
+                    queue.put_nowait(array)
+                else:
+                    queue.put_nowait((prod_idx, array))
 
+                q.queued_prod_idxs.append(prod_idx)
                 q.queue_size += 1
                 q.produced_count += 1
-
-                prod_idx  = q.produced_count
                 update = True
 
             if update:
-                msgs += [
-                    AgingMsg('/Global/GlobalPrioritiesWatcher', 'output_queue_update',
-                             (self._raster.uid, qi), (q.produced_count, q.queue_size)),
-                    AgingMsg('ProductionGate', 'output_queue_update',
-                             (qi,), (q.produced_count, q.queue_size)),
-                    AgingMsg('ComputationGate1', 'output_queue_update',
-                             (qi,), (q.produced_count, q.queue_size)),
-                ]
+                msgs += self._output_queue_updated(qi, q)
                 if qi.key_in_parent is not None:
                     # Notify the parent raster that a new array was put in the queue
                     # If the parent raster was collected this message is discarded
@@ -177,10 +211,44 @@ class ActorQueriesHandler(object):
 
             if q.produced_count == qi.produce_count:
                 del self._queries[qi]
+                if self._memory_budget.enabled:
+                    msgs += self._memory_released(self._memory_budget.release_query(qi))
         del queue
 
         return msgs
 
+    def receive_precomputed_this_cache_file(self, qi, prod_idx):
+        """Receive message: The cache file of this cache tile of a precomputation is ready
+
+        Parameters
+        ----------
+        qi: _actors.cached.query_infos.QueryInfos
+        prod_idx: int
+        """
+        msgs = []
+        q = self._queries[qi]
+        if q.queue_wref is None:
+            # Precomputation without output queue
+            q.produced_count += 1
+        else:
+            queue = q.queue_wref()
+            if queue is None:
+                # Queue is None (Queue was collected upstream by gc) -> Ignore the problem,
+                # `ext_receive_nothing` will be called soon
+                return msgs
+
+            # The output queue can hold all the cache tiles
+            queue.put_nowait(qi.prod[prod_idx].fp)
+            del queue
+            q.queued_prod_idxs.append(prod_idx)
+            q.queue_size += 1
+            q.produced_count += 1
+        msgs += self._output_queue_updated(qi, q)
+
+        if q.produced_count == qi.produce_count:
+            del self._queries[qi]
+        return msgs
+
     def receive_die(self):
         """Receive message: The raster was killed"""
         assert self._alive
@@ -195,6 +263,35 @@ class ActorQueriesHandler(object):
         return msgs
 
     # ******************************************************************************************* **
+    def _new_precompute(self, queue_wref, cache_fps):
+        msgs = []
+
+        raster = self._raster
+        if raster.nodata is not None:
+            dst_nodata = raster.dtype.type(raster.nodata)
+        else:
+            dst_nodata = raster.dtype.type(0)
+        qi = CachedQueryInfos(
+            raster, cache_fps,
+            tuple(range(len(raster))), False, dst_nodata, 'nearest',
+            # All the computations are allowed to start right away
+            len(cache_fps),
+            None, None, precompute=True,
+        )
+        self._raster.debug_mngr.event('object_allocated', qi)
+
+        q = _Query(queue_wref, False)
+        self._queries[qi] = q
+        msgs += [
+            Msg('CacheExtractor', 'notify_those_cache_files_ready', qi),
+            Msg('CacheSupervisor', 'make_those_cache_files_available', qi),
+        ]
+        if self._memory_budget.enabled:
+            # No array is produced, the Dataset's budget does not apply
+            msgs += [Msg('ComputationGate1', 'productions_allowed', qi, qi.produce_count)]
+
+        return msgs
+
     def _cancel_query(self, qi):
         q = self._queries.pop(qi)
         assert q.produced_count != qi.produce_count, "This query finished and can't be cancelled"
@@ -202,26 +299,70 @@ class ActorQueriesHandler(object):
             q.produced_count,
             qi.produce_count,
         ))
-        return [
+        msgs = [
             Msg('/Global/GlobalPrioritiesWatcher', 'cancel_this_query', self._raster.uid, qi),
-
-            Msg('ProductionGate', 'cancel_this_query', qi),
-            Msg('Producer', 'cancel_this_query', qi),
-            Msg('Resampler', 'cancel_this_query', qi),
+        ]
+        if not qi.precompute:
+            msgs += [
+                Msg('ProductionGate', 'cancel_this_query', qi),
+                Msg('Producer', 'cancel_this_query', qi),
+                Msg('Resampler', 'cancel_this_query', qi),
+            ]
+        msgs += [
             Msg('CacheExtractor', 'cancel_this_query', qi),
             Msg('Reader', 'cancel_this_query', qi),
 
-            Msg('CacheSupervisor', 'cancel_this_query', qi),
             Msg('ComputationGate1', 'cancel_this_query', qi),
             Msg('ComputationGate2', 'cancel_this_query', qi),
             Msg('Computer', 'cancel_this_query', qi),
+
+            # After the Computer, that unschedules the computations of this query
+            Msg('CacheSupervisor', 'cancel_this_query', qi),
+        ]
+        if self._memory_budget.enabled:
+            # After the cancellation, the ProductionGate should not allow more of this query
+            msgs += self._memory_released(self._memory_budget.release_query(qi))
+        return msgs
+
+    def _output_queue_updated(self, qi, q):
+        msgs = [
+            AgingMsg('/Global/GlobalPrioritiesWatcher', 'output_queue_update',
+                     (self._raster.uid, qi), (q.produced_count, q.queue_size)),
+        ]
+        if not qi.precompute:
+            msgs += [
+                AgingMsg('ProductionGate', 'output_queue_update',
+                         (qi,), (q.produced_count, q.queue_size)),
+            ]
+        msgs += [
+            AgingMsg('ComputationGate1', 'output_queue_update',
+                     (qi,), (q.produced_count, q.queue_size)),
+        ]
+        return msgs
+
+    @staticmethod
+    def _memory_released(raster_uids):
+        # The rasters that were waiting for memory may be collected already
+        return [
+            DroppableMsg('/Raster{}/ProductionGate'.format(uid), 'memory_released')
+            for uid in raster_uids
         ]
 
     # ******************************************************************************************* **
 
 class _Query(object):
-    def __init__(self, queue_wref):
-        self.queue_wref = queue_wref
+    def __init__(self, queue_wref, ordered):
+        self.queue_wref = queue_wref # None for the precomputations requested by the actors
+        self.ordered = ordered
         self.produce_arrays_dict = {}
+        self.queued_prod_idxs = collections.deque()
         self.produced_count = 0
         self.queue_size = 0
+
+    def next_prod_idx(self):
+        """Index of the next array to put in the output queue, None if not ready yet"""
+        if self.ordered:
+            if self.produced_count in self.produce_arrays_dict:
+                return self.produced_count
+            return None
+        return next(iter(self.produce_arrays_dict), None)
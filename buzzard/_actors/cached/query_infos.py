@@ -1,13 +1,14 @@
 from typing import (
     Set, Dict, List, Sequence, Union, cast, NamedTuple, FrozenSet, Tuple, Mapping, AbstractSet
 )
-import collections
+import bisect
 import queue # Should be imported for `mypy`
 from types import MappingProxyType
 import itertools
 
 import numpy as np
 from buzzard._footprint import Footprint
+from buzzard._footprint_array import FootprintArray
 
 class ComputationFootprint(Footprint):
     """The Footprint that is passed to the user's computation function along with the
@@ -72,7 +73,7 @@ class CachedQueryInfos(object):
     def __init__(self, raster, list_of_prod_fp,
                  channel_ids, is_flat, dst_nodata, interpolation,
                  max_queue_size,
-                 parent_uid, key_in_parent):
+                 parent_uid, key_in_parent, precompute=False):
         # Mutable attributes ******************************************************************** **
         # Attributes that relates a query to a single optional computation phase
         self.cache_computation = None # type: Union[None, CacheComputationInfos]
@@ -81,6 +82,10 @@ class CachedQueryInfos(object):
         self.parent_uid = parent_uid
         self.key_in_parent = key_in_parent
 
+        # If True: This query only ensures that its cache tiles are written, no array is produced.
+        # Its footprints are the cache tiles to precompute.
+        self.precompute = precompute # type: bool
+
         # The parameters given by user in invocation
         self.channel_ids = channel_ids # type: Sequence[int]
         self.is_flat = is_flat # type: bool
@@ -100,154 +105,168 @@ class CachedQueryInfos(object):
         self.produce_count = len(list_of_prod_fp) # type: int
 
         # Build CacheProduceInfos objects **************************************
-        to_zip = []
+        # The predicates and the cache tiles of all the `prod_fp` are computed at once with
+        # vectorized arithmetic. Only the `prod_fp` that require a resampling are planned one by
+        # one, the `CacheProduceInfos` of the other ones are built on first access, as the query
+        # advances.
 
         # The list of Footprints requested
-        list_of_prod_fp = list_of_prod_fp # type: List[ProductionFootprint]
-        to_zip.append(list_of_prod_fp)
+        list_of_prod_fp = list(list_of_prod_fp) # type: List[ProductionFootprint]
+        if list_of_prod_fp:
+            prod_fps = FootprintArray.from_footprints(list_of_prod_fp)
+        else:
+            prod_fps = FootprintArray(np.zeros((0, 6)), np.zeros((0, 2)))
 
         # Boolean attribute of each `prod_fp`
         # If `True` the resampling phase has to be performed on a Pool
-        list_of_prod_same_grid = [
-            fp.same_grid(raster.fp)
-            for fp in list_of_prod_fp
-        ] # type: List[bool]
-        to_zip.append(list_of_prod_same_grid)
+        prod_same_grid = prod_fps.same_grid(raster.fp) # type: np.ndarray
 
         # Boolean attribute of each `prod_fp`
         # If `False` the queried footprint is outside of raster's footprint. It means that no
         # sampling is necessary and the outputed array will be full of `dst_nodata`
-        list_of_prod_share_area = [
-            fp.share_area(raster.fp)
-            for fp in list_of_prod_fp
-        ] # type: List[bool]
-        to_zip.append(list_of_prod_share_area)
-
-        # The full Footprint that needs to be sampled for each `prod_fp`
-        # Is `None` if `prod_fp` is fully outside of raster
-        list_of_prod_sample_fp = [] # type: List[Union[None, SampleFootprint]]
-        to_zip.append(list_of_prod_sample_fp)
-
-        # The set of cache Footprints that are needed for each `prod_fp`
-        list_of_prod_cache_fps = [] # type: List[FrozenSet[CacheFootprint]]
-        to_zip.append(list_of_prod_cache_fps)
-
-        # The list of resamplings to perform for each `prod_fp`
-        # Always at least 1 resampling per `prod_fp`
-        list_of_prod_resample_fps = [] # type: List[Tuple[ResampleFootprint, ...]]
-        to_zip.append(list_of_prod_resample_fps)
-
-        # The set of `cache_fp` necessary per `resample_fp` for each `prod_fp`
-        list_of_prod_resample_cache_deps_fps = [] # type: List[Mapping[ResampleFootprint, FrozenSet[CacheFootprint]]]
-        to_zip.append(list_of_prod_resample_cache_deps_fps)
-
-        # The full Footprint that needs to be sampled par `resample_fp` for each `prod_fp`
-        # Might be `None` if `prod_fp` is fully outside of raster
-        list_of_prod_resample_sample_dep_fp = [] # type: List[Mapping[ResampleFootprint, Union[None, SampleFootprint]]]
-        to_zip.append(list_of_prod_resample_sample_dep_fp)
-
-        it = zip(list_of_prod_fp, list_of_prod_same_grid, list_of_prod_share_area)
-        # TODO: Speed up that piece of code
-        # - Code footprint with lower level code
-        # - Spawn a ProcessPoolExecutor when >100 prod. (The same could be done for fp.tile).
-        # - What about a global process pool executor in `buzz.env`?
-        for prod_fp, same_grid, share_area in it:
-            if not share_area:
-                # Resampling will be performed in one pass, on the scheduler
-                list_of_prod_sample_fp.append(None)
-                list_of_prod_cache_fps.append(frozenset())
-                resample_fp = cast(ResampleFootprint, prod_fp)
-                list_of_prod_resample_fps.append((resample_fp,))
-                list_of_prod_resample_cache_deps_fps.append(MappingProxyType({resample_fp: frozenset()}))
-                list_of_prod_resample_sample_dep_fp.append(MappingProxyType({resample_fp: None}))
+        prod_share_area = prod_fps.intersects(raster.fp) # type: np.ndarray
+
+        # The ranges of rows and columns of `raster.cache_fps` needed by each `prod_fp` that is
+        # remapped
+        remap_idxs = np.flatnonzero(prod_same_grid & prod_share_area)
+        prod_cache_ranges = np.zeros((len(list_of_prod_fp), 4), dtype=int)
+        prod_cache_ranges[remap_idxs] = np.stack(
+            raster.cache_ranges_of_fps(prod_fps[remap_idxs]), axis=-1,
+        )
+        counts = (
+            (prod_cache_ranges[:, 1] - prod_cache_ranges[:, 0]) *
+            (prod_cache_ranges[:, 3] - prod_cache_ranges[:, 2])
+        )
+        assert (counts[remap_idxs] > 0).all()
+
+        # The `CacheProduceInfos` of the `prod_fp` that are resampled
+        prebuilt_prod = [None] * len(list_of_prod_fp) # type: List[Union[None, CacheProduceInfos]]
+
+        # Only the `prod_fp` that are resampled are planned eagerly
+        for prod_idx in np.flatnonzero(~prod_same_grid & prod_share_area).tolist():
+            prod_fp = list_of_prod_fp[prod_idx]
+            sample_fp = raster.build_sampling_footprint_to_remap_interpolate(prod_fp, interpolation)
+
+            if raster.max_resampling_size is None:
+                # Remapping will be performed in one pass, on a Pool
+                resample_fps = [cast(ResampleFootprint, prod_fp)]
+                sample_dep_fp = {
+                    resample_fps[0]: sample_fp
+                }
             else:
-                if same_grid:
-                    # Remapping will be performed in one pass, on the scheduler
-                    sample_fp = raster.fp & prod_fp
-                    resample_fps = [cast(ResampleFootprint, prod_fp)]
-                    sample_dep_fp = {
-                        resample_fps[0]: sample_fp
-                    }
-                else:
-                    sample_fp = raster.build_sampling_footprint_to_remap_interpolate(prod_fp, interpolation)
-
-                    if raster.max_resampling_size is None:
-                        # Remapping will be performed in one pass, on a Pool
-                        resample_fps = [cast(ResampleFootprint, prod_fp)]
-                        sample_dep_fp = {
-                            resample_fps[0]: sample_fp
-                        }
-                    else:
-                        # Resampling will be performed in several passes, on a Pool
-                        rsize = np.maximum(prod_fp.rsize, sample_fp.rsize)
-                        countx, county = np.ceil(rsize / raster.max_resampling_size).astype(int)
-                        resample_fps = prod_fp.tile_count(
-                            countx, county, boundary_effect='shrink'
-                        ).flatten().tolist()
-                        sample_dep_fp = {
-                            resample_fp: (
-                                raster.build_sampling_footprint_to_remap_interpolate(resample_fp, interpolation)
-                                if resample_fp.share_area(raster.fp) else
-                                None
-                            )
-                            for resample_fp in resample_fps
-                        }
-
-                resample_cache_deps_fps = MappingProxyType({
-                    resample_fp: frozenset(raster.cache_fps_of_fp(sample_subfp))
+                # Resampling will be performed in several passes, on a Pool
+                rsize = np.maximum(prod_fp.rsize, sample_fp.rsize)
+                countx, county = np.ceil(rsize / raster.max_resampling_size).astype(int)
+                resample_fps = prod_fp.tile_count(
+                    countx, county, boundary_effect='shrink'
+                ).flatten().tolist()
+                sample_dep_fp = {
+                    resample_fp: (
+                        raster.build_sampling_footprint_to_remap_interpolate(resample_fp, interpolation)
+                        if resample_fp.share_area(raster.fp) else
+                        None
+                    )
                     for resample_fp in resample_fps
-                    for sample_subfp in [sample_dep_fp[resample_fp]]
-                    if sample_subfp is not None
-                })
-                for s in resample_cache_deps_fps.items():
-                    assert len(s) > 0
-
-                # The `intersection of the cache_fps with sample_fp` might not be the same as the
-                # the `intersection of the cache_fps with resample_fps`!
-                cache_fps = frozenset(itertools.chain.from_iterable(
-                    resample_cache_deps_fps.values()
-                ))
-                assert len(cache_fps) > 0
-
-                list_of_prod_cache_fps.append(cache_fps)
-                list_of_prod_sample_fp.append(sample_fp)
-                list_of_prod_resample_fps.append(tuple(resample_fps))
-                list_of_prod_resample_cache_deps_fps.append(resample_cache_deps_fps)
-                list_of_prod_resample_sample_dep_fp.append(MappingProxyType(sample_dep_fp))
-
-        self.prod = tuple([
-            CacheProduceInfos(*args)
-            for args in zip(*to_zip)
-        ]) # type: Tuple[CacheProduceInfos, ...]
+                }
+
+            resample_cache_deps_fps = MappingProxyType({
+                resample_fp: frozenset(raster.cache_fps_of_fp(sample_subfp))
+                for resample_fp in resample_fps
+                for sample_subfp in [sample_dep_fp[resample_fp]]
+                if sample_subfp is not None
+            })
+            for s in resample_cache_deps_fps.items():
+                assert len(s) > 0
+
+            # The `intersection of the cache_fps with sample_fp` might not be the same as the
+            # the `intersection of the cache_fps with resample_fps`!
+            cache_fps = frozenset(itertools.chain.from_iterable(
+                resample_cache_deps_fps.values()
+            ))
+            assert len(cache_fps) > 0
+
+            prebuilt_prod[prod_idx] = CacheProduceInfos(
+                prod_fp, False, True, sample_fp, cache_fps, tuple(resample_fps),
+                resample_cache_deps_fps, MappingProxyType(sample_dep_fp),
+            )
+
+        raster_fp = raster.fp
+        raster_cache_fps = raster.cache_fps
+        list_of_prod_same_grid = prod_same_grid.tolist()
+        list_of_prod_share_area = prod_share_area.tolist()
+
+        def _build_prod(prod_idx):
+            prod_fp = list_of_prod_fp[prod_idx]
+            resample_fp = cast(ResampleFootprint, prod_fp)
+            if not list_of_prod_share_area[prod_idx]:
+                # Resampling will be performed in one pass, on the scheduler
+                return CacheProduceInfos(
+                    prod_fp, list_of_prod_same_grid[prod_idx], False, None, frozenset(),
+                    (resample_fp,),
+                    MappingProxyType({resample_fp: frozenset()}),
+                    MappingProxyType({resample_fp: None}),
+                )
+            # Remapping will be performed in one pass, on the scheduler
+            sample_fp = raster_fp & prod_fp
+            row_start, row_stop, col_start, col_stop = prod_cache_ranges[prod_idx].tolist()
+            cache_fps = frozenset(raster_cache_fps[row_start:row_stop, col_start:col_stop].flat)
+            return CacheProduceInfos(
+                prod_fp, True, True, sample_fp, cache_fps,
+                (resample_fp,),
+                MappingProxyType({resample_fp: cache_fps}),
+                MappingProxyType({resample_fp: sample_fp}),
+            )
+
+        self.prod = _LazySequence(_build_prod, prebuilt_prod) # type: Sequence[CacheProduceInfos]
 
         # Misc *****************************************************************
+        # The pairs of (`prod_idx`, index of a `cache_fp` in `raster.cache_fps.flat`), for all the
+        # cache Footprints needed by each `prod_fp`
+        row_count, col_count = raster_cache_fps.shape
+        pair_prod_idxs = np.repeat(np.arange(len(list_of_prod_fp)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        widths = np.repeat(prod_cache_ranges[:, 3] - prod_cache_ranges[:, 2], counts)
+        pair_cache_idxs = (
+            (np.repeat(prod_cache_ranges[:, 0], counts) + offsets // widths.clip(1)) * col_count +
+            np.repeat(prod_cache_ranges[:, 2], counts) + offsets % widths.clip(1)
+        )
+        resampled_pairs = [
+            (prod_idx, raster.indices_of_cache_fp[cache_fp])
+            for prod_idx, prod in enumerate(prebuilt_prod)
+            if prod is not None
+            for cache_fp in prod.cache_fps
+        ]
+        if resampled_pairs:
+            idxs, indices = zip(*resampled_pairs)
+            pair_prod_idxs = np.r_[pair_prod_idxs, idxs]
+            pair_cache_idxs = np.r_[
+                pair_cache_idxs, np.ravel_multi_index(tuple(zip(*indices)), (row_count, col_count))
+            ]
+        cache_fp_of_idx = raster_cache_fps.flatten()
+
         # The list of all cache Footprints needed, ordered by priority
-        self.list_of_cache_fp = [] # type: Sequence[CacheFootprint]
-        seen = set()
-        for fps in list_of_prod_cache_fps:
-            for fp in fps:
-                if fp not in seen:
-                    seen.add(fp)
-                    self.list_of_cache_fp.append(fp)
-        self.list_of_cache_fp = tuple(self.list_of_cache_fp)
-        del seen
+        order = np.lexsort((pair_cache_idxs, pair_prod_idxs))
+        cache_idxs, firsts = np.unique(pair_cache_idxs[order], return_index=True)
+        min_prod_idxs = pair_prod_idxs[order][firsts]
+        cache_fps = cache_fp_of_idx[cache_idxs].tolist()
+        self.list_of_cache_fp = tuple(
+            cache_fp_of_idx[cache_idxs[np.argsort(firsts, kind='stable')]].tolist()
+        ) # type: Sequence[CacheFootprint]
 
         # The dict of cache Footprint to set of production idxs
         # For each `cache_fp`, the set of prod_idx that need this cache tile
-        self.dict_of_prod_idxs_per_cache_fp = collections.defaultdict(set) # type: Mapping[CacheFootprint, AbstractSet[int]]
-        for i, (prod_fp, cache_fps) in enumerate(zip(list_of_prod_fp, list_of_prod_cache_fps)):
-            for cache_fp in cache_fps:
-                self.dict_of_prod_idxs_per_cache_fp[cache_fp].add(i)
-        for k, v in self.dict_of_prod_idxs_per_cache_fp.items():
-            self.dict_of_prod_idxs_per_cache_fp[k] = frozenset(v)
-        self.dict_of_prod_idxs_per_cache_fp = MappingProxyType(self.dict_of_prod_idxs_per_cache_fp)
+        order = np.lexsort((pair_prod_idxs, pair_cache_idxs))
+        splits = np.flatnonzero(np.diff(pair_cache_idxs[order])) + 1
+        self.dict_of_prod_idxs_per_cache_fp = MappingProxyType({
+            cache_fp: frozenset(prod_idxs.tolist())
+            for cache_fp, prod_idxs in zip(cache_fps, np.split(pair_prod_idxs[order], splits))
+        }) # type: Mapping[CacheFootprint, AbstractSet[int]]
 
         # The dict of cache Footprint to production_idx
         # For each `cache_fp`, the minimum prod_idx that need this cache tile
-        self.dict_of_min_prod_idx_per_cache_fp = {} # type: Mapping[CacheFootprint, int]
-        for k, v in self.dict_of_prod_idxs_per_cache_fp.items():
-            self.dict_of_min_prod_idx_per_cache_fp[k] = min(v)
-        self.dict_of_min_prod_idx_per_cache_fp = MappingProxyType(self.dict_of_min_prod_idx_per_cache_fp)
+        self.dict_of_min_prod_idx_per_cache_fp = MappingProxyType(dict(zip(
+            cache_fps, min_prod_idxs.tolist(),
+        ))) # type: Mapping[CacheFootprint, int]
 
         # *************************************************************************************** **
     def __hash__(self):
@@ -256,6 +275,27 @@ class CachedQueryInfos(object):
     def __eq__(self, other):
         return self is other
 
+class _LazySequence(object):
+    """Immutable sequence whose missing elements are built on first access"""
+
+    def __init__(self, build, elements):
+        self._build = build
+        self._elements = elements
+
+    def __len__(self):
+        return len(self._elements)
+
+    def __getitem__(self, idx):
+        element = self._elements[idx]
+        if element is None:
+            element = self._build(range(len(self._elements))[idx])
+            self._elements[idx] = element
+        return element
+
+    def __iter__(self):
+        for idx in range(len(self._elements)):
+            yield self[idx]
+
 class CacheComputationInfos(object):
     """Object that store informations about a computation phase of a query.
     Instanciating this object also starts the primitives collection from the list of the cache
@@ -310,12 +350,107 @@ class CacheComputationInfos(object):
         }
 
         # Step 3 - Start collection phase
-        self.primitive_queue_per_primitive = {
-            name: prim_back.queue_data(
-                self.primitive_fps_per_primitive[name],
-                parent_uid=raster.uid,
-                key_in_parent=(qi, name),
-                **raster.primitives_kwargs[name]
-            )
-            for name, prim_back in raster.primitives_back.items()
-        }
+        if not qi.precompute:
+            self.primitive_queue_per_primitive = {
+                name: prim_back.queue_data(
+                    self.primitive_fps_per_primitive[name],
+                    parent_uid=raster.uid,
+                    key_in_parent=(qi, name),
+                    **raster.primitives_kwargs[name]
+                )
+                for name, prim_back in raster.primitives_back.items()
+            }
+        else:
+            # The computations are not delayed by a consumer, the primitive footprints of the
+            # neighbouring computations are read at once to avoid reading their overlap twice
+            self.primitive_queue_per_primitive = {}
+            for name, prim_back in raster.primitives_back.items():
+                fps = self.primitive_fps_per_primitive[name]
+                read_fps, read_idxs = _group_primitive_fps(fps)
+                self.primitive_queue_per_primitive[name] = _GroupedPrimitiveQueue(
+                    prim_back.queue_data(
+                        read_fps,
+                        parent_uid=raster.uid,
+                        key_in_parent=(qi, name),
+                        **raster.primitives_kwargs[name]
+                    ),
+                    fps, read_fps, read_idxs,
+                )
+
+# Maximum number of primitive footprints read at once by a precomputation
+PRIMITIVE_READ_GROUP_SIZE = 4
+
+def _group_primitive_fps(fps):
+    """Group the consecutive primitive footprints that are on the same grid and that overlap or
+    touch, so that the envelope of a group is not larger than the sum of its footprints
+
+    Returns
+    -------
+    read_fps: list of Footprint
+        The envelope of each group
+    read_idxs: list of int
+        The index of the group of each footprint in `fps`, increasing
+    """
+    read_fps = []
+    read_idxs = []
+    group_size = 0
+    for fp in fps:
+        if 0 < group_size < PRIMITIVE_READ_GROUP_SIZE and read_fps[-1].same_grid(fp):
+            envelope = _envelope(read_fps[-1], fp)
+            if envelope.rarea <= read_fps[-1].rarea + fp.rarea:
+                read_fps[-1] = envelope
+                read_idxs.append(len(read_fps) - 1)
+                group_size += 1
+                continue
+        read_fps.append(fp)
+        read_idxs.append(len(read_fps) - 1)
+        group_size = 1
+    return read_fps, read_idxs
+
+def _envelope(fp0, fp1):
+    """Smallest Footprint containing two Footprints on the same grid"""
+    rtl = fp0.spatial_to_raster(fp1.tl)
+    start = np.minimum([0, 0], rtl)
+    end = np.maximum(fp0.rsize, rtl + fp1.rsize)
+    tl = fp0.tl + start[0] * fp0.pxlrvec + start[1] * fp0.pxtbvec
+    gt = fp0.gt
+    gt[0] = tl[0]
+    gt[3] = tl[1]
+    return Footprint(gt=gt, rsize=end - start)
+
+class _GroupedPrimitiveQueue(object):
+    """Output queue of a primitive query that read groups of primitive footprints. It is consumed
+    (by the ComputationGate2 and the Computer) as if each primitive footprint had its own array.
+    """
+
+    def __init__(self, queue, fps, read_fps, read_idxs):
+        self._queue = queue
+        self._fps = fps
+        self._read_fps = read_fps
+        self._read_idxs = read_idxs
+        self._got_count = 0
+        self._pulled_read_count = 0
+        self._array = None
+
+    def qsize(self):
+        read_count = self._pulled_read_count + self._queue.qsize()
+        return bisect.bisect_left(self._read_idxs, read_count) - self._got_count
+
+    def get_nowait(self):
+        i = self._got_count
+        read_idx = self._read_idxs[i]
+        if read_idx == self._pulled_read_count:
+            self._array = self._queue.get_nowait()
+            self._pulled_read_count += 1
+        self._got_count += 1
+
+        fp = self._fps[i]
+        read_fp = self._read_fps[read_idx]
+        if fp == read_fp:
+            array = self._array
+        else:
+            # A copy, the computations may write to their inputs
+            array = self._array[fp.slice_in(read_fp)].copy()
+        if self._got_count == len(self._fps) or self._read_idxs[self._got_count] != read_idx:
+            self._array = None
+        return array
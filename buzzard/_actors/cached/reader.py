@@ -1,15 +1,12 @@
 import functools
 import collections
-import multiprocessing as mp
-import multiprocessing.pool
-import contextlib
 
 import numpy as np
 
 from buzzard._actors.message import Msg
 from buzzard._actors.pool_job import ProductionJobWaiting, PoolJobWorking
+from buzzard._dataset_shared_array_arena import call_with_shared_arrays
 from buzzard import _tools
-from buzzard._gdal_file_raster import BackGDALFileRaster
 
 class ActorReader(object):
     """Actor that takes care of reading cache tiles"""
@@ -22,12 +19,14 @@ class ActorReader(object):
         if io_pool is not None:
             self._waiting_room_address = '/Pool{}/WaitingRoom'.format(id(io_pool))
             self._working_room_address = '/Pool{}/WorkingRoom'.format(id(io_pool))
-            if isinstance(io_pool, mp.pool.ThreadPool):
-                self._same_address_space = True
-            elif isinstance(io_pool, mp.pool.Pool):
-                self._same_address_space = False
-            else: # pragma: no cover
-                assert False, 'Type should be checked in facade'
+            self._same_address_space = _tools.pool_same_address_space(io_pool)
+        arena = raster.back_ds.shared_array_arena
+        if io_pool is not None and not self._same_address_space and arena.available:
+            # Arrays are exchanged with the process pool through shared memory instead of pipes
+            self._shared_array_arena = arena
+        else:
+            self._shared_array_arena = None
+        self._tile_cache = raster.tile_cache
         self._waiting_jobs = set()
         self._working_jobs = set()
 
@@ -37,6 +36,13 @@ class ActorReader(object):
         self._missing_cache_fps_per_prod_tile = (
             collections.defaultdict(dict)
         ) # type: Mapping[CachedQueryInfos, Mapping[int, Set[Footprint]]]
+
+        # When the tile cache is enabled, a cache file being read is not read a second time by
+        # another query, the other query waits for the tile
+        self._job_per_path = {} # type: Mapping[str, Union[Wait, Work]]
+        self._followers_per_path = (
+            collections.defaultdict(list)
+        ) # type: Mapping[str, List[Tuple[CachedQueryInfos, int, Footprint]]]
         self.address = '/Raster{}/Reader'.format(self._raster.uid)
 
     @property
@@ -45,23 +51,32 @@ class ActorReader(object):
 
     # ******************************************************************************************* **
     def receive_sample_cache_file_to_unique_array(self, qi, prod_idx, cache_fp, path):
-        msgs = []
-
-        if self._raster.io_pool is None:
-            work = self._create_work_job(qi, prod_idx, cache_fp, path)
-            work.func()
-            msgs += self._commit_work_result(work, None)
-        else:
-            wait = Wait(self, qi, prod_idx, cache_fp, path)
-            self._waiting_jobs.add(wait)
-            msgs += [Msg(self._waiting_room_address, 'schedule_job', wait)]
-
-        return msgs
+        if self._tile_cache is not None:
+            if path in self._job_per_path:
+                # Wait for the tile being read for another query
+                self._tile_cache.get_pending(path)
+                self._raster.debug_mngr.event(
+                    'tile_cache_update', self._raster.facade_proxy, path,
+                    'hit', self._tile_cache.stats,
+                )
+                self._followers_per_path[path].append((qi, prod_idx, cache_fp))
+                return []
+            tile = self._tile_cache.get(path)
+            self._raster.debug_mngr.event(
+                'tile_cache_update', self._raster.facade_proxy, path,
+                'miss' if tile is None else 'hit', self._tile_cache.stats,
+            )
+            if tile is not None:
+                # No need to schedule an io job
+                return self._sample_from_tile(qi, prod_idx, cache_fp, tile)
+        return self._schedule_read(qi, prod_idx, cache_fp, path)
 
     def receive_token_to_working_room(self, job, token):
         self._waiting_jobs.remove(job)
         work = self._create_work_job(job.qi, job.prod_idx, job.cache_fp, job.path)
         self._working_jobs.add(work)
+        if self._tile_cache is not None:
+            self._job_per_path[job.path] = work
         return [
             Msg(self._working_room_address, 'launch_job_with_token', work, token)
         ]
@@ -72,6 +87,8 @@ class ActorReader(object):
 
     def receive_cancel_this_query(self, qi):
         msgs = []
+        killed_jobs = []
+
         # Cancel waiting jobs
         jobs_to_kill = [
             job
@@ -81,6 +98,7 @@ class ActorReader(object):
         for job in jobs_to_kill:
             msgs += [Msg(self._waiting_room_address, 'unschedule_job', job)]
             self._waiting_jobs.remove(job)
+        killed_jobs += jobs_to_kill
 
         # Cancel working jobs
         jobs_to_kill = [
@@ -91,12 +109,27 @@ class ActorReader(object):
         for job in jobs_to_kill:
             msgs += [Msg(self._working_room_address, 'cancel_job', job)]
             self._working_jobs.remove(job)
+        killed_jobs += jobs_to_kill
 
         # Clean datastructures
         if qi in self._sample_array_per_prod_tile:
             del self._sample_array_per_prod_tile[qi]
             del self._missing_cache_fps_per_prod_tile[qi]
 
+        # Hand over the cancelled reads to the queries waiting for the same tiles
+        for path, followers in list(self._followers_per_path.items()):
+            followers[:] = [f for f in followers if f[0] != qi]
+        for job in killed_jobs:
+            if self._job_per_path.get(job.path) is job:
+                del self._job_per_path[job.path]
+                followers = self._followers_per_path[job.path]
+                if followers:
+                    follower_qi, prod_idx, cache_fp = followers.pop(0)
+                    msgs += self._schedule_read(follower_qi, prod_idx, cache_fp, job.path)
+        for path, followers in list(self._followers_per_path.items()):
+            if not followers:
+                del self._followers_per_path[path]
+
         return msgs
 
     def receive_die(self):
@@ -114,18 +147,44 @@ class ActorReader(object):
 
         self._sample_array_per_prod_tile.clear()
         self._missing_cache_fps_per_prod_tile.clear()
+        self._job_per_path.clear()
+        self._followers_per_path.clear()
         self._raster = None
         self._back_ds = None
+        self._shared_array_arena = None
+        self._tile_cache = None
         return msgs
 
     # ******************************************************************************************* **
+    def _schedule_read(self, qi, prod_idx, cache_fp, path):
+        msgs = []
+        if self._raster.io_pool is None:
+            work = self._create_work_job(qi, prod_idx, cache_fp, path)
+            work.func()
+            msgs += self._commit_work_result(work, None)
+        else:
+            wait = Wait(self, qi, prod_idx, cache_fp, path)
+            self._waiting_jobs.add(wait)
+            if self._tile_cache is not None:
+                self._job_per_path[path] = wait
+            msgs += [Msg(self._waiting_room_address, 'schedule_job', wait)]
+        return msgs
+
     def _create_work_job(self, qi, prod_idx, cache_fp, path):
+        dst_array = self._sample_array_of(qi, prod_idx)
+        return Work(self, qi, prod_idx, cache_fp, path, dst_array)
+
+    def _sample_array_of(self, qi, prod_idx):
         if prod_idx not in self._sample_array_per_prod_tile[qi]:
             # Allocate sample array
             # If no interpolation or nodata conversion is necessary, this is the array that will be
             # returned in the output queue
             full_sample_fp = qi.prod[prod_idx].sample_fp
-            self._sample_array_per_prod_tile[qi][prod_idx] = np.empty(
+            if self._shared_array_arena is None:
+                allocate = np.empty
+            else:
+                allocate = self._shared_array_arena.empty
+            self._sample_array_per_prod_tile[qi][prod_idx] = allocate(
                 np.r_[full_sample_fp.shape, len(qi.unique_channel_ids)],
                 self._raster.dtype,
             )
@@ -134,35 +193,71 @@ class ActorReader(object):
                 self._sample_array_per_prod_tile[qi][prod_idx]
             )
             self._missing_cache_fps_per_prod_tile[qi][prod_idx] = set(qi.prod[prod_idx].cache_fps)
-
-        dst_array = self._sample_array_per_prod_tile[qi][prod_idx]
-        return Work(self, qi, prod_idx, cache_fp, path, dst_array)
+        return self._sample_array_per_prod_tile[qi][prod_idx]
 
     def _commit_work_result(self, job, result):
         if self._raster.io_pool is None or self._same_address_space:
             assert result is None
+            arr = job.read_array
+        elif self._shared_array_arena is not None:
+            # The worker wrote to `job.read_array`
+            assert result is None
+            arr = job.read_array
         else:
-            job.dst_array_slice[:] = result
+            arr = result
+
+        if self._tile_cache is None:
+            if arr is not job.dst_array_slice:
+                job.dst_array_slice[:] = arr
+            return self._sampled(job.qi, job.prod_idx, job.cache_fp)
 
-        dst_array = self._sample_array_per_prod_tile[job.qi][job.prod_idx]
-        self._missing_cache_fps_per_prod_tile[job.qi][job.prod_idx].remove(job.cache_fp)
+        # The whole cache tile was read
+        for path in self._tile_cache.put(job.path, arr):
+            self._raster.debug_mngr.event(
+                'tile_cache_update', self._raster.facade_proxy, path,
+                'eviction', self._tile_cache.stats,
+            )
+        msgs = self._sample_from_tile(job.qi, job.prod_idx, job.cache_fp, arr)
+        self._job_per_path.pop(job.path, None)
+        for qi, prod_idx, cache_fp in self._followers_per_path.pop(job.path, []):
+            msgs += self._sample_from_tile(qi, prod_idx, cache_fp, arr)
+        return msgs
+
+    def _sample_from_tile(self, qi, prod_idx, cache_fp, tile):
+        dst_array = self._sample_array_of(qi, prod_idx)
+        full_sample_fp = qi.prod[prod_idx].sample_fp
+        sample_fp = full_sample_fp & cache_fp
+        _sample_tile(
+            tile, cache_fp, qi.unique_channel_ids, sample_fp,
+            dst_array[sample_fp.slice_in(full_sample_fp)],
+        )
+        return self._sampled(qi, prod_idx, cache_fp)
+
+    def _sampled(self, qi, prod_idx, cache_fp):
+        msgs = []
+        dst_array = self._sample_array_per_prod_tile[qi][prod_idx]
+        self._missing_cache_fps_per_prod_tile[qi][prod_idx].remove(cache_fp)
 
         # Perform fine grain garbage collection
-        if len(self._missing_cache_fps_per_prod_tile[job.qi][job.prod_idx]) == 0:
+        if len(self._missing_cache_fps_per_prod_tile[qi][prod_idx]) == 0:
             # Done reading for that `(qi, prod_idx)`
-            del self._missing_cache_fps_per_prod_tile[job.qi][job.prod_idx]
-            del self._sample_array_per_prod_tile[job.qi][job.prod_idx]
+            del self._missing_cache_fps_per_prod_tile[qi][prod_idx]
+            del self._sample_array_per_prod_tile[qi][prod_idx]
+            if self._raster.max_cache_bytes is not None:
+                # Record the accesses for the eviction of the least recently read cache files
+                msgs += [Msg('CacheSupervisor', 'cache_files_read', qi.prod[prod_idx].cache_fps)]
 
-        if len(self._missing_cache_fps_per_prod_tile[job.qi]) == 0:
+        if len(self._missing_cache_fps_per_prod_tile[qi]) == 0:
             # Not reading for that `qi`
-            del self._missing_cache_fps_per_prod_tile[job.qi]
-            del self._sample_array_per_prod_tile[job.qi]
+            del self._missing_cache_fps_per_prod_tile[qi]
+            del self._sample_array_per_prod_tile[qi]
 
-        return [
+        msgs += [
             Msg('CacheExtractor', 'sampled_a_cache_file_to_the_array',
-                job.qi, job.prod_idx, job.cache_fp, dst_array,
+                qi, prod_idx, cache_fp, dst_array,
             )
         ]
+        return msgs
 
     # ******************************************************************************************* **
 
@@ -180,31 +275,55 @@ class Work(PoolJobWorking):
         self.qi = qi
         self.prod_idx = prod_idx
         self.cache_fp = cache_fp
+        self.path = path
         raster = actor._raster
         full_sample_fp = qi.prod[prod_idx].sample_fp
-        sample_fp = full_sample_fp & cache_fp
-
-        dst_array_slice = dst_array[sample_fp.slice_in(full_sample_fp)]
-
-        if actor._raster.io_pool is None or actor._same_address_space:
+        self.sample_fp = full_sample_fp & cache_fp
+        self.dst_array_slice = dst_array[self.sample_fp.slice_in(full_sample_fp)]
+
+        if actor._tile_cache is None:
+            # Read the rectangle of the cache file needed by this query, straight to `dst_array`
+            read_fp = self.sample_fp
+            read_channel_ids = qi.unique_channel_ids
+            self.read_array = self.dst_array_slice
+        else:
+            # Read the whole cache file to store it in the tile cache
+            read_fp = cache_fp
+            read_channel_ids = list(range(len(raster)))
+            if actor._shared_array_arena is None:
+                allocate = np.empty
+            else:
+                allocate = actor._shared_array_arena.empty
+            self.read_array = allocate(np.r_[cache_fp.shape, len(raster)], raster.dtype)
+            raster.debug_mngr.event('object_allocated', self.read_array)
+
+        if raster.io_pool is None or actor._same_address_space:
             func = functools.partial(
-                _cache_file_read,
-                path, cache_fp, actor._raster.dtype, qi.unique_channel_ids, sample_fp, dst_array_slice,
+                _cache_file_read, raster.cache_format,
+                path, cache_fp, raster.dtype, read_channel_ids, read_fp, self.read_array,
                 actor._back_ds,
             )
+        elif actor._shared_array_arena is None:
+            self.read_array = None
+            func = functools.partial(
+                _cache_file_read, raster.cache_format,
+                path, cache_fp, raster.dtype, read_channel_ids, read_fp, None, None,
+            )
         else:
-            self.dst_array_slice = dst_array_slice
             func = functools.partial(
-                _cache_file_read,
-                path, cache_fp, actor._raster.dtype, qi.unique_channel_ids, sample_fp, None, None,
+                call_with_shared_arrays,
+                _cache_file_read, raster.cache_format,
+                path, cache_fp, raster.dtype, read_channel_ids, read_fp,
+                actor._shared_array_arena.handle_of(self.read_array), None,
             )
-        actor._raster.debug_mngr.event('object_allocated', func)
+        raster.debug_mngr.event('object_allocated', func)
         super().__init__(actor.address, func)
 
-def _cache_file_read(path, cache_fp, dtype, channel_ids, sample_fp, dst_opt, back_ds_opt):
+def _cache_file_read(cache_format, path, cache_fp, dtype, channel_ids, sample_fp, dst_opt, back_ds_opt):
     """
     Parameters
     ----------
+    cache_format: ACacheFormat
     path: str
     cache_fp: Footprint
         Should be the Footprint of the cache file
@@ -216,56 +335,24 @@ def _cache_file_read(path, cache_fp, dtype, channel_ids, sample_fp, dst_opt, bac
     dst_opt: None or np.ndarray
         optional destination for read
     """
+    # Allocate if ProcessPool
+    if dst_opt is None:
+        dst = np.empty(np.r_[sample_fp.shape, len(channel_ids)], dtype)
+        ret = dst
+    else:
+        dst = dst_opt
+        ret = None
 
-    allocator = lambda: BackGDALFileRaster.open_file(path, 'GTiff', [], 'r')
-    with contextlib.ExitStack() as stack:
-        if back_ds_opt is None:
-            gdal_ds = allocator()
-        else:
-            gdal_ds = stack.enter_context(back_ds_opt.acquire_driver_object(path, allocator))
-
-        # Check raster
-        if gdal_ds is None: # pragma: no cover
-            raise RuntimeError("Could not open {path}, what happend to it?".format(
-                path
-            ))
-        if (gdal_ds.RasterXSize, gdal_ds.RasterYSize) != tuple(cache_fp.rsize): # pragma: no cover
-            raise RuntimeError('{} was expected to have rsize {}, not {}'.format(
-                path,
-                tuple(cache_fp.rsize),
-                (gdal_ds.RasterXSize, gdal_ds.RasterYSize),
-            ))
-        stored_dtype = _tools.conv.dtype_of_gdt_downcast(gdal_ds.GetRasterBand(1).DataType)
-        if dtype != stored_dtype: # pragma: no cover
-            raise RuntimeError('{} was expected to have dtype {}, not {}'.format(
-                path,
-                dtype,
-                stored_dtype,
-            ))
-
-        # Allocate if ProcessPool
-        if dst_opt is None:
-            dst = np.empty(np.r_[sample_fp.shape, len(channel_ids)], dtype)
-            ret = dst
-        else:
-            dst = dst_opt
-            ret = None
-
-        # Perform read
-        rtlx, rtly = cache_fp.spatial_to_raster(sample_fp.tl)
-        for i, ci in enumerate(channel_ids):
-            b = gdal_ds.GetRasterBand(ci + 1)
-            a = b.ReadAsArray(
-                int(rtlx),
-                int(rtly),
-                int(sample_fp.rsizex),
-                int(sample_fp.rsizey),
-                buf_obj=dst[..., i],
-            )
-            del b
-            if a is None: # pragma: no cover
-                raise RuntimeError('Could not read channel_id {}'.format(ci))
-    del gdal_ds
+    # Perform read
+    cache_format.read(path, cache_fp, dtype, channel_ids, sample_fp, dst, back_ds_opt)
 
     # Return
     return ret
+
+def _sample_tile(tile, cache_fp, channel_ids, sample_fp, dst):
+    """Copy a rectangle of a cache tile read by the tile cache to `dst`"""
+    src = tile[sample_fp.slice_in(cache_fp)]
+    if len(channel_ids) == tile.shape[-1] and all(i == ci for i, ci in enumerate(channel_ids)):
+        dst[...] = src
+    else:
+        dst[...] = src[..., list(channel_ids)]
@@ -2,12 +2,9 @@ import os
 import uuid
 import functools
 
-import numpy as np
-
 from buzzard._actors.message import Msg
 from buzzard._actors.pool_job import CacheJobWaiting, PoolJobWorking
-
-create_raster = None # lazy import
+from buzzard._cache_checksum import checksum_file, format_checksum
 
 class ActorWriter(object):
     """Actor that takes care of writing to disk a cache tile that has been computed and merged."""
@@ -109,10 +106,11 @@ class Work(PoolJobWorking):
 
         func = functools.partial(
             _cache_file_write,
+            actor._raster.cache_format,
+            actor._raster.checksum,
             array,
             actor._raster.cache_dir,
             actor._raster.fname_prefix_of_cache_fp(cache_fp),
-            '.tif',
             cache_fp,
             {'nodata': actor._raster.nodata},
             actor._raster.wkt_stored,
@@ -121,33 +119,8 @@ class Work(PoolJobWorking):
 
         super().__init__(actor.address, func)
 
-def _checksum(fname, buffer_size=512 * 1024, dtype='uint64'):
-    # https://github.com/airware/buzzard/pull/39/#discussion_r239071556
-    dtype = np.dtype(dtype)
-    dtypesize = dtype.itemsize
-    assert buffer_size % dtypesize == 0
-    assert np.issubdtype(dtype, np.unsignedinteger)
-
-    acc = dtype.type(0)
-    with open(fname, "rb") as f:
-        with np.warnings.catch_warnings():
-            np.warnings.filterwarnings('ignore', r'overflow encountered')
-
-            for chunk in iter(lambda: f.read(buffer_size), b""):
-                head = np.frombuffer(chunk, dtype, count=len(chunk) // dtypesize)
-                head = np.add.reduce(head, dtype=dtype, initial=acc)
-                acc += head
-
-                tailsize = len(chunk) % dtypesize
-                if tailsize > 0:
-                    # This should only be needed for file's tail
-                    tail = chunk[-tailsize:] + b'\0' * (dtypesize - tailsize)
-                    tail = np.frombuffer(tail, dtype)
-                    acc += tail
-        return '{:016x}'.format(acc.item())
-
-def _cache_file_write(array,
-                      dir_path, filename_prefix, filename_suffix,
+def _cache_file_write(cache_format, checksum_algo, array,
+                      dir_path, filename_prefix,
                       cache_fp, channels_schema, sr):
     """Write this ndarray to disk.
 
@@ -159,14 +132,16 @@ def _cache_file_write(array,
 
     Parameters
     ----------
+    cache_format: ACacheFormat
+        How to store the cache file, it also provides the file extension
+    checksum_algo: str
+        Checksum algorithm used to name the file
     array: ndarray of shape (Y, X, C)
         What to write in the cache file
     dir_path: str
         Directory where to create the file
     filename_prefix: str
         First third of the file name
-    filename_suffix: str
-        Last thirf of the file name
     cache_fp: Footprint of shape (Y, X)
         Footprint of the file
     channels_schema: dict
@@ -174,30 +149,15 @@ def _cache_file_write(array,
     sr: str or None
         Spatial reference given by user when creating the cached recipe
     """
-    # Step 0. Lazily import buzzard to avoid circular dependencies
-    global create_raster
-    if create_raster is None:
-        from buzzard import create_raster
-
     # Step 1. Create/close file with a temporary name
+    filename_suffix = cache_format.extension
     src_path = os.path.join(
         dir_path, 'tmp_' + filename_prefix + str(uuid.uuid4()) + filename_suffix
     )
-
-    # TODO: Allow the user to choose the type and options of cache files
-    # TODO: Use driver-object allocator
-    options = [
-        "TILED=YES",
-        "BLOCKXSIZE=256", "BLOCKYSIZE=256",
-        "SPARSE_OK=TRUE",
-    ]
-    assert array.ndim == 3
-    with create_raster(src_path, cache_fp, array.dtype, array.shape[-1], channels_schema,
-                       sr=sr, options=options).close as r:
-        r.set_data(array, channels=None)
+    cache_format.write(src_path, array, cache_fp, channels_schema, sr)
 
     # Step 2. checksum hash file
-    checksum = _checksum(src_path)
+    checksum = format_checksum(checksum_algo, checksum_file(src_path, checksum_algo))
 
     # Step 3. move file to its final location
     dst_path = os.path.join(dir_path, filename_prefix + '_' + checksum + filename_suffix)
@@ -18,6 +18,10 @@ class ActorComputationAccumulator(object):
         self._raster = raster
         self._alive = True
         self._cache_tiles_accumulations = {}
+
+        # A computation is performed again when one of its cache tiles is evicted (see
+        # `max_cache_bytes`), it should not be accumulated for its other cache tiles
+        self._merged_cache_fps = set()
         self.address = '/Raster{}/ComputationAccumulator'.format(self._raster.uid)
 
     @property
@@ -25,10 +29,23 @@ class ActorComputationAccumulator(object):
         return self._alive
 
     # ******************************************************************************************* **
-    def receive_combine_this_array(self, compute_fp, array):
+    def receive_combine_this_array(self, qi, compute_fp, array):
+        """Receive message: A computation is done, slice it for all the cache tiles that
+        need it.
+
+        Parameters
+        ----------
+        qi: _actors.cached.query_infos.CachedQueryInfos
+            The query that triggered the computation. Unused since cache tiles are shared between
+            queries.
+        compute_fp: Footprint
+        array: ndarray
+        """
         msgs = []
 
         for cache_fp in self._raster.cache_fps_of_compute_fp[compute_fp]:
+            if cache_fp in self._merged_cache_fps:
+                continue
 
             # Fetch and update storage for that cache_fp
             if cache_fp in self._cache_tiles_accumulations:
@@ -39,7 +56,9 @@ class ActorComputationAccumulator(object):
                     'ready': {},
                 }
                 self._cache_tiles_accumulations[cache_fp] = store
-            assert compute_fp in store['missing']
+            if compute_fp not in store['missing']:
+                # Already received before the eviction of another cache tile
+                continue
             store['missing'].remove(compute_fp)
 
             compute_fp_part = compute_fp & cache_fp
@@ -57,13 +76,26 @@ class ActorComputationAccumulator(object):
                     Msg('Merger', 'merge_those_arrays', cache_fp, store['ready'])
                 ]
                 del self._cache_tiles_accumulations[cache_fp]
+                self._merged_cache_fps.add(cache_fp)
         return msgs
 
+    def receive_cache_files_evicted(self, cache_fps):
+        """Receive message: Those cache files were removed to respect the cache budget, they will be
+        computed again if needed
+
+        Parameters
+        ----------
+        cache_fps: sequence of Footprint
+        """
+        self._merged_cache_fps.difference_update(cache_fps)
+        return []
+
     def receive_die(self):
         """Receive message: The raster was killed"""
         assert self._alive
         self._alive = False
         self._cache_tiles_accumulations.clear()
+        self._merged_cache_fps.clear()
         self._raster = None
         return []
 
@@ -8,6 +8,7 @@ class ActorComputationGate1(object):
 
     def __init__(self, raster):
         self._raster = raster
+        self._memory_budget = raster.back_ds.memory_budget
         self._queries = {}
         self._alive = True
         self.address = '/Raster{}/ComputationGate1'.format(self._raster.uid)
@@ -34,7 +35,7 @@ class ActorComputationGate1(object):
             # `receive_output_queue_update` happened before this call
             q = self._queries[qi]
         else:
-            q = _Query()
+            q = _Query(self._memory_budget.enabled)
             self._queries[qi] = q
         msgs += self._allow(qi, q)
         return msgs
@@ -76,7 +77,7 @@ class ActorComputationGate1(object):
             if qi in self._queries:
                 q = self._queries[qi]
             else:
-                q = _Query()
+                q = _Query(self._memory_budget.enabled)
                 self._queries[qi] = q
             q.pulled_count = pulled_count
             if qicc is not None:
@@ -86,6 +87,29 @@ class ActorComputationGate1(object):
 
         return msgs
 
+    def receive_productions_allowed(self, qi, allowed_count):
+        """Receive message: The ProductionGate allowed more productions to start, the Dataset
+        having a memory budget.
+
+        Parameters
+        ----------
+        qi: _actors.cached.query_infos.QueryInfos
+        allowed_count: int
+            How many productions were allowed to start
+        """
+        msgs = []
+
+        if qi in self._queries:
+            q = self._queries[qi]
+        else:
+            q = _Query(True)
+            self._queries[qi] = q
+        q.prod_allowed_count = allowed_count
+        if qi.cache_computation is not None:
+            msgs += self._allow(qi, q)
+
+        return msgs
+
     def receive_cancel_this_query(self, qi):
         """Receive message: One query was dropped
 
@@ -112,6 +136,9 @@ class ActorComputationGate1(object):
         qicc = qi.cache_computation
 
         max_prod_idx_allowed = q.pulled_count + qi.max_queue_size - 1
+        if q.prod_allowed_count is not None:
+            # With a memory budget, only compute for the productions allowed to start
+            max_prod_idx_allowed = min(max_prod_idx_allowed, q.prod_allowed_count - 1)
         i = q.allowed_count
         while True:
             # list_of_compute_fp being sorted by priority, `min_prod_idx` is increasing between loops
@@ -133,7 +160,8 @@ class ActorComputationGate1(object):
     # ******************************************************************************************* **
 
 class _Query(object):
-    def __init__(self):
+    def __init__(self, memory_budget_enabled):
         self.pulled_count = 0
         self.allowed_count = 0
         self.produced_count = 0
+        self.prod_allowed_count = 0 if memory_budget_enabled else None
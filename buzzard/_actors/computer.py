@@ -1,32 +1,46 @@
 import collections
-import multiprocessing as mp
-import multiprocessing.pool
 import functools
 
 import numpy as np
 
 from buzzard._actors.message import Msg
 from buzzard._actors.pool_job import ProductionJobWaiting, PoolJobWorking
+from buzzard._dataset_shared_array_arena import (
+    SharedArrayHandle, call_into_shared_array
+)
+from buzzard import _tools
 
 class ActorComputer(object):
     """Actor that takes care of sheduling computations by using user's `compute_array` function"""
 
-    def __init__(self, raster):
+    def __init__(self, raster, cached):
+        """
+        Parameters
+        ----------
+        raster: _a_recipe_raster.ABackRecipeRaster
+        cached: bool
+            Are the computations written to cache files
+        """
         self._raster = raster
         self._alive = True
         computation_pool = raster.computation_pool
         if computation_pool is not None:
             self._waiting_room_address = '/Pool{}/WaitingRoom'.format(id(computation_pool))
             self._working_room_address = '/Pool{}/WorkingRoom'.format(id(computation_pool))
-            if isinstance(computation_pool, mp.pool.ThreadPool):
-                self._same_address_space = True
-            elif isinstance(computation_pool, mp.pool.Pool):
-                self._same_address_space = False
-            else: # pragma: no cover
-                assert False, 'Type should be checked in facade'
+            self._same_address_space = _tools.pool_same_address_space(computation_pool)
+        arena = raster.back_ds.shared_array_arena
+        if computation_pool is not None and not self._same_address_space and arena.available:
+            # Arrays are exchanged with the process pool through shared memory instead of pipes
+            self._shared_array_arena = arena
+        else:
+            self._shared_array_arena = None
         self._waiting_jobs_per_query = collections.defaultdict(set)
         self._working_jobs = set()
 
+        # With a cache, a `compute_fp` is computed at most once during the lifetime of a raster and
+        # the result outlives the queries that requested it. Without a cache, each query performs
+        # its own computations.
+        self._is_cached = cached
         self._performed_computations = set() # type: Set[Footprint]
         self.address = '/Raster{}/Computer'.format(self._raster.uid)
 
@@ -42,11 +56,12 @@ class ActorComputer(object):
         if self._raster.computation_pool is None:
             work = self._create_work_job(qi, compute_idx)
             compute_fp = qi.cache_computation.list_of_compute_fp[compute_idx]
-            if compute_fp not in self._performed_computations:
+            if not self._is_cached or compute_fp not in self._performed_computations:
                 res = work.func()
                 res = self._normalize_user_result(compute_fp, res)
                 self._raster.debug_mngr.event('object_allocated', res)
-                self._performed_computations.add(compute_fp)
+                if self._is_cached:
+                    self._performed_computations.add(compute_fp)
                 msgs += self._commit_work_result(work, res)
 
         else:
@@ -66,9 +81,10 @@ class ActorComputer(object):
         work = self._create_work_job(job.qi, job.compute_idx)
 
         compute_fp = job.qi.cache_computation.list_of_compute_fp[job.compute_idx]
-        if compute_fp not in self._performed_computations:
+        if not self._is_cached or compute_fp not in self._performed_computations:
             msgs += [Msg(self._working_room_address, 'launch_job_with_token', work, token)]
-            self._performed_computations.add(compute_fp)
+            if self._is_cached:
+                self._performed_computations.add(compute_fp)
             self._working_jobs.add(work)
         else:
             msgs += [Msg(self._working_room_address, 'salvage_token', token)]
@@ -76,11 +92,50 @@ class ActorComputer(object):
         return msgs
 
     def receive_job_done(self, job, result):
+        if isinstance(result, SharedArrayHandle):
+            # The worker wrote the result to shared memory
+            result = job.dst_array
         result = self._normalize_user_result(job.compute_fp, result)
         self._raster.debug_mngr.event('object_allocated', result)
         self._working_jobs.remove(job)
         return self._commit_work_result(job, result)
 
+    def receive_cache_files_evicted(self, cache_fps):
+        """Receive message: Those cache files were removed to respect the cache budget, their
+        computations should be performed again if needed
+
+        Parameters
+        ----------
+        cache_fps: sequence of Footprint
+        """
+        for cache_fp in cache_fps:
+            self._performed_computations.difference_update(
+                self._raster.compute_fps_of_cache_fp[cache_fp]
+            )
+        return []
+
+    def receive_cache_tiles_dropped(self, cache_fps):
+        """Receive message: No query of this process needs those cache tiles anymore, which of them
+        will still be written?
+
+        A cache tile is written once all its computations were performed, the ones already
+        launched are never cancelled.
+
+        Parameters
+        ----------
+        cache_fps: sequence of Footprint
+        """
+        abandoned_cache_fps = [
+            cache_fp
+            for cache_fp in cache_fps
+            if not self._performed_computations.issuperset(
+                self._raster.compute_fps_of_cache_fp[cache_fp]
+            )
+        ]
+        if not abandoned_cache_fps:
+            return []
+        return [Msg('CacheSupervisor', 'cache_tiles_abandoned', abandoned_cache_fps)]
+
     def receive_cancel_this_query(self, qi):
         """Receive message: One query was dropped
 
@@ -92,6 +147,18 @@ class ActorComputer(object):
         for job in self._waiting_jobs_per_query[qi]:
             msgs += [Msg(self._waiting_room_address, 'unschedule_job', job)]
         del self._waiting_jobs_per_query[qi]
+
+        if not self._is_cached:
+            # Without a cache, the ongoing computations of this query are useless
+            jobs_to_kill = [
+                job
+                for job in self._working_jobs
+                if job.qi == qi
+            ]
+            for job in jobs_to_kill:
+                msgs += [Msg(self._working_room_address, 'cancel_job', job)]
+                self._working_jobs.remove(job)
+
         return msgs
 
     def receive_die(self):
@@ -114,6 +181,7 @@ class ActorComputer(object):
         self._working_jobs.clear()
 
         self._raster = None
+        self._shared_array_arena = None
         return msgs
 
     # ******************************************************************************************* **
@@ -123,7 +191,7 @@ class ActorComputer(object):
         )
 
     def _commit_work_result(self, work_job, res):
-        return [Msg('ComputationAccumulator', 'combine_this_array', work_job.compute_fp, res)]
+        return [Msg('ComputationAccumulator', 'combine_this_array', work_job.qi, work_job.compute_fp, res)]
 
     def _normalize_user_result(self, compute_fp, res):
         if not isinstance(res, np.ndarray): # pragma: no cover
@@ -165,6 +233,7 @@ class Work(PoolJobWorking):
 
         compute_fp = qicc.list_of_compute_fp[compute_idx]
 
+        self.qi = qi
         self.compute_fp = compute_fp
 
         primitive_arrays = {}
@@ -183,7 +252,7 @@ class Work(PoolJobWorking):
                 primitive_arrays,
                 actor._raster.facade_proxy
             )
-        else:
+        elif actor._shared_array_arena is None:
             func = functools.partial(
                 actor._raster.compute_array,
                 compute_fp,
@@ -191,6 +260,20 @@ class Work(PoolJobWorking):
                 primitive_arrays,
                 None,
             )
+        else:
+            arena = actor._shared_array_arena
+            self.dst_array = arena.empty(
+                np.r_[compute_fp.shape, len(actor._raster)], actor._raster.dtype,
+            )
+            func = functools.partial(
+                call_into_shared_array,
+                arena.handle_of(self.dst_array),
+                actor._raster.compute_array,
+                compute_fp,
+                primitive_footprints,
+                {k: arena.share(v) for k, v in primitive_arrays.items()},
+                None,
+            )
         actor._raster.debug_mngr.event('object_allocated', func)
 
         super().__init__(actor.address, func)
@@ -67,9 +67,11 @@ class Msg(object):
         )
 
 class DroppableMsg(Msg):
-    pass
+    __slots__ = []
 
 class AgingMsg(Msg):
+    __slots__ = ['id_args']
+
     def __init__(self, address, title, id_args, other_args):
         self.id_args = id_args
         super().__init__(address, title, *(list(id_args) + list(other_args)))
@@ -0,0 +1,83 @@
+import collections
+
+from buzzard._actors.message import Msg
+
+class ActorComputationAccumulator(object):
+    """Actor that takes care of accumulating computed slices needed
+    to build the sample array of 1 production array
+    """
+
+    def __init__(self, raster):
+        self._raster = raster
+        self._alive = True
+        self._sample_accumulations_per_query = collections.defaultdict(dict)
+        self.address = '/Raster{}/ComputationAccumulator'.format(self._raster.uid)
+
+    @property
+    def alive(self):
+        return self._alive
+
+    # ******************************************************************************************* **
+    def receive_combine_this_array(self, qi, compute_fp, array):
+        """Receive message: A computation is done, store it for all the production arrays that
+        need it.
+
+        Parameters
+        ----------
+        qi: _actors.nocache.query_infos.NocacheQueryInfos
+        compute_fp: Footprint
+        array: ndarray
+        """
+        msgs = []
+        accumulations = self._sample_accumulations_per_query[qi]
+
+        for prod_idx in sorted(qi.dict_of_prod_idxs_per_compute_fp[compute_fp]):
+            pi = qi.prod[prod_idx]
+
+            # Fetch and update storage for that prod_idx
+            if prod_idx in accumulations:
+                store = accumulations[prod_idx]
+            else:
+                store = {
+                    'missing': set(pi.compute_fps),
+                    'ready': {},
+                }
+                accumulations[prod_idx] = store
+            assert compute_fp in store['missing']
+            store['missing'].remove(compute_fp)
+
+            # The whole computed array is given to the merge function, the parts of overlapping
+            # computation tiles inside the sample footprint may be equal
+            store['ready'][compute_fp] = array
+
+            # Send news to merger
+            if len(store['missing']) == 0:
+                msgs += [
+                    Msg('Merger', 'merge_those_arrays', qi, prod_idx, store['ready'])
+                ]
+                del accumulations[prod_idx]
+
+        if len(accumulations) == 0:
+            del self._sample_accumulations_per_query[qi]
+        return msgs
+
+    def receive_cancel_this_query(self, qi):
+        """Receive message: One query was dropped
+
+        Parameters
+        ----------
+        qi: _actors.nocache.query_infos.NocacheQueryInfos
+        """
+        if qi in self._sample_accumulations_per_query:
+            del self._sample_accumulations_per_query[qi]
+        return []
+
+    def receive_die(self):
+        """Receive message: The raster was killed"""
+        assert self._alive
+        self._alive = False
+        self._sample_accumulations_per_query.clear()
+        self._raster = None
+        return []
+
+    # ******************************************************************************************* **
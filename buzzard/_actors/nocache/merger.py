@@ -0,0 +1,219 @@
+import functools
+
+import numpy as np
+
+from buzzard._actors.message import Msg
+from buzzard._actors.pool_job import ProductionJobWaiting, PoolJobWorking
+from buzzard._dataset_shared_array_arena import (
+    SharedArrayHandle, call_into_shared_array
+)
+from buzzard import _tools
+
+class ActorMerger(object):
+    """Actor that takes care of merging several arrays into one sample array"""
+
+    def __init__(self, raster):
+        self._raster = raster
+        self._alive = True
+        merge_pool = raster.merge_pool
+        if merge_pool is not None:
+            self._waiting_room_address = '/Pool{}/WaitingRoom'.format(id(merge_pool))
+            self._working_room_address = '/Pool{}/WorkingRoom'.format(id(merge_pool))
+            self._same_address_space = _tools.pool_same_address_space(merge_pool)
+        arena = raster.back_ds.shared_array_arena
+        if merge_pool is not None and not self._same_address_space and arena.available:
+            # Arrays are exchanged with the process pool through shared memory instead of pipes
+            self._shared_array_arena = arena
+        else:
+            self._shared_array_arena = None
+        self._waiting_jobs = set()
+        self._working_jobs = set()
+
+        self.address = '/Raster{}/Merger'.format(self._raster.uid)
+
+    @property
+    def alive(self):
+        return self._alive
+
+    # ******************************************************************************************* **
+    def receive_merge_those_arrays(self, qi, prod_idx, array_per_fp):
+        """Receive message: All the computations needed by a sample array are ready
+
+        Parameters
+        ----------
+        qi: _actors.nocache.query_infos.NocacheQueryInfos
+        prod_idx: int
+        array_per_fp: dict of Footprint to ndarray
+            The computed arrays that overlap the sample footprint
+        """
+        msgs = []
+        assert len(array_per_fp) > 0
+        sample_fp = qi.prod[prod_idx].sample_fp
+
+        # A single computation that covers the sample footprint is sliced without merge
+        arr = None
+        if len(array_per_fp) == 1:
+            (compute_fp, compute_arr), = array_per_fp.items()
+            if compute_fp.almost_equals(sample_fp):
+                arr = compute_arr
+            elif compute_fp.contains(sample_fp):
+                arr = compute_arr[sample_fp.slice_in(compute_fp)]
+
+        if arr is not None:
+            msgs += [
+                Msg('Producer', 'merged_the_sample_array', qi, prod_idx, arr)
+            ]
+        elif self._raster.merge_pool is None:
+            work = self._create_work_job(qi, prod_idx, sample_fp, array_per_fp)
+            res = work.func()
+            res = self._normalize_user_result(sample_fp, res)
+            msgs += self._commit_work_result(work, res)
+        else:
+            wait = Wait(self, qi, prod_idx, sample_fp, array_per_fp)
+            self._waiting_jobs.add(wait)
+            msgs += [Msg(self._waiting_room_address, 'schedule_job', wait)]
+
+        return msgs
+
+    def receive_token_to_working_room(self, job, token):
+        self._waiting_jobs.remove(job)
+        work = self._create_work_job(job.qi, job.prod_idx, job.sample_fp, job.array_per_fp)
+        self._working_jobs.add(work)
+        return [
+            Msg(self._working_room_address, 'launch_job_with_token', work, token)
+        ]
+
+    def receive_job_done(self, job, result):
+        self._working_jobs.remove(job)
+        if isinstance(result, SharedArrayHandle):
+            # The worker wrote the result to shared memory
+            result = job.dst_array
+        result = self._normalize_user_result(job.sample_fp, result)
+        return self._commit_work_result(job, result)
+
+    def receive_cancel_this_query(self, qi):
+        """Receive message: One query was dropped
+
+        Parameters
+        ----------
+        qi: _actors.nocache.query_infos.NocacheQueryInfos
+        """
+        msgs = []
+
+        # Cancel waiting jobs
+        jobs_to_kill = [
+            job
+            for job in self._waiting_jobs
+            if job.qi == qi
+        ]
+        for job in jobs_to_kill:
+            msgs += [Msg(self._waiting_room_address, 'unschedule_job', job)]
+            self._waiting_jobs.remove(job)
+
+        # Cancel working jobs
+        jobs_to_kill = [
+            job
+            for job in self._working_jobs
+            if job.qi == qi
+        ]
+        for job in jobs_to_kill:
+            msgs += [Msg(self._working_room_address, 'cancel_job', job)]
+            self._working_jobs.remove(job)
+
+        return msgs
+
+    def receive_die(self):
+        """Receive message: The raster was killed"""
+        assert self._alive
+        self._alive = False
+
+        msgs = []
+        for job in self._waiting_jobs:
+            msgs += [Msg(self._waiting_room_address, 'unschedule_job', job)]
+        for job in self._working_jobs:
+            msgs += [Msg(self._working_room_address, 'cancel_job', job)]
+        self._waiting_jobs.clear()
+        self._working_jobs.clear()
+        self._raster = None
+        self._shared_array_arena = None
+
+        return msgs
+
+    # ******************************************************************************************* **
+    def _create_work_job(self, qi, prod_idx, sample_fp, array_per_fp):
+        return Work(
+            self, qi, prod_idx, sample_fp, array_per_fp
+        )
+
+    def _commit_work_result(self, job, arr):
+        return [
+            Msg('Producer', 'merged_the_sample_array', job.qi, job.prod_idx, arr)
+        ]
+
+    def _normalize_user_result(self, sample_fp, res):
+        try:
+            res = np.atleast_3d(res)
+        except: # pragma: no cover
+            raise ValueError("Result of recipe's `merge_arrays` has type {}, it can't be converted to ndarray".format(
+                type(res)
+            ))
+        y, x, c = res.shape
+        if (y, x) != tuple(sample_fp.shape): # pragma: no cover
+            raise ValueError("Result of recipe's `merge_arrays` has shape `{}`, should start with {}".format(
+                res.shape,
+                sample_fp.shape,
+            ))
+        if c != len(self._raster): # pragma: no cover
+            raise ValueError("Result of recipe's `merge_arrays` has shape `{}`, should have {} bands".format(
+                res.shape,
+                len(self._raster),
+            ))
+        res = res.astype(self._raster.dtype, copy=False)
+        return res
+
+    # ******************************************************************************************* **
+
+class Wait(ProductionJobWaiting):
+    def __init__(self, actor, qi, prod_idx, sample_fp, array_per_fp):
+        self.qi = qi
+        self.prod_idx = prod_idx
+        self.sample_fp = sample_fp
+        self.array_per_fp = array_per_fp
+        super().__init__(actor.address, qi, prod_idx, 3, sample_fp)
+
+class Work(PoolJobWorking):
+    def __init__(self, actor, qi, prod_idx, sample_fp, array_per_fp):
+        self.qi = qi
+        self.prod_idx = prod_idx
+        self.sample_fp = sample_fp
+
+        if actor._raster.merge_pool is None or actor._same_address_space:
+            func = functools.partial(
+                actor._raster.merge_arrays,
+                sample_fp,
+                array_per_fp,
+                actor._raster.facade_proxy,
+            )
+        elif actor._shared_array_arena is None:
+            func = functools.partial(
+                actor._raster.merge_arrays,
+                sample_fp,
+                array_per_fp,
+                None
+            )
+        else:
+            arena = actor._shared_array_arena
+            self.dst_array = arena.empty(
+                np.r_[sample_fp.shape, len(actor._raster)], actor._raster.dtype,
+            )
+            func = functools.partial(
+                call_into_shared_array,
+                arena.handle_of(self.dst_array),
+                actor._raster.merge_arrays,
+                sample_fp,
+                {fp: arena.share(arr) for fp, arr in array_per_fp.items()},
+                None,
+            )
+        actor._raster.debug_mngr.event('object_allocated', func)
+
+        super().__init__(actor.address, func)
@@ -0,0 +1,140 @@
+from buzzard._actors.message import Msg
+
+import collections
+
+class ActorProducer(object):
+    """Actor that takes care of waiting for sample arrays to be computed and launching
+    resamplings
+    """
+
+    def __init__(self, raster):
+        self._raster = raster
+        self._alive = True
+
+        self._produce_per_query = collections.defaultdict(dict) # type: Mapping[NocacheQueryInfos, Mapping[int, _ProdArray]]
+        self.address = '/Raster{}/Producer'.format(self._raster.uid)
+
+    @property
+    def alive(self):
+        return self._alive
+
+    # ******************************************************************************************* **
+    def receive_make_this_array(self, qi, prod_idx):
+        """Receive message: Start making this array
+
+        Parameters
+        ----------
+        qi: _actors.nocache.query_infos.NocacheQueryInfos
+        prod_idx: int
+        """
+        msgs = []
+
+        pi = qi.prod[prod_idx] # type: NocacheProduceInfos
+        assert pi.share_area is (len(pi.compute_fps) != 0)
+
+        for resample_fp in pi.resample_fps:
+            sample_fp = pi.resample_sample_dep_fp[resample_fp]
+            if sample_fp is None:
+                # Start the 'resampling' step of the resample_fp fully outside of raster
+                msgs += [Msg(
+                    'Resampler', 'resample_and_accumulate',
+                    qi, prod_idx, None, resample_fp, None,
+                )]
+
+        if prod_idx in self._produce_per_query[qi]:
+            # The sample array was computed before this production was allowed
+            pr = self._produce_per_query[qi][prod_idx]
+            assert pr.sample_array is not None
+            msgs += self._resample(qi, prod_idx, pr.sample_array)
+            pr.sample_array = None
+        else:
+            pr = _ProdArray()
+            self._produce_per_query[qi][prod_idx] = pr
+        pr.allowed = True
+
+        return msgs
+
+    def receive_merged_the_sample_array(self, qi, prod_idx, array):
+        """Receive message: The sample array of that output array was computed
+
+        Parameters
+        ----------
+        qi: _actors.nocache.query_infos.NocacheQueryInfos
+        prod_idx: int
+        array: ndarray
+            The sample array, with all the channels of the raster
+        """
+        msgs = []
+
+        # Only keep the channels requested, this also performs a copy that allows the resampler to
+        # work in-place
+        array = array[..., list(qi.unique_channel_ids)]
+
+        if prod_idx in self._produce_per_query[qi]:
+            pr = self._produce_per_query[qi][prod_idx]
+            assert pr.allowed
+            msgs += self._resample(qi, prod_idx, array)
+        else:
+            # The computations needed by this array were performed for a previous array, wait for
+            # the `ProductionGate` before starting the resampling
+            pr = _ProdArray()
+            pr.sample_array = array
+            self._produce_per_query[qi][prod_idx] = pr
+
+        return msgs
+
+    def receive_made_this_array(self, qi, prod_idx, array):
+        """Receive message: Done creating an output array"""
+        del self._produce_per_query[qi][prod_idx]
+        if len(self._produce_per_query[qi]) == 0:
+            del self._produce_per_query[qi]
+        return [Msg(
+            'QueriesHandler', 'made_this_array', qi, prod_idx, array
+        )]
+
+    def receive_cancel_this_query(self, qi):
+        """Receive message: One query was dropped
+
+        Parameters
+        ----------
+        qi: _actors.nocache.query_infos.NocacheQueryInfos
+        """
+        if qi in self._produce_per_query:
+            del self._produce_per_query[qi]
+        return []
+
+    def receive_die(self):
+        """Receive message: The raster was killed"""
+        assert self._alive
+        self._alive = False
+
+        self._produce_per_query.clear()
+        self._raster = None
+        return []
+
+    # ******************************************************************************************* **
+    @staticmethod
+    def _resample(qi, prod_idx, array):
+        msgs = []
+        pi = qi.prod[prod_idx]
+
+        for resample_fp in pi.resample_fps:
+            subsample_fp = pi.resample_sample_dep_fp[resample_fp]
+            if subsample_fp is None:
+                continue
+            subsample_array = array[subsample_fp.slice_in(pi.sample_fp)]
+
+            assert subsample_array.shape[:2] == tuple(subsample_fp.shape)
+            msgs += [Msg(
+                'Resampler', 'resample_and_accumulate',
+                qi, prod_idx, subsample_fp, resample_fp, subsample_array,
+            )]
+
+        return msgs
+
+    # ******************************************************************************************* **
+
+class _ProdArray(object):
+    def __init__(self):
+        self.allowed = False
+        self.sample_array = None
@@ -0,0 +1,203 @@
+from typing import (
+    Union, cast, NamedTuple, FrozenSet, Tuple, Mapping,
+)
+import collections
+from types import MappingProxyType
+
+import numpy as np
+
+from buzzard._actors.cached.query_infos import (
+    ComputationFootprint, SampleFootprint, ResampleFootprint, ProductionFootprint,
+)
+
+class NocacheProduceInfos(NamedTuple(
+    'NocacheProduceInfos', [
+        ('fp', ProductionFootprint),
+        ('same_grid', bool),
+        ('share_area', bool),
+        ('sample_fp', Union[None, SampleFootprint]),
+        ('compute_fps', FrozenSet[ComputationFootprint]),
+        ('resample_fps', Tuple[ResampleFootprint, ...]),
+        ('resample_sample_dep_fp', Mapping[ResampleFootprint, Union[None, SampleFootprint]]),
+    ],
+)):
+    """Object that stores many informations about an array to produce"""
+
+class NocacheQueryInfos(object):
+    """Object that stores many informations about a query. Most attributes are immutable.
+    An instance of this class identifies a query among the actors, hence the
+    `__hash__` implementation.
+
+    Classes' attributes are typed for documentation purposes and for validation with `mypy`
+    """
+
+    def __init__(self, raster, list_of_prod_fp,
+                 channel_ids, is_flat, dst_nodata, interpolation,
+                 max_queue_size,
+                 parent_uid, key_in_parent):
+        # Mutable attributes ******************************************************************** **
+        # Attributes that relates a query to a single optional computation phase
+        # The name is shared with `CachedQueryInfos` to reuse the computation actors
+        self.cache_computation = None # type: Union[None, NocacheComputationInfos]
+
+        # Immutable attributes ****************************************************************** **
+        self.parent_uid = parent_uid
+        self.key_in_parent = key_in_parent
+
+        # The parameters given by user in invocation
+        self.channel_ids = channel_ids
+        self.is_flat = is_flat # type: bool
+        self.unique_channel_ids = []
+        for bi in channel_ids:
+            if bi not in self.unique_channel_ids:
+                self.unique_channel_ids.append(bi)
+        self.unique_channel_ids = tuple(self.unique_channel_ids)
+
+        self.dst_nodata = dst_nodata # type: Union[int, float]
+        self.interpolation = interpolation # type: str
+
+        # Output max queue size (Parameter given to queue.Queue)
+        self.max_queue_size = max_queue_size # type: int
+
+        # How many arrays are requested
+        self.produce_count = len(list_of_prod_fp) # type: int
+
+        # Build NocacheProduceInfos objects ************************************
+        prod = []
+        for prod_fp in list_of_prod_fp:
+            if not raster.automatic_remapping:
+                # `compute_array` will be called on `prod_fp` itself, there is no sampling nor
+                # resampling to perform, the produced array will be forwarded as is
+                sample_fp = cast(SampleFootprint, prod_fp)
+                resample_fp = cast(ResampleFootprint, prod_fp)
+                prod.append(NocacheProduceInfos(
+                    prod_fp, True, True, sample_fp,
+                    frozenset(raster.compute_fps_of_fp(sample_fp)),
+                    (resample_fp,), MappingProxyType({resample_fp: sample_fp}),
+                ))
+                continue
+
+            same_grid = prod_fp.same_grid(raster.fp)
+            share_area = prod_fp.share_area(raster.fp)
+
+            if not share_area:
+                # Resampling will be performed in one pass, on the scheduler
+                resample_fp = cast(ResampleFootprint, prod_fp)
+                prod.append(NocacheProduceInfos(
+                    prod_fp, same_grid, share_area, None, frozenset(),
+                    (resample_fp,), MappingProxyType({resample_fp: None}),
+                ))
+                continue
+
+            if same_grid:
+                # Remapping will be performed in one pass, on the scheduler
+                sample_fp = raster.fp & prod_fp
+                resample_fps = [cast(ResampleFootprint, prod_fp)]
+                sample_dep_fp = {
+                    resample_fps[0]: sample_fp
+                }
+            else:
+                sample_fp = raster.build_sampling_footprint_to_remap_interpolate(prod_fp, interpolation)
+
+                if raster.max_resampling_size is None:
+                    # Remapping will be performed in one pass, on a Pool
+                    resample_fps = [cast(ResampleFootprint, prod_fp)]
+                    sample_dep_fp = {
+                        resample_fps[0]: sample_fp
+                    }
+                else:
+                    # Resampling will be performed in several passes, on a Pool
+                    rsize = np.maximum(prod_fp.rsize, sample_fp.rsize)
+                    countx, county = np.ceil(rsize / raster.max_resampling_size).astype(int)
+                    resample_fps = prod_fp.tile_count(
+                        countx, county, boundary_effect='shrink'
+                    ).flatten().tolist()
+                    sample_dep_fp = {
+                        resample_fp: (
+                            raster.build_sampling_footprint_to_remap_interpolate(resample_fp, interpolation)
+                            if resample_fp.share_area(raster.fp) else
+                            None
+                        )
+                        for resample_fp in resample_fps
+                    }
+
+            compute_fps = frozenset(raster.compute_fps_of_fp(sample_fp))
+            assert len(compute_fps) > 0
+            prod.append(NocacheProduceInfos(
+                prod_fp, same_grid, share_area, sample_fp, compute_fps,
+                tuple(resample_fps), MappingProxyType(sample_dep_fp),
+            ))
+
+        self.prod = tuple(prod) # type: Tuple[NocacheProduceInfos, ...]
+
+        # Misc *****************************************************************
+        # The dict of compute Footprint to set of production idxs
+        # For each `compute_fp`, the set of prod_idx that need this computation
+        self.dict_of_prod_idxs_per_compute_fp = collections.defaultdict(set) # type: Mapping[ComputationFootprint, set]
+        for i, pi in enumerate(self.prod):
+            for compute_fp in pi.compute_fps:
+                self.dict_of_prod_idxs_per_compute_fp[compute_fp].add(i)
+        for k, v in self.dict_of_prod_idxs_per_compute_fp.items():
+            self.dict_of_prod_idxs_per_compute_fp[k] = frozenset(v)
+        self.dict_of_prod_idxs_per_compute_fp = MappingProxyType(self.dict_of_prod_idxs_per_compute_fp)
+
+        # *************************************************************************************** **
+    def __hash__(self):
+        return id(self)
+
+    def __eq__(self, other):
+        return self is other
+
+class NocacheComputationInfos(object):
+    """Object that store informations about the computation phase of a query.
+    Instanciating this object also starts the primitives collection. Primitive collection consists
+    of creating new raster queries to primitive rasters.
+
+    This object is instanciated for each query that requires at least one computation. It exposes
+    the same attributes as `CacheComputationInfos` so that the computation actors can be shared
+    between the cached and the nocache recipes.
+    """
+
+    def __init__(self, qi, raster):
+        """
+        Parameters
+        ----------
+        qi: NocacheQueryInfos
+        raster: _nocache_raster_recipe.BackNocacheRasterRecipe
+        """
+
+        # Mutable **************************************************************
+        self.collected_count = 0 # type: int
+
+        # Immutable ************************************************************
+        # Step 1 - List compute Footprints sorted by priority
+        self.dict_of_min_prod_idx_per_compute_fp = {
+            compute_fp: min(prod_idxs)
+            for compute_fp, prod_idxs in qi.dict_of_prod_idxs_per_compute_fp.items()
+        } # type: Mapping[ComputationFootprint, int]
+
+        # Sort those tiles by using the same scheme as the WaitingRoom does
+        l = sorted(
+            self.dict_of_min_prod_idx_per_compute_fp.keys(),
+            key=lambda fp: (self.dict_of_min_prod_idx_per_compute_fp[fp], -fp.cy, +fp.cx),
+        )
+        self.list_of_compute_fp = tuple(l) # type: Tuple[ComputationFootprint, ...]
+        self.to_collect_count = len(self.list_of_compute_fp) # type: int
+        del l
+
+        # Step 2 - List primtive Footprints
+        self.primitive_fps_per_primitive = {
+            name: tuple([func(fp) for fp in self.list_of_compute_fp])
+            for name, func in raster.convert_footprint_per_primitive.items()
+        }
+
+        # Step 3 - Start collection phase
+        self.primitive_queue_per_primitive = {
+            name: prim_back.queue_data(
+                self.primitive_fps_per_primitive[name],
+                parent_uid=raster.uid,
+                key_in_parent=(qi, name),
+                **raster.primitives_kwargs[name]
+            )
+            for name, prim_back in raster.primitives_back.items()
+        }
@@ -3,6 +3,7 @@ import itertools
 import operator
 import functools
 import logging
+import time
 import uuid # For mypy
 
 import sortedcontainers
@@ -10,6 +11,7 @@ import numpy as np
 
 from buzzard._footprint import Footprint # For mypy
 from buzzard._actors.message import Msg
+from buzzard import _tools
 from buzzard._actors.pool_job import PoolJobWaiting, MaxPrioJobWaiting, ProductionJobWaiting, CacheJobWaiting
 from buzzard._actors.priorities import dummy_priorities, Priorities
 from buzzard._actors.cached.query_infos import CachedQueryInfos
@@ -39,13 +41,22 @@ class ActorPoolWaitingRoom(object):
 
     """
 
-    def __init__(self, pool):
+    def __init__(self, pool, debug_mngr):
         """
         Parameters
         ----------
-        pool: multiprocessing.pool.Pool (or the multiprocessing.pool.ThreadPool subclass)
+        pool: multiprocessing.pool.Pool (or the multiprocessing.pool.ThreadPool subclass) or
+            concurrent.futures.Executor
+        debug_mngr: DebugObserversManager
+            Observers of the Dataset, notified of the time spent by the jobs waiting for a token
         """
         self._alive = True
+        self._pool = pool
+        self._debug_mngr = debug_mngr
+        if debug_mngr.observed('pool_job_waited'):
+            self._waiting_since_per_job = {} # type: Dict[PoolJobWaiting, float]
+        else:
+            self._waiting_since_per_job = None
 
         # `global_priorities` contains all the methods necessary to establish the priority of a
         # `prod_job` or a `cache_job`. This object is updated by
@@ -55,7 +66,7 @@ class ActorPoolWaitingRoom(object):
         # Tokens *****************************************************
         pool_id = id(pool)
         self._pool_id = pool_id
-        self._token_count = pool._processes + OVERLOAD
+        self._token_count = _tools.pool_max_workers(pool) + OVERLOAD
         short_id = short_id_of_id(pool_id)
         self._tokens = {
             # This has no particular meaning, the only hard requirement is just to have
@@ -113,6 +124,8 @@ class ActorPoolWaitingRoom(object):
         else:
             # Store job for later invocation
             self._store_job(job)
+            if self._waiting_since_per_job is not None:
+                self._waiting_since_per_job[job] = time.perf_counter()
         return []
 
     def receive_unschedule_job(self, job):
@@ -123,6 +136,8 @@ class ActorPoolWaitingRoom(object):
         job: _actors.pool_job.PoolJobWaiting
         """
         self._unstore_job(job)
+        if self._waiting_since_per_job is not None:
+            del self._waiting_since_per_job[job]
         return []
 
     def receive_global_priorities_update(self, global_priorities, query_updates, cache_tile_updates):
@@ -174,6 +189,11 @@ class ActorPoolWaitingRoom(object):
             reached if token_count == 1"""
 
             job = self._unstore_most_urgent_job()
+            if self._waiting_since_per_job is not None:
+                self._debug_mngr.event(
+                    'pool_job_waited', self._pool, job,
+                    self._waiting_since_per_job.pop(job), time.perf_counter(),
+                )
 
         return [Msg(
             job.sender_address, 'token_to_working_room', job, self._tokens.pop()
@@ -192,6 +212,9 @@ class ActorPoolWaitingRoom(object):
         self._prios = dummy_priorities
         for ds in self._data_structures:
             ds.clear()
+        if self._waiting_since_per_job is not None:
+            self._waiting_since_per_job.clear()
+        self._pool = None
 
         return []
 
@@ -1,20 +1,40 @@
+import collections
+import functools
 import logging
+import os
+import threading
+import time
 
 from buzzard._actors.message import Msg
+from buzzard import _tools
 
 LOGGER = logging.getLogger(__name__)
 
 class ActorPoolWorkingRoom(object):
     """Actor that takes care of starting/collecting jobs on/off a thread/process pool"""
 
-    def __init__(self, pool):
+    def __init__(self, pool, wake_up_scheduler, debug_mngr):
         """
         Parameter
         ---------
-        pool: multiprocessing.pool.Pool (or the multiprocessing.pool.ThreadPool subclass)
+        pool: multiprocessing.pool.Pool (or the multiprocessing.pool.ThreadPool subclass) or
+            concurrent.futures.Executor
+        wake_up_scheduler: callable
+            Thread-safe function to call to wake up the scheduler when a job is done
+        debug_mngr: DebugObserversManager
+            Observers of the Dataset, notified of the execution of the jobs
         """
         self._pool = pool
+        self._wake_up_scheduler = wake_up_scheduler
+        self._debug_mngr = debug_mngr
+
+        # The jobs are only timed (in the workers) if an observer listens
+        self._timed = debug_mngr.observed('pool_job_span')
         self._jobs = {}
+
+        # Jobs appended by the pool's callbacks when they are done
+        # a deque is thread-safe: https://docs.python.org/3/library/collections.html#collections.deque
+        self._finished_jobs = collections.deque()
         self._alive = True
         self.address = '/Pool{}/WorkingRoom'.format(id(self._pool))
 
@@ -33,8 +53,12 @@ class ActorPoolWorkingRoom(object):
         """
         assert job not in self._jobs
 
-        future = self._pool.apply_async(job.func)
-        self._jobs[job] = (future, token)
+        callback = functools.partial(self._job_finished_callback, job)
+        func = job.func
+        if self._timed:
+            func = functools.partial(_timed_call, func)
+        get_result = _tools.pool_submit(self._pool, func, callback)
+        self._jobs[job] = (get_result, token)
 
         return []
 
@@ -61,18 +85,20 @@ class ActorPoolWorkingRoom(object):
     def ext_receive_nothing(self):
         """Receive message sent by something else than an actor, still treated synchronously: What's
         up?
-        Did a Job finished? Check all futures
+        Did a Job finished? Check the jobs reported by the pool's callbacks
         """
         msgs = []
 
-        finished_jobs = [
-            job
-            for job, (future, _) in self._jobs.items()
-            if future.ready()
-        ]
-        for job in finished_jobs:
-            future, token = self._jobs.pop(job)
-            res = future.get()
+        while self._finished_jobs:
+            job = self._finished_jobs.popleft()
+            if job not in self._jobs:
+                # Job was cancelled
+                continue
+            get_result, token = self._jobs.pop(job)
+            res = get_result()
+            if self._timed:
+                res, worker, start, end = res
+                self._debug_mngr.event('pool_job_span', self._pool, job, worker, start, end)
             msgs += [
                 Msg(job.sender_address, 'job_done', job, res),
                 Msg('WaitingRoom', 'salvage_token', token),
@@ -91,8 +117,26 @@ class ActorPoolWorkingRoom(object):
 
         # Clear attributes *****************************************************
         self._jobs.clear()
+        self._finished_jobs.clear()
         self._pool = None
 
         return []
 
     # ******************************************************************************************* **
+    def _job_finished_callback(self, job):
+        """Called from a thread of the pool when a job succeeded or failed"""
+        self._finished_jobs.append(job)
+        self._wake_up_scheduler()
+
+    # ******************************************************************************************* **
+
+def _timed_call(func):
+    """Called in a worker of the pool instead of `func` when the jobs are observed.
+    `time.perf_counter` is system-wide on linux, the times measured in a process pool can be
+    compared with the ones of the scheduler.
+    """
+    start = time.perf_counter()
+    res = func()
+    end = time.perf_counter()
+    worker = (os.getpid(), threading.current_thread().name)
+    return res, worker, start, end
@@ -5,6 +5,7 @@ class ActorProductionGate(object):
 
     def __init__(self, raster):
         self._raster = raster
+        self._memory_budget = raster.back_ds.memory_budget
         self._queries = {}
         self._alive = True
         self.address = '/Raster{}/ProductionGate'.format(self._raster.uid)
@@ -26,7 +27,7 @@ class ActorProductionGate(object):
 
         q = _Query()
         self._queries[qi] = q
-        msgs += self._allow(qi, q, 0)
+        msgs += self._allow(qi, q)
         return msgs
 
     def receive_output_queue_update(self, qi, produced_count, queue_size):
@@ -49,11 +50,20 @@ class ActorProductionGate(object):
             assert q.allowed_count == produced_count
             del self._queries[qi]
         else:
-            pulled_count = produced_count - queue_size
-            msgs += self._allow(qi, q, pulled_count)
+            q.pulled_count = produced_count - queue_size
+            msgs += self._allow(qi, q)
 
         return msgs
 
+    def receive_memory_released(self):
+        """Receive message: Some memory of the Dataset's budget was released, and a production of
+        this raster did not fit in it earlier.
+        """
+        msgs = []
+        for qi, q in list(self._queries.items()):
+            msgs += self._allow(qi, q)
+        return msgs
+
     def receive_cancel_this_query(self, qi):
         """Receive message: One query was dropped
 
@@ -74,22 +84,34 @@ class ActorProductionGate(object):
         return []
 
     # ******************************************************************************************* **
-    @staticmethod
-    def _allow(qi, q, pulled_count):
+    def _allow(self, qi, q):
         msgs = []
+        budget = self._memory_budget
+        prev_allowed_count = q.allowed_count
 
         while True:
             if q.allowed_count == qi.produce_count:
                 # All productions started
                 break
-            if q.allowed_count == pulled_count + qi.max_queue_size:
+            if q.allowed_count == q.pulled_count + qi.max_queue_size:
                 # Enough production started yet
                 break
+            if budget.enabled:
+                nbytes = budget.production_nbytes(qi, q.allowed_count, self._raster.dtype)
+                if not budget.try_acquire(self._raster.uid, qi, q.allowed_count, nbytes):
+                    # Not enough memory, `receive_memory_released` will be received later
+                    break
             msgs += [Msg(
                 'Producer', 'make_this_array', qi, q.allowed_count
             )]
             q.allowed_count += 1
 
+        if budget.enabled and q.allowed_count != prev_allowed_count:
+            # Computations should only start for the productions that fit in memory
+            msgs += [Msg(
+                'ComputationGate1', 'productions_allowed', qi, q.allowed_count
+            )]
+
         return msgs
 
 
@@ -99,3 +121,4 @@ class _Query(object):
 
     def __init__(self):
         self.allowed_count = 0
+        self.pulled_count = 0
@@ -1,13 +1,13 @@
 import functools
 import collections
-import multiprocessing as mp
-import multiprocessing.pool
 
 import numpy as np
 
 from buzzard._actors.message import Msg
 from buzzard._actors.pool_job import ProductionJobWaiting, PoolJobWorking
 from buzzard._a_source_raster_remap import ABackSourceRasterRemapMixin
+from buzzard._dataset_shared_array_arena import call_with_shared_arrays
+from buzzard import _tools
 
 class ActorResampler(object):
     """Actor that takes care of resampling sample tiles, and wait for all
@@ -21,12 +21,13 @@ class ActorResampler(object):
         if resample_pool is not None:
             self._waiting_room_address = '/Pool{}/WaitingRoom'.format(id(resample_pool))
             self._working_room_address = '/Pool{}/WorkingRoom'.format(id(resample_pool))
-            if isinstance(resample_pool, mp.pool.ThreadPool):
-                self._same_address_space = True
-            elif isinstance(resample_pool, mp.pool.Pool):
-                self._same_address_space = False
-            else: # pragma: no cover
-                assert False, 'Type should be checked in facade'
+            self._same_address_space = _tools.pool_same_address_space(resample_pool)
+        arena = raster.back_ds.shared_array_arena
+        if resample_pool is not None and not self._same_address_space and arena.available:
+            # Arrays are exchanged with the process pool through shared memory instead of pipes
+            self._shared_array_arena = arena
+        else:
+            self._shared_array_arena = None
         self._waiting_jobs = set()
         self._working_jobs = set()
 
@@ -208,6 +209,7 @@ class ActorResampler(object):
         self._working_jobs.clear()
         self._prod_infos.clear()
         self._raster = None
+        self._shared_array_arena = None
         return msgs
 
     # ******************************************************************************************* **
@@ -216,8 +218,13 @@ class ActorResampler(object):
         pr = self._prod_infos[qi][prod_idx]
 
         if pr.arr is None:
-            pr.arr = np.full(
-                np.r_[pi.fp.shape, len(qi.channel_ids)],
+            # Channels are reordered in `_push_if_done`
+            if self._shared_array_arena is None:
+                allocate = np.full
+            else:
+                allocate = self._shared_array_arena.full
+            pr.arr = allocate(
+                np.r_[pi.fp.shape, len(qi.unique_channel_ids)],
                 qi.dst_nodata, self._raster.dtype,
             )
 
@@ -235,10 +242,13 @@ class ActorResampler(object):
 
         pr.commit(resample_fp)
 
-        if self._raster.resample_pool is not None and not self._same_address_space:
-            work_job.dst_array_slice[:] = res
-        else:
+        if self._raster.resample_pool is None or self._same_address_space:
             assert res is None
+        elif self._shared_array_arena is not None:
+            # The worker wrote to the production array
+            assert res is None
+        else:
+            work_job.dst_array_slice[:] = res
 
     def _push_if_done(self, qi, prod_idx):
         msgs = []
@@ -308,7 +318,7 @@ class Work(PoolJobWorking):
                 actor._raster.nodata, qi.dst_nodata,
                 qi.interpolation, dst_array_slice,
             )
-        else:
+        elif actor._shared_array_arena is None:
             self.dst_array_slice = dst_array_slice
             func = functools.partial(
                 _resample_subsample_array,
@@ -316,6 +326,15 @@ class Work(PoolJobWorking):
                 actor._raster.nodata, qi.dst_nodata,
                 qi.interpolation, None,
             )
+        else:
+            arena = actor._shared_array_arena
+            func = functools.partial(
+                call_with_shared_arrays,
+                _resample_subsample_array,
+                sample_fp, resample_fp, arena.share(subsample_array),
+                actor._raster.nodata, qi.dst_nodata,
+                qi.interpolation, arena.handle_of(dst_array_slice),
+            )
         actor._raster.debug_mngr.event('object_allocated', func)
 
         super().__init__(actor.address, func)
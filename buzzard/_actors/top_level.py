@@ -15,7 +15,17 @@ class ActorTopLevel(object):
     as stopping the scheduler's loop. If a destruction is ever needed, call a die method from
     the scheduler using the `top_level_actor` variable.
     """
-    def __init__(self):
+    def __init__(self, wake_up_scheduler, debug_mngr):
+        """
+        Parameter
+        ---------
+        wake_up_scheduler: callable
+            Thread-safe function to call to wake up the scheduler when an event occurs outside of it
+        debug_mngr: DebugObserversManager
+            Observers of the Dataset, notified of the activity of the pools
+        """
+        self._wake_up_scheduler = wake_up_scheduler
+        self._debug_mngr = debug_mngr
         self._rasters = set()
         self._rasters_per_pool = collections.defaultdict(list)
 
@@ -76,8 +86,8 @@ class ActorTopLevel(object):
         for pool_id, pool in pools.items():
             if pool_id not in self._rasters_per_pool:
                 actors = [
-                    ActorPoolWaitingRoom(pool),
-                    ActorPoolWorkingRoom(pool),
+                    ActorPoolWaitingRoom(pool, self._debug_mngr),
+                    ActorPoolWorkingRoom(pool, self._wake_up_scheduler, self._debug_mngr),
                 ]
                 msgs += actors
 
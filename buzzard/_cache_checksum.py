@@ -0,0 +1,199 @@
+"""Checksums of the cache files of a CachedRasterRecipe, and the manifest of the files that can be
+trusted without recomputing their checksum"""
+
+import hashlib
+import json
+import os
+import uuid
+
+import numpy as np
+
+try:
+    import xxhash
+except ImportError: # pragma: no cover
+    xxhash = None
+
+CHECKSUMS = ('sum64', 'blake2b', 'xxh64')
+MANIFEST_FILENAME = 'buzz_manifest.jsonl'
+
+def sanitize_checksum(checksum):
+    """Check the `checksum` parameter of `create_cached_raster_recipe`"""
+    if checksum not in CHECKSUMS:
+        raise ValueError('`checksum` should be one of {}, not {!r}'.format(CHECKSUMS, checksum))
+    if checksum == 'xxh64' and xxhash is None: # pragma: no cover
+        raise ValueError("`checksum='xxh64'` requires the `xxhash` package")
+    return checksum
+
+def checksum_file(path, checksum):
+    """Compute the checksum of a file, as 16 hexadecimal characters
+
+    Parameters
+    ----------
+    path: str
+    checksum: str
+        One of 'sum64', 'blake2b', 'xxh64'
+    """
+    if checksum == 'sum64':
+        return _sum64(path)
+    if checksum == 'blake2b':
+        return _hash_file(path, hashlib.blake2b(digest_size=8))
+    if checksum == 'xxh64':
+        return _hash_file(path, xxhash.xxh64())
+    assert False # pragma: no cover
+
+def format_checksum(checksum, digest):
+    """Part of a cache file name that holds its digest. The digest is prefixed by the name of the
+    checksum algorithm, except for 'sum64' to keep the names of the cache files written before the
+    other algorithms.
+
+    Parameters
+    ----------
+    checksum: str
+        One of 'sum64', 'blake2b', 'xxh64'
+    digest: str
+        Result of `checksum_file`
+    """
+    if checksum == 'sum64':
+        return digest
+    return '{}-{}'.format(checksum, digest)
+
+def parse_checksum(s):
+    """Inverse of `format_checksum`, returns the checksum algorithm and the digest"""
+    checksum, _, digest = s.rpartition('-')
+    return checksum or 'sum64', digest
+
+def _hash_file(path, h, buffer_size=1024 * 1024):
+    buf = bytearray(buffer_size)
+    view = memoryview(buf)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(view[:n])
+    return h.hexdigest()
+
+def _sum64(fname, buffer_size=512 * 1024, dtype='uint64'):
+    # https://github.com/airware/buzzard/pull/39/#discussion_r239071556
+    dtype = np.dtype(dtype)
+    dtypesize = dtype.itemsize
+    assert buffer_size % dtypesize == 0
+    assert np.issubdtype(dtype, np.unsignedinteger)
+
+    acc = dtype.type(0)
+    with open(fname, "rb") as f:
+        with np.warnings.catch_warnings():
+            np.warnings.filterwarnings('ignore', r'overflow encountered')
+
+            for chunk in iter(lambda: f.read(buffer_size), b""):
+                head = np.frombuffer(chunk, dtype, count=len(chunk) // dtypesize)
+                head = np.add.reduce(head, dtype=dtype, initial=acc)
+                acc += head
+
+                tailsize = len(chunk) % dtypesize
+                if tailsize > 0:
+                    # This should only be needed for file's tail
+                    tail = chunk[-tailsize:] + b'\0' * (dtypesize - tailsize)
+                    tail = np.frombuffer(tail, dtype)
+                    acc += tail
+        return '{:016x}'.format(acc.item())
+
+class CacheManifest(object):
+    """Sidecar file of a cache directory that remembers the size and modification time of the cache
+    files whose checksum was verified. A cache file that did not change since can be trusted without
+    reading it again.
+
+    The file is an append-only log of json lines, so that it is always up to date even if the
+    process is killed. It is compacted when it is loaded.
+
+    Only used by the CacheSupervisor actor.
+    """
+
+    def __init__(self, cache_dir, checksum):
+        self._path = os.path.join(cache_dir, MANIFEST_FILENAME)
+        self._checksum = checksum
+        self._stat_per_filename = {}
+        self._stream = None
+
+    def load(self):
+        """Read the manifest from disk, if any, and open it for appending"""
+        assert self._stream is None
+        line_count = self._read()
+        if line_count != len(self._stat_per_filename) + 1:
+            self._rewrite()
+        self._stream = open(self._path, 'a')
+
+    def is_trusted(self, path):
+        """Is this file unchanged since its checksum was verified"""
+        stat = self._stat_per_filename.get(os.path.basename(path))
+        if stat is None:
+            return False
+        try:
+            return stat == _stat(path)
+        except OSError: # pragma: no cover
+            return False
+
+    def trust(self, path):
+        """Remember the current size and modification time of a verified file"""
+        filename = os.path.basename(path)
+        stat = _stat(path)
+        self._stat_per_filename[filename] = stat
+        self._append([filename, stat[0], stat[1]])
+
+    def forget(self, path):
+        """Stop trusting a file"""
+        filename = os.path.basename(path)
+        if self._stat_per_filename.pop(filename, None) is not None:
+            self._append([filename, None, None])
+
+    def clear(self):
+        """Stop trusting all files"""
+        self._stat_per_filename.clear()
+        self._stream.close()
+        self._rewrite()
+        self._stream = open(self._path, 'a')
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def _append(self, entry):
+        self._stream.write(json.dumps(entry) + '\n')
+        self._stream.flush()
+
+    def _read(self):
+        try:
+            stream = open(self._path, 'r')
+        except FileNotFoundError:
+            return 0
+        line_count = 0
+        with stream:
+            for i, line in enumerate(stream):
+                line_count += 1
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Last line of a killed process
+                    continue
+                if i == 0:
+                    if entry != {'checksum': self._checksum}:
+                        # Written with another checksum, the file names can't be trusted
+                        return line_count
+                elif entry[1] is None:
+                    self._stat_per_filename.pop(entry[0], None)
+                else:
+                    self._stat_per_filename[entry[0]] = (entry[1], entry[2])
+        return line_count
+
+    def _rewrite(self):
+        tmp_path = self._path + '.tmp_' + str(uuid.uuid4())
+        with open(tmp_path, 'w') as stream:
+            stream.write(json.dumps({'checksum': self._checksum}) + '\n')
+            for filename, stat in self._stat_per_filename.items():
+                stream.write(json.dumps([filename, stat[0], stat[1]]) + '\n')
+        os.replace(tmp_path, self._path)
+
+def _stat(path):
+    st = os.stat(path)
+    return (st.st_size, st.st_mtime_ns)
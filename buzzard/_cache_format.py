@@ -0,0 +1,288 @@
+"""Storage formats of the cache files of a CachedRasterRecipe"""
+
+import numbers
+import contextlib
+
+import numpy as np
+
+from buzzard._gdal_file_raster import BackGDALFileRaster
+from buzzard._footprint import Footprint
+from buzzard._tools import conv
+
+create_raster = None # lazy import
+
+class ACacheFormat(object):
+    """Base abstract class defining how the cache tiles of a `CachedRasterRecipe` are stored on
+    disk.
+
+    The same object is used to write, check and read the cache files, sometimes from the workers of
+    a process pool, it should be picklable.
+    """
+
+    extension = None
+
+    def write(self, path, array, cache_fp, channels_schema, sr):
+        """Create a cache file
+
+        Parameters
+        ----------
+        path: str
+        array: ndarray of shape (Y, X, C)
+        cache_fp: Footprint of shape (Y, X)
+        channels_schema: dict
+        sr: str or None
+        """
+        raise NotImplementedError('ACacheFormat.write is virtual pure')
+
+    def check(self, path, cache_fp, channel_count, dtype, back_ds_opt):
+        """Raise an exception if the cache file does not match the recipe
+
+        Parameters
+        ----------
+        path: str
+        cache_fp: Footprint
+        channel_count: int
+        dtype: numpy.dtype
+        back_ds_opt: None or BackDataset
+            Allows to use the Dataset's activation pool
+        """
+        raise NotImplementedError('ACacheFormat.check is virtual pure')
+
+    def read(self, path, cache_fp, dtype, channel_ids, sample_fp, dst, back_ds_opt):
+        """Read a rectangle of a cache file
+
+        Parameters
+        ----------
+        path: str
+        cache_fp: Footprint
+            Should be the Footprint of the cache file
+        dtype: np.dtype
+            Should be the dtype of the cache file
+        channel_ids: sequence of int
+        sample_fp: Footprint
+            Rect of `cache_fp` to read
+        dst: np.ndarray
+            Destination for read
+        back_ds_opt: None or BackDataset
+            Allows to use the Dataset's activation pool
+        """
+        raise NotImplementedError('ACacheFormat.read is virtual pure')
+
+class GTiffCacheFormat(ACacheFormat):
+    """Cache files stored as tiled GeoTIFF, the default format.
+
+    Parameters
+    ----------
+    compress: None or one of {'DEFLATE', 'LZW', 'ZSTD'}
+        Compression codec, None to store the pixels uncompressed
+    predictor: None or one of {1, 2, 3}
+        GDAL's `PREDICTOR` creation option, only valid with a compression codec.
+        2 is for integer dtypes, 3 for floating point dtypes.
+    level: None or int
+        Compression level, only valid with 'DEFLATE' (1 to 9) or 'ZSTD' (1 to 22)
+    block_size: int
+        Width and height of the internal tiles of the GeoTIFF files
+
+    Example
+    -------
+    >>> ds.create_cached_raster_recipe(
+    ...     ..., cache_format=buzz.GTiffCacheFormat('ZSTD', predictor=2, level=9),
+    ... )
+
+    """
+
+    extension = '.tif'
+    _LEVEL_OPTIONS = {'DEFLATE': ('ZLEVEL', 1, 9), 'ZSTD': ('ZSTD_LEVEL', 1, 22)}
+
+    def __init__(self, compress=None, predictor=None, level=None, block_size=256):
+        if compress is not None:
+            compress = str(compress).upper()
+            if compress not in {'DEFLATE', 'LZW', 'ZSTD'}:
+                raise ValueError('Unknown `compress` value {}'.format(compress))
+        if predictor is not None:
+            if compress is None:
+                raise ValueError('`predictor` requires a `compress` codec')
+            predictor = int(predictor)
+            if predictor not in {1, 2, 3}:
+                raise ValueError('`predictor` should be one of 1, 2, 3')
+        if level is not None:
+            if compress not in self._LEVEL_OPTIONS:
+                raise ValueError('`level` is only valid with `DEFLATE` or `ZSTD` codecs')
+            _, min_level, max_level = self._LEVEL_OPTIONS[compress]
+            level = int(level)
+            if not min_level <= level <= max_level:
+                raise ValueError('`level` should be between {} and {} with `{}`'.format(
+                    min_level, max_level, compress
+                ))
+        if not isinstance(block_size, numbers.Integral) or block_size <= 0 or block_size % 16 != 0:
+            raise ValueError('`block_size` should be a positive multiple of 16')
+
+        self.compress = compress
+        self.predictor = predictor
+        self.level = level
+        self.block_size = int(block_size)
+
+    @property
+    def options(self):
+        """GDAL creation options of the cache files"""
+        options = [
+            "TILED=YES",
+            "BLOCKXSIZE={}".format(self.block_size), "BLOCKYSIZE={}".format(self.block_size),
+            "SPARSE_OK=TRUE",
+        ]
+        if self.compress is not None:
+            options.append("COMPRESS={}".format(self.compress))
+        if self.predictor is not None:
+            options.append("PREDICTOR={}".format(self.predictor))
+        if self.level is not None:
+            options.append("{}={}".format(self._LEVEL_OPTIONS[self.compress][0], self.level))
+        return options
+
+    def write(self, path, array, cache_fp, channels_schema, sr):
+        # Lazily import buzzard to avoid circular dependencies
+        global create_raster
+        if create_raster is None:
+            from buzzard import create_raster
+
+        # TODO: Use driver-object allocator
+        assert array.ndim == 3
+        with create_raster(path, cache_fp, array.dtype, array.shape[-1], channels_schema,
+                           sr=sr, options=self.options).close as r:
+            r.set_data(array, channels=None)
+
+    def check(self, path, cache_fp, channel_count, dtype, back_ds_opt):
+        allocator = lambda: BackGDALFileRaster.open_file(path, 'GTiff', [], 'r') # This may raise
+        with _driver_object(path, allocator, back_ds_opt) as gdal_ds:
+            file_fp = Footprint(
+                gt=gdal_ds.GetGeoTransform(),
+                rsize=(gdal_ds.RasterXSize, gdal_ds.RasterYSize),
+            )
+            file_dtype = conv.dtype_of_gdt_downcast(gdal_ds.GetRasterBand(1).DataType)
+            file_len = gdal_ds.RasterCount
+            if file_fp != cache_fp: # pragma: no cover
+                raise RuntimeError('invalid Footprint of {}({} instead of {})'.format(
+                    path, file_fp, cache_fp
+                ))
+            if file_dtype != dtype: # pragma: no cover
+                raise RuntimeError('invalid dtype of {}({} instead of {})'.format(
+                    path, file_dtype, dtype
+                ))
+            if file_len != channel_count: # pragma: no cover
+                raise RuntimeError('invalid channel_count of {}({} instead of {})'.format(
+                    path, file_len, channel_count
+                ))
+            del gdal_ds
+
+    def read(self, path, cache_fp, dtype, channel_ids, sample_fp, dst, back_ds_opt):
+        allocator = lambda: BackGDALFileRaster.open_file(path, 'GTiff', [], 'r')
+        with _driver_object(path, allocator, back_ds_opt) as gdal_ds:
+            # Check raster
+            if gdal_ds is None: # pragma: no cover
+                raise RuntimeError("Could not open {path}, what happend to it?".format(
+                    path
+                ))
+            if (gdal_ds.RasterXSize, gdal_ds.RasterYSize) != tuple(cache_fp.rsize): # pragma: no cover
+                raise RuntimeError('{} was expected to have rsize {}, not {}'.format(
+                    path,
+                    tuple(cache_fp.rsize),
+                    (gdal_ds.RasterXSize, gdal_ds.RasterYSize),
+                ))
+            stored_dtype = conv.dtype_of_gdt_downcast(gdal_ds.GetRasterBand(1).DataType)
+            if dtype != stored_dtype: # pragma: no cover
+                raise RuntimeError('{} was expected to have dtype {}, not {}'.format(
+                    path,
+                    dtype,
+                    stored_dtype,
+                ))
+
+            # Perform read
+            rtlx, rtly = cache_fp.spatial_to_raster(sample_fp.tl)
+            BackGDALFileRaster.read_bands_driver(
+                gdal_ds, int(rtlx), int(rtly), channel_ids, dst,
+            )
+            del gdal_ds
+
+    def __repr__(self):
+        return 'GTiffCacheFormat(compress={!r}, predictor={!r}, level={!r}, block_size={!r})'.format(
+            self.compress, self.predictor, self.level, self.block_size,
+        )
+
+class RawCacheFormat(ACacheFormat):
+    """Cache files stored uncompressed as `.npy` files of shape (Y, X, C).
+
+    Reading a cache file maps it in memory with `numpy.load(mmap_mode='r')`, no GDAL driver is
+    involved. The files are as big as the arrays they contain and the spatial reference is not
+    stored.
+
+    Example
+    -------
+    >>> ds.create_cached_raster_recipe(..., cache_format='raw')
+
+    """
+
+    extension = '.npy'
+
+    def write(self, path, array, cache_fp, channels_schema, sr):
+        assert array.ndim == 3
+        with open(path, 'wb') as stream:
+            np.save(stream, array, allow_pickle=False)
+
+    def check(self, path, cache_fp, channel_count, dtype, back_ds_opt):
+        allocator = lambda: _open_memmap(path)
+        with _driver_object(path, allocator, back_ds_opt) as arr:
+            shape = (int(cache_fp.rsizey), int(cache_fp.rsizex), channel_count)
+            if arr.shape != shape: # pragma: no cover
+                raise RuntimeError('invalid shape of {}({} instead of {})'.format(
+                    path, arr.shape, shape
+                ))
+            if arr.dtype != dtype: # pragma: no cover
+                raise RuntimeError('invalid dtype of {}({} instead of {})'.format(
+                    path, arr.dtype, dtype
+                ))
+            del arr
+
+    def read(self, path, cache_fp, dtype, channel_ids, sample_fp, dst, back_ds_opt):
+        allocator = lambda: _open_memmap(path)
+        with _driver_object(path, allocator, back_ds_opt) as arr:
+            if arr.shape[:2] != (cache_fp.rsizey, cache_fp.rsizex): # pragma: no cover
+                raise RuntimeError('{} was expected to have rsize {}, not {}'.format(
+                    path,
+                    tuple(cache_fp.rsize),
+                    arr.shape[1::-1],
+                ))
+            if arr.dtype != dtype: # pragma: no cover
+                raise RuntimeError('{} was expected to have dtype {}, not {}'.format(
+                    path,
+                    dtype,
+                    arr.dtype,
+                ))
+            slices = sample_fp.slice_in(cache_fp)
+            for i, ci in enumerate(channel_ids):
+                dst[..., i] = arr[slices + (ci,)]
+            del arr
+
+    def __repr__(self):
+        return 'RawCacheFormat()'
+
+def sanitize_cache_format(cache_format):
+    """Convert the `cache_format` parameter of `create_cached_raster_recipe` to an ACacheFormat"""
+    if isinstance(cache_format, ACacheFormat):
+        return cache_format
+    if cache_format == 'gtiff':
+        return GTiffCacheFormat()
+    if cache_format == 'raw':
+        return RawCacheFormat()
+    raise TypeError("`cache_format` should be 'gtiff', 'raw' or an ACacheFormat, not {!r}".format(
+        cache_format
+    ))
+
+def _open_memmap(path):
+    return np.load(path, mmap_mode='r', allow_pickle=False)
+
+@contextlib.contextmanager
+def _driver_object(path, allocator, back_ds_opt):
+    if back_ds_opt is None:
+        yield allocator()
+    else:
+        with back_ds_opt.acquire_driver_object(path, allocator) as obj:
+            yield obj
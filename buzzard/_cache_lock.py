@@ -0,0 +1,115 @@
+"""Lock files of the cache tiles of a CachedRasterRecipe, used to coordinate the processes that share
+a cache directory"""
+
+import logging
+import os
+import socket
+
+try:
+    import fcntl
+except ImportError: # pragma: no cover
+    fcntl = None
+
+LOGGER = logging.getLogger(__name__)
+
+LOCK_EXTENSION = '.lock'
+
+# `fcntl.flock` is not available on Windows
+SUPPORTED = fcntl is not None
+
+class CacheTileLocks(object):
+    """Lock files of the cache tiles being computed by a CachedRasterRecipe.
+
+    A process computes a cache tile only after it obtained an exclusive `flock` on the tile's lock
+    file. The lock file is removed after the cache file was written and renamed, the other
+    processes then find the cache file when they notice that the lock was released. The lock of a
+    process that dies is released by the operating system, its lock file is reused by the next
+    process that locks this tile.
+
+    The lock file is removed while the lock is held, a process that locks a file that is not at
+    the lock path anymore closes it and tries again. `flock` locks are bound to open files, two
+    Datasets of the same process exclude each other too.
+
+    Only used by the CacheSupervisor actor.
+    """
+
+    def __init__(self, cache_dir):
+        assert SUPPORTED
+        self._cache_dir = cache_dir
+        self._owner = '{} {}'.format(socket.gethostname(), os.getpid())
+        self._fd_of_prefix = {}
+
+    def try_acquire(self, prefix):
+        """Try to lock the lock file of a cache tile
+
+        Parameters
+        ----------
+        prefix: str
+            File name prefix of the cache tile
+
+        Returns
+        -------
+        bool
+            False if another process (or another Dataset) holds this lock
+        """
+        assert prefix not in self._fd_of_prefix
+        path = self._path(prefix)
+        while True:
+            fd = os.open(path, os.O_CREAT | os.O_RDWR, 0o644)
+            if not _try_flock(fd, fcntl.LOCK_EX):
+                os.close(fd)
+                return False
+            if not _is_file_at_path(fd, path):
+                # The previous owner removed this file after we opened it
+                os.close(fd)
+                continue
+            # The owner is informative only
+            os.ftruncate(fd, 0)
+            os.write(fd, self._owner.encode('utf-8'))
+            self._fd_of_prefix[prefix] = fd
+            return True
+
+    def is_locked(self, prefix):
+        """Is the lock file of this cache tile held, by this object or by another one"""
+        if prefix in self._fd_of_prefix:
+            return True
+        try:
+            fd = os.open(self._path(prefix), os.O_RDONLY)
+        except FileNotFoundError:
+            return False
+        try:
+            return not _try_flock(fd, fcntl.LOCK_SH)
+        finally:
+            os.close(fd)
+
+    def release(self, prefix):
+        """Remove a lock file locked by this object, and unlock it"""
+        fd = self._fd_of_prefix.pop(prefix)
+        try:
+            os.remove(self._path(prefix))
+        except FileNotFoundError: # pragma: no cover
+            LOGGER.warning('The lock file of {} was removed by someone else'.format(prefix))
+        finally:
+            os.close(fd)
+
+    def release_all(self):
+        for prefix in list(self._fd_of_prefix):
+            self.release(prefix)
+
+    def _path(self, prefix):
+        return os.path.join(self._cache_dir, prefix + LOCK_EXTENSION)
+
+def _try_flock(fd, operation):
+    try:
+        fcntl.flock(fd, operation | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+def _is_file_at_path(fd, path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return False
+    fst = os.fstat(fd)
+    return (st.st_dev, st.st_ino) == (fst.st_dev, fst.st_ino)
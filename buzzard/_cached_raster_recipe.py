@@ -1,13 +1,17 @@
 import collections
-import weakref
 import glob
+import queue
+import weakref
 import os
+import re
 
 import numpy as np
-import rtree.index
 
+from buzzard import _tools
 from buzzard._actors.message import Msg
+from buzzard._a_async_raster import QUEUE_POLL_DISTANCE, _OutputQueue
 from buzzard._a_raster_recipe import ARasterRecipe, ABackRasterRecipe
+from buzzard._footprint import Footprint
 
 from buzzard._actors.cached.cache_extractor import ActorCacheExtractor
 from buzzard._actors.cached.cache_supervisor import ActorCacheSupervisor
@@ -24,6 +28,10 @@ from buzzard._actors.computer import ActorComputer
 from buzzard._actors.production_gate import ActorProductionGate
 from buzzard._actors.resampler import ActorResampler
 
+_CACHE_FILE_NAME_REGEX = re.compile(
+    r'^buzz_x(?P<x>\d+)-y(?P<y>\d+)_x\d+-y\d+_(?:[a-z0-9]+-)?[0123456789abcdef]+(?P<extension>\.\w+)$'
+)
+
 class CachedRasterRecipe(ARasterRecipe):
     """Concrete class defining the behavior of a raster computed on the fly and fills a cache to
     avoid subsequent computations.
@@ -35,11 +43,12 @@ class CachedRasterRecipe(ARasterRecipe):
         self, ds,
         fp, dtype, channel_count, channels_schema, sr,
         compute_array, merge_arrays,
-        cache_dir, overwrite,
+        cache_dir, overwrite, cache_format, checksum, trust_mtime_size, lock_cache_files,
+        max_cache_bytes,
         primitives_back, primitives_kwargs, convert_footprint_per_primitive,
         computation_pool, merge_pool, io_pool, resample_pool,
         cache_tiles, computation_tiles,
-        max_resampling_size,
+        max_resampling_size, tile_cache,
         debug_observers,
     ):
         back = BackCachedRasterRecipe(
@@ -47,11 +56,12 @@ class CachedRasterRecipe(ARasterRecipe):
             weakref.proxy(self),
             fp, dtype, channel_count, channels_schema, sr,
             compute_array, merge_arrays,
-            cache_dir, overwrite,
+            cache_dir, overwrite, cache_format, checksum, trust_mtime_size, lock_cache_files,
+            max_cache_bytes,
             primitives_back, primitives_kwargs, convert_footprint_per_primitive,
             computation_pool, merge_pool, io_pool, resample_pool,
             cache_tiles, computation_tiles,
-            max_resampling_size,
+            max_resampling_size, tile_cache,
             debug_observers,
         )
         super().__init__(ds=ds, back=back)
@@ -66,6 +76,60 @@ class CachedRasterRecipe(ARasterRecipe):
         """Cache directory path provided at construction"""
         return self._back.cache_dir
 
+    @property
+    def cache_format(self):
+        """Storage format of the cache files, an ACacheFormat"""
+        return self._back.cache_format
+
+    def precompute(self, fps=None, progress=None):
+        """Compute and write the cache files of the cache tiles that intersect `fps`, and return
+        once they are all ready.
+
+        Unlike a `queue_data` on the cache tiles, no array is read from the cache files nor
+        resampled, and the computations are not delayed by the consumption of an output queue.
+        The cache tiles are computed from the top-left one to the bottom-right one, and the
+        primitive footprints of the neighbouring computations are read at once.
+
+        If you wish to cancel a precomputation, interrupt it (with a `KeyboardInterrupt` or an
+        exception raised by `progress`), the cache files already written are kept.
+
+        Parameters
+        ----------
+        fps: None or sequence of Footprint
+            if None: All the cache tiles
+            else: The cache tiles that share area with at least one of those footprints
+        progress: None or callable
+            Function called with `(done_count, total_count)` each time a cache tile is ready.
+            The cache tiles that were already ready are counted first. Called from the calling
+            thread.
+
+        Returns
+        -------
+        int
+            Number of cache tiles precomputed (or found in the cache directory)
+
+        Example
+        -------
+        >>> r.precompute(progress=lambda i, n: print('{}/{}'.format(i, n)))
+
+        """
+        if progress is not None and not callable(progress):
+            raise TypeError('`progress` should be None or callable')
+        back = self._back
+        if fps is None:
+            cache_fps = list(back.cache_fps.flat)
+        else:
+            cache_fps = set()
+            for fp in fps:
+                if not isinstance(fp, Footprint):
+                    raise ValueError('element of `fps` parameter should be a Footprint (not {})'.format(
+                        fp
+                    )) # pragma: no cover
+                if fp.share_area(back.fp):
+                    cache_fps.update(back.cache_fps_of_fp(back.fp & fp))
+            cache_fps = sorted(cache_fps, key=back.indices_of_cache_fp.__getitem__)
+        return back.precompute(cache_fps, progress)
+
 class BackCachedRasterRecipe(ABackRasterRecipe):
     """Implementation of CachedRasterRecipe's specifications"""
 
@@ -73,11 +137,12 @@ class BackCachedRasterRecipe(ABackRasterRecipe):
         self, back_ds, facade_proxy,
         fp, dtype, channel_count, channels_schema, sr,
         compute_array, merge_arrays,
-        cache_dir, overwrite,
+        cache_dir, overwrite, cache_format, checksum, trust_mtime_size, lock_cache_files,
+        max_cache_bytes,
         primitives_back, primitives_kwargs, convert_footprint_per_primitive,
         computation_pool, merge_pool, io_pool, resample_pool,
         cache_tiles, computation_tiles,
-        max_resampling_size,
+        max_resampling_size, tile_cache,
         debug_observers,
     ):
         super().__init__(
@@ -110,15 +175,17 @@ class BackCachedRasterRecipe(ABackRasterRecipe):
         self.cache_fps = cache_tiles
         self.cache_dir = cache_dir
         self.overwrite = overwrite
+        self.cache_format = cache_format
+        self.checksum = checksum
+        self.trust_mtime_size = trust_mtime_size
+        self.lock_cache_files = lock_cache_files
+        self.max_cache_bytes = max_cache_bytes
+        self.tile_cache = tile_cache
 
         # Tilings shortcuts ****************************************************
-        self._cache_footprint_index = self._build_cache_fps_index(
-            cache_tiles,
-        )
-        self.cache_fps_of_compute_fp = {
-            compute_fp: self.cache_fps_of_fp(compute_fp)
-            for compute_fp in computation_tiles.flat
-        }
+        # The cache tiles never overlap, their edges are always sorted
+        self._cache_tiling = _tools.GridTiling.of_tiles(self.fp, cache_tiles)
+        self.cache_fps_of_compute_fp = self._cache_fps_of_compute_fps(computation_tiles)
         self.compute_fps_of_cache_fp = collections.defaultdict(list)
         for compute_fp, cache_fps in self.cache_fps_of_compute_fp.items():
             for cache_fp in cache_fps:
@@ -136,12 +203,48 @@ class BackCachedRasterRecipe(ABackRasterRecipe):
     # ******************************************************************************************* **
     def cache_fps_of_fp(self, fp):
         assert fp.same_grid(self.fp)
-        rtl = self.fp.spatial_to_raster(fp.tl, dtype=float)
-        bounds = np.r_[rtl, rtl + fp.rsize]
-        return [
-            self.cache_fps.flat[i]
-            for i in list(self._cache_footprint_index.intersection(bounds))
-        ]
+        x0, y0 = self.fp.spatial_to_raster(fp.tl, op=np.around).tolist()
+        x1, y1 = x0 + fp.rsizex, y0 + fp.rsizey
+        row_start, row_stop, col_start, col_stop = self._cache_tiling.ranges_of_rect(x0, y0, x1, y1)
+        return self.cache_fps[row_start:row_stop, col_start:col_stop].flatten().tolist()
+
+    def cache_ranges_of_fps(self, fps):
+        """Vectorized `cache_fps_of_fp` on a FootprintArray of Footprints on the raster's grid.
+        The cache tiles of `fps[i]` are
+        `cache_fps[row_starts[i]:row_stops[i], col_starts[i]:col_stops[i]]`.
+
+        Returns
+        -------
+        (row_starts, row_stops, col_starts, col_stops): (np.ndarray, ...)
+        """
+        rtl = self.fp.spatial_to_raster(fps.tl, op=np.around).reshape(-1, 2)
+        rbr = rtl + fps.rsize.reshape(-1, 2)
+        row_starts, row_stops = self._cache_tiling.row_ranges(rtl[:, 1], rbr[:, 1])
+        col_starts, col_stops = self._cache_tiling.column_ranges(rtl[:, 0], rbr[:, 0])
+        return row_starts, row_stops, col_starts, col_stops
+
+    def precompute(self, cache_fps, progress):
+        if len(cache_fps) == 0:
+            return 0
+        q = _OutputQueue(len(cache_fps), self.back_ds.wake_up_scheduler)
+        wake_up_scheduler = self.back_ds.wake_up_scheduler
+        self.back_ds.put_message(Msg(
+            '/Raster{}/QueriesHandler'.format(self.uid),
+            'new_precompute',
+            weakref.ref(q, lambda _: wake_up_scheduler()),
+            cache_fps,
+        ))
+        done_count = 0
+        while done_count < len(cache_fps):
+            try:
+                q.get(True, timeout=QUEUE_POLL_DISTANCE)
+            except queue.Empty:
+                self.back_ds.ensure_scheduler_still_alive()
+            else:
+                done_count += 1
+                if progress is not None:
+                    progress(done_count, len(cache_fps))
+        return done_count
 
     def fname_prefix_of_cache_fp(self, cache_fp):
         y, x = self.indices_of_cache_fp[cache_fp]
@@ -152,18 +255,49 @@ class BackCachedRasterRecipe(ABackRasterRecipe):
         ]
         return "buzz_x{:03d}-y{:03d}_x{:05d}-y{:05d}".format(*params)
 
-    def list_cache_path_candidates(self, cache_fp=None):
-        if cache_fp is not None:
-            prefix = self.fname_prefix_of_cache_fp(cache_fp)
-            s = os.path.join(self.cache_dir, prefix + '_[0123456789abcdef]*.tif') # TODO: Use regex
-            return glob.glob(s)
-        else:
-            s = os.path.join(
-                self.cache_dir,
-                 # TODO: Use regex
-                'buzz_x[0-9]*-y[0-9]*_x[0-9]*-y[0-9]*_[0123456789abcdef]*.tif',
-            )
-            return glob.glob(s)
+    def list_cache_path_candidates(self):
+        """List all the files of the cache directory that look like cache files, whatever their
+        format"""
+        return [
+            entry.path
+            for entry in os.scandir(self.cache_dir)
+            if _CACHE_FILE_NAME_REGEX.match(entry.name)
+        ]
+
+    def cache_path_candidates_of_cache_fp(self, cache_fp):
+        """List the files of the cache directory that look like the cache file of `cache_fp`"""
+        prefix = self.fname_prefix_of_cache_fp(cache_fp)
+        pattern = os.path.join(
+            glob.escape(self.cache_dir), prefix + '_*' + self.cache_format.extension,
+        )
+        return [
+            path
+            for path in glob.glob(pattern)
+            if _CACHE_FILE_NAME_REGEX.match(os.path.basename(path))
+        ]
+
+    def index_cache_path_candidates(self):
+        """Scan the cache directory once and group the cache files by cache tile
+
+        Returns
+        -------
+        dict of (int, int) to list of str
+            Paths of the files found for each cache tile, keyed by the tile's indices in
+            `cache_fps`. Tiles without files are omitted.
+        """
+        paths_per_indices = collections.defaultdict(list)
+        shape = self.cache_fps.shape
+        for entry in os.scandir(self.cache_dir):
+            match = _CACHE_FILE_NAME_REGEX.match(entry.name)
+            if match is None or match.group('extension') != self.cache_format.extension:
+                continue
+            indices = int(match.group('y')), int(match.group('x'))
+            if not (indices[0] < shape[0] and indices[1] < shape[1]):
+                continue
+            prefix = self.fname_prefix_of_cache_fp(self.cache_fps[indices])
+            if entry.name.startswith(prefix + '_'):
+                paths_per_indices[indices].append(entry.path)
+        return dict(paths_per_indices)
 
     def create_actors(self):
         actors = [
@@ -178,7 +312,7 @@ class BackCachedRasterRecipe(ABackRasterRecipe):
             ActorComputationAccumulator(self),
             ActorComputationGate1(self),
             ActorComputationGate2(self),
-            ActorComputer(self),
+            ActorComputer(self, cached=True),
             ActorProductionGate(self),
             ActorResampler(self),
         ]
@@ -187,16 +321,20 @@ class BackCachedRasterRecipe(ABackRasterRecipe):
         return actors
 
     # ******************************************************************************************* **
-    def _build_cache_fps_index(self, cache_fps):
-        idx = rtree.index.Index()
-        bounds_inset = np.asarray([
-            + 1 / 4,
-            + 1 / 4,
-            - 1 / 4,
-            - 1 / 4,
-        ])
-        for i, fp in enumerate(cache_fps.flat):
-            rtl = self.fp.spatial_to_raster(fp.tl, dtype=float)
-            bounds = np.r_[rtl, rtl + fp.rsize] + bounds_inset
-            idx.insert(i, bounds)
-        return idx
+    def _cache_fps_of_compute_fps(self, compute_fps):
+        """Vectorized `cache_fps_of_fp` on a matrix of computation tiles"""
+        x0s, x1s, y0s, y1s = _tools.GridTiling.edges_of_tiles(self.fp, compute_fps)
+        row_starts, row_stops = self._cache_tiling.row_ranges(y0s, y1s)
+        col_starts, col_stops = self._cache_tiling.column_ranges(x0s, x1s)
+        col_slices = [slice(a, b) for a, b in zip(col_starts.tolist(), col_stops.tolist())]
+        cache_rows = self.cache_fps.tolist()
+        res = {}
+        for compute_row, a, b in zip(compute_fps.tolist(), row_starts.tolist(), row_stops.tolist()):
+            cache_rows_slice = cache_rows[a:b]
+            for compute_fp, col_slice in zip(compute_row, col_slices):
+                res[compute_fp] = [
+                    cache_fp
+                    for cache_row in cache_rows_slice
+                    for cache_fp in cache_row[col_slice]
+                ]
+        return res
@@ -15,7 +15,8 @@ from buzzard._tools import GDALErrorCatcher as Catch
 
 from buzzard._footprint import Footprint
 from buzzard import _tools
-from buzzard._dataset_back import BackDataset
+from buzzard._dataset_back import BackDataset, BackDatasetWithProcessScheduler
+from buzzard._dataset_back_process_scheduler import check_recipe_parameters
 from buzzard._a_source import ASource
 from buzzard._gdal_file_raster import GDALFileRaster, BackGDALFileRaster
 from buzzard._gdal_file_vector import GDALFileVector, BackGDALFileVector
@@ -24,6 +25,11 @@ from buzzard._gdal_memory_vector import GDALMemoryVector
 from buzzard._dataset_register import DatasetRegisterMixin
 from buzzard._numpy_raster import NumpyRaster
 from buzzard._cached_raster_recipe import CachedRasterRecipe
+from buzzard._nocache_raster_recipe import NocacheRasterRecipe
+from buzzard._cache_format import sanitize_cache_format
+from buzzard._cache_checksum import sanitize_checksum
+from buzzard._cache_lock import SUPPORTED as cache_lock_supported
+from buzzard._dataset_tile_cache import TileCache
 from buzzard._a_pooled_emissary import APooledEmissary
 import buzzard.utils
 
@@ -89,6 +95,27 @@ class Dataset(DatasetRegisterMixin):
         (see :ref:`Sources activation / deactivation` below)
     debug_observers: sequence of object
         Entry points to observe what is happening in the Dataset's sheduler.
+        (see :py:class:`ChromeTraceObserver` to record a timeline of the scheduler)
+    tile_cache_bytes: int
+        Size in bytes of the in-memory LRU of cache tiles shared by the cached raster recipes of
+        this Dataset. When a query needs a cache tile that was recently read from disk, it is
+        taken from memory instead. 0 to disable.
+        (see `tile_cache_bytes` parameter of :py:meth:`Dataset.create_cached_raster_recipe`)
+    intern_footprints: bool
+        Whether or not to use a single object for all the equal Footprints of the tilings of the
+        recipes and of the queries. It speeds up the dicts and sets keyed by Footprint in the
+        scheduler, at the cost of a lookup in a table for each new Footprint.
+    max_memory_bytes: None or int
+        Budget in bytes of the arrays being produced for all the queries of the async rasters of
+        this Dataset, on top of the `max_queue_size` of each query. An array requested to a
+        `queue_data` is accounted for its size and the size of the pixels to sample for it, from
+        the time its production starts to the time it is pulled from its output queue. The
+        productions, and the computations they need, only start when they fit in the budget.
+        A query is always allowed to have one production in flight. None to disable.
+        (see :py:attr:`Dataset.in_flight_bytes`)
+    scheduler: {'thread', 'process'}
+        Whether the scheduler of the async rasters runs in a thread of this process or in a child
+        process. (see :ref:`Scheduler` below)
 
     Examples
     --------
@@ -281,6 +308,24 @@ class Dataset(DatasetRegisterMixin):
     the scheduler will stop and the exception will be propagated to the main thread as soon as
     possible.
 
+    By default the scheduler is a thread of your process, it shares the GIL with your own code and
+    with the functions executed in the thread pools. The tasks given to a `None` pool
+    (see :ref:`Pools`) are performed on its thread and hold it while they run. Use a
+    :py:class:`ChromeTraceObserver` to see where its time goes.
+
+    With `scheduler='process'`, the scheduler runs in a child process started with the `spawn`
+    method when the first *async raster* is created. Each raster recipe is created again in that
+    process, and the arrays of the queries are sent back through shared memory. This mode is
+    restricted to the configurations that can be sent to another process, the raster recipe
+    constructors raise an exception otherwise:
+
+    - all the parameters of the recipe should be picklable, like `compute_array` and `merge_arrays`,
+    - the `*_pool` parameters should be `None` or keys. A key refers to a process pool of the
+      scheduler's process, with `multiprocessing.cpu_count()` workers,
+    - `queue_data_per_primitive` and `debug_observers` are not supported.
+
+    Like with any `spawn`ed process, your main module should be importable without side effects.
+
     Thread-safety
     -------------
     Thread safety is one of the main concern of buzzard. Everything is thread-safe except:
@@ -298,6 +343,10 @@ class Dataset(DatasetRegisterMixin):
                  allow_interpolation=False,
                  max_active=np.inf,
                  debug_observers=(),
+                 tile_cache_bytes=0,
+                 intern_footprints=False,
+                 max_memory_bytes=None,
+                 scheduler='thread',
                  **kwargs):
         sr_fallback, kwargs = deprecation_pool.handle_param_renaming_with_kwargs(
             new_name='sr_fallback', old_names={'sr_implicit': '0.4.4'}, context='Dataset.__init__',
@@ -365,12 +414,28 @@ class Dataset(DatasetRegisterMixin):
 
         if max_active < 1: # pragma: no cover
             raise ValueError('`max_active` should be greater than 1')
+        tile_cache_bytes = int(tile_cache_bytes)
+        if tile_cache_bytes < 0:
+            raise ValueError('`tile_cache_bytes` should be >=0')
+        if max_memory_bytes is not None:
+            max_memory_bytes = int(max_memory_bytes)
+            if max_memory_bytes <= 0:
+                raise ValueError('`max_memory_bytes` should be None or >0')
+        if scheduler not in {'thread', 'process'}:
+            raise ValueError("`scheduler` should be one of {'thread', 'process'}")
+        if scheduler == 'process' and debug_observers:
+            raise ValueError(
+                "`debug_observers` is not supported with `scheduler='process'`, the events occur in "
+                "the scheduler's process"
+            )
 
         allow_interpolation = bool(allow_interpolation)
         allow_none_geometry = bool(allow_none_geometry)
         analyse_transformation = bool(analyse_transformation)
+        intern_footprints = bool(intern_footprints)
         self._ds_closed = False
-        self._back = BackDataset(
+        self._scheduler = scheduler
+        back_kwargs = dict(
             wkt_work=wkt_work,
             wkt_fallback=wkt_fallback,
             wkt_forced=wkt_forced,
@@ -380,7 +445,28 @@ class Dataset(DatasetRegisterMixin):
             max_active=max_active,
             ds_id=id(self),
             debug_observers=debug_observers,
+            tile_cache_bytes=tile_cache_bytes,
+            intern_footprints=intern_footprints,
+            max_memory_bytes=max_memory_bytes,
         )
+        if scheduler == 'thread':
+            self._back = BackDataset(**back_kwargs)
+        else:
+            # The Dataset of the scheduler's process, that hosts the actors
+            scheduler_dataset_kwargs = dict(
+                sr_work=wkt_work,
+                sr_fallback=wkt_fallback,
+                sr_forced=wkt_forced,
+                analyse_transformation=analyse_transformation,
+                allow_none_geometry=allow_none_geometry,
+                allow_interpolation=allow_interpolation,
+                tile_cache_bytes=tile_cache_bytes,
+                intern_footprints=intern_footprints,
+                max_memory_bytes=max_memory_bytes,
+            )
+            self._back = BackDatasetWithProcessScheduler(
+                scheduler_dataset_kwargs=scheduler_dataset_kwargs, **back_kwargs
+            )
         super(Dataset, self).__init__()
 
     # Raster entry points *********************************************************************** **
@@ -784,12 +870,7 @@ class Dataset(DatasetRegisterMixin):
             max_resampling_size=None, automatic_remapping=True,
             debug_observers=(),
     ):
-        """
-
-        .. warning::
-            This method is not yet implemented. It exists for documentation purposes.
-
-        Create a *raster recipe* and register it under `key` within this Dataset.
+        """Create a *raster recipe* and register it under `key` within this Dataset.
 
         A *raster recipe* implements the same interfaces as all other rasters, but internally it
         computes data on the fly by calling a callback. The main goal of the *raster recipes* is to
@@ -909,6 +990,8 @@ class Dataset(DatasetRegisterMixin):
         If `computation_tiles` is (int, int), a tiling will be constructed using Footprint.tile
         using those two ints.
 
+        If `automatic_remapping` is False, `computation_tiles` can't be used.
+
         .. _Merge Function:
         Merge Function
         --------------
@@ -993,6 +1076,11 @@ class Dataset(DatasetRegisterMixin):
         - A *multiprocessing.pool.ThreadPool*, should be the default choice.
         - A *multiprocessing.pool.Pool*, a process pool. Useful for computations that requires the
           GIL or that leaks memory.
+        - A *concurrent.futures.Executor*. A *ThreadPoolExecutor* is used like a *ThreadPool*. Any
+          other executor, like a *ProcessPoolExecutor* or a custom one, is used like a process
+          pool: the arrays are exchanged through shared memory (or pickling) and the functions
+          should be picklable. The number of concurrent jobs is read from `_max_workers`, or
+          `max_workers`, and defaults to `multiprocessing.cpu_count()`.
         - `None`, to request the scheduler thread to perform the tasks itself. Should be used when
           the computation is very light.
         - A *hashable* (like a *string*), that will map to a pool registered in the *Dataset*. If
@@ -1000,14 +1088,212 @@ class Dataset(DatasetRegisterMixin):
           `multiprocessing.cpu_count()` workers will be automatically instanciated. When the
           Dataset is closed, the pools instanciated that way will be joined.
 
+        With a Dataset created with `scheduler='process'`, only `None` and the keys are accepted
+        (see :ref:`Scheduler`).
+
         See Also
         --------
         - :py:meth:`Dataset.acreate_raster_recipe`: To skip the `key` assigment
-        - :py:meth:`Dataset.create_raster_recipe`: For results `caching`
+        - :py:meth:`Dataset.create_cached_raster_recipe`: For results `caching`
         - :py:meth:`Dataset.acreate_cached_raster_recipe`: To skip the `key` assigment
 
         """
-        raise NotImplementedError()
+        # Parameters of the recipe in the scheduler's process ******************
+        if self._scheduler == 'process':
+            remote_kwargs = dict(
+                fp=fp, dtype=dtype, channel_count=channel_count,
+                channels_schema=channels_schema, sr=sr,
+                compute_array=compute_array, merge_arrays=merge_arrays,
+                computation_pool=computation_pool, merge_pool=merge_pool,
+                resample_pool=resample_pool,
+                computation_tiles=computation_tiles, max_computation_size=max_computation_size,
+                max_resampling_size=max_resampling_size, automatic_remapping=automatic_remapping,
+            )
+        else:
+            remote_kwargs = None
+
+        # Parameter checking ***************************************************
+        # Classic RasterSource parameters *******************
+        if not isinstance(fp, Footprint): # pragma: no cover
+            raise TypeError('`fp` should be a Footprint')
+        dtype = np.dtype(dtype)
+        channel_count = int(channel_count)
+        if channel_count <= 0:
+            raise ValueError('`channel_count` should be >0')
+        channels_schema = _tools.sanitize_channels_schema(channels_schema, channel_count)
+        if sr is not None:
+            success, payload = Catch(osr.GetUserInputAsWKT, nonzero_int_is_error=True)(sr)
+            if not success:
+                raise ValueError('Could not transform `sr` to `wkt` (gdal error: `{}`)'.format(
+                    payload[1]
+                ))
+            wkt = payload
+        else:
+            wkt = None
+        del sr
+        if wkt is not None:
+            fp = self._back.convert_footprint(fp, wkt)
+
+        # Callables ****************************************
+        if compute_array is None:
+            raise ValueError('Missing `compute_array` parameter')
+        if not callable(compute_array):
+            raise TypeError('`compute_array` should be callable')
+        if not callable(merge_arrays):
+            raise TypeError('`merge_arrays` should be callable')
+
+        # Primitives ***************************************
+        if convert_footprint_per_primitive is None:
+            convert_footprint_per_primitive = {
+                name: (lambda fp: fp)
+                for name in queue_data_per_primitive.keys()
+            }
+
+        if queue_data_per_primitive.keys() != convert_footprint_per_primitive.keys():
+            err = 'There should be the same keys in `queue_data_per_primitive` and '
+            err += '`convert_footprint_per_primitive`.'
+            if queue_data_per_primitive.keys() - convert_footprint_per_primitive.keys():
+                err += '\n{} are missing from `convert_footprint_per_primitive`.'.format(
+                    queue_data_per_primitive.keys() - convert_footprint_per_primitive.keys()
+                )
+            if convert_footprint_per_primitive.keys() - queue_data_per_primitive.keys():
+                err += '\n{} are missing from `queue_data_per_primitive`.'.format(
+                    convert_footprint_per_primitive.keys() - queue_data_per_primitive.keys()
+                )
+            raise ValueError(err)
+
+        primitives_back = {}
+        primitives_kwargs = {}
+        for name, met in queue_data_per_primitive.items():
+            primitives_back[name], primitives_kwargs[name] = _tools.shatter_queue_data_method(met, name)
+            if primitives_back[name].back_ds is not self._back:
+                raise ValueError('The `{}` primitive comes from another Dataset'.format(
+                    name
+                ))
+
+        for name, func in convert_footprint_per_primitive.items():
+            if not callable(func):
+                raise TypeError('convert_footprint_per_primitive[{}] should be callable'.format(
+                    name
+                ))
+
+        # Scheduler's process ******************************
+        if remote_kwargs is not None:
+            check_recipe_parameters(
+                self._back.pools_container, remote_kwargs,
+                queue_data_per_primitive, debug_observers,
+            )
+            # The pools live in the scheduler's process
+            computation_pool, merge_pool, resample_pool = None, None, None
+
+        # Pools ********************************************
+        computation_pool = self._back.pools_container._normalize_pool_parameter(
+            computation_pool, 'computation_pool'
+        )
+        merge_pool = self._back.pools_container._normalize_pool_parameter(
+            merge_pool, 'merge_pool'
+        )
+        resample_pool = self._back.pools_container._normalize_pool_parameter(
+            resample_pool, 'resample_pool'
+        )
+
+        # Tilings ******************************************
+        automatic_remapping = bool(automatic_remapping)
+        if computation_tiles is not None and max_computation_size is not None:
+            raise ValueError('`computation_tiles` and `max_computation_size` should not be both provided')
+
+        if computation_tiles is None:
+            pass
+        elif not automatic_remapping:
+            raise ValueError('`computation_tiles` should be None when `automatic_remapping` is False')
+        elif isinstance(computation_tiles, np.ndarray) and computation_tiles.dtype == np.object:
+            if not _tools.is_tiling_covering_fp(
+                    computation_tiles, fp,
+                    allow_outer_pixels=True, allow_overlapping_pixels=True,
+            ):
+                raise ValueError("`computation_tiles` should be a tiling covering raster's Footprint")
+        else:
+            # Defer the parameter checking to fp.tile
+            computation_tiles = fp.tile(computation_tiles, 0, 0, boundary_effect='shrink')
+        if computation_tiles is not None:
+            computation_tiles = self._back.footprint_interner.intern_array(computation_tiles)
+
+        if max_computation_size is not None:
+            max_computation_size = np.asarray(max_computation_size, dtype=int)
+            if max_computation_size.shape not in [(), (2,)]:
+                raise ValueError('`max_computation_size` should be an int or a tuple of 2 ints')
+            if (max_computation_size <= 0).any():
+                raise ValueError('`max_computation_size` should be >0')
+            max_computation_size = tuple(np.broadcast_to(max_computation_size, (2,)).tolist())
+
+        # Misc *********************************************
+        if max_resampling_size is not None:
+            max_resampling_size = int(max_resampling_size)
+            if max_resampling_size <= 0:
+                raise ValueError('`max_resampling_size` should be >0')
+
+        # Construction *********************************************************
+        prox = NocacheRasterRecipe(
+            self,
+            fp, dtype, channel_count, channels_schema, wkt,
+            compute_array, merge_arrays,
+            primitives_back, primitives_kwargs, convert_footprint_per_primitive,
+            computation_pool, merge_pool, resample_pool,
+            computation_tiles, max_computation_size,
+            max_resampling_size, automatic_remapping,
+            debug_observers,
+        )
+
+        if remote_kwargs is not None:
+            self._back.declare_raster(prox._back, 'acreate_raster_recipe', remote_kwargs)
+
+        # Dataset Registering ***********************************************
+        if not isinstance(key, _AnonymousSentry):
+            self._register([key], prox)
+        else:
+            self._register([], prox)
+        return prox
+
+    def acreate_raster_recipe(
+            self,
+
+            # raster attributes
+            fp, dtype, channel_count, channels_schema=None, sr=None,
+
+            # callbacks running on pool
+            compute_array=None, merge_arrays=buzzard.utils.concat_arrays,
+
+            # primitives
+            queue_data_per_primitive=MappingProxyType({}), convert_footprint_per_primitive=None,
+
+            # pools
+            computation_pool='cpu', merge_pool='cpu', resample_pool='cpu',
+
+            # misc
+            computation_tiles=None, max_computation_size=None,
+            max_resampling_size=None, automatic_remapping=True,
+            debug_observers=(),
+    ):
+        """Create a raster recipe anonymously within this Dataset.
+
+        See Dataset.create_raster_recipe
+
+        See Also
+        --------
+        - :py:meth:`Dataset.create_cached_raster_recipe`: For results `caching`
+        - :py:meth:`Dataset.create_raster_recipe`: To assign a `key` to this source within the `Dataset`
+
+        """
+        return self.create_raster_recipe(
+            _AnonymousSentry(),
+            fp, dtype, channel_count, channels_schema, sr,
+            compute_array, merge_arrays,
+            queue_data_per_primitive, convert_footprint_per_primitive,
+            computation_pool, merge_pool, resample_pool,
+            computation_tiles, max_computation_size,
+            max_resampling_size, automatic_remapping,
+            debug_observers,
+        )
 
     def create_cached_raster_recipe(
             self, key,
@@ -1020,6 +1306,8 @@ class Dataset(DatasetRegisterMixin):
 
             # filesystem
             cache_dir=None, ow=False,
+            cache_format='gtiff', checksum='sum64', trust_mtime_size=False, lock_cache_files=False,
+            max_cache_bytes=None,
 
             # primitives
             queue_data_per_primitive=MappingProxyType({}), convert_footprint_per_primitive=None,
@@ -1029,6 +1317,7 @@ class Dataset(DatasetRegisterMixin):
 
             # misc
             cache_tiles=(512, 512), computation_tiles=None, max_resampling_size=None,
+            tile_cache_bytes=None,
             debug_observers=()
     ):
         """Create a *cached raster recipe* and register it under `key` within this Dataset.
@@ -1037,8 +1326,9 @@ class Dataset(DatasetRegisterMixin):
         twice. Cache files are used to store and reuse pixels from computations. The cache can even
         be reused between python sessions.
 
-        If you are familiar with `create_raster_recipe` four parameters are new here: `io_pool`,
-        `cache_tiles`, `cache_dir` and `ow`. They are all related to file system operations.
+        If you are familiar with `create_raster_recipe` nine parameters are new here: `io_pool`,
+        `cache_tiles`, `cache_dir`, `ow`, `cache_format`, `checksum`, `trust_mtime_size`,
+        `lock_cache_files` and `max_cache_bytes`. They are all related to file system operations.
 
         See `create_raster_recipe` method, since it shares most of the features:
 
@@ -1073,6 +1363,42 @@ class Dataset(DatasetRegisterMixin):
                 not only the tiles needed (hence computed) but all buzzard cache files in
                 `cache_dir` will be deleted.
 
+        cache_format: str or ACacheFormat
+            How the cache files are stored on disk.
+
+            - 'gtiff': Uncompressed tiled GeoTIFF files, same as `buzz.GTiffCacheFormat()`
+            - 'raw': Uncompressed `.npy` files, read through memory maps without GDAL, same as
+              `buzz.RawCacheFormat()`
+            - `buzz.GTiffCacheFormat(compress, predictor, level)`: Compressed GeoTIFF files, useful
+              when the disk is the bottleneck
+        checksum: str
+            Checksum algorithm of the new cache files. The checksum of a cache file, and the name
+            of its algorithm, are part of its name. The checksum is verified before the file's first
+            use, with the algorithm the file was written with. Changing the algorithm keeps the
+            existing cache files.
+
+            - 'sum64': Sum of the file as uint64 values, the historical algorithm.
+            - 'blake2b': Strong hash from the standard library, usually several times faster.
+            - 'xxh64': Even faster, requires the `xxhash` package.
+        trust_mtime_size: bool
+            If True, remember the size and modification time of the verified cache files in a
+            `buzz_manifest.jsonl` file of `cache_dir`. When the recipe is reopened, the unchanged
+            files are used right away, without reading them entirely to verify their checksum.
+        lock_cache_files: bool
+            If True, coordinate with the other processes (or Datasets) that use the same
+            `cache_dir` so that a cache tile is never computed twice. A process locks a `.lock`
+            file of `cache_dir` with `flock` before computing a missing cache tile. The other
+            processes wait for the cache file instead of computing it, and discover it as soon as
+            the lock is released. If the process holding a lock dies, or releases it without
+            writing the cache file, the lock is taken over.
+            Not available on Windows.
+        max_cache_bytes: None or int
+            Budget in bytes of the cache files of this recipe in `cache_dir`. When it is exceeded,
+            the cache files that were read the least recently are removed, they will be computed
+            again if needed. The cache files needed by the ongoing queries are never removed, the
+            budget may be exceeded temporarily. The files already in `cache_dir` count in the
+            budget, from the oldest to the newest. None for no limit.
+            Not compatible with `lock_cache_files`, since another process may read a removed file.
         queue_data_per_primitive:
             see :py:meth:`Dataset.create_raster_recipe` method
         convert_footprint_per_primitive:
@@ -1093,9 +1419,24 @@ class Dataset(DatasetRegisterMixin):
             else: see `create_raster_recipe` method
         max_resampling_size: None or int or (int, int)
             see :py:meth:`Dataset.create_raster_recipe` method
+        tile_cache_bytes: None or int
+            In-memory LRU of the cache tiles read from disk, useful when the queries overlap (e.g.
+            sliding windows). On a miss the whole cache tile is read, with all its channels.
+
+            - None: Use the one of the Dataset, see `tile_cache_bytes` parameter of `Dataset`
+            - int: Use a LRU of that many bytes dedicated to this raster, 0 to disable it
+
+            The `debug_observers` with an `on_tile_cache_update(raster, path, event, stats)` method
+            are notified of each 'hit', 'miss' and 'eviction' `event`, `stats` being a dict of the
+            counters of the LRU (hits, misses, evictions, tile_count, nbytes, max_bytes).
         debug_observers: sequence of object
             see :py:meth:`Dataset.create_raster_recipe` method
 
+            When an array requested to a query is already being produced for another query with
+            the same footprint, channels, nodata and interpolation, it is produced once and copied.
+            The `debug_observers` with an `on_production_coalesced(raster, fp)` method are notified
+            of each array that was not produced twice.
+
         Returns
         -------
         source: CachedRasterRecipe
@@ -1107,6 +1448,23 @@ class Dataset(DatasetRegisterMixin):
         - :py:meth:`Dataset.acreate_cached_raster_recipe`: To skip the `key` assigment
 
         """
+        # Parameters of the recipe in the scheduler's process ******************
+        if self._scheduler == 'process':
+            remote_kwargs = dict(
+                fp=fp, dtype=dtype, channel_count=channel_count,
+                channels_schema=channels_schema, sr=sr,
+                compute_array=compute_array, merge_arrays=merge_arrays,
+                cache_dir=cache_dir, ow=ow, cache_format=cache_format, checksum=checksum,
+                trust_mtime_size=trust_mtime_size, lock_cache_files=lock_cache_files,
+                max_cache_bytes=max_cache_bytes,
+                computation_pool=computation_pool, merge_pool=merge_pool, io_pool=io_pool,
+                resample_pool=resample_pool,
+                cache_tiles=cache_tiles, computation_tiles=computation_tiles,
+                max_resampling_size=max_resampling_size, tile_cache_bytes=tile_cache_bytes,
+            )
+        else:
+            remote_kwargs = None
+
         # Parameter checking ***************************************************
         # Classic RasterSource parameters *******************
         if not isinstance(fp, Footprint): # pragma: no cover
@@ -1172,6 +1530,15 @@ class Dataset(DatasetRegisterMixin):
                     name
                 ))
 
+        # Scheduler's process ******************************
+        if remote_kwargs is not None:
+            check_recipe_parameters(
+                self._back.pools_container, remote_kwargs,
+                queue_data_per_primitive, debug_observers,
+            )
+            # The pools live in the scheduler's process
+            computation_pool, merge_pool, io_pool, resample_pool = None, None, None, None
+
         # Pools ********************************************
         computation_pool = self._back.pools_container._normalize_pool_parameter(
             computation_pool, 'computation_pool'
@@ -1199,17 +1566,20 @@ class Dataset(DatasetRegisterMixin):
             # Defer the parameter checking to fp.tile
             cache_tiles = fp.tile(cache_tiles, 0, 0, boundary_effect='shrink')
 
+        cache_tiles = self._back.footprint_interner.intern_array(cache_tiles)
         if computation_tiles is None:
             computation_tiles = cache_tiles
         elif isinstance(computation_tiles, np.ndarray) and computation_tiles.dtype == np.object:
             if not _tools.is_tiling_covering_fp(
-                    cache_tiles, fp,
+                    computation_tiles, fp,
                     allow_outer_pixels=True, allow_overlapping_pixels=True,
             ):
                 raise ValueError("`computation_tiles` should be a tiling covering raster's Footprint")
+            computation_tiles = self._back.footprint_interner.intern_array(computation_tiles)
         else:
             # Defer the parameter checking to fp.tile
             computation_tiles = fp.tile(computation_tiles, 0, 0, boundary_effect='shrink')
+            computation_tiles = self._back.footprint_interner.intern_array(computation_tiles)
 
         # Misc *********************************************
         if max_resampling_size is not None:
@@ -1224,20 +1594,45 @@ class Dataset(DatasetRegisterMixin):
         cache_dir = str(cache_dir)
         overwrite = bool(ow)
         del ow
+        cache_format = sanitize_cache_format(cache_format)
+        checksum = sanitize_checksum(checksum)
+        trust_mtime_size = bool(trust_mtime_size)
+        lock_cache_files = bool(lock_cache_files)
+        if lock_cache_files and not cache_lock_supported:
+            raise ValueError('`lock_cache_files` requires `fcntl.flock`, not available on this platform')
+        if max_cache_bytes is not None:
+            max_cache_bytes = int(max_cache_bytes)
+            if max_cache_bytes < 0:
+                raise ValueError('`max_cache_bytes` should be >=0')
+            if lock_cache_files:
+                raise ValueError('`max_cache_bytes` and `lock_cache_files` are not compatible')
+        if tile_cache_bytes is None:
+            tile_cache = self._back.tile_cache
+        else:
+            tile_cache_bytes = int(tile_cache_bytes)
+            if tile_cache_bytes < 0:
+                raise ValueError('`tile_cache_bytes` should be >=0')
+            tile_cache = TileCache(tile_cache_bytes)
+        if not tile_cache.enabled:
+            tile_cache = None
 
         # Construction *********************************************************
         prox = CachedRasterRecipe(
             self,
             fp, dtype, channel_count, channels_schema, wkt,
             compute_array, merge_arrays,
-            cache_dir, overwrite,
+            cache_dir, overwrite, cache_format, checksum, trust_mtime_size, lock_cache_files,
+            max_cache_bytes,
             primitives_back, primitives_kwargs, convert_footprint_per_primitive,
             computation_pool, merge_pool, io_pool, resample_pool,
             cache_tiles, computation_tiles,
-            max_resampling_size,
+            max_resampling_size, tile_cache,
             debug_observers,
         )
 
+        if remote_kwargs is not None:
+            self._back.declare_raster(prox._back, 'acreate_cached_raster_recipe', remote_kwargs)
+
         # Dataset Registering ***********************************************
         if not isinstance(key, _AnonymousSentry):
             self._register([key], prox)
@@ -1256,6 +1651,8 @@ class Dataset(DatasetRegisterMixin):
 
             # filesystem
             cache_dir=None, ow=False,
+            cache_format='gtiff', checksum='sum64', trust_mtime_size=False, lock_cache_files=False,
+            max_cache_bytes=None,
 
             # primitives
             queue_data_per_primitive=MappingProxyType({}), convert_footprint_per_primitive=None,
@@ -1265,6 +1662,7 @@ class Dataset(DatasetRegisterMixin):
 
             # misc
             cache_tiles=(512, 512), computation_tiles=None, max_resampling_size=None,
+            tile_cache_bytes=None,
             debug_observers=()
     ):
         """Create a cached raster reciped anonymously within this Dataset.
@@ -1281,10 +1679,12 @@ class Dataset(DatasetRegisterMixin):
             _AnonymousSentry(),
             fp, dtype, channel_count, channels_schema, sr,
             compute_array, merge_arrays,
-            cache_dir, ow,
+            cache_dir, ow, cache_format, checksum, trust_mtime_size, lock_cache_files,
+            max_cache_bytes,
             queue_data_per_primitive, convert_footprint_per_primitive,
             computation_pool, merge_pool, io_pool, resample_pool,
             cache_tiles, computation_tiles, max_resampling_size,
+            tile_cache_bytes,
             debug_observers,
         )
 
@@ -1720,6 +2120,19 @@ class Dataset(DatasetRegisterMixin):
         """
         return self._back.pools_container
 
+    # Memory budget ***************************************************************************** **
+    @property
+    def max_memory_bytes(self):
+        """Budget in bytes of the arrays being produced by the async rasters, None if disabled"""
+        return self._back.memory_budget.max_bytes
+
+    @property
+    def in_flight_bytes(self):
+        """Number of bytes currently accounted against the `max_memory_bytes` budget. Always 0 if
+        the budget is disabled.
+        """
+        return self._back.in_flight_bytes
+
     # Deprecation ******************************************************************************* **
     open_araster = deprecation_pool.wrap_method(
         aopen_raster,
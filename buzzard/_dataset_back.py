@@ -2,7 +2,12 @@
 from buzzard._dataset_back_conversions import BackDatasetConversionsMixin
 from buzzard._dataset_back_activation_pool import BackDatasetActivationPoolMixin
 from buzzard._dataset_back_scheduler import BackDatasetSchedulerMixin
+from buzzard._dataset_back_process_scheduler import BackDatasetProcessSchedulerMixin
 from buzzard._dataset_pools_container import PoolsContainer
+from buzzard._dataset_shared_array_arena import SharedArrayArena
+from buzzard._dataset_tile_cache import TileCache
+from buzzard._dataset_footprint_interner import FootprintInterner
+from buzzard._dataset_memory_budget import MemoryBudget
 
 class BackDataset(BackDatasetConversionsMixin,
                      BackDatasetActivationPoolMixin,
@@ -10,8 +15,20 @@ class BackDataset(BackDatasetConversionsMixin,
     """Backend of the Dataset, referenced by backend proxies
     Implements activation (pooling) and conversion methods"""
 
-    def __init__(self, allow_none_geometry, allow_interpolation, **kwargs):
+    def __init__(self, allow_none_geometry, allow_interpolation, tile_cache_bytes,
+                 intern_footprints, max_memory_bytes, **kwargs):
         self.allow_interpolation = allow_interpolation
         self.allow_none_geometry = allow_none_geometry
         self.pools_container = PoolsContainer()
+        self.shared_array_arena = SharedArrayArena()
+        self.tile_cache = TileCache(tile_cache_bytes)
+        self.footprint_interner = FootprintInterner(intern_footprints)
+        self.memory_budget = MemoryBudget(max_memory_bytes)
         super(BackDataset, self).__init__(**kwargs)
+
+    @property
+    def in_flight_bytes(self):
+        return self.memory_budget.nbytes
+
+class BackDatasetWithProcessScheduler(BackDatasetProcessSchedulerMixin, BackDataset):
+    """Backend of a Dataset whose scheduler runs in a child process"""
@@ -0,0 +1,511 @@
+"""Scheduler of a Dataset created with `scheduler='process'`.
+
+The actors run in a child process that hosts a Dataset with a regular scheduler. The recipes of the
+user's process are recreated there from the parameters of their constructors, and the queries are
+replicated there with output queues that send their arrays back through shared memory.
+"""
+
+import collections
+import contextlib
+import itertools
+import multiprocessing as mp
+import multiprocessing.util
+import pickle
+import queue
+import threading
+import traceback
+import weakref
+
+import numpy as np
+
+from buzzard import _tools
+from buzzard._actors.message import Msg
+from buzzard._dataset_shared_array_arena import SharedArrayHandle
+
+try:
+    from multiprocessing import shared_memory
+except ImportError: # pragma: no cover
+    # Python < 3.8, arrays are pickled through the pipe
+    shared_memory = None
+
+# Maximum time spent by the scheduler's process between two checks of its scheduler thread, and by
+# this process between two checks of the scheduler's process when waiting for a reply
+IDLE_TIMEOUT = 1 / 2
+
+POOL_PARAMETERS = ['computation_pool', 'merge_pool', 'io_pool', 'resample_pool']
+
+def check_recipe_parameters(pools_container, kwargs, queue_data_per_primitive, debug_observers):
+    """Raise an exception if a recipe can't be recreated in the scheduler's process from the
+    parameters `kwargs` of its constructor"""
+    if queue_data_per_primitive:
+        raise ValueError(
+            "`queue_data_per_primitive` is not supported with `scheduler='process'`, the "
+            "scheduler's process can't query the rasters of this process"
+        )
+    if debug_observers:
+        raise ValueError(
+            "`debug_observers` is not supported with `scheduler='process'`, the events occur in "
+            "the scheduler's process"
+        )
+    for name in POOL_PARAMETERS:
+        pool = kwargs.get(name)
+        if pool is None:
+            continue
+        if _tools.is_pool(pool):
+            raise TypeError(
+                "`{}` should be None or a key with `scheduler='process'`, a pool can't be sent "
+                "to the scheduler's process".format(name)
+            )
+        try:
+            hash(pool)
+        except TypeError:
+            raise TypeError('`{}` should be None or hashable'.format(name)) from None
+        if pool in pools_container:
+            raise ValueError(
+                "`{}` should not be the key of a pool of this Dataset with "
+                "`scheduler='process'`, the pools are created in the scheduler's process".format(
+                    name
+                )
+            )
+    for name, value in kwargs.items():
+        try:
+            pickle.dumps(value)
+        except Exception as e:
+            raise TypeError(
+                "`{}` should be picklable with `scheduler='process'`".format(name)
+            ) from e
+
+class BackDatasetProcessSchedulerMixin(object):
+    """Replaces the scheduler thread of a BackDataset by a scheduler process.
+
+    Only the facades and the backends of the rasters live in this process, the actors live in the
+    scheduler's process.
+    """
+
+    def __init__(self, ds_id, scheduler_dataset_kwargs, **kwargs):
+        self._scheduler_dataset_kwargs = scheduler_dataset_kwargs
+        self._scheduler_process = None
+        self._raster_uid_per_address = {}
+        super().__init__(ds_id=ds_id, **kwargs)
+
+    # Public methods **************************************************************************** **
+    def declare_raster(self, back_raster, method_name, kwargs):
+        """Recreate a raster in the scheduler's process by calling `method_name` with `kwargs` on
+        the Dataset of that process. Replaces the `new_raster` message of the raster.
+        """
+        address = '/Raster{}/QueriesHandler'.format(back_raster.uid)
+        self._raster_uid_per_address[address] = back_raster.uid
+        self.ensure_scheduler_living()
+        self._scheduler_process.send('new_raster', back_raster.uid, method_name, kwargs)
+
+    def ensure_scheduler_living(self):
+        if self._scheduler_process is None:
+            self._scheduler_process = _SchedulerProcess(
+                self._ds_id, self._scheduler_dataset_kwargs,
+            )
+            # Called before `multiprocessing` joins the child processes when this process exits
+            mp.util.Finalize(self, self._scheduler_process.stop, exitpriority=10)
+        else:
+            self.ensure_scheduler_still_alive()
+
+    def ensure_scheduler_still_alive(self):
+        self._scheduler_process.ensure_still_alive()
+
+    def put_message(self, msg, check_scheduler_status=True):
+        if check_scheduler_status:
+            self.ensure_scheduler_living()
+        elif self._scheduler_process is None:
+            return
+
+        if msg.title == 'new_raster':
+            # The raster is recreated by `declare_raster`, from the parameters of its constructor
+            pass
+        elif msg.title == 'kill_raster':
+            back_raster, = msg.args
+            address = '/Raster{}/QueriesHandler'.format(back_raster.uid)
+            if self._raster_uid_per_address.pop(address, None) is not None:
+                self._scheduler_process.send('kill_raster', back_raster.uid)
+        elif msg.title == 'new_query':
+            queue_wref, _, fps = msg.args[:3]
+            self._scheduler_process.put_query(
+                self._raster_uid_per_address[msg.address], msg.title, queue_wref, len(fps),
+                msg.args[1:],
+            )
+        elif msg.title == 'new_precompute':
+            queue_wref, cache_fps = msg.args
+            self._scheduler_process.put_query(
+                self._raster_uid_per_address[msg.address], msg.title, queue_wref, len(cache_fps),
+                msg.args[1:],
+            )
+        else: # pragma: no cover
+            assert False, msg
+
+    def wake_up_scheduler(self):
+        """Signal that an output queue was consumed or collected. Can be called from any thread."""
+        if self._scheduler_process is not None:
+            self._scheduler_process.wake_up()
+
+    def stop_scheduler(self):
+        if self._scheduler_process is not None:
+            self._scheduler_process.stop()
+
+    @property
+    def in_flight_bytes(self):
+        if self._scheduler_process is None:
+            return 0
+        return self._scheduler_process.in_flight_bytes()
+
+class _SchedulerProcess(object):
+    """The scheduler's process and the two threads of this process that talk to it.
+
+    The `sender` thread sends the messages of this process and reports the consumption of the
+    output queues, the `receiver` thread puts the arrays received in the output queues.
+    An object put in an output queue of the scheduler's process is sent right away. The size of
+    that queue is the number of objects sent that were not yet pulled from the output queue of
+    this process, it never exceeds the `max_queue_size` of the query.
+    """
+
+    def __init__(self, ds_id, dataset_kwargs):
+        self._lock = threading.Lock()
+        self._outgoing_msgs = collections.deque()
+        self._query_per_qid = {}
+        self._qids = itertools.count()
+        self._wake_up_event = threading.Event()
+        self._in_flight_bytes_lock = threading.Lock()
+        self._in_flight_bytes_replies = queue.Queue()
+        self._exn = None
+        self._stopping = False
+
+        # The scheduler's process does not inherit the threads and the file descriptors of this one
+        ctx = mp.get_context('spawn')
+        self._conn, child_conn = ctx.Pipe()
+        self._process = ctx.Process(
+            target=_scheduler_process_main,
+            args=(child_conn, dataset_kwargs),
+            name='Dataset{:#x}Scheduler'.format(ds_id),
+        )
+        self._process.start()
+        child_conn.close()
+
+        self._sender = threading.Thread(
+            target=self._sender_loop,
+            name='Dataset{:#x}SchedulerSender'.format(ds_id),
+            daemon=True,
+        )
+        self._receiver = threading.Thread(
+            target=self._receiver_loop,
+            name='Dataset{:#x}SchedulerReceiver'.format(ds_id),
+            daemon=True,
+        )
+        self._sender.start()
+        self._receiver.start()
+
+    def send(self, *msg):
+        with self._lock:
+            if self._stopping:
+                return
+            self._outgoing_msgs.append(msg)
+        self._wake_up_event.set()
+
+    def put_query(self, raster_uid, title, queue_wref, count, args):
+        with self._lock:
+            if self._stopping:
+                return
+            qid = next(self._qids)
+            self._query_per_qid[qid] = _Query(queue_wref, count)
+            self._outgoing_msgs.append(('new_query', raster_uid, qid, title, args))
+        self._wake_up_event.set()
+
+    def wake_up(self):
+        self._wake_up_event.set()
+
+    def ensure_still_alive(self):
+        if self._exn is not None:
+            raise self._exn
+        if not self._receiver.is_alive():
+            raise RuntimeError(
+                "Dataset's scheduler process exited with code {}".format(self._process.exitcode)
+            )
+
+    def in_flight_bytes(self):
+        with self._in_flight_bytes_lock:
+            if self._stopping:
+                return 0
+            self.send('in_flight_bytes')
+            while True:
+                try:
+                    return self._in_flight_bytes_replies.get(timeout=IDLE_TIMEOUT)
+                except queue.Empty:
+                    self.ensure_still_alive()
+
+    def stop(self):
+        with self._lock:
+            if self._stopping:
+                return
+            self._stopping = True
+            self._outgoing_msgs.append(('stop',))
+        self._wake_up_event.set()
+        self._sender.join()
+        self._receiver.join()
+        self._process.join()
+        self._conn.close()
+
+    # Private methods *************************************************************************** **
+    def _sender_loop(self):
+        try:
+            while True:
+                # The event is cleared before the messages and the queues are checked, so that no
+                # signal can be lost
+                self._wake_up_event.wait()
+                self._wake_up_event.clear()
+                with self._lock:
+                    msgs = list(self._outgoing_msgs)
+                    self._outgoing_msgs.clear()
+                    msgs += self._poll_queries()
+                for msg in msgs:
+                    self._conn.send(msg)
+                    if msg[0] == 'stop':
+                        return
+        except Exception as e:
+            self._fail(e)
+            # The receiver stops when the scheduler's process is gone
+            self._process.terminate()
+
+    def _poll_queries(self):
+        msgs = []
+        for qid, query in list(self._query_per_qid.items()):
+            q = query.queue_wref()
+            if q is not None:
+                # The output queue is FIFO, the oldest arrays were pulled
+                pulled_count = query.received_count - q.qsize()
+                if pulled_count != query.pulled_count:
+                    msgs.append(('pulled', qid, pulled_count - query.pulled_count))
+                    query.pulled_count = pulled_count
+            if q is None or query.pulled_count == query.count:
+                # The output queue was collected or fully consumed
+                msgs.append(('drop_query', qid))
+                del self._query_per_qid[qid]
+            del q
+        return msgs
+
+    def _receiver_loop(self):
+        try:
+            while True:
+                try:
+                    msg = self._conn.recv()
+                except EOFError:
+                    if not self._stopping:
+                        raise RuntimeError("Dataset's scheduler process exited unexpectedly")
+                    return
+                title = msg[0]
+                if title == 'item':
+                    _, qid, item = msg
+                    # An item of a dropped query is decoded too, to free its shared memory
+                    obj = _decode_item(item)
+                    with self._lock:
+                        query = self._query_per_qid.get(qid)
+                        q = None if query is None else query.queue_wref()
+                        if q is not None:
+                            q.put_nowait(obj)
+                            query.received_count += 1
+                    del obj, q
+                elif title == 'in_flight_bytes':
+                    self._in_flight_bytes_replies.put(msg[1])
+                elif title == 'error':
+                    _, exn, tb = msg
+                    exn.__cause__ = _RemoteTraceback(tb)
+                    self._exn = exn
+                elif title == 'stopped':
+                    return
+                else: # pragma: no cover
+                    assert False, msg
+        except Exception as e:
+            self._fail(e)
+
+    def _fail(self, exn):
+        if self._exn is None:
+            self._exn = exn
+
+class _Query(object):
+    """State of a query of this process, replicated in the scheduler's process"""
+
+    def __init__(self, queue_wref, count):
+        self.queue_wref = queue_wref
+        self.count = count
+        self.received_count = 0
+        self.pulled_count = 0
+
+class _RemoteTraceback(Exception):
+    """Traceback of an exception raised in the scheduler's process"""
+
+    def __init__(self, tb):
+        super().__init__()
+        self.tb = tb
+
+    def __str__(self):
+        return self.tb
+
+# Scheduler's process ************************************************************************* **
+def _scheduler_process_main(conn, dataset_kwargs):
+    # Lazy import, `buzzard._dataset` imports this module
+    from buzzard._dataset import Dataset
+
+    _SchedulerProcessMain(conn, Dataset(**dataset_kwargs)).run()
+
+class _SchedulerProcessMain(object):
+    """Main thread of the scheduler's process, executes the messages of the user's process on a
+    Dataset with a regular scheduler"""
+
+    def __init__(self, conn, ds):
+        self._conn = conn
+        self._ds = ds
+        self._send_lock = threading.Lock()
+        self._raster_per_uid = {}
+        self._queue_per_qid = {}
+
+    def run(self):
+        back_ds = self._ds._back
+        try:
+            back_ds.ensure_scheduler_living()
+            while True:
+                if self._conn.poll(IDLE_TIMEOUT):
+                    try:
+                        msg = self._conn.recv()
+                    except EOFError:
+                        # The user's process is gone
+                        break
+                    if msg[0] == 'stop':
+                        break
+                    getattr(self, '_receive_' + msg[0])(*msg[1:])
+                back_ds.ensure_scheduler_still_alive()
+        except Exception as e:
+            self._send_exception(e)
+        finally:
+            self._queue_per_qid.clear()
+            self._raster_per_uid.clear()
+            self._ds.close()
+            with contextlib.suppress(OSError):
+                self._send('stopped')
+            self._conn.close()
+
+    def _send(self, *msg):
+        # Called from the main thread and from the scheduler thread of this process
+        with self._send_lock:
+            self._conn.send(msg)
+
+    def _send_exception(self, exn):
+        tb = traceback.format_exc()
+        try:
+            pickle.loads(pickle.dumps(exn))
+        except Exception:
+            exn = RuntimeError('{}: {}'.format(type(exn).__name__, exn))
+        with contextlib.suppress(OSError):
+            self._send('error', exn, tb)
+
+    def _receive_new_raster(self, raster_uid, method_name, kwargs):
+        for name in POOL_PARAMETERS:
+            key = kwargs.get(name)
+            if key is not None and key not in self._ds.pools:
+                # The pools of the scheduler's process are process pools
+                pool = mp.get_context('spawn').Pool(mp.cpu_count())
+                self._ds.pools.alias(key, pool)
+                self._ds.pools.manage(pool)
+        self._raster_per_uid[raster_uid] = getattr(self._ds, method_name)(**kwargs)
+
+    def _receive_kill_raster(self, raster_uid):
+        self._raster_per_uid.pop(raster_uid).close()
+
+    def _receive_new_query(self, raster_uid, qid, title, args):
+        back_raster = self._raster_per_uid[raster_uid]._back
+        back_ds = self._ds._back
+        q = _ForwardingOutputQueue(qid, self._send)
+        self._queue_per_qid[qid] = q
+        wake_up_scheduler = back_ds.wake_up_scheduler
+        back_ds.put_message(Msg(
+            '/Raster{}/QueriesHandler'.format(back_raster.uid),
+            title,
+            weakref.ref(q, lambda _: wake_up_scheduler()),
+            *args
+        ))
+
+    def _receive_pulled(self, qid, count):
+        self._queue_per_qid[qid].pulled(count)
+        self._ds._back.wake_up_scheduler()
+
+    def _receive_drop_query(self, qid):
+        # The scheduler is woken up when the queue is collected
+        del self._queue_per_qid[qid]
+
+    def _receive_in_flight_bytes(self):
+        self._send('in_flight_bytes', self._ds.in_flight_bytes)
+
+class _ForwardingOutputQueue(object):
+    """Output queue of a query in the scheduler's process, the objects put are sent to the user's
+    process right away"""
+
+    def __init__(self, qid, send):
+        self._qid = qid
+        self._send = send
+        self._lock = threading.Lock()
+        self._size = 0
+
+    def qsize(self):
+        with self._lock:
+            return self._size
+
+    def put_nowait(self, obj):
+        with self._lock:
+            self._size += 1
+        self._send('item', self._qid, _encode_item(obj))
+
+    def pulled(self, count):
+        with self._lock:
+            self._size -= count
+
+# Items of the output queues ****************************************************************** **
+def _encode_item(obj):
+    if isinstance(obj, np.ndarray):
+        return 'array', _share_array(obj)
+    if isinstance(obj, tuple):
+        # The `(prod_idx, array)` of an unordered query
+        prod_idx, arr = obj
+        return 'indexed_array', prod_idx, _share_array(arr)
+    # The Footprint of a precomputed cache tile
+    return 'object', obj
+
+def _decode_item(item):
+    if item[0] == 'array':
+        return _adopt_array(item[1])
+    if item[0] == 'indexed_array':
+        return item[1], _adopt_array(item[2])
+    return item[1]
+
+def _share_array(arr):
+    """Copy `arr` to a new shared memory segment, that will be unlinked by the user's process"""
+    if shared_memory is None: # pragma: no cover
+        return arr
+    shm = shared_memory.SharedMemory(create=True, size=max(1, arr.nbytes))
+    dst = np.ndarray(arr.shape, arr.dtype, buffer=shm.buf)
+    dst[...] = arr
+    handle = SharedArrayHandle(shm.name, 0, dst.shape, dst.strides, dst.dtype)
+    del dst
+    shm.close()
+    return handle
+
+def _adopt_array(handle):
+    """Map a segment created by `_share_array`, it is unlinked right away and freed when the array
+    (and all its views) is garbage collected"""
+    if not isinstance(handle, SharedArrayHandle): # pragma: no cover
+        return handle
+    shm = shared_memory.SharedMemory(name=handle.name)
+    shm.unlink()
+    arr = np.ndarray(
+        handle.shape, handle.dtype, buffer=shm.buf, offset=handle.offset, strides=handle.strides,
+    )
+    weakref.finalize(arr, _close_segment, shm)
+    return arr
+
+def _close_segment(shm):
+    # The mapping is closed when `shm` is collected if a buffer is still exported
+    with contextlib.suppress(BufferError):
+        shm.close()
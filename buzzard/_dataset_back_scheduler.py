@@ -1,7 +1,6 @@
 import collections
-import time
 import threading
-import datetime
+import time
 
 from buzzard._actors.top_level import ActorTopLevel
 from buzzard._actors.message import Msg, DroppableMsg, AgingMsg
@@ -9,11 +8,17 @@ from buzzard._debug_observers_manager import DebugObserversManager
 
 VERBOSE = 0
 
+# Maximum time spent idle by the scheduler between two polls of the "keep alive" actors. All the
+# events that the scheduler waits for (external messages, pool jobs completion, output queues
+# consumption or collection) wake the scheduler up before this timeout.
+IDLE_TIMEOUT = 1 / 2
+
 class BackDatasetSchedulerMixin(object):
     """TODO: docstring"""
 
     def __init__(self, ds_id, debug_observers, **kwargs):
         self._ext_message_to_scheduler_queue = []
+        self._wake_up_event = threading.Event()
         self._thread = None
         self._thread_exn = None
         self._ds_id = ds_id
@@ -35,7 +40,7 @@ class BackDatasetSchedulerMixin(object):
             self.ensure_scheduler_still_alive()
 
     def ensure_scheduler_still_alive(self):
-        if not self._thread.isAlive():
+        if not self._thread.is_alive():
             if isinstance(self._thread_exn, Exception):
                 raise self._thread_exn
             else:
@@ -49,9 +54,17 @@ class BackDatasetSchedulerMixin(object):
 
         # a list is thread-safe: https://stackoverflow.com/a/6319267/4952173
         self._ext_message_to_scheduler_queue.append(msg)
+        self.wake_up_scheduler()
+
+    def wake_up_scheduler(self):
+        """Signal the scheduler that something happened outside of it, if it is sleeping it will
+        perform a new loop right away. Can be called from any thread.
+        """
+        self._wake_up_event.set()
 
     def stop_scheduler(self):
         self._stop = True
+        self.wake_up_scheduler()
         if self._thread is not None:
             self._thread.join()
 
@@ -121,8 +134,14 @@ class BackDatasetSchedulerMixin(object):
         # Stack of pending messages
         piles_of_msgs = [] # type: List[Tuple[Actor, List[Union[Msg, Actor]]]]
 
+        # The messages are only timed if an observer listens
+        timed = (
+            self._debug_mngr.observed('message_passed') or
+            self._debug_mngr.observed('message_span')
+        )
+
         # Instantiate and register the top level actor
-        top_level_actor = ActorTopLevel()
+        top_level_actor = ActorTopLevel(self.wake_up_scheduler, self._debug_mngr)
         _register_actor(top_level_actor)
         piles_of_msgs.append(
             (top_level_actor, 'ext_receive_', top_level_actor.ext_receive_prime()),
@@ -157,7 +176,6 @@ class BackDatasetSchedulerMixin(object):
                             # This message may be discadted if DroppableMsg
                             assert isinstance(msg, DroppableMsg), '\ndst_actor: {}\n      msg: {}\n'.format(dst_actor, msg)
                         else:
-                            a = datetime.datetime.now()
                             met = getattr(dst_actor, title_prefix + msg.title)
 
                             # Check if stale message
@@ -172,10 +190,13 @@ class BackDatasetSchedulerMixin(object):
                                 msgidx_of_prev_methodcall[(met, msg.id_args)] = msg_idx
 
                             # Dispatch message and retrieve new ones
-                            new_msgs = met(*msg.args)
-                            b = datetime.datetime.now()
-                            delta = (b - a).total_seconds()
-                            self._debug_mngr.event('message_passed', dst_actor.__class__.__name__, msg.title, delta)
+                            if timed:
+                                a = time.perf_counter()
+                                new_msgs = met(*msg.args)
+                                b = time.perf_counter()
+                                self._message_timed(dst_actor, msg.title, a, b)
+                            else:
+                                new_msgs = met(*msg.args)
                             if self._stop:
                                 # Dataset is closing. This is the same as `step 5`. (optimisation purposes)
                                 return
@@ -219,11 +240,13 @@ class BackDatasetSchedulerMixin(object):
                 for actor, _ in zip(keep_alive_iterator, range(len(keep_alive_actors))):
                     # Iter at most once on each "keep alive" actor
 
-                    a = datetime.datetime.now()
-                    new_msgs = actor.ext_receive_nothing()
-                    b = datetime.datetime.now()
-                    delta = (b - a).total_seconds()
-                    self._debug_mngr.event('message_passed', actor.__class__.__name__, 'nothing', delta)
+                    if timed:
+                        a = time.perf_counter()
+                        new_msgs = actor.ext_receive_nothing()
+                        b = time.perf_counter()
+                        self._message_timed(actor, 'nothing', a, b)
+                    else:
+                        new_msgs = actor.ext_receive_nothing()
 
                     if self._stop:
                         # Dataset is closing. This is the same as `step 5`. (optimisation purposes)
@@ -247,16 +270,23 @@ class BackDatasetSchedulerMixin(object):
                 actor = None
 
             # Step 4: If no messages from phase 2 nor from phase 3
-            #   Sleep
+            #   Sleep until something happens outside of the scheduler
+            #   The event is cleared right after waking up, before the external messages and the
+            #   "keep alive" actors are checked again, so that no signal can be lost.
             if not piles_of_msgs:
                 self._debug_mngr.event('scheduler_activity_update', False)
-                time.sleep(1 / 20) # TODO: Set a better sleep time / make it parameterizable
+                self._wake_up_event.wait(IDLE_TIMEOUT)
+                self._wake_up_event.clear()
                 self._debug_mngr.event('scheduler_activity_update', True)
 
             # Step 5: Check if Dataset was collected
             if self._stop:
                 return
 
+    def _message_timed(self, actor, title, start, end):
+        self._debug_mngr.event('message_passed', actor.__class__.__name__, title, end - start)
+        self._debug_mngr.event('message_span', actor.address, title, start, end)
+
 def _cycle_list(l):
     """Loop in a list forever, even if its size changes. Error if empty."""
     i = -1
@@ -0,0 +1,44 @@
+import threading
+import weakref
+
+import numpy as np
+
+class FootprintInterner(object):
+    """Table of the Footprints of a Dataset, to use a single object for all the equal Footprints.
+
+    The Footprints of the tilings of the recipes and of the queries are the keys of many dicts and
+    sets in the scheduler. When they are interned, looking them up mostly compares identical
+    objects. A Footprint is forgotten when it is garbage collected.
+    """
+
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._fp_per_key = weakref.WeakValueDictionary()
+
+    def intern(self, fp):
+        """Get the interned Footprint equal to `fp`, `fp` itself if it is the first one"""
+        if not self.enabled:
+            return fp
+        key = fp._eq_key
+        with self._lock:
+            res = self._fp_per_key.get(key)
+            if res is None:
+                self._fp_per_key[key] = fp
+                res = fp
+        return res
+
+    def intern_many(self, fps):
+        """Intern a sequence of Footprints, return a list"""
+        if not self.enabled:
+            return fps
+        return [self.intern(fp) for fp in fps]
+
+    def intern_array(self, fps):
+        """Intern a numpy array of Footprints, return a new array"""
+        if not self.enabled:
+            return fps
+        res = np.empty(fps.shape, dtype=object)
+        for idx, fp in np.ndenumerate(fps):
+            res[idx] = self.intern(fp)
+        return res
@@ -0,0 +1,90 @@
+class MemoryBudget(object):
+    """Byte budget of the arrays being produced for all the queries of a Dataset.
+
+    A production (an array requested to a `queue_data`) is accounted for the bytes of its sample
+    array and of its output array, from the time it is allowed to start by the `ProductionGate` to
+    the time its array is pulled from the output queue. The reads, computations, merges and
+    resamplings of a production only start once it is allowed.
+
+    A query with no production in flight is always allowed one, so that a query (or the query
+    of a primitive) can't be starved by the others, even with an array larger than the budget.
+
+    Only used from the scheduler's thread.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.peak_nbytes = 0
+        self._nbytes_per_prod_idx_per_query = {}
+        self._blocked_raster_uids = set()
+
+    @property
+    def enabled(self):
+        return self.max_bytes is not None
+
+    @property
+    def stats(self):
+        """Snapshot of the counters of the memory budget"""
+        return {
+            'nbytes': self.nbytes,
+            'peak_nbytes': self.peak_nbytes,
+            'max_bytes': self.max_bytes,
+            'query_count': len(self._nbytes_per_prod_idx_per_query),
+        }
+
+    @staticmethod
+    def production_nbytes(qi, prod_idx, dtype):
+        """Bytes accounted for a production"""
+        prod = qi.prod[prod_idx]
+        count = prod.fp.rarea * len(qi.channel_ids)
+        if prod.sample_fp is not None:
+            count += prod.sample_fp.rarea * len(qi.unique_channel_ids)
+        return int(count) * dtype.itemsize
+
+    def try_acquire(self, raster_uid, qi, prod_idx, nbytes):
+        """Account for a production if it fits in the budget. If it does not, the raster will be
+        notified when some memory is released.
+
+        Returns
+        -------
+        bool
+        """
+        nbytes_per_prod_idx = self._nbytes_per_prod_idx_per_query.setdefault(qi, {})
+        if nbytes_per_prod_idx and self.nbytes + nbytes > self.max_bytes:
+            self._blocked_raster_uids.add(raster_uid)
+            return False
+        nbytes_per_prod_idx[prod_idx] = nbytes
+        self.nbytes += nbytes
+        self.peak_nbytes = max(self.peak_nbytes, self.nbytes)
+        return True
+
+    def release(self, qi, prod_idxs):
+        """A query's productions are no longer in flight
+
+        Returns
+        -------
+        list of uuid.UUID
+            The rasters that were blocked and that should try again
+        """
+        nbytes_per_prod_idx = self._nbytes_per_prod_idx_per_query.get(qi)
+        if nbytes_per_prod_idx is None:
+            return []
+        for prod_idx in prod_idxs:
+            self.nbytes -= nbytes_per_prod_idx.pop(prod_idx, 0)
+        return self._unblock()
+
+    def release_query(self, qi):
+        """A query finished or was cancelled, none of its productions are in flight any more"""
+        nbytes_per_prod_idx = self._nbytes_per_prod_idx_per_query.pop(qi, None)
+        if nbytes_per_prod_idx is None:
+            return []
+        self.nbytes -= sum(nbytes_per_prod_idx.values())
+        return self._unblock()
+
+    def _unblock(self):
+        if not self._blocked_raster_uids:
+            return []
+        raster_uids = list(self._blocked_raster_uids)
+        self._blocked_raster_uids.clear()
+        return raster_uids
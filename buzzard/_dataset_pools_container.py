@@ -3,6 +3,8 @@ import collections
 import multiprocessing as mp
 import multiprocessing.pool
 
+from buzzard import _tools
+
 class PoolsContainer(object):
     """Manages thread/process pools and aliases for a Dataset"""
 
@@ -20,7 +22,8 @@ class PoolsContainer(object):
         ----------
         key: hashable (like a string)
             ..
-        pool_or_none: multiprocessing.pool.Pool or multiprocessing.pool.ThreadPool or None
+        pool_or_none: multiprocessing.pool.Pool or multiprocessing.pool.ThreadPool or
+            concurrent.futures.Executor or None
             ..
         """
         with self._lock:
@@ -36,11 +39,12 @@ class PoolsContainer(object):
 
         Parameters
         ----------
-        pool: multiprocessing.pool.Pool or multiprocessing.pool.ThreadPool
+        pool: multiprocessing.pool.Pool or multiprocessing.pool.ThreadPool or
+            concurrent.futures.Executor
             ..
 
         """
-        if not isinstance(pool, (mp.pool.Pool, mp.pool.ThreadPool)): # pragma: no cover
+        if not _tools.is_pool(pool): # pragma: no cover
             raise TypeError('Can only manage pools')
         with self._lock:
             self._managed_pools.add(pool)
@@ -72,15 +76,15 @@ class PoolsContainer(object):
     # Private interface with Dataset ********************************************************* **
     def _close(self):
         for pool in self._managed_pools:
-            pool.terminate()
+            _tools.pool_terminate(pool)
         for pool in self._managed_pools:
-            pool.join()
+            _tools.pool_join(pool)
         self._aliases.clear()
         self._aliases_per_pool.clear()
         self._managed_pools.clear()
 
     def _normalize_pool_parameter(self, pool_param, param_name):
-        if isinstance(pool_param, (mp.pool.Pool, mp.pool.ThreadPool)):
+        if _tools.is_pool(pool_param):
             return pool_param
         if pool_param is None:
             return None
@@ -88,6 +92,7 @@ class PoolsContainer(object):
             types = [
                 'multiprocessing.pool.Pool',
                 'multiprocessing.pool.ThreadPool',
+                'concurrent.futures.Executor',
                 'None', 'hashable',
             ]
             raise TypeError('`{}` parameter should be one of {}'.format(
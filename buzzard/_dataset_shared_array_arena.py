@@ -0,0 +1,207 @@
+import os
+import sys
+import weakref
+import contextlib
+
+import numpy as np
+
+try:
+    from multiprocessing import shared_memory, resource_tracker
+except ImportError: # pragma: no cover
+    # Python < 3.8, arrays are pickled to be sent to process pools
+    shared_memory = None
+
+class SharedArrayArena(object):
+    """Allocates the arrays of a Dataset that are exchanged with process pools.
+
+    An array allocated here lives in its own shared memory segment. To send it to a process
+    pool, a `SharedArrayHandle` is pickled instead of the array, and the worker reads or writes
+    the array in place. A segment is unlinked when the array allocated on it (and all its views)
+    is garbage collected.
+    """
+
+    def __init__(self):
+        self._name_per_array_id = {}
+
+    @property
+    def available(self):
+        """Are shared memory segments supported by this python interpreter"""
+        return shared_memory is not None
+
+    def empty(self, shape, dtype):
+        """Allocate an uninitialized array in shared memory
+
+        Parameters
+        ----------
+        shape: sequence of int
+        dtype: numpy.dtype
+            ..
+
+        Returns
+        -------
+        np.ndarray
+        """
+        shape = tuple(int(v) for v in shape)
+        dtype = np.dtype(dtype)
+        size = max(1, int(np.prod(shape, dtype='int64')) * dtype.itemsize)
+
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        arr = np.ndarray(shape, dtype, buffer=shm.buf)
+        key = id(arr)
+        self._name_per_array_id[key] = (weakref.ref(arr), shm.name)
+        weakref.finalize(arr, _release_segment, shm, self._name_per_array_id, key)
+        return arr
+
+    def full(self, shape, fill_value, dtype):
+        """Allocate an array in shared memory and fill it with `fill_value`"""
+        arr = self.empty(shape, dtype)
+        arr.fill(fill_value)
+        return arr
+
+    def handle_of(self, arr):
+        """Get a handle to an array allocated by this arena or to a view of such an array.
+
+        Returns
+        -------
+        SharedArrayHandle or None
+            None if `arr` is not in shared memory
+        """
+        root = arr
+        while isinstance(root.base, np.ndarray):
+            root = root.base
+        ref_name = self._name_per_array_id.get(id(root))
+        if ref_name is None or ref_name[0]() is not root:
+            return None
+        offset = arr.__array_interface__['data'][0] - root.__array_interface__['data'][0]
+        return SharedArrayHandle(ref_name[1], offset, arr.shape, arr.strides, arr.dtype, root)
+
+    def share(self, arr):
+        """Get a handle to `arr`, copy it to shared memory beforehand if necessary
+
+        Returns
+        -------
+        SharedArrayHandle
+        """
+        handle = self.handle_of(arr)
+        if handle is None:
+            copy = self.empty(arr.shape, arr.dtype)
+            copy[...] = arr
+            handle = self.handle_of(copy)
+        return handle
+
+class SharedArrayHandle(object):
+    """Picklable reference to an array allocated by a `SharedArrayArena`.
+
+    In the process that allocated the array, the handle keeps the array alive. Only the location
+    of the array is pickled.
+    """
+    __slots__ = ['name', 'offset', 'shape', 'strides', 'dtype', '_root']
+
+    def __init__(self, name, offset, shape, strides, dtype, root=None):
+        self.name = name
+        self.offset = offset
+        self.shape = shape
+        self.strides = strides
+        self.dtype = dtype
+        self._root = root
+
+    def __getstate__(self):
+        return (self.name, self.offset, self.shape, self.strides, self.dtype)
+
+    def __setstate__(self, state):
+        self.name, self.offset, self.shape, self.strides, self.dtype = state
+        self._root = None
+
+def call_with_shared_arrays(func, *args):
+    """Call `func(*args)` in a worker of a process pool.
+
+    Each `SharedArrayHandle` in `args`, or in the values of a dict in `args`, is replaced by the
+    array it refers to.
+    """
+    with _attached_arrays(args) as (args, roots):
+        res = func(*args)
+        del args
+        if isinstance(res, np.ndarray) and any(_root_of(res) is root for root in roots):
+            # The result is a view of a shared array, it has to be copied before detaching
+            res = res.copy()
+        return res
+
+def call_into_shared_array(dst_handle, func, *args):
+    """Call `func(*args)` in a worker of a process pool and write the returned array to
+    `dst_handle` instead of returning it.
+
+    Each `SharedArrayHandle` in `args`, or in the values of a dict in `args`, is replaced by the
+    array it refers to.
+
+    Returns
+    -------
+    SharedArrayHandle or object
+        `dst_handle` if the result was written to shared memory. The result itself if it can't
+        be written as-is (wrong type or shape), to let the scheduler report the error.
+    """
+    res = call_with_shared_arrays(func, *args)
+    if not isinstance(res, np.ndarray):
+        return res
+    res = np.atleast_3d(res)
+    if res.shape != dst_handle.shape:
+        return res
+    with _attached_arrays([dst_handle]) as ((dst,), _):
+        np.copyto(dst, res, casting='unsafe')
+        del dst
+    return dst_handle
+
+@contextlib.contextmanager
+def _attached_arrays(args):
+    segments = []
+    roots = []
+
+    def _attach(handle):
+        shm = _open_segment(handle.name)
+        segments.append(shm)
+        root = np.ndarray(shm.size, 'uint8', buffer=shm.buf)
+        roots.append(root)
+        return np.ndarray(
+            handle.shape, handle.dtype, buffer=root, offset=handle.offset, strides=handle.strides,
+        )
+
+    def _attach_arg(arg):
+        if isinstance(arg, SharedArrayHandle):
+            return _attach(arg)
+        if isinstance(arg, dict):
+            return {
+                k: _attach(v) if isinstance(v, SharedArrayHandle) else v
+                for k, v in arg.items()
+            }
+        return arg
+
+    try:
+        yield [_attach_arg(arg) for arg in args], roots
+    finally:
+        del roots[:]
+        for shm in segments:
+            with contextlib.suppress(BufferError):
+                shm.close()
+
+def _open_segment(name):
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Opening a segment registers it to the resource tracker of this process, that would unlink it
+    # when this process exits. The segment belongs to the process that created it.
+    shm = shared_memory.SharedMemory(name=name)
+    if os.name == 'posix':
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+def _root_of(arr):
+    while isinstance(arr.base, np.ndarray):
+        arr = arr.base
+    return arr
+
+def _release_segment(shm, name_per_array_id, key):
+    name_per_array_id.pop(key, None)
+    shm.close()
+    if os.name == 'posix' and sys.version_info < (3, 13):
+        # A worker that shares the resource tracker of this process unregistered the segment when
+        # it opened it, `unlink` unregisters it again
+        resource_tracker.register(shm._name, 'shared_memory')
+    shm.unlink()
@@ -0,0 +1,83 @@
+import collections
+
+class TileCache(object):
+    """Byte-budgeted LRU of the cache tiles read from disk by the `CachedRasterRecipe`s.
+
+    A tile is stored whole (all its pixels and all its channels) and read-only, under the path of
+    its cache file. A cache file is never modified once written, and its name contains its
+    checksum, so the path is enough to identify the pixels, even between two rasters.
+
+    Only used from the scheduler's thread.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._tiles = collections.OrderedDict()
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    @property
+    def stats(self):
+        """Snapshot of the counters of the tile cache"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'tile_count': len(self._tiles),
+            'nbytes': self.nbytes,
+            'max_bytes': self.max_bytes,
+        }
+
+    def get(self, path):
+        """Get the array of a cache file and mark it as the most recently used
+
+        Returns
+        -------
+        None or np.ndarray of shape (Y, X, C)
+        """
+        arr = self._tiles.get(path)
+        if arr is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._tiles.move_to_end(path)
+        return arr
+
+    def get_pending(self, path):
+        """Count a hit on a tile that is being read from disk for another query"""
+        self.hits += 1
+
+    def put(self, path, arr):
+        """Store the array of a cache file, evict the least recently used ones to stay in budget
+
+        Returns
+        -------
+        list of str
+            Paths of the evicted tiles
+        """
+        if arr.nbytes > self.max_bytes:
+            return []
+        old = self._tiles.pop(path, None)
+        if old is not None:
+            self.nbytes -= old.nbytes
+        arr.flags.writeable = False
+        self._tiles[path] = arr
+        self.nbytes += arr.nbytes
+
+        evicted = []
+        while self.nbytes > self.max_bytes:
+            evicted_path, evicted_arr = self._tiles.popitem(last=False)
+            self.nbytes -= evicted_arr.nbytes
+            self.evictions += 1
+            evicted.append(evicted_path)
+        return evicted
+
+    def clear(self):
+        self._tiles.clear()
+        self.nbytes = 0
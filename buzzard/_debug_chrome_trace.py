@@ -0,0 +1,154 @@
+"""Debug observer recording the activity of a Dataset's scheduler in the Chrome trace format"""
+
+import json
+import os
+import threading
+import time
+
+_SCHEDULER_PID = 0
+_SCHEDULER_TID = 0
+
+class ChromeTraceObserver(object):
+    """Debug observer that records the activity of a Dataset's scheduler as a timeline, to be
+    exported to the Chrome trace event format and opened with `chrome://tracing` or
+    `https://ui.perfetto.dev`.
+
+    It records
+    - the messages handled by the actors, on the scheduler's track,
+    - the periods of inactivity of the scheduler,
+    - the time spent by the jobs waiting for a token in front of each pool,
+    - the jobs executed by each pool, on one track per worker thread/process. The jobs are named
+      after the actor that issued them (e.g. `Reader` for the cache tiles reads, `Writer` for the
+      cache tiles writes, `Computer` for the calls to `compute_array`).
+
+    The timings are only measured when an observer of this kind is provided to the Dataset, the
+    scheduler does not time anything otherwise. `time.perf_counter` is system-wide on linux, the
+    jobs executed in a process pool are placed correctly on the timeline.
+
+    Example
+    -------
+    >>> trace = buzz.ChromeTraceObserver()
+    >>> ds = buzz.Dataset(debug_observers=[trace])
+    >>> # Perform some queries
+    >>> trace.dump('trace.json')
+
+    """
+
+    def __init__(self):
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self._events = []
+        self._pid_per_pool = {}
+        self._tid_per_worker = {}
+        self._waited_count = 0
+        self._idle_since = None
+        self._metadata(_SCHEDULER_PID, _SCHEDULER_TID, 'Scheduler', 'scheduler')
+
+    @property
+    def trace_events(self):
+        """List of the events recorded so far, as dicts of the Chrome trace event format"""
+        with self._lock:
+            return list(self._events)
+
+    def to_json(self):
+        """Serialize the events recorded so far to a Chrome trace json string"""
+        return json.dumps({
+            'traceEvents': self.trace_events,
+            'displayTimeUnit': 'ms',
+        })
+
+    def dump(self, path):
+        """Write the events recorded so far to a Chrome trace json file"""
+        with open(path, 'w') as stream:
+            stream.write(self.to_json())
+
+    # Dataset's debug events ******************************************************************** **
+    def on_message_span(self, address, title, start, end):
+        self._complete(
+            _SCHEDULER_PID, _SCHEDULER_TID, '{}.{}'.format(_actor_name(address), title),
+            'message', start, end, {'address': address},
+        )
+
+    def on_scheduler_activity_update(self, activity):
+        now = time.perf_counter()
+        if activity:
+            if self._idle_since is not None:
+                self._complete(
+                    _SCHEDULER_PID, _SCHEDULER_TID, 'idle', 'scheduler', self._idle_since, now, {},
+                )
+                self._idle_since = None
+        else:
+            self._idle_since = now
+
+    def on_pool_job_waited(self, pool, job, start, end):
+        pid = self._pool_pid(pool)
+        name = _actor_name(job.sender_address)
+        with self._lock:
+            self._waited_count += 1
+            event_id = self._waited_count
+            for ph, t in [('b', start), ('e', end)]:
+                self._events.append({
+                    'name': name, 'cat': 'waiting', 'ph': ph, 'id': event_id,
+                    'pid': pid, 'tid': 0, 'ts': self._us(t),
+                    'args': {'address': job.sender_address},
+                })
+
+    def on_pool_job_span(self, pool, job, worker, start, end):
+        pid = self._pool_pid(pool)
+        tid = self._worker_tid(pid, worker)
+        self._complete(
+            pid, tid, _actor_name(job.sender_address), 'job', start, end,
+            {'address': job.sender_address},
+        )
+
+    # Private *********************************************************************************** **
+    def _us(self, t):
+        return (t - self._t0) * 1e6
+
+    def _complete(self, pid, tid, name, cat, start, end, args):
+        event = {
+            'name': name, 'cat': cat, 'ph': 'X', 'pid': pid, 'tid': tid,
+            'ts': self._us(start), 'dur': (end - start) * 1e6, 'args': args,
+        }
+        with self._lock:
+            self._events.append(event)
+
+    def _metadata(self, pid, tid, process_name, thread_name):
+        with self._lock:
+            if process_name is not None:
+                self._events.append({
+                    'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                    'args': {'name': process_name},
+                })
+            self._events.append({
+                'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                'args': {'name': thread_name},
+            })
+
+    def _pool_pid(self, pool):
+        # Pools are keyed by id, they are kept alive by the Dataset
+        pid = self._pid_per_pool.get(id(pool))
+        if pid is None:
+            pid = len(self._pid_per_pool) + 1
+            self._pid_per_pool[id(pool)] = pid
+            self._metadata(
+                pid, 0, '{} {:#x}'.format(pool.__class__.__name__, id(pool)), 'waiting room',
+            )
+        return pid
+
+    def _worker_tid(self, pid, worker):
+        tid = self._tid_per_worker.get((pid, worker))
+        if tid is None:
+            tid = len(self._tid_per_worker) + 1
+            self._tid_per_worker[(pid, worker)] = tid
+            worker_pid, thread_name = worker
+            if worker_pid == os.getpid():
+                name = thread_name
+            else:
+                name = 'process {}'.format(worker_pid)
+            self._metadata(pid, tid, None, name)
+        return tid
+
+def _actor_name(address):
+    """'/Raster0/Reader' -> 'Reader'"""
+    return address.rsplit('/', 1)[-1]
@@ -113,7 +113,9 @@ class Footprint(TileMixin, IntersectionMixin, MoveMixin):
 
     """
 
-    __slots__ = ['_tl', '_bl', '_br', '_tr', '_aff', '_rsize', '_significant_min']
+    __slots__ = [
+        '_tl', '_aff', '_rsize', '_north_up', '_corners', '_significant_min_', '_key', '_hash',
+    ]
 
     # Footprint construction ******************************************************************** **
     # Footprint construction - from scratch ***************************************************** **
@@ -177,11 +179,24 @@ class Footprint(TileMixin, IntersectionMixin, MoveMixin):
         if kwargs:
             raise ValueError('Unknown parameters [{}]'.format(kwargs.keys()))
 
+        self._init(a, b, c, d, e, f, rsize)
+
+    @classmethod
+    def _trusted(cls, gt, rsize):
+        """Constructor without the checks of the inputs, for the geo transforms and the raster
+        sizes computed from other Footprints"""
+        self = cls.__new__(cls)
+        c, a, b, f, d, e = map(float, gt)
+        self._init(a, b, c, d, e, f, rsize)
+        return self
+
+    def _init(self, a, b, c, d, e, f, rsize):
         if a * e - d * b == 0:
             raise ValueError('Determinent should not be 0: {}'.format(
                 a * e - d * b
             ))
-        if b != 0 or d != 0 or a <= 0 or e >= 0:
+        north_up = bool(b == 0 and d == 0 and a > 0 and e < 0)
+        if not north_up:
             if not env.allow_complex_footprint:
                 arr = np.asarray([[a, b, c], [d, e, f]])
                 arr = np.array2string(arr, precision=17).replace('\n', ' ')
@@ -191,25 +206,21 @@ class Footprint(TileMixin, IntersectionMixin, MoveMixin):
                      'deactivate this error.affine matrix:\n{}').format(arr)
                 raise ValueError(s)
 
-        rsizex, rsizey = rsize
-        aff = affine.Affine(a, b, c, d, e, f)
+        self._tl = np.asarray((c, f), dtype=np.float64)
+        self._aff = affine.Affine(a, b, c, d, e, f)
+        self._rsize = np.asarray(rsize, dtype=env.default_index_dtype)
 
-        self._tl = c, f
-        self._bl = aff * (0, rsizey)
-        self._br = aff * (rsizex, rsizey)
-        self._tr = aff * (rsizex, 0)
-        self._aff = aff
-        self._rsize = rsize
+        # North-up/west-left Footprints are axis-aligned rectangles, their binary predicates are
+        # computed with comparisons of their bounds instead of shapely geometries
+        self._north_up = north_up
 
-        self._tl = np.asarray(self._tl, dtype=np.float64)
-        self._bl = np.asarray(self._bl, dtype=np.float64)
-        self._br = np.asarray(self._br, dtype=np.float64)
-        self._tr = np.asarray(self._tr, dtype=np.float64)
-        self._rsize = np.asarray(self._rsize, dtype=env.default_index_dtype)
-
-        rect = _tools.Rect(*self.coords)
-        self._significant_min = rect.significant_min((rect.size / self._rsize).min())
+        # Lazily computed by `_bl`, `_br`, `_tr` and `_significant_min`
+        self._corners = None
+        self._significant_min_ = None
 
+        # Lazily computed by `_eq_key` and `__hash__`
+        self._key = None
+        self._hash = None
 
     # Footprint construction - from Footprint *************************************************** **
     def __and__(self, other):
@@ -300,22 +311,21 @@ class Footprint(TileMixin, IntersectionMixin, MoveMixin):
         rsize = np.asarray(
             [endx - startx, endy - starty]
         )
+        if (rsize <= 0).any():
+            raise ValueError('Invalid rsize value `%s`' % rsize)
         tl = self.tl + startx * self.pxlrvec + starty * self.pxtbvec
         gt = self.gt
         gt[0] = tl[0]
         gt[3] = tl[1]
 
-        return self.__class__(
-            gt=gt,
-            rsize=rsize,
-        )
+        return self.__class__._trusted(gt, rsize)
 
     def _morpho(self, scount):
         aff = self._aff * affine.Affine.translation(-scount, -scount)
-        return Footprint(
-            gt=aff.to_gdal(),
-            rsize=(self.rsize + 2 * scount),
-        )
+        rsize = self.rsize + 2 * scount
+        if (rsize <= 0).any():
+            raise ValueError('Invalid rsize value `%s`' % rsize)
+        return Footprint._trusted(aff.to_gdal(), rsize)
 
     def erode(self, count):
         """Construct a new Footprint from self, eroding all edges by :code:`count` pixels"""
@@ -1128,10 +1138,34 @@ class Footprint(TileMixin, IntersectionMixin, MoveMixin):
         -------
         bool
         """
+        if isinstance(other, Footprint) and self._north_up and other._north_up:
+            minx, miny, maxx, maxy = self._north_up_bounds
+            ominx, ominy, omaxx, omaxy = other._north_up_bounds
+            return max(minx, ominx) < min(maxx, omaxx) and max(miny, ominy) < min(maxy, omaxy)
         a = self.poly
         b = other.poly
         return not a.disjoint(b) and not a.touches(b)
 
+    def contains(self, other):
+        """Binary predicate: Does self contain other
+
+        Parameters
+        ----------
+        other: Footprint
+            ..
+
+        Returns
+        -------
+        bool
+        """
+        if not isinstance(other, Footprint):
+            raise TypeError('other should be a Footprint')
+        if self._north_up and other._north_up:
+            minx, miny, maxx, maxy = self._north_up_bounds
+            ominx, ominy, omaxx, omaxy = other._north_up_bounds
+            return minx <= ominx and omaxx <= maxx and miny <= ominy and omaxy <= maxy
+        return self.poly.contains(other.poly)
+
     def equals(self, other):
         """Binary predicate: Is other Footprint exactly equal to self
 
@@ -1144,6 +1178,10 @@ class Footprint(TileMixin, IntersectionMixin, MoveMixin):
         -------
         bool
         """
+        if self is other:
+            return True
+        if isinstance(other, Footprint):
+            return self._eq_key == other._eq_key
         if (self.gt != other.gt).any():
             return False
         if (self.rsize != other.rsize).any():
@@ -1210,6 +1248,8 @@ class Footprint(TileMixin, IntersectionMixin, MoveMixin):
                  'buzz.Env(significant={}) in a `with statement`.'
             ).format(self._significant_min, env.significant, env.significant + 1)
             raise RuntimeError(s)
+        if self._north_up and other._north_up:
+            return self._same_grid_north_up(other)
         largest_coord = np.abs(np.r_[self.coords, other.coords]).max()
         spatial_precision = largest_coord * 10 ** -env.significant
 
@@ -1232,6 +1272,88 @@ class Footprint(TileMixin, IntersectionMixin, MoveMixin):
             return False
         return True
 
+    def _same_grid_north_up(self, other):
+        """Same as `same_grid` with scalar arithmetic, for two north-up Footprints. The pixel
+        vectors only have one non-zero component and the corners are the bounds."""
+        minx, miny, maxx, maxy = self._north_up_bounds
+        ominx, ominy, omaxx, omaxy = other._north_up_bounds
+        largest_coord = max(
+            abs(minx), abs(miny), abs(maxx), abs(maxy),
+            abs(ominx), abs(ominy), abs(omaxx), abs(omaxy),
+        )
+        spatial_precision = largest_coord * 10 ** -env.significant
+        rw, rh = self._rsize.tolist()
+        orw, orh = other._rsize.tolist()
+        pxw = (maxx - minx) / rw
+        pxh = (miny - maxy) / rh
+        opxw = (omaxx - ominx) / orw
+        opxh = (ominy - omaxy) / orh
+
+        rdx, rdy = np.around(~self._aff * (ominx, omaxy)).tolist()
+        if abs(ominx - pxw * rdx - minx) >= spatial_precision:
+            return False
+        if abs(omaxy - pxh * rdy - maxy) >= spatial_precision:
+            return False
+
+        if abs(maxy + opxh * rh - miny) >= spatial_precision:
+            return False
+        if abs(minx + opxw * rw - maxx) >= spatial_precision:
+            return False
+        if abs(omaxy + pxh * orh - ominy) >= spatial_precision:
+            return False
+        if abs(ominx + pxw * orw - omaxx) >= spatial_precision:
+            return False
+        return True
+
+    @property
+    def _bl(self):
+        corners = self._corners
+        if corners is None:
+            corners = self._compute_corners()
+        return corners[0]
+
+    @property
+    def _br(self):
+        corners = self._corners
+        if corners is None:
+            corners = self._compute_corners()
+        return corners[1]
+
+    @property
+    def _tr(self):
+        corners = self._corners
+        if corners is None:
+            corners = self._compute_corners()
+        return corners[2]
+
+    def _compute_corners(self):
+        rsizex, rsizey = self._rsize.tolist()
+        aff = self._aff
+        corners = (
+            np.asarray(aff * (0, rsizey), dtype=np.float64),
+            np.asarray(aff * (rsizex, rsizey), dtype=np.float64),
+            np.asarray(aff * (rsizex, 0), dtype=np.float64),
+        )
+        self._corners = corners
+        return corners
+
+    @property
+    def _significant_min(self):
+        """Number of significant digits required to handle this Footprint"""
+        significant_min = self._significant_min_
+        if significant_min is None:
+            rect = _tools.Rect(*self.coords)
+            significant_min = rect.significant_min((rect.size / self._rsize).min())
+            self._significant_min_ = significant_min
+        return significant_min
+
+    @property
+    def _north_up_bounds(self):
+        """Bounds (minx, miny, maxx, maxy) of a north-up Footprint, as python floats"""
+        minx, maxy = self._tl.tolist()
+        maxx, miny = self._br.tolist()
+        return minx, miny, maxx, maxy
+
     # Numpy ************************************************************************************* **
     @property
     def shape(self):
@@ -1845,7 +1967,7 @@ class Footprint(TileMixin, IntersectionMixin, MoveMixin):
 
     # Tiling ************************************************************************************ **
     def tile(self, size, overlapx=0, overlapy=0,
-             boundary_effect='extend', boundary_effect_locus='br'):
+             boundary_effect='extend', boundary_effect_locus='br', as_footprint_array=False):
         """Tile a Footprint to a matrix of Footprint
 
         Parameters
@@ -1896,10 +2018,13 @@ class Footprint(TileMixin, IntersectionMixin, MoveMixin):
                 bottom right coordinates are preserved
             - 'bl' : Boundary effect occurs at the bottom left corner of the raster, \
                 top right coordinates are preserved
+        as_footprint_array: bool
+            If True, return a `FootprintArray` instead of a numpy array of Footprint. Much faster
+            when there are many tiles, the Footprints are only created when indexed.
 
         Returns
         -------
-        np.ndarray
+        np.ndarray or FootprintArray
             - of dtype=object (Footprint)
             - of shape (M, N)
 
@@ -1931,10 +2056,11 @@ class Footprint(TileMixin, IntersectionMixin, MoveMixin):
             raise ValueError('boundary_effect_locus(%s) should be one of %s' % (
                 boundary_effect_locus, self._TILE_BOUNDARY_EFFECT_LOCI
             ))
-        return self._tile_unsafe(size, overlapx, overlapy, boundary_effect, boundary_effect_locus)
+        tiles = self._tile_unsafe(size, overlapx, overlapy, boundary_effect, boundary_effect_locus)
+        return self._tiles_of_footprint_array(tiles, as_footprint_array)
 
     def tile_count(self, rowcount, colcount, overlapx=0, overlapy=0,
-                   boundary_effect='extend', boundary_effect_locus='br'):
+                   boundary_effect='extend', boundary_effect_locus='br', as_footprint_array=False):
         """Tile a Footprint to a matrix of Footprint
 
         Parameters
@@ -1984,6 +2110,18 @@ class Footprint(TileMixin, IntersectionMixin, MoveMixin):
                 top left coordinates are preserved
             - 'tr' : Boundary effect occurs at the top right corner of the raster, \
                 bottom left coordinates are preserved
+        as_footprint_array: bool
+            If True, return a `FootprintArray` instead of a numpy array of Footprint. Much faster
+            when there are many tiles, the Footprints are only created when indexed.
+
+        Returns
+        -------
+        np.ndarray or FootprintArray
+            - of dtype=object (Footprint)
+            - of shape (M, N)
+
+                - with M the line count
+                - with N the column count
 
         """
         rowcount = int(rowcount)
@@ -2066,10 +2204,11 @@ class Footprint(TileMixin, IntersectionMixin, MoveMixin):
                 tiles = tiles[0:colcount, -rowcount:]
             else:
                 assert False # pragma: no cover
-        return tiles
+        return self._tiles_of_footprint_array(tiles, as_footprint_array)
 
     def tile_occurrence(self, size, pixel_occurrencex, pixel_occurrencey,
-                        boundary_effect='extend', boundary_effect_locus='br'):
+                        boundary_effect='extend', boundary_effect_locus='br',
+                        as_footprint_array=False):
         """Tile a Footprint to a matrix of Footprint
         Each pixel occur `pixel_occurrencex * pixel_occurrencey` times overall in the output
 
@@ -2123,12 +2262,14 @@ class Footprint(TileMixin, IntersectionMixin, MoveMixin):
                 bottom right coordinates are preserved
             - 'bl' : Boundary effect occurs at the bottom left corner of the raster, \
                 top right coordinates are preserved
+        as_footprint_array: bool
+            If True, return a `FootprintArray` instead of a numpy array of Footprint. Much faster
+            when there are many tiles, the Footprints are only created when indexed.
 
         Returns
         -------
-        np.ndarray
-            - of dtype=object (Footpr
-            int)
+        np.ndarray or FootprintArray
+            - of dtype=object (Footprint)
             - of shape (M, N)
                 - with M the line count
                 - with N the column count
@@ -2179,7 +2320,7 @@ class Footprint(TileMixin, IntersectionMixin, MoveMixin):
         tiles = big_fp._tile_unsafe(
             size, overlap[0], overlap[1], boundary_effect, boundary_effect_locus
         )
-        return tiles
+        return self._tiles_of_footprint_array(tiles, as_footprint_array)
 
     # Serialization ***************************************************************************** **
     def __str__(self):
@@ -2198,14 +2339,27 @@ class Footprint(TileMixin, IntersectionMixin, MoveMixin):
         return "Footprint(gt=%s, rsize=(%d, %d))" % (tuple(self.gt), self.rsize[0], self.rsize[1])
 
     def __reduce__(self):
-        return (_restore, (self.gt, self.rsize))
+        return (_restore, (self._aff.to_gdal(), tuple(self._rsize.tolist())))
 
     def __hash__(self):
-        # TODO: Speed test and optimize
-        return hash((
-            self._aff.to_gdal(),
-            tuple(self._rsize.tolist()),
-        ))
+        # Footprints are keys of many dicts in the scheduler, the hash is computed once
+        h = self._hash
+        if h is None:
+            h = hash(self._eq_key)
+            self._hash = h
+        return h
+
+    @property
+    def _eq_key(self):
+        """Exact geo transform and raster size, as a tuple of python numbers"""
+        key = self._key
+        if key is None:
+            key = (
+                tuple(float(v) for v in self._aff.to_gdal()),
+                tuple(self._rsize.tolist()),
+            )
+            self._key = key
+        return key
 
     # The end *********************************************************************************** **
     # ******************************************************************************************* **
@@ -2252,7 +2406,7 @@ def _poly_iterator(obj):
                     yield poly
 
 def _restore(gt, rsize):
-    return Footprint(gt=gt, rsize=rsize)
+    return Footprint._trusted(gt, rsize)
 
 def _angle_between(a, b, c):
     return np.arccos(np.dot(
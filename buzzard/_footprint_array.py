@@ -0,0 +1,418 @@
+""">>> help(FootprintArray)"""
+
+import numpy as np
+
+from buzzard._env import env
+
+Footprint = None # lazy import
+
+class FootprintArray(object):
+    """Immutable n-dimensional array of Footprints, stored as contiguous arrays of geo transforms and
+    raster sizes instead of Footprint objects.
+
+    It is returned by the tiling methods of `Footprint` when `as_footprint_array=True`. Building one
+    is vectorized, it is much faster than building the equivalent numpy array of Footprints when
+    there are many tiles. A `Footprint` is only created when indexing an element.
+
+    Indexing
+    --------
+    The container behaves like a numpy array of dtype object:
+
+    - `shape`, `ndim`, `size` and `len()` describe the container, not the Footprints
+      (see `rsize` and `bounds` for those)
+    - Indexing an element returns a Footprint
+    - Indexing several elements (slices, masks, ...) returns a FootprintArray
+    - Iterating yields the elements of the first axis
+
+    >>> tiles = fp.tile((256, 256), as_footprint_array=True)
+    ... tile = tiles[0, 0] # Footprint
+    ... first_row = tiles[0] # FootprintArray
+    ... tiles_inside_roi = tiles[tiles.intersects(roi)] # 1d FootprintArray
+
+    Vectorized attributes
+    ---------------------
+    The attributes mirror the ones of `Footprint`, with the extra leading dimensions of the
+    container: `gt`, `rsize`, `tl`, `bounds`, ... `slice_in(fp)`, `intersection(fp)`, ...
+
+    >>> tiles.tl.shape
+    (M, N, 2)
+
+    """
+
+    __slots__ = ['_gt', '_rsize']
+
+    def __init__(self, gt, rsize):
+        """
+        Parameters
+        ----------
+        gt: array of shape (..., 6)
+            Geo transforms with GDAL ordering
+        rsize: array of shape (..., 2)
+            Raster sizes
+        """
+        gt = np.array(gt, dtype='float64')
+        rsize = np.array(rsize, dtype=env.default_index_dtype)
+        if gt.ndim == 0 or gt.shape[-1] != 6:
+            raise ValueError('Invalid gt shape `{}`'.format(gt.shape))
+        if rsize.ndim == 0 or rsize.shape[-1] != 2:
+            raise ValueError('Invalid rsize shape `{}`'.format(rsize.shape))
+        if gt.shape[:-1] != rsize.shape[:-1]:
+            raise ValueError('gt and rsize shapes mismatch `{}` `{}`'.format(gt.shape, rsize.shape))
+        if not np.isfinite(gt).all():
+            raise ValueError('Invalid gt value')
+        if (rsize <= 0).any():
+            raise ValueError('Invalid rsize value')
+        gt.flags.writeable = False
+        rsize.flags.writeable = False
+        self._gt = gt
+        self._rsize = rsize
+
+    @classmethod
+    def from_footprints(cls, fps):
+        """Create a FootprintArray from a numpy array or a sequence of Footprints"""
+        fps = np.asarray(fps, dtype=object)
+        shape = fps.shape
+        fps = fps.ravel()
+        gt = np.empty((fps.size, 6), 'float64')
+        rsize = np.empty((fps.size, 2), env.default_index_dtype)
+        for i, fp in enumerate(fps):
+            gt[i] = fp.gt
+            rsize[i] = fp.rsize
+        return cls(gt.reshape(shape + (6,)), rsize.reshape(shape + (2,)))
+
+    # Container ********************************************************************************* **
+    @property
+    def shape(self):
+        """Shape of the container"""
+        return self._gt.shape[:-1]
+
+    @property
+    def ndim(self):
+        """Number of dimensions of the container"""
+        return self._gt.ndim - 1
+
+    @property
+    def size(self):
+        """Number of Footprints in the container"""
+        return int(np.prod(self.shape, dtype='int64'))
+
+    def __len__(self):
+        if self.ndim == 0:
+            raise TypeError('len() of unsized object')
+        return self.shape[0]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            if any(k is Ellipsis for k in key):
+                key = key + (slice(None),)
+        elif key is Ellipsis:
+            key = (Ellipsis, slice(None))
+        if isinstance(key, FootprintArray): # pragma: no cover
+            raise TypeError('Invalid index')
+        gt = self._gt[key]
+        rsize = self._rsize[key]
+        if gt.ndim == 1:
+            return _footprint_of(gt, rsize)
+        return self.__class__._trusted(gt, rsize)
+
+    @property
+    def flat(self):
+        """Iterator over the Footprints, in C order"""
+        gt = self._gt.reshape(-1, 6)
+        rsize = self._rsize.reshape(-1, 2)
+        for i in range(gt.shape[0]):
+            yield _footprint_of(gt[i], rsize[i])
+
+    def flatten(self):
+        """Copy of the container collapsed into one dimension"""
+        return self.reshape(-1)
+
+    def reshape(self, *shape):
+        """Container with the same Footprints and a new shape"""
+        if len(shape) == 1 and not isinstance(shape[0], int):
+            shape = tuple(shape[0])
+        gt = self._gt.reshape(shape + (6,))
+        rsize = self._rsize.reshape(shape + (2,))
+        return self.__class__._trusted(gt, rsize)
+
+    def to_object_array(self):
+        """Create all the Footprints, as a numpy array of dtype object"""
+        arr = np.empty(self.size, dtype=object)
+        arr[:] = list(self.flat)
+        return arr.reshape(self.shape)
+
+    def tolist(self):
+        """Create all the Footprints, as nested lists"""
+        return self.to_object_array().tolist()
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is not None and np.dtype(dtype) != np.dtype(object):
+            raise TypeError('A FootprintArray can only be converted to an array of dtype object')
+        return self.to_object_array()
+
+    def __repr__(self):
+        return 'FootprintArray(shape={})'.format(self.shape)
+
+    # Vectorized accessors ********************************************************************** **
+    @property
+    def gt(self):
+        """Geo transforms, array of shape (..., 6)"""
+        return self._gt.copy()
+
+    @property
+    def rsize(self):
+        """Raster sizes (x, y), array of shape (..., 2)"""
+        return self._rsize.copy()
+
+    @property
+    def rsizex(self):
+        """Raster widths, array of shape (...)"""
+        return self._rsize[..., 0].copy()
+
+    @property
+    def rsizey(self):
+        """Raster heights, array of shape (...)"""
+        return self._rsize[..., 1].copy()
+
+    @property
+    def tl(self):
+        """Top left coordinates, array of shape (..., 2)"""
+        return self._raster_to_spatial(0, 0)
+
+    @property
+    def tr(self):
+        """Top right coordinates, array of shape (..., 2)"""
+        return self._raster_to_spatial(self._rsize[..., 0], 0)
+
+    @property
+    def bl(self):
+        """Bottom left coordinates, array of shape (..., 2)"""
+        return self._raster_to_spatial(0, self._rsize[..., 1])
+
+    @property
+    def br(self):
+        """Bottom right coordinates, array of shape (..., 2)"""
+        return self._raster_to_spatial(self._rsize[..., 0], self._rsize[..., 1])
+
+    @property
+    def coords(self):
+        """Corners coordinates (tl, bl, br, tr), array of shape (..., 4, 2)"""
+        return np.stack([self.tl, self.bl, self.br, self.tr], axis=-2)
+
+    @property
+    def bounds(self):
+        """Bounds (minx, miny, maxx, maxy), array of shape (..., 4)"""
+        coords = self.coords
+        return np.concatenate([coords.min(axis=-2), coords.max(axis=-2)], axis=-1)
+
+    @property
+    def extent(self):
+        """Extents (minx, maxx, miny, maxy), array of shape (..., 4)"""
+        return self.bounds[..., [0, 2, 1, 3]]
+
+    @property
+    def pxsize(self):
+        """Spatial distances ||pixel bottom right - pixel top left|| (x, y), array of shape (..., 2)
+        """
+        c, a, b, f, d, e = np.moveaxis(self._gt, -1, 0)
+        return np.stack([np.hypot(a, d), np.hypot(b, e)], axis=-1)
+
+    def slice_in(self, other, clip=False):
+        """Compute the locations of the Footprints inside `other`, as in `Footprint.slice_in`
+
+        Parameters
+        ----------
+        other: Footprint
+        clip: bool
+            see `Footprint.slice_in`
+
+        Returns
+        -------
+        np.ndarray of int and of shape (..., 4)
+            (ystart, ystop, xstart, xstop) of each Footprint
+
+        Example
+        -------
+        >>> for (ystart, ystop, xstart, xstop), tile in zip(tiles.slice_in(fp), tiles):
+        ...     arr[ystart:ystop, xstart:xstop] = ...
+        """
+        start = other.spatial_to_raster(self.tl)
+        end = other.spatial_to_raster(self.br)
+        if clip:
+            start = start.clip(0, other.rsize)
+            end = end.clip(0, other.rsize)
+        return np.stack([start[..., 1], end[..., 1], start[..., 0], end[..., 0]], axis=-1)
+
+    def intersects(self, other):
+        """Binary predicate: Does each Footprint share area with `other`
+
+        Parameters
+        ----------
+        other: Footprint
+
+        Returns
+        -------
+        np.ndarray of bool and of shape (...)
+        """
+        if self._north_up() and _is_north_up(other.gt):
+            bounds = self.bounds
+            minx, miny, maxx, maxy = other.bounds
+            return (
+                (np.maximum(bounds[..., 0], minx) < np.minimum(bounds[..., 2], maxx)) &
+                (np.maximum(bounds[..., 1], miny) < np.minimum(bounds[..., 3], maxy))
+            )
+        poly = other.poly
+        mask = np.asarray([
+            fp.poly.intersects(poly) and not fp.poly.touches(poly)
+            for fp in self.flat
+        ], dtype=bool)
+        return mask.reshape(self.shape)
+
+    def same_grid(self, other):
+        """Binary predicate: Does each Footprint lie on the same grid as `other`
+
+        Parameters
+        ----------
+        other: Footprint
+
+        Returns
+        -------
+        np.ndarray of bool and of shape (...)
+        """
+        if not (self._north_up() and _is_north_up(other.gt)):
+            mask = np.asarray([fp.same_grid(other) for fp in self.flat], dtype=bool)
+            return mask.reshape(self.shape)
+
+        # Same arithmetic as `Footprint.same_grid` for two north-up Footprints
+        c, a, _, f, _, e = np.moveaxis(self._gt, -1, 0)
+        rw, rh = np.moveaxis(self._rsize, -1, 0)
+        minx, maxy = c, f
+        maxx, miny = c + a * rw, f + e * rh
+        ominx, ominy, omaxx, omaxy = other.bounds
+        orw, orh = other.rsize
+        pxw = (maxx - minx) / rw
+        pxh = (miny - maxy) / rh
+        opxw = (omaxx - ominx) / orw
+        opxh = (ominy - omaxy) / orh
+
+        largest_coord = np.stack([np.abs(minx), np.abs(miny), np.abs(maxx), np.abs(maxy)]).max(axis=0)
+        significant_min = -np.log10(np.minimum(pxw, -pxh) / largest_coord.clip(1, np.inf))
+        if self.size > 0 and env.significant <= significant_min.max():
+            s = ('This Footprint have large coordinates and small pixels, at least {:.2} '
+                'significant digits are necessary to perform this operation, but '
+                 '`buzz.env.significant` is set to {}. Increase this value by using '
+                 'buzz.Env(significant={}) in a `with statement`.'
+            ).format(significant_min.max(), env.significant, env.significant + 1)
+            raise RuntimeError(s)
+        if env.significant <= other._significant_min:
+            s = ('This Footprint have large coordinates and small pixels, at least {:.2} '
+                'significant digits are necessary to perform this operation, but '
+                 '`buzz.env.significant` is set to {}. Increase this value by using '
+                 'buzz.Env(significant={}) in a `with statement`.'
+            ).format(other._significant_min, env.significant, env.significant + 1)
+            raise RuntimeError(s)
+
+        largest_coord = np.maximum(
+            largest_coord, max(abs(ominx), abs(ominy), abs(omaxx), abs(omaxy)),
+        )
+        spatial_precision = largest_coord * 10 ** -env.significant
+        rdx = np.around((ominx - c) / a)
+        rdy = np.around((omaxy - f) / e)
+        return (
+            (np.abs(ominx - pxw * rdx - minx) < spatial_precision) &
+            (np.abs(omaxy - pxh * rdy - maxy) < spatial_precision) &
+            (np.abs(maxy + opxh * rh - miny) < spatial_precision) &
+            (np.abs(minx + opxw * rw - maxx) < spatial_precision) &
+            (np.abs(omaxy + pxh * orh - ominy) < spatial_precision) &
+            (np.abs(ominx + pxw * orw - omaxx) < spatial_precision)
+        )
+
+    def intersection(self, other):
+        """Compute the intersection of each Footprint with `other`, with the default parameters of
+        `Footprint.intersection`, i.e. on the grid of each Footprint.
+
+        Parameters
+        ----------
+        other: Footprint
+
+        Returns
+        -------
+        FootprintArray
+            Of the same shape as self
+
+        Raises
+        ------
+        ValueError
+            If a Footprint does not share area with `other`. Use `intersects` to filter them out.
+        """
+        if not (self._north_up() and _is_north_up(other.gt)):
+            res = [fp.intersection(other) for fp in self.flat]
+            gt = np.asarray([fp.gt for fp in res], dtype='float64').reshape(self.shape + (6,))
+            rsize = np.asarray([fp.rsize for fp in res]).reshape(self.shape + (2,))
+            return self.__class__(gt, rsize)
+
+        # Bounds of the intersections
+        bounds = self.bounds
+        minx, miny, maxx, maxy = other.bounds
+        minx = np.maximum(bounds[..., 0], minx)
+        miny = np.maximum(bounds[..., 1], miny)
+        maxx = np.minimum(bounds[..., 2], maxx)
+        maxy = np.minimum(bounds[..., 3], maxy)
+        if not ((minx < maxx) & (miny < maxy)).all():
+            raise ValueError('Intersection is empty')
+
+        # Align the intersections on the grid of each Footprint, the same way as
+        # `Footprint.intersection`
+        c, a, _, f, _, e = np.moveaxis(self._gt, -1, 0)
+        largest_coord = np.stack([
+            np.abs(minx), np.abs(miny), np.abs(maxx), np.abs(maxy),
+        ]).max(axis=0).clip(1, np.inf)
+        spatial_precision = largest_coord * 10 ** -env.significant
+        abstract_grid_density = np.floor(1 / (spatial_precision / np.minimum(np.abs(a), np.abs(e))))
+
+        def _snap(v, op):
+            return op(np.around(v * abstract_grid_density, 0) / abstract_grid_density)
+
+        tlx = c + _snap((minx - c) / a, np.floor) * a
+        tly = f + _snap((maxy - f) / e, np.floor) * e
+        rsizex = _snap((maxx - tlx) / a, np.ceil).clip(1, np.inf)
+        rsizey = _snap((miny - tly) / e, np.ceil).clip(1, np.inf)
+
+        gt = self._gt.copy()
+        gt[..., 0] = tlx
+        gt[..., 3] = tly
+        return self.__class__(gt, np.stack([rsizex, rsizey], axis=-1))
+
+    # Private *********************************************************************************** **
+    @classmethod
+    def _trusted(cls, gt, rsize):
+        """Constructor without checks nor copies, for arrays already sanitized"""
+        self = cls.__new__(cls)
+        self._gt = gt
+        self._rsize = rsize
+        return self
+
+    def _raster_to_spatial(self, x, y):
+        c, a, b, f, d, e = np.moveaxis(self._gt, -1, 0)
+        return np.stack([c + a * x + b * y, f + d * x + e * y], axis=-1)
+
+    def _north_up(self):
+        return _is_north_up(self._gt)
+
+def _is_north_up(gt):
+    gt = np.asarray(gt)
+    return bool(
+        (gt[..., 2] == 0).all() and (gt[..., 4] == 0).all() and
+        (gt[..., 1] > 0).all() and (gt[..., 5] < 0).all()
+    )
+
+def _footprint_of(gt, rsize):
+    # Lazily import Footprint to avoid circular dependencies
+    global Footprint
+    if Footprint is None:
+        from buzzard._footprint import Footprint
+    return Footprint._trusted(gt, rsize)
@@ -71,22 +71,30 @@ class IntersectionMixin(object):
         return resolution, rotation, fitrot, alignment, fitalign
 
     def _intersection_unsafe(self, footprints, geoms, resolution, rotation, alignment):
-        geoms = [fp.poly for fp in footprints] + geoms
-        for g1, g2 in itertools.combinations(geoms, 2):
-            if g1.disjoint(g2):
-                raise ValueError('Intersection is empty')
-            elif g1.touches(g2):
-                raise ValueError('Two geometries are only touching, intersection is empty')
-        geom = functools.reduce(sg.Polygon.intersection, geoms)
-        del geoms
-        assert geom.is_valid
-        assert not geom.is_empty
+        if not geoms and all(fp._north_up for fp in footprints):
+            # The intersection of axis-aligned rectangles is computed from their bounds
+            bounds = _north_up_intersection_bounds(footprints)
+            geom = None
+        else:
+            bounds = None
+            geoms = [fp.poly for fp in footprints] + geoms
+            for g1, g2 in itertools.combinations(geoms, 2):
+                if g1.disjoint(g2):
+                    raise ValueError('Intersection is empty')
+                elif g1.touches(g2):
+                    raise ValueError('Two geometries are only touching, intersection is empty')
+            geom = functools.reduce(sg.Polygon.intersection, geoms)
+            del geoms
+            assert geom.is_valid
+            assert not geom.is_empty
         resolution, rotation, fitrot, alignment, fitalign = self._intersection_expand_parameters(
             footprints, resolution, rotation, alignment
         )
         del footprints
 
         if fitrot:
+            if geom is None:
+                geom = sg.box(*bounds)
             # TODO: Make this block work with non-polygon geom
             rect = geom.minimum_rotated_rectangle
             abovex, _, _, abovey = rect.bounds
@@ -104,14 +112,20 @@ class IntersectionMixin(object):
             )
             rotation = rect.angle
         else:
+            if bounds is None:
+                centroid = geom.centroid.coords[0]
+                points = np.concatenate(list(_exterior_coords_iterator(geom)), axis=0)
+                points = points[:, :2]
+            else:
+                minx, miny, maxx, maxy = bounds
+                centroid = ((minx + maxx) / 2, (miny + maxy) / 2)
+                points = np.asarray([[minx, maxy], [minx, miny], [maxx, miny], [maxx, maxy]])
             tmp_to_spatial = (
-                Affine.translation(*geom.centroid.coords[0]) *
+                Affine.translation(*centroid) *
                 Affine.rotation(rotation) *
                 Affine.scale(*resolution)
             )
             spatial_to_tmp = ~tmp_to_spatial
-            points = np.concatenate(list(_exterior_coords_iterator(geom)), axis=0)
-            points = points[:, :2]
             spatial_to_tmp.itransform(points)
 
             rect = _tools.Rect(
@@ -159,10 +173,22 @@ class IntersectionMixin(object):
             rsize = rsize.clip(1, np.iinfo(int).max)
 
         assert (rsize > 0).all()
-        return self.__class__(
-            gt=aff.to_gdal(),
-            rsize=rsize,
-        )
+        return self.__class__._trusted(aff.to_gdal(), rsize)
+
+def _north_up_intersection_bounds(footprints):
+    """Bounds of the intersection of north-up Footprints, with the same errors as the shapely
+    predicates"""
+    all_bounds = [fp._north_up_bounds for fp in footprints]
+    for (minx, miny, maxx, maxy), (ominx, ominy, omaxx, omaxy) in itertools.combinations(
+            all_bounds, 2):
+        dx = min(maxx, omaxx) - max(minx, ominx)
+        dy = min(maxy, omaxy) - max(miny, ominy)
+        if dx < 0 or dy < 0:
+            raise ValueError('Intersection is empty')
+        elif dx == 0 or dy == 0:
+            raise ValueError('Two geometries are only touching, intersection is empty')
+    minxs, minys, maxxs, maxys = zip(*all_bounds)
+    return max(minxs), max(minys), min(maxxs), min(maxys)
 
 def _exterior_coords_iterator(geom):
     if isinstance(geom, sg.Point):
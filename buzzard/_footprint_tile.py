@@ -2,6 +2,8 @@
 
 import numpy as np
 
+from buzzard._footprint_array import FootprintArray
+
 class TileMixin(object):
     """Private mixin for the Footprint class containing tiling subroutines"""
 
@@ -160,39 +162,34 @@ class TileMixin(object):
         horiz_vec = self.pxlrvec * direction[0]
         vert_vec = self.pxtbvec * direction[1]
 
-        def _footprint_of_deltacoords(y, x, sizex, sizey):
-            rsize = np.asarray([sizex, sizey])
-            gt = self.gt
-            tl = horiz_vec * x + vert_vec * y + origin
-            tl -= rsize * (direction == -1) * (1, -1) # I don't get this line :'(
-            gt[0] = tl[0]
-            gt[3] = tl[1]
-            return self.__class__(
-                gt=gt,
-                rsize=rsize,
-            )
-
         infoxs = list(gen_xinfo)
         infoys = list(gen_yinfo)
         deltaxs, deltays = np.meshgrid(
-            [deltax for (deltax, _) in infoxs],
-            [deltay for (deltay, _) in infoys],
+            np.asarray([deltax for (deltax, _) in infoxs], dtype='float64'),
+            np.asarray([deltay for (deltay, _) in infoys], dtype='float64'),
         )
         sizexs, sizeys = np.meshgrid(
-            [sizex for (_, sizex) in infoxs],
-            [sizey for (_, sizey) in infoys],
+            np.asarray([sizex for (_, sizex) in infoxs], dtype='int64'),
+            np.asarray([sizey for (_, sizey) in infoys], dtype='int64'),
         )
-        tiles = np.asarray(list(map(
-            _footprint_of_deltacoords,
-            deltays.flatten(),
-            deltaxs.flatten(),
-            sizexs.flatten(),
-            sizeys.flatten(),
-        )), dtype=object)
-        if tiles.size > 0:
-            tiles = tiles.reshape(len(infoys), len(infoxs))
+        rsize = np.stack([sizexs, sizeys], axis=-1)
+        tl = horiz_vec * deltaxs[..., None] + vert_vec * deltays[..., None] + origin
+        tl -= rsize * (direction == -1) * (1, -1) # I don't get this line :'(
+        gt = np.empty(rsize.shape[:-1] + (6,), dtype='float64')
+        gt[...] = self.gt
+        gt[..., 0] = tl[..., 0]
+        gt[..., 3] = tl[..., 1]
+
         if direction[0] == -1:
-            tiles = np.fliplr(tiles)
+            gt, rsize = gt[:, ::-1], rsize[:, ::-1]
         if direction[1] == -1:
-            tiles = np.flipud(tiles)
-        return tiles
+            gt, rsize = gt[::-1], rsize[::-1]
+        return FootprintArray(gt, rsize)
+
+    @staticmethod
+    def _tiles_of_footprint_array(tiles, as_footprint_array):
+        if as_footprint_array:
+            return tiles
+        if tiles.size == 0:
+            return np.asarray([], dtype=object)
+        return tiles.to_object_array()
@@ -0,0 +1,189 @@
+import weakref
+
+import numpy as np
+import rtree.index
+
+from buzzard import _tools
+from buzzard._actors.message import Msg
+from buzzard._a_raster_recipe import ARasterRecipe, ABackRasterRecipe
+
+from buzzard._actors.nocache.computation_accumulator import ActorComputationAccumulator
+from buzzard._actors.nocache.merger import ActorMerger
+from buzzard._actors.nocache.producer import ActorProducer
+from buzzard._actors.nocache.queries_handler import ActorQueriesHandler
+from buzzard._actors.computation_gate1 import ActorComputationGate1
+from buzzard._actors.computation_gate2 import ActorComputationGate2
+from buzzard._actors.computer import ActorComputer
+from buzzard._actors.production_gate import ActorProductionGate
+from buzzard._actors.resampler import ActorResampler
+
+class NocacheRasterRecipe(ARasterRecipe):
+    """Concrete class defining the behavior of a raster computed on the fly, without cache.
+
+    >>> help(Dataset.create_raster_recipe)
+
+    """
+    def __init__(
+        self, ds,
+        fp, dtype, channel_count, channels_schema, sr,
+        compute_array, merge_arrays,
+        primitives_back, primitives_kwargs, convert_footprint_per_primitive,
+        computation_pool, merge_pool, resample_pool,
+        computation_tiles, max_computation_size,
+        max_resampling_size, automatic_remapping,
+        debug_observers,
+    ):
+        back = BackNocacheRasterRecipe(
+            ds._back,
+            weakref.proxy(self),
+            fp, dtype, channel_count, channels_schema, sr,
+            compute_array, merge_arrays,
+            primitives_back, primitives_kwargs, convert_footprint_per_primitive,
+            computation_pool, merge_pool, resample_pool,
+            computation_tiles, max_computation_size,
+            max_resampling_size, automatic_remapping,
+            debug_observers,
+        )
+        super().__init__(ds=ds, back=back)
+
+    @property
+    def computation_tiles(self):
+        """Computation tiles provided or created at construction, None if not provided"""
+        if self._back.compute_fps is None:
+            return None
+        return self._back.compute_fps.copy()
+
+    @property
+    def max_computation_size(self):
+        """Maximum computation size provided at construction as a (width, height) tuple, None if
+        not provided
+        """
+        return self._back.max_computation_size
+
+    @property
+    def automatic_remapping(self):
+        """Automatic remapping flag provided at construction"""
+        return self._back.automatic_remapping
+
+class BackNocacheRasterRecipe(ABackRasterRecipe):
+    """Implementation of NocacheRasterRecipe's specifications"""
+
+    def __init__(
+        self, back_ds, facade_proxy,
+        fp, dtype, channel_count, channels_schema, sr,
+        compute_array, merge_arrays,
+        primitives_back, primitives_kwargs, convert_footprint_per_primitive,
+        computation_pool, merge_pool, resample_pool,
+        computation_tiles, max_computation_size,
+        max_resampling_size, automatic_remapping,
+        debug_observers,
+    ):
+        super().__init__(
+            # Source
+            back_ds=back_ds,
+            wkt_stored=sr,
+
+            # RasterSource
+            channels_schema=channels_schema,
+            dtype=dtype,
+            fp_stored=fp,
+            channel_count=channel_count,
+
+            # Recipe
+            facade_proxy=facade_proxy,
+            computation_pool=computation_pool,
+            merge_pool=merge_pool,
+            compute_array=compute_array,
+            merge_arrays=merge_arrays,
+            primitives_back=primitives_back,
+            primitives_kwargs=primitives_kwargs,
+            convert_footprint_per_primitive=convert_footprint_per_primitive,
+
+            # Async
+            resample_pool=resample_pool,
+            max_resampling_size=max_resampling_size,
+            debug_observers=debug_observers,
+        )
+        self.compute_fps = computation_tiles
+        self.max_computation_size = max_computation_size
+        self.automatic_remapping = automatic_remapping
+
+        # Tilings shortcuts ****************************************************
+        self._compute_tiling = None
+        self._compute_footprint_index = None
+        if computation_tiles is not None:
+            # The edges of the computation tiles provided by the user may be unsorted when the
+            # tiles overlap, an R-tree is used in this case
+            self._compute_tiling = _tools.GridTiling.of_tiles(self.fp, computation_tiles)
+            if self._compute_tiling is None:
+                self._compute_footprint_index = self._build_compute_fps_index(
+                    computation_tiles,
+                )
+
+        # Scheduler notification ***********************************************
+        self.back_ds.put_message(Msg(
+            '/Global/TopLevel', 'new_raster', self,
+        ))
+
+    # ******************************************************************************************* **
+    def compute_fps_of_fp(self, fp):
+        """Get the list of Footprints to pass to `compute_array` to build `fp`
+
+        if `computation_tiles` was provided: The computation tiles that share area with `fp`
+        elif `max_computation_size` was provided: A tiling of `fp`
+        else: `[fp]`
+        """
+        if self._compute_tiling is not None:
+            assert fp.same_grid(self.fp)
+            x0, y0 = self.fp.spatial_to_raster(fp.tl, op=np.around).tolist()
+            x1, y1 = x0 + fp.rsizex, y0 + fp.rsizey
+            row_start, row_stop, col_start, col_stop = self._compute_tiling.ranges_of_rect(
+                x0, y0, x1, y1,
+            )
+            return self.compute_fps[row_start:row_stop, col_start:col_stop].flatten().tolist()
+        elif self._compute_footprint_index is not None:
+            assert fp.same_grid(self.fp)
+            rtl = self.fp.spatial_to_raster(fp.tl, dtype=float)
+            bounds = np.r_[rtl, rtl + fp.rsize]
+            return [
+                self.compute_fps.flat[i]
+                for i in list(self._compute_footprint_index.intersection(bounds))
+            ]
+        elif self.max_computation_size is not None:
+            countx, county = np.ceil(fp.rsize / self.max_computation_size).astype(int)
+            return fp.tile_count(
+                countx, county, boundary_effect='shrink'
+            ).flatten().tolist()
+        else:
+            return [fp]
+
+    def create_actors(self):
+        actors = [
+            ActorComputationAccumulator(self),
+            ActorMerger(self),
+            ActorProducer(self),
+            ActorQueriesHandler(self),
+            ActorComputationGate1(self),
+            ActorComputationGate2(self),
+            ActorComputer(self, cached=False),
+            ActorProductionGate(self),
+            ActorResampler(self),
+        ]
+        for a in actors:
+            self.debug_mngr.event('object_allocated', a)
+        return actors
+
+    # ******************************************************************************************* **
+    def _build_compute_fps_index(self, compute_fps):
+        idx = rtree.index.Index()
+        bounds_inset = np.asarray([
+            + 1 / 4,
+            + 1 / 4,
+            - 1 / 4,
+            - 1 / 4,
+        ])
+        for i, fp in enumerate(compute_fps.flat):
+            rtl = self.fp.spatial_to_raster(fp.tl, dtype=float)
+            bounds = np.r_[rtl, rtl + fp.rsize] + bounds_inset
+            idx.insert(i, bounds)
+        return idx
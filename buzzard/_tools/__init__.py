@@ -7,3 +7,5 @@ from .helper_classes import *
 from .rect import *
 from .multi_ordered_dict import *
 from .slices_of_matrix import *
+from .pools import *
+from .grid_tiling import *
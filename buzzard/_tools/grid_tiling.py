@@ -0,0 +1,173 @@
+""">>> help(GridTiling)"""
+
+import bisect
+
+import numpy as np
+
+class GridTiling(object):
+    """Private tool class used to find the tiles of a tiling that overlap a rectangle of pixels,
+    without an R-tree.
+
+    The tiling is a matrix of tiles made of rows and columns, like the outputs of `Footprint.tile`
+    and `Footprint.tile_count`: all the tiles of a row share the same top and bottom edges, all
+    the tiles of a column share the same left and right edges. The tiles may overlap, but the
+    edges have to be sorted along each axis.
+
+    The edges are expressed in pixels of a reference Footprint. When the tiles are evenly spaced,
+    a lookup is an integer division on each axis, otherwise it is a bisection.
+    """
+
+    def __init__(self, x0s, x1s, y0s, y1s):
+        """
+        Parameters
+        ----------
+        x0s, x1s: sequence of int
+            Left and right edges of the columns, in pixel
+        y0s, y1s: sequence of int
+            Top and bottom edges of the rows, in pixel
+        """
+        self._x = _Axis(x0s, x1s)
+        self._y = _Axis(y0s, y1s)
+
+    @classmethod
+    def of_tiles(cls, fp, tiles):
+        """Create the index of a matrix of tiles on the grid of `fp`. Returns None if the edges of
+        the tiles are not sorted.
+
+        Parameters
+        ----------
+        fp: Footprint
+        tiles: np.ndarray of Footprint
+            A tiling that was checked with `is_tiling_covering_fp`, or an output of `fp.tile`
+        """
+        edges = cls.edges_of_tiles(fp, tiles)
+        for v in edges:
+            if (v[:-1] > v[1:]).any():
+                return None
+        return cls(*edges)
+
+    @staticmethod
+    def edges_of_tiles(fp, tiles):
+        """Edges of the columns and rows of a matrix of tiles, in pixels of `fp`. Only the first
+        row and the first column are inspected.
+
+        Returns
+        -------
+        (x0s, x1s, y0s, y1s): (np.ndarray, np.ndarray, np.ndarray, np.ndarray)
+        """
+        first_row = tiles[0, :]
+        first_col = tiles[:, 0]
+        x0s = fp.spatial_to_raster([tile.tl for tile in first_row], op=np.around)[:, 0]
+        y0s = fp.spatial_to_raster([tile.tl for tile in first_col], op=np.around)[:, 1]
+        x1s = x0s + [tile.rsizex for tile in first_row]
+        y1s = y0s + [tile.rsizey for tile in first_col]
+        return x0s, x1s, y0s, y1s
+
+    @property
+    def shape(self):
+        return len(self._y), len(self._x)
+
+    def ranges_of_rect(self, x0, y0, x1, y1):
+        """Rows and columns of the tiles that share area with a rectangle of pixels
+
+        Returns
+        -------
+        (row_start, row_stop, col_start, col_stop): (int, int, int, int)
+            Python ranges, empty if the rectangle is outside of the tiling
+        """
+        row_start, row_stop = self._y.range_of_segment(y0, y1)
+        col_start, col_stop = self._x.range_of_segment(x0, x1)
+        return row_start, row_stop, col_start, col_stop
+
+    def indices_of_rect(self, x0, y0, x1, y1):
+        """Indices of the tiles that share area with a rectangle of pixels, in row-major order
+
+        Returns
+        -------
+        list of (int, int)
+        """
+        row_start, row_stop, col_start, col_stop = self.ranges_of_rect(x0, y0, x1, y1)
+        return [
+            (i, j)
+            for i in range(row_start, row_stop)
+            for j in range(col_start, col_stop)
+        ]
+
+    def column_ranges(self, x0s, x1s):
+        """Vectorized lookup of the columns that share area with many horizontal segments
+
+        Returns
+        -------
+        (np.ndarray, np.ndarray)
+            Starts and stops of the ranges of columns
+        """
+        return self._x.ranges_of_segments(x0s, x1s)
+
+    def row_ranges(self, y0s, y1s):
+        """Vectorized lookup of the rows that share area with many vertical segments
+
+        Returns
+        -------
+        (np.ndarray, np.ndarray)
+            Starts and stops of the ranges of rows
+        """
+        return self._y.ranges_of_segments(y0s, y1s)
+
+class _Axis(object):
+    """Starts and stops of the tiles along one axis"""
+
+    def __init__(self, starts, stops):
+        self._starts = [int(v) for v in starts]
+        self._stops = [int(v) for v in stops]
+        self._size = len(self._starts)
+        assert self._size == len(self._stops) > 0
+
+        # When the tiles are evenly spaced and have the same length, except maybe the last one
+        # that may be shorter, the lookups are integer divisions
+        self._origin = self._starts[0]
+        self._length = self._stops[0] - self._starts[0]
+        self._stride = self._starts[1] - self._starts[0] if self._size > 1 else self._length
+        self._regular = (
+            self._stride > 0 and
+            all(
+                start == self._origin + i * self._stride
+                for i, start in enumerate(self._starts)
+            ) and
+            all(
+                stop == start + self._length
+                for start, stop in zip(self._starts[:-1], self._stops[:-1])
+            ) and
+            self._starts[-1] < self._stops[-1] <= self._starts[-1] + self._length
+        )
+
+    def __len__(self):
+        return self._size
+
+    def range_of_segment(self, a, b):
+        """Range of the tiles that share a non-empty segment with [a, b)"""
+        if self._regular:
+            start = (a - self._origin - self._length) // self._stride + 1
+            start = min(max(start, 0), self._size)
+            if start < self._size and self._stops[start] <= a:
+                # The last tile is shorter
+                start += 1
+            stop = -((self._origin - b) // self._stride)
+            stop = min(max(stop, 0), self._size)
+        else:
+            start = bisect.bisect_right(self._stops, a)
+            stop = bisect.bisect_left(self._starts, b)
+        return start, max(start, stop)
+
+    def ranges_of_segments(self, a, b):
+        """Vectorized `range_of_segment`"""
+        a = np.asarray(a, dtype='int64')
+        b = np.asarray(b, dtype='int64')
+        if self._regular:
+            start = ((a - self._origin - self._length) // self._stride + 1).clip(0, self._size)
+            stops = np.asarray(self._stops + [np.iinfo('int64').max], dtype='int64')
+            start += stops[start] <= a
+            stop = (-((self._origin - b) // self._stride)).clip(0, self._size)
+        else:
+            start = np.searchsorted(self._stops, a, side='right')
+            stop = np.searchsorted(self._starts, b, side='left')
+        return start, np.maximum(start, stop)
@@ -389,7 +389,8 @@ def normalize_fields_defn(fields):
 
 # Async rasters ***************************************************************************** **
 def parse_queue_data_parameters(context, raster, channels=None, dst_nodata=None,
-                                interpolation='cv_area', max_queue_size=5, **kwargs):
+                                interpolation='cv_area', max_queue_size=5, ordered=True,
+                                **kwargs):
     """Check and transform the last parameters of a `queue_data` method.
     Default values are duplicated in the .queue_data and .iter_data methods
     """
@@ -443,12 +444,17 @@ def parse_queue_data_parameters(context, raster, channels=None, dst_nodata=None,
     if max_queue_size <= 0:
         raise ValueError('`max_queue_size` should be >0')
 
+    # Check ordered
+    if not isinstance(ordered, (bool, np.bool_)): # pragma: no cover
+        raise TypeError('`ordered` should be a bool')
+
     return dict(
         channel_ids=channel_ids,
         dst_nodata=dst_nodata,
         interpolation=interpolation,
         max_queue_size=max_queue_size,
         is_flat=is_flat,
+        ordered=bool(ordered),
     )
 
 def shatter_queue_data_method(met, name):
@@ -490,6 +496,8 @@ def shatter_queue_data_method(met, name):
         raise TypeError(fmt.format(name))
 
     kwargs = parse_queue_data_parameters('create_raster_recipe', met.__self__, **kwargs)
+    if not kwargs['ordered']:
+        raise ValueError('`queue_data_per_primitive[{}]` should not be unordered'.format(name))
     return met.__self__._back, kwargs
 
 # Tiling checks ********************************************************************************* **
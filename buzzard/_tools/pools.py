@@ -0,0 +1,69 @@
+"""Common interface of the pools accepted by the Dataset's scheduler:
+- `multiprocessing.pool.Pool` and its `multiprocessing.pool.ThreadPool` subclass,
+- `concurrent.futures.Executor`, like a `ThreadPoolExecutor`, a `ProcessPoolExecutor` (with any
+  `mp_context`) or a custom executor following the `submit`/`add_done_callback` protocol.
+"""
+
+import concurrent.futures
+import multiprocessing as mp
+import multiprocessing.pool
+
+def is_pool(obj):
+    """Is `obj` a pool that can be used by the Dataset's scheduler"""
+    return isinstance(obj, (mp.pool.Pool, concurrent.futures.Executor))
+
+def pool_max_workers(pool):
+    """Number of jobs that `pool` can run simultaneously"""
+    if isinstance(pool, mp.pool.Pool):
+        return pool._processes
+    for name in ['_max_workers', 'max_workers']:
+        count = getattr(pool, name, None)
+        if isinstance(count, int) and count > 0:
+            return count
+    return mp.cpu_count()
+
+def pool_same_address_space(pool):
+    """Do the workers of `pool` run in the same process as the scheduler.
+
+    An executor that is neither a `ThreadPoolExecutor` nor a `ThreadPool` is considered to run
+    in other processes. It is always correct, arrays are then just exchanged through shared
+    memory or pickling.
+    """
+    return isinstance(pool, (mp.pool.ThreadPool, concurrent.futures.ThreadPoolExecutor))
+
+def pool_submit(pool, func, done_callback):
+    """Start `func()` in `pool`.
+
+    Parameters
+    ----------
+    pool: multiprocessing.pool.Pool or concurrent.futures.Executor
+    func: callable
+        Picklable if `pool` uses other processes
+    done_callback: callable
+        Called without argument from any thread when `func` succeeded or failed
+
+    Returns
+    -------
+    get_result: callable
+        Returns the output of `func`, or raises its exception
+    """
+    if isinstance(pool, mp.pool.Pool):
+        callback = lambda _: done_callback()
+        return pool.apply_async(func, callback=callback, error_callback=callback).get
+    future = pool.submit(func)
+    future.add_done_callback(lambda _: done_callback())
+    return future.result
+
+def pool_terminate(pool):
+    """Stop the workers of `pool` without waiting for their jobs"""
+    if isinstance(pool, mp.pool.Pool):
+        pool.terminate()
+    else:
+        pool.shutdown(wait=False)
+
+def pool_join(pool):
+    """Wait for the workers of `pool` to stop"""
+    if isinstance(pool, mp.pool.Pool):
+        pool.join()
+    else:
+        pool.shutdown(wait=True)
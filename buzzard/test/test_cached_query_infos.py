@@ -0,0 +1,148 @@
+"""Tests for the planning of the queries of cached recipes, without any file or scheduler"""
+
+# pylint: disable=redefined-outer-name
+
+import itertools
+import types
+
+import numpy as np
+import pytest
+
+import buzzard as buzz
+from buzzard import _tools
+from buzzard._cached_raster_recipe import BackCachedRasterRecipe
+from buzzard._a_source_raster_remap import ABackSourceRasterRemapMixin
+from buzzard._actors.cached.query_infos import CachedQueryInfos
+
+class _Raster(object):
+    """The attributes of a BackCachedRasterRecipe read by CachedQueryInfos"""
+
+    cache_fps_of_fp = BackCachedRasterRecipe.cache_fps_of_fp
+    cache_ranges_of_fps = BackCachedRasterRecipe.cache_ranges_of_fps
+    build_sampling_footprint_to_remap_interpolate = (
+        ABackSourceRasterRemapMixin.build_sampling_footprint_to_remap_interpolate
+    )
+
+    def __init__(self, fp, cache_tiles, max_resampling_size):
+        self.fp = fp
+        self.cache_fps = fp.tile(cache_tiles, 0, 0, boundary_effect='shrink')
+        self._cache_tiling = _tools.GridTiling.of_tiles(fp, self.cache_fps)
+        self.indices_of_cache_fp = {
+            cache_fp: indices
+            for indices, cache_fp in np.ndenumerate(self.cache_fps)
+        }
+        self.max_resampling_size = max_resampling_size
+        self.back_ds = types.SimpleNamespace(allow_interpolation=True)
+
+def _random_fps(raster_fp, count, rng):
+    fps = []
+    for _ in range(count):
+        rsize = rng.randint(1, 60, 2)
+        tl = raster_fp.tl + rng.randint(-40, 120, 2) * raster_fp.pxvec
+        kind = rng.randint(4)
+        if kind == 0:
+            # On the raster's grid, inside, overlapping or outside of the raster
+            fps.append(buzz.Footprint(tl=tl, size=rsize * raster_fp.pxsize, rsize=rsize))
+        elif kind == 1:
+            # Shifted from the raster's grid
+            tl = tl + raster_fp.pxvec / 3
+            fps.append(buzz.Footprint(tl=tl, size=rsize * raster_fp.pxsize, rsize=rsize))
+        elif kind == 2:
+            # Another resolution
+            fps.append(buzz.Footprint(tl=tl, size=rsize * raster_fp.pxsize, rsize=rsize * 2))
+        else:
+            # Far away from the raster
+            tl = raster_fp.tl - raster_fp.size * 3
+            fps.append(buzz.Footprint(tl=tl, size=rsize * raster_fp.pxsize, rsize=rsize))
+    return fps
+
+def _cache_fps_of_fp(raster, fp):
+    return [
+        cache_fp
+        for cache_fp in raster.cache_fps.flat
+        if cache_fp.share_area(fp)
+    ]
+
+def _reference(raster, list_of_prod_fp, interpolation):
+    """Straightforward per-Footprint planning"""
+    prods = []
+    for prod_fp in list_of_prod_fp:
+        same_grid = prod_fp.same_grid(raster.fp)
+        if not prod_fp.share_area(raster.fp):
+            prods.append((
+                prod_fp, same_grid, False, None, frozenset(), (prod_fp,),
+                {prod_fp: frozenset()}, {prod_fp: None},
+            ))
+            continue
+        if same_grid:
+            sample_fp = raster.fp & prod_fp
+            resample_fps = [prod_fp]
+            sample_dep_fp = {prod_fp: sample_fp}
+        else:
+            sample_fp = raster.build_sampling_footprint_to_remap_interpolate(prod_fp, interpolation)
+            if raster.max_resampling_size is None:
+                resample_fps = [prod_fp]
+                sample_dep_fp = {prod_fp: sample_fp}
+            else:
+                rsize = np.maximum(prod_fp.rsize, sample_fp.rsize)
+                countx, county = np.ceil(rsize / raster.max_resampling_size).astype(int)
+                resample_fps = prod_fp.tile_count(
+                    countx, county, boundary_effect='shrink'
+                ).flatten().tolist()
+                sample_dep_fp = {
+                    resample_fp: (
+                        raster.build_sampling_footprint_to_remap_interpolate(resample_fp, interpolation)
+                        if resample_fp.share_area(raster.fp) else
+                        None
+                    )
+                    for resample_fp in resample_fps
+                }
+        resample_cache_deps_fps = {
+            resample_fp: frozenset(_cache_fps_of_fp(raster, sample_subfp))
+            for resample_fp, sample_subfp in sample_dep_fp.items()
+            if sample_subfp is not None
+        }
+        cache_fps = frozenset(itertools.chain.from_iterable(resample_cache_deps_fps.values()))
+        prods.append((
+            prod_fp, same_grid, True, sample_fp, cache_fps, tuple(resample_fps),
+            resample_cache_deps_fps, sample_dep_fp,
+        ))
+
+    # The tiles of a `prod_fp` are ordered like in `raster.cache_fps`
+    list_of_cache_fp = []
+    prod_idxs_per_cache_fp = {}
+    for prod_idx, prod in enumerate(prods):
+        for cache_fp in sorted(prod[4], key=raster.indices_of_cache_fp.__getitem__):
+            if cache_fp not in prod_idxs_per_cache_fp:
+                list_of_cache_fp.append(cache_fp)
+                prod_idxs_per_cache_fp[cache_fp] = set()
+            prod_idxs_per_cache_fp[cache_fp].add(prod_idx)
+    min_prod_idx_per_cache_fp = {k: min(v) for k, v in prod_idxs_per_cache_fp.items()}
+    return prods, list_of_cache_fp, prod_idxs_per_cache_fp, min_prod_idx_per_cache_fp
+
+@pytest.mark.parametrize('max_resampling_size', [None, 17])
+def test_planning(max_resampling_size):
+    raster_fp = buzz.Footprint(tl=(1000, 1100), size=(100, 80), rsize=(100, 80))
+    raster = _Raster(raster_fp, (25, 15), max_resampling_size)
+    rng = np.random.RandomState(42)
+
+    for query_idx in range(200):
+        list_of_prod_fp = _random_fps(raster_fp, query_idx % 7, rng)
+        qi = CachedQueryInfos(
+            raster, list_of_prod_fp, [0], True, 0, 'cv_area', 5, None, None,
+        )
+        prods, list_of_cache_fp, prod_idxs, min_prod_idx = _reference(
+            raster, list_of_prod_fp, 'cv_area',
+        )
+
+        assert qi.produce_count == len(list_of_prod_fp)
+        assert len(qi.prod) == len(prods)
+        for prod, ref in zip(qi.prod, prods):
+            assert len(prod) == len(ref)
+            for field, v, vref in zip(prod._fields, prod, ref):
+                if field.startswith('resample_') and field != 'resample_fps':
+                    v = dict(v)
+                assert v == vref, field
+        assert list(qi.list_of_cache_fp) == list_of_cache_fp
+        assert dict(qi.dict_of_prod_idxs_per_cache_fp) == prod_idxs
+        assert dict(qi.dict_of_min_prod_idx_per_cache_fp) == min_prod_idx
@@ -1,3 +1,4 @@
+import concurrent.futures
 import multiprocessing as mp
 import multiprocessing.pool
 import shutil
@@ -10,11 +11,13 @@ import time
 import gc
 import threading
 import itertools
+import json
 
 import numpy as np
 import pytest
 
 import buzzard as buzz
+from buzzard._cache_lock import CacheTileLocks
 
 def pytest_generate_tests(metafunc):
     if 'pools' in metafunc.fixturenames:
@@ -24,6 +27,8 @@ def pytest_generate_tests(metafunc):
                 'lol',
                 mp.pool.ThreadPool(2),
                 mp.pool.Pool(2),
+                concurrent.futures.ThreadPoolExecutor(2),
+                concurrent.futures.ProcessPoolExecutor(2),
         ]:
             # TODO: test with different pools
             # TODO: test with spawn/forks
@@ -56,13 +61,21 @@ test_prefix2 = test_prefix
 def cache_tiles(request):
     return request.param
 
-def test_(pools, test_prefix, cache_tiles, test_prefix2):
+@pytest.fixture(params=[
+    'gtiff',
+    'raw',
+])
+def cache_format(request):
+    return request.param
+
+def test_(pools, test_prefix, cache_tiles, cache_format, test_prefix2):
     def _open(**kwargs):
         d = dict(
             fp=fp, dtype='float32', channel_count=2,
             compute_array=functools.partial(_meshgrid_raster_in, reffp=fp),
             cache_dir=test_prefix,
             cache_tiles=cache_tiles,
+            cache_format=cache_format,
             **dict(itertools.chain(
                 pools['merge'].items(),
                 pools['resample'].items(),
@@ -100,6 +113,7 @@ def test_(pools, test_prefix, cache_tiles, test_prefix2):
     compute_same_address_space = (
         type(pools['computation']['computation_pool']) in {str, mp.pool.ThreadPool, type(None)}
     )
+    cache_files_pattern = os.path.join(test_prefix, '*' + {'gtiff': '.tif', 'raw': '.npy'}[cache_format])
 
     with buzz.Dataset(allow_interpolation=1).close as ds:
         # Create a numpy raster with the same data, useful to compare resampling
@@ -107,12 +121,12 @@ def test_(pools, test_prefix, cache_tiles, test_prefix2):
 
         # Test lazyness of cache
         r = _open()
-        files = glob.glob(os.path.join(test_prefix, '*.tif'))
+        files = glob.glob(cache_files_pattern)
         assert len(files) == 0
 
         # Test get_data results
         _test_get()
-        files = glob.glob(os.path.join(test_prefix, '*.tif'))
+        files = glob.glob(cache_files_pattern)
         assert len(files) > 0
         mtimes0 = {f: os.stat(f).st_mtime for f in files}
 
@@ -121,7 +135,7 @@ def test_(pools, test_prefix, cache_tiles, test_prefix2):
         r.close()
         r = _open(compute_array=_should_not_be_called)
         _test_get()
-        files = glob.glob(os.path.join(test_prefix, '*.tif'))
+        files = glob.glob(cache_files_pattern)
         assert len(files) > 0
         mtimes1 = {f: os.stat(f).st_mtime for f in files}
         assert mtimes0 == mtimes1
@@ -131,7 +145,7 @@ def test_(pools, test_prefix, cache_tiles, test_prefix2):
         r.close()
         r = _open(ow=True)
         _test_get()
-        files = glob.glob(os.path.join(test_prefix, '*.tif'))
+        files = glob.glob(cache_files_pattern)
         assert len(files) > 0
         mtimes1 = {f: os.stat(f).st_mtime for f in files}
         assert mtimes0.keys() == mtimes1.keys()
@@ -197,7 +211,7 @@ def test_(pools, test_prefix, cache_tiles, test_prefix2):
         npr = ds.awrap_numpy_raster(fp, np.stack(fp.meshgrid_raster, axis=2).astype('float32'))
 
         # Corrupted cache file
-        files = glob.glob(os.path.join(test_prefix, '*.tif'))
+        files = glob.glob(cache_files_pattern)
         mtimes0 = {f: os.stat(f).st_mtime for f in files}
         corrupted_path = files[0]
         _corrupt_files([corrupted_path])
@@ -216,7 +230,7 @@ def test_(pools, test_prefix, cache_tiles, test_prefix2):
         npr = ds.awrap_numpy_raster(fp, np.stack(fp.meshgrid_raster, axis=2).astype('float32'))
 
         # In iter_data, the first one(s) don't need cache, the next ones need cache file checking and then recomputation
-        _corrupt_files(glob.glob(os.path.join(test_prefix, '*.tif')))
+        _corrupt_files(glob.glob(cache_files_pattern))
         r = _open()
         fps = [
             fp.move(fp.br + fp.diagvec), # Outside
@@ -366,6 +380,562 @@ def test_(pools, test_prefix, cache_tiles, test_prefix2):
         with pytest.raises(NecessaryCrash):
             r.get_data()
 
+def test_cache_format_parameters():
+    assert isinstance(buzz.RawCacheFormat(), buzz.ACacheFormat)
+    assert buzz.GTiffCacheFormat().options == [
+        'TILED=YES', 'BLOCKXSIZE=256', 'BLOCKYSIZE=256', 'SPARSE_OK=TRUE',
+    ]
+    assert buzz.GTiffCacheFormat('zstd', predictor=3, level=10).options[-3:] == [
+        'COMPRESS=ZSTD', 'PREDICTOR=3', 'ZSTD_LEVEL=10',
+    ]
+    with pytest.raises(ValueError):
+        buzz.GTiffCacheFormat('JPEG')
+    with pytest.raises(ValueError):
+        buzz.GTiffCacheFormat(predictor=2)
+    with pytest.raises(ValueError):
+        buzz.GTiffCacheFormat('LZW', level=2)
+    with pytest.raises(ValueError):
+        buzz.GTiffCacheFormat('DEFLATE', level=10)
+    with pytest.raises(ValueError):
+        buzz.GTiffCacheFormat(block_size=100)
+
+    fp = buzz.Footprint(rsize=(100, 100), size=(100, 100), tl=(1000, 1100))
+    with buzz.Dataset().close as ds:
+        _open = functools.partial(
+            ds.acreate_cached_raster_recipe,
+            fp, 'float32', 2, compute_array=functools.partial(_meshgrid_raster_in, reffp=fp),
+            cache_dir=tempfile.gettempdir(),
+        )
+        assert isinstance(_open().cache_format, buzz.GTiffCacheFormat)
+        assert isinstance(_open(cache_format='raw').cache_format, buzz.RawCacheFormat)
+        with pytest.raises(TypeError):
+            _open(cache_format='zarr')
+        with pytest.raises(ValueError):
+            _open(checksum='md5')
+
+def test_trust_mtime_size(test_prefix):
+    fp = buzz.Footprint(rsize=(100, 100), size=(100, 100), tl=(1000, 1100))
+    xref, yref = fp.meshgrid_raster
+
+    def _open(**kwargs):
+        d = dict(
+            fp=fp, dtype='float32', channel_count=2,
+            compute_array=functools.partial(_meshgrid_raster_in, reffp=fp),
+            cache_dir=test_prefix, cache_tiles=(50, 50), cache_format='raw',
+            checksum='blake2b', trust_mtime_size=True,
+        )
+        d.update(kwargs)
+        return ds.acreate_cached_raster_recipe(**d)
+
+    with buzz.Dataset().close as ds:
+        _open().get_data()
+    assert os.path.isfile(os.path.join(test_prefix, 'buzz_manifest.jsonl'))
+
+    # Alter a file without changing its size and modification time, it is trusted
+    path = sorted(glob.glob(os.path.join(test_prefix, '*.npy')))[-1]
+    st = os.stat(path)
+    with open(path, 'r+b') as stream:
+        stream.seek(-4, os.SEEK_END)
+        stream.write(np.float32(-1).tobytes())
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    with buzz.Dataset().close as ds:
+        arr = _open(compute_array=_should_not_be_called).get_data()
+        assert arr[-1, -1, -1] == -1
+        assert np.all(arr[..., 0] == xref)
+
+    # Its modification time changed, it is checked and recomputed
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    with buzz.Dataset().close as ds:
+        arr = _open().get_data()
+        assert np.all(arr[..., 0] == xref)
+        assert np.all(arr[..., 1] == yref)
+
+    # Another checksum algorithm does not trust the manifest, the files are checked again
+    with buzz.Dataset().close as ds:
+        arr = _open(compute_array=_should_not_be_called, checksum='sum64').get_data()
+        assert np.all(arr[..., 0] == xref)
+
+def test_checksum_change(test_prefix):
+    fp = buzz.Footprint(rsize=(100, 100), size=(100, 100), tl=(1000, 1100))
+    xref, yref = fp.meshgrid_raster
+
+    def _open(ds, checksum, compute_array=functools.partial(_meshgrid_raster_in, reffp=fp)):
+        return ds.acreate_cached_raster_recipe(
+            fp=fp, dtype='float32', channel_count=2,
+            compute_array=compute_array,
+            cache_dir=test_prefix, cache_tiles=(50, 50), cache_format='raw',
+            checksum=checksum,
+        )
+
+    def _cache_files():
+        return sorted(glob.glob(os.path.join(test_prefix, '*.npy')))
+
+    with buzz.Dataset().close as ds:
+        _open(ds, 'blake2b').get_data()
+    files = _cache_files()
+    assert len(files) == 4
+    assert all('_blake2b-' in os.path.basename(path) for path in files)
+
+    # The cache files are checked with the algorithm in their name, none is removed
+    with buzz.Dataset().close as ds:
+        r = _open(ds, 'sum64', _should_not_be_called)
+        arr = r.get_data()
+        assert np.all(arr[..., 0] == xref)
+        assert np.all(arr[..., 1] == yref)
+    assert _cache_files() == files
+
+    # A corrupted cache file is still detected, and written again with the new algorithm
+    with open(files[0], 'r+b') as stream:
+        stream.seek(-4, os.SEEK_END)
+        stream.write(np.float32(-1).tobytes())
+    with buzz.Dataset().close as ds:
+        arr = _open(ds, 'sum64').get_data()
+        assert np.all(arr[..., 0] == xref)
+        assert np.all(arr[..., 1] == yref)
+    new_files = _cache_files()
+    assert len(new_files) == 4
+    assert files[0] not in new_files
+    assert len(set(new_files) - set(files)) == 1
+    assert '-' not in os.path.basename(list(set(new_files) - set(files))[0]).split('_')[-1]
+
+def test_tile_cache(pools, test_prefix):
+    fp = buzz.Footprint(rsize=(100, 100), size=(100, 100), tl=(1000, 1100))
+    xref, yref = fp.meshgrid_raster
+    tile_nbytes = 25 * 25 * 2 * 4
+
+    class _Observer(object):
+        def __init__(self):
+            self.events = []
+
+        def on_tile_cache_update(self, raster, path, event, stats):
+            self.events.append(event)
+            self.stats = stats
+
+    def _open(**kwargs):
+        d = dict(
+            fp=fp, dtype='float32', channel_count=2,
+            compute_array=functools.partial(_meshgrid_raster_in, reffp=fp),
+            cache_dir=test_prefix, cache_tiles=(25, 25), cache_format='raw',
+            **pools['io'],
+        )
+        d.update(kwargs)
+        return ds.acreate_cached_raster_recipe(**d)
+
+    with buzz.Dataset().close as ds:
+        _open().get_data()
+
+    # Sliding windows, each cache tile is read once from disk
+    obs = _Observer()
+    windows = fp.tile((50, 50), 25, 25).flatten()
+    with buzz.Dataset(tile_cache_bytes=16 * tile_nbytes).close as ds:
+        r = _open(compute_array=_should_not_be_called, debug_observers=[obs])
+        for win, arr in zip(windows, r.iter_data(windows, channels=[1])):
+            assert np.all(arr[..., 0] == yref[win.slice_in(fp)])
+    assert obs.events.count('miss') == 16
+    assert obs.events.count('hit') == windows.size * 4 - 16
+    assert obs.stats['max_bytes'] == 16 * tile_nbytes
+
+    # The budget is too small to keep all the tiles
+    obs = _Observer()
+    with buzz.Dataset().close as ds:
+        r = _open(
+            compute_array=_should_not_be_called, debug_observers=[obs],
+            tile_cache_bytes=2 * tile_nbytes,
+        )
+        for win, arr in zip(windows, r.iter_data(windows)):
+            assert np.all(arr[..., 0] == xref[win.slice_in(fp)])
+            assert np.all(arr[..., 1] == yref[win.slice_in(fp)])
+    assert obs.stats['evictions'] == obs.events.count('eviction') > 0
+    assert obs.stats['nbytes'] <= 2 * tile_nbytes
+
+    # Disabled
+    obs = _Observer()
+    with buzz.Dataset(tile_cache_bytes=16 * tile_nbytes).close as ds:
+        r = _open(
+            compute_array=_should_not_be_called, debug_observers=[obs], tile_cache_bytes=0,
+        )
+        r.get_data()
+    assert obs.events == []
+
+def test_coalescing(test_prefix):
+    fp = buzz.Footprint(rsize=(100, 100), size=(100, 100), tl=(1000, 1100))
+    xref, yref = fp.meshgrid_raster
+    windows = fp.tile((50, 50)).flatten()
+
+    class _Observer(object):
+        def __init__(self):
+            self.fps = []
+
+        def on_production_coalesced(self, raster, fp):
+            self.fps.append(fp)
+
+        def wait(self, count):
+            t0 = time.time()
+            while len(self.fps) < count:
+                assert time.time() - t0 < 10, 'Productions were not coalesced'
+                time.sleep(0.01)
+
+    class _GatedExecutor(concurrent.futures.ThreadPoolExecutor):
+        """Executor whose jobs wait for `event`"""
+        def __init__(self, event):
+            super().__init__(2)
+            self._event = event
+
+        def submit(self, fn):
+            return super().submit(self._run, fn)
+
+        def _run(self, fn):
+            self._event.wait()
+            return fn()
+
+    def _open(**kwargs):
+        d = dict(
+            fp=fp, dtype='float32', channel_count=2,
+            compute_array=functools.partial(_meshgrid_raster_in, reffp=fp),
+            cache_dir=test_prefix, cache_tiles=(25, 25), cache_format='raw', tile_cache_bytes=0,
+        )
+        d.update(kwargs)
+        return ds.acreate_cached_raster_recipe(**d)
+
+    def _check(queue, channels=(0, 1)):
+        arrays = [queue.get(timeout=10) for _ in windows]
+        for win, arr in zip(windows, arrays):
+            for i, ref in enumerate([xref, yref][c] for c in channels):
+                assert np.all(arr[..., i] == ref[win.slice_in(fp)])
+        return arrays
+
+    with buzz.Dataset().close as ds:
+        _open().get_data()
+
+    for drop in [None, 'leader', 'follower']:
+        event = threading.Event()
+        obs = _Observer()
+        io_pool = _GatedExecutor(event)
+        try:
+            with buzz.Dataset().close as ds:
+                r = _open(
+                    compute_array=_should_not_be_called, debug_observers=[obs],
+                    io_pool=io_pool,
+                )
+                leader = r.queue_data(windows, max_queue_size=windows.size)
+                follower = r.queue_data(windows, max_queue_size=windows.size)
+                other = r.queue_data(windows, channels=[1], max_queue_size=windows.size)
+                obs.wait(windows.size)
+                if drop == 'leader':
+                    del leader
+                elif drop == 'follower':
+                    del follower
+                gc.collect()
+                time.sleep(0.1)
+                event.set()
+
+                if drop != 'leader':
+                    leader_arrays = _check(leader)
+                if drop != 'follower':
+                    follower_arrays = _check(follower)
+                _check(other, [1])
+                if drop is None:
+                    for a, b in zip(leader_arrays, follower_arrays):
+                        assert not np.shares_memory(a, b)
+        finally:
+            event.set()
+            io_pool.shutdown()
+        assert len(obs.fps) == windows.size
+
+def test_lock_cache_files(test_prefix):
+    fp = buzz.Footprint(rsize=(100, 100), size=(100, 100), tl=(1000, 1100))
+    xref, yref = fp.meshgrid_raster
+
+    class _Observer(object):
+        def __init__(self):
+            self.events = []
+
+        def on_cache_file_update(self, raster, cache_fp, status):
+            self.events.append(status)
+
+        def wait(self, status, count):
+            t0 = time.time()
+            while self.events.count(status) < count:
+                assert time.time() - t0 < 10, 'Timeout'
+                time.sleep(0.01)
+
+    def _blocked_computation(fp, primitive_fps, primtive_arrays, raster, event):
+        event.wait()
+        return _meshgrid_raster_in(fp, primitive_fps, primtive_arrays, raster, raster.fp)
+
+    def _open(ds, cache_dir, **kwargs):
+        d = dict(
+            fp=fp, dtype='float32', channel_count=2,
+            compute_array=functools.partial(_meshgrid_raster_in, reffp=fp),
+            cache_dir=cache_dir, cache_tiles=(50, 50), cache_format='raw',
+            lock_cache_files=True,
+        )
+        d.update(kwargs)
+        return ds.acreate_cached_raster_recipe(**d)
+
+    def _check(arr):
+        assert np.all(arr[..., 0] == xref)
+        assert np.all(arr[..., 1] == yref)
+
+    # A second Dataset waits for the cache tiles computed by the first one
+    cache_dir = os.path.join(test_prefix, 'a')
+    event = threading.Event()
+    obs = _Observer()
+    with buzz.Dataset().close as ds1, buzz.Dataset().close as ds2:
+        r1 = _open(ds1, cache_dir, compute_array=functools.partial(_blocked_computation, event=event))
+        r2 = _open(ds2, cache_dir, compute_array=_should_not_be_called, debug_observers=[obs])
+        q1 = r1.queue_data([fp])
+        t0 = time.time()
+        while len(glob.glob(os.path.join(cache_dir, '*.lock'))) < 4:
+            assert time.time() - t0 < 10, 'Timeout'
+            time.sleep(0.01)
+        q2 = r2.queue_data([fp])
+        obs.wait('locked', 4)
+        event.set()
+        _check(q1.get(timeout=10))
+        _check(q2.get(timeout=10))
+    assert glob.glob(os.path.join(cache_dir, '*.lock')) == []
+    assert len(glob.glob(os.path.join(cache_dir, '*.npy'))) == 4
+
+    # A lock released without writing the cache file is taken over
+    cache_dir = os.path.join(test_prefix, 'b')
+    os.makedirs(cache_dir)
+    obs = _Observer()
+    with buzz.Dataset().close as ds:
+        r = _open(ds, cache_dir, debug_observers=[obs])
+        prefix = r._back.fname_prefix_of_cache_fp(r.cache_tiles[0, 0])
+        locks = CacheTileLocks(cache_dir)
+        assert locks.try_acquire(prefix)
+        q = r.queue_data([fp])
+        obs.wait('locked', 1)
+        locks.release(prefix)
+        _check(q.get(timeout=10))
+    assert glob.glob(os.path.join(cache_dir, '*.lock')) == []
+    assert len(glob.glob(os.path.join(cache_dir, '*.npy'))) == 4
+
+def test_lock_cache_files_processes(test_prefix):
+    fp = buzz.Footprint(rsize=(100, 100), size=(100, 100), tl=(1000, 1100))
+
+    # Several processes race for the lock of a process that died
+    prefix = 'buzz_x000-y000_x00000-y00000'
+    for _ in range(5):
+        p = mp.Process(target=_lock_and_die, args=(test_prefix, prefix))
+        p.start()
+        p.join()
+        assert os.path.isfile(os.path.join(test_prefix, prefix + '.lock'))
+        barrier = mp.Barrier(6)
+        results = mp.Queue()
+        ps = [
+            mp.Process(target=_try_lock, args=(test_prefix, prefix, barrier, results))
+            for _ in range(barrier.parties)
+        ]
+        for p in ps:
+            p.start()
+        acquired = [results.get(timeout=10) for _ in ps]
+        for p in ps:
+            p.join()
+            assert p.exitcode == 0
+        assert acquired.count(True) == 1
+
+    # A process dies while computing the cache tiles, another one takes them over
+    cache_dir = os.path.join(test_prefix, 'a')
+    p = mp.Process(target=_open_and_get, args=(fp, cache_dir, _exit_computation, None))
+    p.start()
+    p.join()
+    assert p.exitcode == 1
+    assert len(glob.glob(os.path.join(cache_dir, '*.lock'))) > 0
+    assert glob.glob(os.path.join(cache_dir, '*.npy')) == []
+    _open_and_get(fp, cache_dir, _meshgrid_raster_in, None)
+    assert glob.glob(os.path.join(cache_dir, '*.lock')) == []
+    assert len(glob.glob(os.path.join(cache_dir, '*.npy'))) == 4
+
+    # Two processes race for the same cache tiles, each tile is computed once
+    cache_dir = os.path.join(test_prefix, 'b')
+    counter_dir = os.path.join(test_prefix, 'counter')
+    os.makedirs(counter_dir)
+    barrier = mp.Barrier(2)
+    ps = [
+        mp.Process(target=_open_and_get, args=(
+            fp, cache_dir, functools.partial(_counted_computation, counter_dir=counter_dir), barrier,
+        ))
+        for _ in range(barrier.parties)
+    ]
+    for p in ps:
+        p.start()
+    for p in ps:
+        p.join()
+        assert p.exitcode == 0
+    assert len(os.listdir(counter_dir)) == 4
+    assert glob.glob(os.path.join(cache_dir, '*.lock')) == []
+    assert len(glob.glob(os.path.join(cache_dir, '*.npy'))) == 4
+
+def test_max_cache_bytes(test_prefix):
+    fp = buzz.Footprint(rsize=(100, 100), size=(100, 100), tl=(1000, 1100))
+    xref, yref = fp.meshgrid_raster
+    tile_nbytes = 50 * 50 * 2 * 4 + 128 # float32 array and .npy header
+
+    class _Observer(object):
+        def __init__(self):
+            self.events = []
+
+        def on_cache_file_update(self, raster, cache_fp, status):
+            self.events.append(status)
+
+    def _open(ds, max_cache_bytes, **kwargs):
+        return ds.acreate_cached_raster_recipe(
+            fp=fp, dtype='float32', channel_count=2,
+            compute_array=functools.partial(_meshgrid_raster_in, reffp=fp),
+            cache_dir=test_prefix, cache_tiles=(50, 50), cache_format='raw',
+            max_cache_bytes=max_cache_bytes, **kwargs
+        )
+
+    def _check(fp_query, arr):
+        slices = fp_query.slice_in(fp)
+        assert np.all(arr[..., 0] == xref[slices])
+        assert np.all(arr[..., 1] == yref[slices])
+
+    def _wait_cache_nbytes(nbytes):
+        t0 = time.time()
+        while True:
+            paths = glob.glob(os.path.join(test_prefix, '*.npy'))
+            if sum(os.path.getsize(path) for path in paths) <= nbytes:
+                return
+            assert time.time() - t0 < 10, 'Timeout'
+            time.sleep(0.01)
+
+    with buzz.Dataset().close as ds:
+        with pytest.raises(ValueError, match='max_cache_bytes'):
+            _open(ds, -1)
+        with pytest.raises(ValueError, match='lock_cache_files'):
+            _open(ds, tile_nbytes, lock_cache_files=True)
+
+    # The cache files read the least recently are removed
+    obs = _Observer()
+    with buzz.Dataset().close as ds:
+        r = _open(ds, 2 * tile_nbytes, debug_observers=[obs])
+        for cache_fp in r.cache_tiles.flat:
+            _check(cache_fp, r.get_data(fp=cache_fp))
+        _wait_cache_nbytes(2 * tile_nbytes)
+        assert obs.events.count('evicted') == 2
+        assert sorted(glob.glob(os.path.join(test_prefix, '*.npy'))) == sorted(
+            glob.glob(os.path.join(test_prefix, r._back.fname_prefix_of_cache_fp(cache_fp) + '*'))[0]
+            for cache_fp in r.cache_tiles.flat[2:]
+        )
+
+        # The evicted cache tiles are computed again, the tiles of a query are kept until its
+        # arrays are made
+        _check(fp, r.get_data(fp=fp))
+        assert obs.events.count('ready') == 6
+        _wait_cache_nbytes(2 * tile_nbytes)
+
+    # The cache files found in the cache directory count in the budget
+    with buzz.Dataset().close as ds:
+        r = _open(ds, tile_nbytes)
+        cache_fp = r.cache_tiles[0, 0]
+        _check(cache_fp, r.get_data(fp=cache_fp))
+        _wait_cache_nbytes(tile_nbytes)
+
+def test_precompute(test_prefix):
+    fp = buzz.Footprint(rsize=(100, 100), size=(100, 100), tl=(1000, 1100))
+    xref, yref = fp.meshgrid_raster
+
+    primitive_calls = []
+    def _primitive_computation(fp_, primitive_fps, primitive_arrays, raster):
+        primitive_calls.append(fp_)
+        return _meshgrid_raster_in(fp_, primitive_fps, primitive_arrays, None, fp)
+
+    def _computation(fp_, primitive_fps, primitive_arrays, raster):
+        # The primitive footprint overlaps the ones of the neighbouring computations
+        prim_fp = primitive_fps['prim']
+        assert prim_fp == fp_.dilate(1)
+        x, y = prim_fp.meshgrid_raster_in(fp)
+        assert np.all(primitive_arrays['prim'][..., 0] == x)
+        assert np.all(primitive_arrays['prim'][..., 1] == y)
+        return primitive_arrays['prim'][1:-1, 1:-1]
+
+    def _open(ds, compute_array=_computation):
+        prim = ds.acreate_raster_recipe(
+            fp.dilate(1), 'float32', 2, compute_array=_primitive_computation, computation_pool=None,
+        )
+        return ds.acreate_cached_raster_recipe(
+            fp=fp, dtype='float32', channel_count=2,
+            compute_array=compute_array,
+            queue_data_per_primitive={'prim': prim.queue_data},
+            convert_footprint_per_primitive={'prim': lambda fp_: fp_.dilate(1)},
+            cache_dir=test_prefix, cache_tiles=(25, 25), cache_format='raw',
+        )
+
+    def _cache_file_count():
+        return len(glob.glob(os.path.join(test_prefix, '*.npy')))
+
+    with buzz.Dataset().close as ds:
+        r = _open(ds)
+
+        # The cache tiles that share area with some footprints
+        progress = []
+        fps = [r.cache_tiles[0, 0].erode(1), r.cache_tiles[3, 3]]
+        assert r.precompute(fps, lambda *args: progress.append(args)) == 2
+        assert progress == [(1, 2), (2, 2)]
+        assert _cache_file_count() == 2
+        assert len(primitive_calls) == 2
+
+        # The remaining cache tiles, the primitive footprints of a row being read at once
+        progress = []
+        assert r.precompute(progress=lambda *args: progress.append(args)) == 16
+        assert progress == [(i + 1, 16) for i in range(16)]
+        assert _cache_file_count() == 16
+        assert len(primitive_calls) == 2 + 4
+
+        assert r.precompute([]) == 0
+
+    # The cache files are found in the cache directory
+    with buzz.Dataset().close as ds:
+        r = _open(ds, _should_not_be_called)
+        assert r.precompute() == 16
+        arr = r.get_data()
+        assert np.all(arr[..., 0] == xref)
+        assert np.all(arr[..., 1] == yref)
+
+def test_chrome_trace(test_prefix):
+    fp = buzz.Footprint(rsize=(100, 100), size=(100, 100), tl=(1000, 1100))
+    xref, yref = fp.meshgrid_raster
+    pool = mp.pool.ThreadPool(2)
+    trace = buzz.ChromeTraceObserver()
+
+    with buzz.Dataset(debug_observers=[trace]).close as ds:
+        r = ds.acreate_cached_raster_recipe(
+            fp=fp, dtype='float32', channel_count=2,
+            compute_array=functools.partial(_meshgrid_raster_in, reffp=fp),
+            cache_dir=test_prefix, cache_tiles=(50, 50), cache_format='raw',
+            computation_pool=pool, io_pool=pool,
+        )
+        arr = r.get_data()
+        assert np.all(arr[..., 0] == xref)
+        assert np.all(arr[..., 1] == yref)
+    pool.terminate()
+
+    path = os.path.join(test_prefix, 'trace.json')
+    trace.dump(path)
+    with open(path) as stream:
+        events = json.load(stream)['traceEvents']
+
+    messages = [e for e in events if e.get('cat') == 'message']
+    assert messages
+    assert all(e['pid'] == 0 and e['dur'] >= 0 for e in messages)
+    assert 'QueriesHandler.new_query' in {e['name'] for e in messages}
+
+    jobs = [e for e in events if e.get('cat') == 'job']
+    names = [e['name'] for e in jobs]
+    assert names.count('Computer') == 4
+    assert names.count('Writer') == 4
+    assert names.count('Reader') >= 4
+    assert all(e['pid'] != 0 and e['dur'] >= 0 for e in jobs)
+
+    waited = [e for e in events if e.get('cat') == 'waiting']
+    assert waited
+    phases = [e['ph'] for e in waited]
+    assert phases.count('b') == phases.count('e')
+
 # Tools ***************************************************************************************** **
 class _AreaCounter(object):
     def __init__(self, fp):
@@ -408,5 +978,40 @@ class NecessaryCrash(Exception):
 def _please_crash(fp, primitive_fps, primtive_arrays, raster):
     raise NecessaryCrash()
 
+def _lock_and_die(cache_dir, prefix):
+    assert CacheTileLocks(cache_dir).try_acquire(prefix)
+    os._exit(0)
+
+def _try_lock(cache_dir, prefix, barrier, results):
+    locks = CacheTileLocks(cache_dir)
+    barrier.wait()
+    results.put(locks.try_acquire(prefix))
+    # Hold the lock until all the processes tried
+    barrier.wait()
+    locks.release_all()
+
+def _open_and_get(fp, cache_dir, compute_array, barrier):
+    with buzz.Dataset().close as ds:
+        r = ds.acreate_cached_raster_recipe(
+            fp=fp, dtype='float32', channel_count=2,
+            compute_array=functools.partial(compute_array, reffp=fp),
+            cache_dir=cache_dir, cache_tiles=(50, 50), cache_format='raw',
+            lock_cache_files=True,
+        )
+        if barrier is not None:
+            barrier.wait()
+        arr = r.get_data()
+    xref, yref = fp.meshgrid_raster
+    assert np.all(arr[..., 0] == xref)
+    assert np.all(arr[..., 1] == yref)
+
+def _exit_computation(fp, primitive_fps, primtive_arrays, raster, reffp):
+    os._exit(1)
+
+def _counted_computation(fp, primitive_fps, primtive_arrays, raster, reffp, counter_dir):
+    open(os.path.join(counter_dir, str(uuid.uuid4())), 'w').close()
+    time.sleep(0.1)
+    return _meshgrid_raster_in(fp, primitive_fps, primtive_arrays, raster, reffp)
+
 def _should_not_be_called(*args):
     assert False, _should_not_be_called
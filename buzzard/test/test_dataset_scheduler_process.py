@@ -0,0 +1,141 @@
+"""Tests of the Datasets whose scheduler runs in a child process"""
+
+import functools
+import glob
+import multiprocessing as mp
+import multiprocessing.pool
+import os
+import shutil
+import tempfile
+import uuid
+
+import numpy as np
+import pytest
+
+import buzzard as buzz
+
+@pytest.fixture
+def test_prefix():
+    path = os.path.join(tempfile.gettempdir(), 'buzz-ut-' + str(uuid.uuid4()))
+    os.makedirs(path)
+    yield path
+    shutil.rmtree(path)
+
+def test_nocache():
+    fp = buzz.Footprint(rsize=(100, 100), size=(100, 100), tl=(1000, 1100))
+    fps = list(fp.tile((30, 30), boundary_effect='shrink').flat)
+
+    with buzz.Dataset(scheduler='process').close as ds:
+        r = ds.acreate_raster_recipe(
+            fp, 'float32', 2,
+            compute_array=functools.partial(_meshgrid_raster_in, reffp=fp),
+            computation_pool=None, merge_pool=None, resample_pool=None,
+            max_computation_size=40,
+        )
+        _check_arrays(fp, [fp], [r.get_data()])
+        _check_arrays(fp, [fp.erode(10)], [r.get_data(fp=fp.erode(10), channels=[0, 1])])
+        _check_arrays(fp, fps, r.iter_data(fps, max_queue_size=2))
+
+        # The query is dropped after one array
+        q = r.queue_data(fps, max_queue_size=1)
+        _check_arrays(fp, fps[:1], [q.get()])
+        del q
+        _check_arrays(fp, fps, r.iter_data(fps))
+
+def test_cached(test_prefix):
+    fp = buzz.Footprint(rsize=(100, 100), size=(100, 100), tl=(1000, 1100))
+    fps = list(fp.tile((30, 30), boundary_effect='shrink').flat)
+
+    def _cache_file_count():
+        return len(glob.glob(os.path.join(test_prefix, '*.npy')))
+
+    # The pools are process pools of the scheduler's process
+    with buzz.Dataset(scheduler='process').close as ds:
+        r = ds.acreate_cached_raster_recipe(
+            fp, 'float32', 2,
+            compute_array=functools.partial(_meshgrid_raster_in, reffp=fp),
+            cache_dir=test_prefix, cache_tiles=(50, 50), cache_format='raw',
+        )
+        assert r.precompute([fps[0]]) == 1
+        assert _cache_file_count() == 1
+        _check_arrays(fp, fps, r.iter_data(fps, max_queue_size=2))
+        assert _cache_file_count() == 4
+
+    # The cache files are reused by a scheduler thread
+    with buzz.Dataset().close as ds:
+        r = ds.acreate_cached_raster_recipe(
+            fp, 'float32', 2,
+            compute_array=_should_not_be_called,
+            cache_dir=test_prefix, cache_tiles=(50, 50), cache_format='raw',
+        )
+        _check_arrays(fp, [fp], [r.get_data()])
+
+def test_exception():
+    fp = buzz.Footprint(rsize=(100, 100), size=(100, 100), tl=(1000, 1100))
+
+    with buzz.Dataset(scheduler='process').close as ds:
+        r = ds.acreate_raster_recipe(
+            fp, 'float32', 2, compute_array=_please_crash, computation_pool=None,
+        )
+        with pytest.raises(NecessaryCrash):
+            r.get_data()
+
+def test_unsupported_configurations():
+    fp = buzz.Footprint(rsize=(100, 100), size=(100, 100), tl=(1000, 1100))
+    compute_array = functools.partial(_meshgrid_raster_in, reffp=fp)
+
+    with pytest.raises(ValueError, match='scheduler'):
+        buzz.Dataset(scheduler='processes')
+    with pytest.raises(ValueError, match='debug_observers'):
+        buzz.Dataset(scheduler='process', debug_observers=[buzz.ChromeTraceObserver()])
+
+    pool = mp.pool.ThreadPool(1)
+    with buzz.Dataset(scheduler='process').close as ds:
+        with pytest.raises(TypeError, match='picklable'):
+            ds.acreate_raster_recipe(fp, 'float32', 2, compute_array=lambda *args: None)
+        with pytest.raises(TypeError, match='computation_pool'):
+            ds.acreate_raster_recipe(
+                fp, 'float32', 2, compute_array=compute_array, computation_pool=pool,
+            )
+        ds.pools.alias('thread', pool)
+        with pytest.raises(ValueError, match='merge_pool'):
+            ds.acreate_raster_recipe(
+                fp, 'float32', 2, compute_array=compute_array, merge_pool='thread',
+            )
+        with pytest.raises(ValueError, match='debug_observers'):
+            ds.acreate_raster_recipe(
+                fp, 'float32', 2, compute_array=compute_array,
+                debug_observers=[buzz.ChromeTraceObserver()],
+            )
+
+        prim = ds.acreate_raster_recipe(
+            fp, 'float32', 2, compute_array=compute_array, computation_pool=None,
+        )
+        with pytest.raises(ValueError, match='queue_data_per_primitive'):
+            ds.acreate_raster_recipe(
+                fp, 'float32', 2, compute_array=compute_array,
+                queue_data_per_primitive={'prim': prim.queue_data},
+            )
+    pool.terminate()
+
+# Tools ***************************************************************************************** **
+def _check_arrays(reffp, fps, arrays):
+    arrays = list(arrays)
+    assert len(arrays) == len(fps)
+    for fp, arr in zip(fps, arrays):
+        x, y = fp.meshgrid_raster_in(reffp)
+        assert np.all(arr[..., 0] == x)
+        assert np.all(arr[..., 1] == y)
+
+def _meshgrid_raster_in(fp, primitive_fps, primtive_arrays, raster, reffp):
+    x, y = fp.meshgrid_raster_in(reffp)
+    return np.stack([x, y], axis=2).astype('float32')
+
+class NecessaryCrash(Exception):
+    pass
+
+def _please_crash(fp, primitive_fps, primtive_arrays, raster):
+    raise NecessaryCrash()
+
+def _should_not_be_called(*args):
+    assert False, _should_not_be_called
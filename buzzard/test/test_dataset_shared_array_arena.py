@@ -0,0 +1,85 @@
+import multiprocessing as mp
+import multiprocessing.pool
+import pickle
+import gc
+
+import numpy as np
+import pytest
+
+from buzzard._dataset_shared_array_arena import (
+    SharedArrayArena, call_with_shared_arrays, call_into_shared_array
+)
+
+@pytest.fixture(scope='module')
+def arena():
+    arena = SharedArrayArena()
+    if not arena.available:
+        pytest.skip('multiprocessing.shared_memory not available')
+    return arena
+
+@pytest.fixture(scope='module')
+def pool():
+    pool = mp.pool.Pool(2)
+    yield pool
+    pool.terminate()
+    pool.join()
+
+def test_handles(arena):
+    arr = arena.full((10, 20, 3), 42, 'float32')
+    assert arr.shape == (10, 20, 3)
+    assert np.all(arr == 42)
+
+    view = arr[2:5, 3:9, 1:]
+    h = arena.handle_of(view)
+    assert h is not None
+    assert h.shape == view.shape
+    assert h.strides == view.strides
+
+    h2 = pickle.loads(pickle.dumps(h))
+    assert (h2.name, h2.offset, h2.shape, h2.strides) == (h.name, h.offset, h.shape, h.strides)
+
+    assert arena.handle_of(np.zeros(10)) is None
+    assert arena.handle_of(arr[..., [0, 1]]) is None
+    assert arena.share(view).name == h.name
+    assert arena.share(np.zeros(10)).name != h.name
+
+def test_workers(arena, pool):
+    src = arena.empty((30, 40, 2), 'float32')
+    src[...] = np.arange(src.size).reshape(src.shape)
+    dst = arena.full((10, 10, 2), 0, 'float32')
+
+    # Worker writes in place
+    h = arena.handle_of(dst[2:5, 3:7])
+    pool.apply(call_with_shared_arrays, (np.copyto, h, arena.share(np.ones((3, 4, 2)))))
+    assert np.all(dst[2:5, 3:7] == 1)
+    dst[2:5, 3:7] = 0
+    assert np.all(dst == 0)
+
+    # Worker returns a view of a shared array
+    res = pool.apply(call_with_shared_arrays, (_first, {'a': arena.handle_of(src[5:15, 5:15])}))
+    assert np.all(res == src[5:15, 5:15])
+
+    # Worker writes its result to shared memory
+    h = arena.handle_of(dst)
+    res = pool.apply(call_into_shared_array, (h, _first, {'a': arena.handle_of(src[5:15, 5:15])}))
+    assert res.name == h.name
+    assert np.all(dst == src[5:15, 5:15])
+
+    # Worker returns a result that does not fit
+    res = pool.apply(call_into_shared_array, (h, _first, {'a': arena.handle_of(src)}))
+    assert np.all(res == src)
+
+def test_release(arena):
+    arena = SharedArrayArena()
+    arr = arena.empty((10,), 'uint8')
+    view = arr[5:]
+    name = arena.handle_of(view).name
+    del arr
+    gc.collect()
+    assert arena.handle_of(view).name == name
+    del view
+    gc.collect()
+    assert len(arena._name_per_array_id) == 0
+
+def _first(arrays):
+    return next(iter(arrays.values()))
@@ -3,6 +3,7 @@
 
 from __future__ import division, print_function
 import itertools
+import pickle
 
 import numpy as np
 import pytest
@@ -197,6 +198,38 @@ def test_equal(fps):
     for a, b in itertools.combinations(fps.values(), 2):
         assert a != b
 
+def test_hash(fps):
+    for a in fps.values():
+        b = buzz.Footprint(gt=a.gt, rsize=a.rsize)
+        assert a is not b
+        assert hash(a) == hash(b)
+        assert {a: 1}[b] == 1
+    assert len(set(fps.values())) == len(fps)
+
+    a = fps.AI
+    b = buzz.Footprint(gt=a.gt, rsize=a.rsize)
+    with buzz.Dataset(intern_footprints=True).close as ds:
+        interner = ds._back.footprint_interner
+        assert interner.intern(a) is a
+        assert interner.intern(b) is a
+        assert interner.intern_many([b, fps.BI]) == [a, fps.BI]
+    with buzz.Dataset().close as ds:
+        assert ds._back.footprint_interner.intern(b) is b
+
+
+def test_pickle(fps):
+    for a in fps.values():
+        b = pickle.loads(pickle.dumps(a))
+        assert a == b
+        assert eq(a.coords, b.coords)
+        assert a._significant_min == b._significant_min
+
+    with buzz.Env(allow_complex_footprint=True):
+        a = fps.AI.move(fps.AI.tl, fps.AI.tl + [fps.AI.w * 0.8, -fps.AI.w * 0.6])
+        s = pickle.dumps(a)
+        assert pickle.loads(s) == a
+    with pytest.raises(ValueError, match='north-up'):
+        pickle.loads(s)
 
 def test_morpho(fps):
 
@@ -304,6 +337,31 @@ def test_binary_predicates(fps):
         with buzz.Env(allow_complex_footprint=True):
             assert not fp.same_grid(fp.move([sq2, sq2], [2 * sq2, 2 * sq2]))
 
+def test_binary_predicates_north_up(fps):
+    # The north-up Footprints are compared with their bounds, check against shapely
+    for a, b in itertools.product(fps.values(), repeat=2):
+        pa, pb = a.poly, b.poly
+        share_area = not pa.disjoint(pb) and not pa.touches(pb)
+        assert a.share_area(b) == share_area
+        assert a.contains(b) == pa.contains(pb)
+        if share_area:
+            inter = a & b
+            assert inter.poly.equals(pa.intersection(pb))
+            assert inter.same_grid(a)
+        else:
+            with pytest.raises(ValueError, match='empty'):
+                a & b
+
+    with buzz.Env(allow_complex_footprint=True):
+        for fp in fps.values():
+            rotated = fp.move(fp.tl, fp.tl + [fp.w * 0.8, -fp.w * 0.6])
+            assert fp.share_area(rotated)
+            assert not fp.same_grid(rotated)
+            assert not fp.contains(rotated)
+
+    with pytest.raises(TypeError, match='Footprint'):
+        fps.AI.contains(fps.AI.poly)
+
 
 def test_numpy_like_functions(fps, fps1px):
 
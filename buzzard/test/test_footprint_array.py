@@ -0,0 +1,117 @@
+# pylint: disable=redefined-outer-name
+
+import itertools
+import pickle
+
+import numpy as np
+import pytest
+
+import buzzard as buzz
+
+@pytest.fixture(scope='module')
+def fp():
+    return buzz.Footprint(tl=(1000, 2000), size=(50, 30), rsize=(100, 60))
+
+@pytest.mark.parametrize('boundary_effect,boundary_effect_locus', itertools.product(
+    ['extend', 'overlap', 'exclude', 'shrink'], ['br', 'tr', 'tl', 'bl'],
+))
+def test_tile_methods(fp, boundary_effect, boundary_effect_locus):
+    for name, args in [
+            ('tile', ((16, 12), 3, 2)),
+            ('tile_count', (5, 4, 3, 2)),
+            ('tile_occurrence', ((16, 12), 2, 3)),
+    ]:
+        if name == 'tile_occurrence' and boundary_effect != 'extend':
+            continue
+        method = getattr(fp, name)
+        kwargs = dict(boundary_effect=boundary_effect, boundary_effect_locus=boundary_effect_locus)
+        tiles = method(*args, **kwargs)
+        fa = method(*args, as_footprint_array=True, **kwargs)
+        assert isinstance(fa, buzz.FootprintArray)
+        assert fa.shape == tiles.shape
+        assert fa.size == tiles.size
+        assert fa.to_object_array().tolist() == tiles.tolist()
+
+def test_container(fp):
+    tiles = fp.tile((16, 12))
+    fa = fp.tile((16, 12), as_footprint_array=True)
+
+    assert fa.ndim == 2
+    assert len(fa) == tiles.shape[0]
+    assert fa[2, 3] == tiles[2, 3]
+    assert fa[-1, -1] == tiles[-1, -1]
+    assert fa[1].to_object_array().tolist() == tiles[1].tolist()
+    assert fa[..., 1].to_object_array().tolist() == tiles[..., 1].tolist()
+    assert fa[1:3, ::2].to_object_array().tolist() == tiles[1:3, ::2].tolist()
+    assert list(fa.flat) == list(tiles.flat)
+    assert [row.tolist() for row in fa] == tiles.tolist()
+    assert fa.flatten().shape == (tiles.size,)
+    assert fa.reshape((1, -1)).shape == (1, tiles.size)
+    assert np.asarray(fa).tolist() == tiles.tolist()
+    assert buzz.FootprintArray.from_footprints(tiles).to_object_array().tolist() == tiles.tolist()
+    assert pickle.loads(pickle.dumps(fa)).tolist() == tiles.tolist()
+
+    with pytest.raises(ValueError):
+        buzz.FootprintArray(np.zeros((3, 5)), np.ones((3, 2)))
+    with pytest.raises(ValueError):
+        buzz.FootprintArray(fa.gt[:2], fa.rsize)
+    with pytest.raises(ValueError):
+        buzz.FootprintArray(fa.gt, fa.rsize * 0)
+
+def test_accessors(fp):
+    tiles = fp.tile((16, 12), 3, 2).flatten()
+    fa = fp.tile((16, 12), 3, 2, as_footprint_array=True).flatten()
+
+    for name in ['gt', 'rsize', 'tl', 'tr', 'bl', 'br', 'coords', 'bounds', 'extent', 'pxsize']:
+        ref = np.asarray([getattr(tile, name) for tile in tiles])
+        assert np.allclose(getattr(fa, name), ref), name
+    assert (fa.rsizex == fa.rsize[:, 0]).all()
+    assert (fa.rsizey == fa.rsize[:, 1]).all()
+
+    for other, clip in itertools.product([fp, fp.erode(10)], [False, True]):
+        slices = fa.slice_in(other, clip=clip)
+        for s, tile in zip(slices, tiles):
+            ys, xs = tile.slice_in(other, clip=clip)
+            assert tuple(s) == (ys.start, ys.stop, xs.start, xs.stop)
+
+def test_intersection(fp):
+    tiles = fp.tile((16, 12), 3, 2, boundary_effect='overlap').flatten()
+    fa = fp.tile((16, 12), 3, 2, boundary_effect='overlap', as_footprint_array=True).flatten()
+
+    for other in [
+            fp.erode(17),
+            buzz.Footprint(tl=(1010.1, 1990.3), size=(7.3, 9.5), rsize=(33, 21)),
+            buzz.Footprint(tl=(1040, 1980), size=(50, 30), rsize=(100, 60)),
+    ]:
+        mask = fa.intersects(other)
+        assert mask.tolist() == [
+            tile.poly.intersects(other.poly) and not tile.poly.touches(other.poly)
+            for tile in tiles
+        ]
+        assert mask.any() and not mask.all()
+        inter = fa[mask].intersection(other)
+        assert inter.tolist() == [tile & other for tile in tiles[mask]]
+        with pytest.raises(ValueError):
+            fa.intersection(other)
+
+def test_same_grid(fp):
+    fps = [
+        fp,
+        fp.erode(17),
+        fp.dilate(3),
+        fp.move(fp.tl + fp.pxvec / 2),
+        fp.move(fp.tl + fp.pxvec * 1000.),
+        buzz.Footprint(tl=(1010.1, 1990.3), size=(7.3, 9.5), rsize=(33, 21)),
+        buzz.Footprint(tl=(1040, 1980), size=(50, 30), rsize=(100, 60)),
+        buzz.Footprint(tl=(1040, 1980), size=(50, 30), rsize=(101, 60)),
+    ]
+    fa = buzz.FootprintArray.from_footprints(fps)
+    for other in fps:
+        mask = fa.same_grid(other)
+        assert mask.tolist() == [tile.same_grid(other) for tile in fps]
+        assert mask.any() and not mask.all()
+
+    with buzz.Env(significant=4):
+        far = buzz.Footprint(tl=(1e7, 1e7), size=(1, 1), rsize=(100, 100))
+        with pytest.raises(RuntimeError):
+            buzz.FootprintArray.from_footprints([far]).same_grid(fp)
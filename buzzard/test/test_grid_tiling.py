@@ -0,0 +1,84 @@
+"""Tests for GridTiling, the arithmetic index of the tilings used by the raster recipes.
+The lookups are compared to a brute force search over all the tiles.
+"""
+
+import itertools
+
+import pytest
+import numpy as np
+
+import buzzard as buzz
+from buzzard._tools import GridTiling
+
+def _brute_force(edges, x0, y0, x1, y1):
+    x0s, x1s, y0s, y1s = edges
+    return [
+        (i, j)
+        for i, j in itertools.product(range(len(y0s)), range(len(x0s)))
+        if y0s[i] < y1 and y1s[i] > y0 and x0s[j] < x1 and x1s[j] > x0
+    ]
+
+def _rects(size):
+    rng = np.random.RandomState(42)
+    for _ in range(500):
+        x0, x1 = np.sort(rng.randint(-5, size + 5, 2))
+        y0, y1 = np.sort(rng.randint(-5, size + 5, 2))
+        yield int(x0), int(y0), int(x1) + 1, int(y1) + 1
+
+@pytest.mark.parametrize('tile_size', [1, 7, 10, 40])
+@pytest.mark.parametrize('overlap', [0, 3])
+@pytest.mark.parametrize('boundary_effect', ['shrink', 'extend', 'overlap'])
+def test_tile(tile_size, overlap, boundary_effect):
+    if overlap >= tile_size:
+        pytest.skip()
+    fp = buzz.Footprint(tl=(100, 200), size=(40, 40), rsize=(40, 40))
+    tiles = fp.tile((tile_size, tile_size), overlap, overlap, boundary_effect=boundary_effect)
+    tiling = GridTiling.of_tiles(fp, tiles)
+    assert tiling.shape == tiles.shape
+    edges = GridTiling.edges_of_tiles(fp, tiles)
+
+    for x0, y0, x1, y1 in _rects(40):
+        indices = tiling.indices_of_rect(x0, y0, x1, y1)
+        assert indices == _brute_force(edges, x0, y0, x1, y1)
+        rect = buzz.Footprint(
+            tl=fp.raster_to_spatial([x0, y0]), size=(x1 - x0, y1 - y0), rsize=(x1 - x0, y1 - y0),
+        )
+        assert [tiles[idx] for idx in indices] == [
+            tile
+            for tile in tiles.flat
+            if tile.share_area(rect)
+        ]
+
+def test_irregular():
+    edges = (
+        [0, 2, 3, 10, 10], [2, 6, 8, 12, 20],
+        [-3, 0, 1], [0, 4, 5],
+    )
+    tiling = GridTiling(*edges)
+    assert not tiling._x._regular
+    for x0, y0, x1, y1 in _rects(20):
+        assert tiling.indices_of_rect(x0, y0, x1, y1) == _brute_force(edges, x0, y0, x1, y1)
+
+@pytest.mark.parametrize('edges', [
+    ([0, 10, 20], [10, 20, 25], [0], [5]),
+    ([0, 10, 20], [10, 20, 25], [5, 6, 7], [6, 7, 8]),
+    ([0, 2, 4, 6], [3, 5, 7, 9], [0, 2], [3, 5]),
+    ([0, 2, 3, 10, 10], [2, 6, 8, 12, 20], [-3, 0, 1], [0, 4, 5]),
+])
+def test_batch(edges):
+    tiling = GridTiling(*edges)
+    rects = list(_rects(30))
+    x0s, y0s, x1s, y1s = np.asarray(rects).T
+    col_starts, col_stops = tiling.column_ranges(x0s, x1s)
+    row_starts, row_stops = tiling.row_ranges(y0s, y1s)
+    for rect, rows, cols in zip(
+            rects, zip(row_starts, row_stops), zip(col_starts, col_stops)
+    ):
+        assert (rows + cols) == tiling.ranges_of_rect(*rect)
+
+def test_unsorted():
+    fp = buzz.Footprint(tl=(0, 10), size=(10, 10), rsize=(10, 10))
+    tiles = fp.tile((5, 5))
+    assert GridTiling.of_tiles(fp, tiles) is not None
+    assert GridTiling.of_tiles(fp, tiles[:, ::-1]) is None
+    assert GridTiling.of_tiles(fp, tiles[::-1, :]) is None
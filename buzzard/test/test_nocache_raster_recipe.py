@@ -0,0 +1,494 @@
+import asyncio
+import concurrent.futures
+import multiprocessing as mp
+import multiprocessing.pool
+import functools
+import time
+import gc
+import threading
+import itertools
+
+import numpy as np
+import pytest
+
+import buzzard as buzz
+
+def pytest_generate_tests(metafunc):
+    if 'pools' in metafunc.fixturenames:
+        argvalues = []
+        for pval in [
+                None,
+                'lol',
+                mp.pool.ThreadPool(2),
+                mp.pool.Pool(2),
+                concurrent.futures.ThreadPoolExecutor(2),
+                concurrent.futures.ProcessPoolExecutor(2),
+        ]:
+            argvalues.append(dict(
+                computation={'computation_pool': pval},
+                merge={'merge_pool': pval},
+                resample={'resample_pool': pval},
+            ))
+
+        metafunc.parametrize(
+            argnames='pools',
+            argvalues=argvalues,
+        )
+
+@pytest.fixture(params=[
+    {},
+    {'max_computation_size': 26},
+    {'max_computation_size': (99, 7)},
+    {'computation_tiles': (26, 26)},
+])
+def tiling(request):
+    return request.param
+
+def test_(pools, tiling):
+    def _open(**kwargs):
+        d = dict(
+            fp=fp, dtype='float32', channel_count=2,
+            compute_array=functools.partial(_meshgrid_raster_in, reffp=fp),
+            **dict(itertools.chain(
+                pools['merge'].items(),
+                pools['resample'].items(),
+                pools['computation'].items(),
+                tiling.items(),
+            ))
+        )
+        d.update(kwargs)
+        return ds.acreate_raster_recipe(**d)
+
+    def _test_get():
+        arrs = r.get_data(band=-1)
+        assert arrs.shape == tuple(np.r_[fp.shape, 2])
+        x, y = arrs[..., 0], arrs[..., 1]
+        xref, yref = fp.meshgrid_raster
+        assert np.all(x == xref)
+        assert np.all(y == yref)
+
+    def _test_resampling(fp):
+        arr = r.get_data(band=-1, fp=fp)
+        ref = npr.get_data(band=-1, fp=fp)
+        assert np.allclose(arr, ref)
+
+    print() # debug line
+    fp = buzz.Footprint(
+        rsize=(100, 100),
+        size=(100, 100),
+        tl=(1000, 1100),
+    )
+    compute_same_address_space = (
+        type(pools['computation']['computation_pool']) in {str, mp.pool.ThreadPool, type(None)}
+    )
+
+    with buzz.Dataset(allow_interpolation=1).close as ds:
+        # Create a numpy raster with the same data, useful to compare resampling
+        npr = ds.awrap_numpy_raster(fp, np.stack(fp.meshgrid_raster, axis=2).astype('float32'))
+
+        # Test get_data results
+        r = _open()
+        _test_get()
+
+        # Test that nothing is kept between two queries
+        if compute_same_address_space:
+            ac = _AreaCounter(fp)
+            r.close()
+            r = _open(compute_array=functools.partial(_base_computation, area_counter=ac, reffp=fp))
+            _test_get()
+            ac.check_done()
+            _test_get()
+            ac.check_done(2)
+
+        # Test remapping #1 - Interpolation - Fully Inside
+        fp_within_upscaled = fp.intersection(fp, scale=fp.scale / 2) & fp.erode(fp.rsemiminoraxis // 4)
+        _test_resampling(fp_within_upscaled)
+
+        # Test remapping #2 - Interpolation - Fully Outside
+        _test_resampling(fp_within_upscaled.move(fp.br + fp.diagvec))
+
+        # Test remapping #3 - No Interpolation - Fully Outside
+        _test_resampling(fp.move(fp.br + fp.diagvec))
+
+        # Test remapping #4 - Interpolation - Both in and out
+        _test_resampling(fp_within_upscaled.move(fp.br - fp_within_upscaled.diagvec / 2))
+
+        # Test remapping #5 - No Interpolation - Both in and out
+        _test_resampling(fp.move(fp.br - fp.pxvec * fp.rsemiminoraxis))
+
+        # Test remapping #6 - Interpolation - Fully Inside - Tiled
+        r.close()
+        r = _open(max_resampling_size=20)
+        _test_resampling(fp_within_upscaled)
+
+        # Query garbage collected
+        it1 = r.iter_data(fps=[fp] * 2, max_queue_size=1) # 2/2 ready, 1/2 sinked
+        it2 = r.iter_data(fps=[fp] * 1, max_queue_size=1) # 1/1 ready, 0/1 sinked
+        it3 = r.iter_data(fps=[fp] * 2, max_queue_size=1) # 1/2 ready, 0/2 sinked
+        next(it1)
+        time.sleep(1/2)
+
+        del it1, it2, it3
+        gc.collect()
+        time.sleep(1 / 2)
+        r.get_data() # This line will reraise any exception from scheduler
+
+    with buzz.Dataset(allow_interpolation=1).close as ds:
+        npr = ds.awrap_numpy_raster(fp, np.stack(fp.meshgrid_raster, axis=2).astype('float32'))
+
+        # Test channels order versus numpy raster
+        r = _open()
+        for channels in [
+                0, 1, None, slice(None), [0, 1], [1, 0], [1, 0, 1],
+        ]:
+            assert np.all(r.get_data(channels=channels) == npr.get_data(channels=channels))
+
+        # Several arrays sharing computations in a single query
+        tiles = fp.tile((20, 20)).flatten().tolist()
+        fps = tiles + tiles[::-1] + [fp] + [fp.move(fp.br + fp.diagvec)]
+        for tile, arr in zip(fps, r.iter_data(band=-1, fps=fps, max_queue_size=3)):
+            assert np.all(arr == npr.get_data(band=-1, fp=tile, dst_nodata=0))
+
+    with buzz.Dataset(allow_interpolation=1).close as ds:
+        # Derived and primitive rasters
+        if compute_same_address_space:
+            ac0, ac1 = _AreaCounter(fp), _AreaCounter(fp)
+        else:
+            ac0, ac1 = None, None
+        r0 = _open(
+            compute_array=functools.partial(_base_computation, area_counter=ac0, reffp=fp),
+        )
+        r1 = _open(
+            compute_array=functools.partial(_derived_computation, area_counter=ac1, reffp=fp),
+            queue_data_per_primitive={'prim': functools.partial(r0.queue_data, band=-1)},
+        )
+        assert len(r0.primitives) == 0
+        assert len(r1.primitives) == 1
+        assert r1.primitives['prim'] is r0
+
+        arr = r1.get_data(band=-1)
+        x, y = fp.meshgrid_raster
+        assert np.all(arr == np.stack([x, y], axis=2) ** 2)
+        if compute_same_address_space:
+            ac0.check_done()
+            ac1.check_done()
+
+        # Several queries, one is dropped, the rest is still working
+        t = fp.tile((26, 26)).flatten()
+        fps0 = t.tolist() * 2
+        fps1 = fps0[::-1]
+        fps2 = np.roll(t, t.size // 2).tolist() * 2
+        fps3 = fps2[::-1]
+
+        it0 = r1.iter_data(fps=fps0)
+        it1 = r1.iter_data(fps=fps1)
+        it2 = r1.iter_data(fps=fps2)
+        it3 = r1.iter_data(fps=fps3)
+        del it1
+
+        assert len(list(it3)) == t.size * 2
+        assert len(list(it0)) == t.size * 2
+        assert len(list(it2)) == t.size * 2
+
+        r0.close()
+        r1.close()
+
+        # Computation function crashes, we catch error in main thread
+        r = _open(compute_array=_please_crash)
+        with pytest.raises(NecessaryCrash):
+            r.get_data()
+
+def test_no_automatic_remapping(pools):
+    fp = buzz.Footprint(
+        rsize=(100, 100),
+        size=(100, 100),
+        tl=(1000, 1100),
+    )
+
+    with buzz.Dataset().close as ds:
+        r = ds.acreate_raster_recipe(
+            fp, 'float32', 2,
+            compute_array=_meshgrid_spatial,
+            automatic_remapping=False,
+            max_computation_size=30,
+            **dict(itertools.chain(
+                pools['merge'].items(),
+                pools['resample'].items(),
+                pools['computation'].items(),
+            ))
+        )
+        for tile in [
+                fp,
+                fp.move(fp.br + fp.diagvec), # Outside
+                fp.move(fp.br - fp.pxvec * fp.rsemiminoraxis), # Both in and out
+                fp.intersection(fp, scale=fp.scale / 2), # Not on the same grid
+        ]:
+            assert np.all(r.get_data(band=-1, fp=tile) == _meshgrid_spatial(tile, None, None, None))
+
+def test_overlapping_computation_tiles():
+    fp = buzz.Footprint(
+        rsize=(100, 100),
+        size=(100, 100),
+        tl=(1000, 1100),
+    )
+    tiles = fp.tile((30, 30), 10, 10, boundary_effect='shrink')
+    xref, yref = fp.meshgrid_raster
+    merged_fps = []
+
+    def _merge(fp_, array_per_fp, raster):
+        merged_fps.append(set(array_per_fp.keys()))
+        for tile, arr in array_per_fp.items():
+            assert tuple(tile.shape) == arr.shape[:2]
+        return buzz.utils.concat_arrays(fp_, array_per_fp, raster)
+
+    with buzz.Dataset().close as ds:
+        r = ds.acreate_raster_recipe(
+            fp, 'float32', 2,
+            compute_array=functools.partial(_meshgrid_raster_in, reffp=fp),
+            merge_arrays=_merge,
+            computation_tiles=tiles,
+        )
+
+        # In the overlap of 4 computation tiles, their parts in the footprint are equal
+        tile = fp.clip(20, 20, 30, 30)
+        arr = r.get_data(fp=tile)
+        assert np.all(arr[..., 0] == xref[tile.slice_in(fp)])
+        assert np.all(arr[..., 1] == yref[tile.slice_in(fp)])
+        assert merged_fps == [{tiles[0, 0], tiles[0, 1], tiles[1, 0], tiles[1, 1]}]
+
+        # Within a single computation tile, no merge
+        tile = fp.clip(0, 0, 10, 10)
+        arr = r.get_data(fp=tile)
+        assert np.all(arr[..., 0] == xref[tile.slice_in(fp)])
+        assert len(merged_fps) == 1
+
+        arr = r.get_data()
+        assert np.all(arr[..., 0] == xref)
+        assert np.all(arr[..., 1] == yref)
+
+def test_parameters():
+    fp = buzz.Footprint(
+        rsize=(100, 100),
+        size=(100, 100),
+        tl=(1000, 1100),
+    )
+    with buzz.Dataset().close as ds:
+        _open = functools.partial(
+            ds.acreate_raster_recipe,
+            fp, 'float32', 2, compute_array=functools.partial(_meshgrid_raster_in, reffp=fp),
+        )
+        with pytest.raises(ValueError):
+            _open(computation_tiles=(10, 10), max_computation_size=10)
+        with pytest.raises(ValueError):
+            _open(computation_tiles=(10, 10), automatic_remapping=False)
+        with pytest.raises(ValueError):
+            _open(max_computation_size=0)
+        with pytest.raises(ValueError):
+            _open(max_computation_size=(10, 10, 10))
+        with pytest.raises(ValueError):
+            _open(compute_array=None)
+
+        r = _open(computation_tiles=(10, 10))
+        assert r.computation_tiles.shape == (10, 10)
+        assert r.max_computation_size is None
+        assert r.automatic_remapping is True
+
+        r = _open(max_computation_size=10)
+        assert r.computation_tiles is None
+        assert r.max_computation_size == (10, 10)
+
+def test_unordered():
+    fp = buzz.Footprint(
+        rsize=(100, 100),
+        size=(100, 100),
+        tl=(1000, 1100),
+    )
+    tiles = fp.tile((10, 10)).flatten()
+
+    def _compute(fp, primitive_fps, primtive_arrays, raster, reffp):
+        if fp == tiles[0]:
+            time.sleep(0.5)
+        return _meshgrid_raster_in(fp, primitive_fps, primtive_arrays, raster, reffp)
+
+    with buzz.Dataset().close as ds:
+        r = ds.acreate_raster_recipe(
+            fp, 'float32', 2,
+            compute_array=functools.partial(_compute, reffp=fp),
+            computation_tiles=(10, 10),
+            computation_pool=mp.pool.ThreadPool(2),
+        )
+        idxs = []
+        for i, arr in r.iter_data(tiles, channels=0, max_queue_size=4, ordered=False):
+            assert np.all(arr == _meshgrid_raster_in(tiles[i], None, None, None, fp)[..., 0])
+            idxs.append(i)
+        assert sorted(idxs) == list(range(len(tiles)))
+        assert idxs[0] != 0
+
+        with pytest.raises(ValueError):
+            ds.acreate_raster_recipe(
+                fp, 'float32', 2, compute_array=_meshgrid_spatial,
+                queue_data_per_primitive={'prim': functools.partial(r.queue_data, ordered=False)},
+            )
+
+def test_memory_budget():
+    fp = buzz.Footprint(
+        rsize=(100, 100),
+        size=(100, 100),
+        tl=(1000, 1100),
+    )
+    tiles = fp.tile((10, 10)).flatten()
+    production_nbytes = 10 * 10 * 2 * 4 * 2 # Sample array and output array
+    in_flight_bytes = []
+
+    def _compute(fp, primitive_fps, primtive_arrays, raster, reffp):
+        in_flight_bytes.append(ds.in_flight_bytes)
+        return _meshgrid_raster_in(fp, primitive_fps, primtive_arrays, raster, reffp)
+
+    with buzz.Dataset(max_memory_bytes=production_nbytes * 3).close as ds:
+        assert ds.max_memory_bytes == production_nbytes * 3
+        rs = [
+            ds.acreate_raster_recipe(
+                fp, 'float32', 2,
+                compute_array=functools.partial(_compute, reffp=fp),
+                computation_tiles=(10, 10),
+                computation_pool=mp.pool.ThreadPool(2),
+            )
+            for _ in range(2)
+        ]
+        its = [r.iter_data(tiles, max_queue_size=10) for r in rs]
+        for arrs in zip(*its):
+            assert arrs[0].shape == (10, 10, 2)
+            assert np.all(arrs[0] == arrs[1])
+        # Each query is always allowed one production, even when the budget is full
+        assert 0 < max(in_flight_bytes) <= production_nbytes * (3 + 1)
+        assert ds.in_flight_bytes == 0
+
+        # Dropping a query releases its memory
+        it = rs[0].iter_data(tiles, max_queue_size=10)
+        next(it)
+        del it
+        gc.collect()
+        for _ in range(50):
+            if ds.in_flight_bytes == 0:
+                break
+            time.sleep(0.01)
+        assert ds.in_flight_bytes == 0
+
+    # A budget smaller than an array, with a recipe that depends on another one
+    with buzz.Dataset(max_memory_bytes=1).close as ds:
+        prim = ds.acreate_raster_recipe(
+            fp, 'float32', 2,
+            compute_array=functools.partial(_base_computation, reffp=fp),
+            computation_tiles=(10, 10),
+        )
+        derived = ds.acreate_raster_recipe(
+            fp, 'float32', 2,
+            compute_array=functools.partial(_derived_computation, reffp=fp),
+            queue_data_per_primitive={'prim': prim.queue_data},
+            computation_tiles=(10, 10),
+        )
+        arr = derived.get_data()
+        assert np.all(arr == prim.get_data() ** 2)
+        assert ds.in_flight_bytes == 0
+
+def test_asyncio():
+    fp = buzz.Footprint(
+        rsize=(100, 100),
+        size=(100, 100),
+        tl=(1000, 1100),
+    )
+    tiles = fp.tile((10, 10)).flatten()
+
+    async def _main(r, counter):
+        # Many concurrent queries
+        arrs = await asyncio.gather(*[r.aget_data(tile) for tile in tiles])
+        for tile, arr in zip(tiles, arrs):
+            assert np.all(arr == _meshgrid_raster_in(tile, None, None, None, fp))
+        assert np.all((await r.aget_data(channels=[1]))[..., 0] == r.get_data(channels=1))
+
+        # Ordered iteration
+        i = 0
+        async for arr in r.aiter_data(tiles[::-1], channels=0):
+            assert arr.shape == (10, 10)
+            assert np.all(arr == _meshgrid_raster_in(tiles[::-1][i], None, None, None, fp)[..., 0])
+            i += 1
+        assert i == len(tiles)
+
+        # Cancelling the task cancels the query
+        async def _consume():
+            async for _ in r.aiter_data(tiles, max_queue_size=1):
+                await asyncio.sleep(1)
+        counter.clear()
+        task = asyncio.ensure_future(_consume())
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        del task
+        gc.collect()
+        await asyncio.sleep(0.2)
+        assert 0 < len(counter) < len(tiles)
+
+    def _compute(fp, primitive_fps, primtive_arrays, raster, reffp, counter):
+        counter.append(fp)
+        return _meshgrid_raster_in(fp, primitive_fps, primtive_arrays, raster, reffp)
+
+    counter = []
+    with buzz.Dataset().close as ds:
+        r = ds.acreate_raster_recipe(
+            fp, 'float32', 2,
+            compute_array=functools.partial(_compute, reffp=fp, counter=counter),
+            computation_tiles=(10, 10),
+        )
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(_main(r, counter))
+        finally:
+            loop.close()
+
+        # Outside of an event loop
+        with pytest.raises(RuntimeError, match='event loop'):
+            r.aqueue_data(tiles)
+
+# Tools ***************************************************************************************** **
+class _AreaCounter(object):
+    def __init__(self, fp):
+        self._lock = threading.Lock()
+        self._fp = fp
+        self._mask = np.zeros(fp.shape, 'uint8')
+
+    def increment(self, fp):
+        with self._lock:
+            self._mask[fp.slice_in(self._fp)] += 1
+
+    def check_done(self, count=1):
+        assert np.all(self._mask == count)
+
+def _base_computation(fp, primitive_fps, primtive_arrays, raster, reffp, area_counter=None):
+    if area_counter is not None:
+        area_counter.increment(fp)
+    x, y = fp.meshgrid_raster_in(reffp)
+    return np.stack([x, y], axis=2).astype('float32')
+
+def _derived_computation(fp, primitive_fps, primtive_arrays, raster, reffp, area_counter=None):
+    if area_counter is not None:
+        area_counter.increment(fp)
+    assert fp == primitive_fps['prim']
+    x, y = fp.meshgrid_raster_in(reffp)
+    return np.stack([x, y], axis=2).astype('float32') * primtive_arrays['prim']
+
+def _meshgrid_raster_in(fp, primitive_fps, primtive_arrays, raster, reffp):
+    if raster is not None:
+        assert raster.fp == reffp
+    x, y = fp.meshgrid_raster_in(reffp)
+    return np.stack([x, y], axis=2).astype('float32')
+
+def _meshgrid_spatial(fp, primitive_fps, primtive_arrays, raster):
+    x, y = fp.meshgrid_spatial
+    return np.stack([x, y], axis=2).astype('float32')
+
+class NecessaryCrash(Exception):
+    pass
+
+def _please_crash(fp, primitive_fps, primtive_arrays, raster):
+    raise NecessaryCrash()
@@ -1,7 +1,7 @@
 import numpy as np
 
 def concat_arrays(fp, array_per_fp, _):
-    """Concatenate arrays from `array_per_fp` to form `fp`.
+    """Concatenate arrays from `array_per_fp` to form `fp`. The arrays may extend beyond `fp`.
 
     This function is meant to be fed to the `merge_arrays` parameter when constructing a recipe.
     """
@@ -15,8 +15,7 @@ def concat_arrays(fp, array_per_fp, _):
     # Burn
     for tile, tile_arr in array_per_fp.items():
         assert tuple(tile.shape) == tile_arr.shape[:2]
-        slices = tile.slice_in(fp)
-        arr[slices] = tile_arr
+        arr[tile.slice_in(fp, clip=True)] = tile_arr[fp.slice_in(tile, clip=True)]
 
     # Return
     return arr
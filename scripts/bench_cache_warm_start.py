@@ -0,0 +1,91 @@
+"""
+Measure the time to first tile of a cached recipe whose cache directory is already filled, i.e.
+the time spent by the Dataset to check the existing cache files before reading them.
+
+```sh
+$ python scripts/bench_cache_warm_start.py --size 4096 --cache-tile-size 512
+```
+
+The cache is filled once, then for each checksum strategy, a new Dataset opens the recipe and
+reads all its cache tiles. Without `trust_mtime_size`, each cache file is read in full to verify its
+checksum. With `trust_mtime_size`, a first run verifies the checksums and fills the manifest, the
+following runs only compare the sizes and modification times.
+
+"""
+
+import argparse
+import functools
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+import buzzard as buzz
+from buzzard._cache_checksum import xxhash
+
+def _meshgrid_raster_in(fp, primitive_fps, primitive_arrays, raster, reffp):
+    x, y = fp.meshgrid_raster_in(reffp)
+    return np.stack([x, y], axis=2).astype('float32')
+
+def _should_not_be_called(*args):
+    raise RuntimeError('The cache should be warm')
+
+def _open(cache_dir, fp, args, checksum, trust, compute_array):
+    ds = buzz.Dataset()
+    r = ds.acreate_cached_raster_recipe(
+        fp=fp, dtype='float32', channel_count=2,
+        compute_array=compute_array,
+        cache_dir=cache_dir, cache_tiles=(args.cache_tile_size, args.cache_tile_size),
+        cache_format=args.format, checksum=checksum, trust_mtime_size=trust,
+    )
+    return ds, r
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--size', type=int, default=4096, help='Width of the raster')
+    parser.add_argument('--cache-tile-size', type=int, default=512, help='Width of the cache tiles')
+    parser.add_argument('--format', default='gtiff', help="Cache format, 'gtiff' or 'raw'")
+    parser.add_argument('--repeat', type=int, default=3, help='Number of warm starts per strategy')
+    args = parser.parse_args()
+
+    fp = buzz.Footprint(tl=(0, args.size), size=(args.size, args.size), rsize=(args.size, args.size))
+    tiles = fp.tile((args.cache_tile_size, args.cache_tile_size), boundary_effect='shrink').flatten()
+    checksums = ['sum64', 'blake2b'] + (['xxh64'] if xxhash is not None else [])
+
+    cache_dir = tempfile.mkdtemp(prefix='buzz-bench-')
+    try:
+        for checksum in checksums:
+            # Fill the cache with this checksum in the file names
+            for name in os.listdir(cache_dir):
+                os.remove(os.path.join(cache_dir, name))
+            compute_array = functools.partial(_meshgrid_raster_in, reffp=fp)
+            ds, r = _open(cache_dir, fp, args, checksum, False, compute_array)
+            with ds.close:
+                r.get_data()
+            size = sum(
+                os.path.getsize(os.path.join(cache_dir, name))
+                for name in os.listdir(cache_dir)
+            )
+
+            for trust in [False, True]:
+                firsts, totals = [], []
+                for _ in range(args.repeat):
+                    ds, r = _open(cache_dir, fp, args, checksum, trust, _should_not_be_called)
+                    with ds.close:
+                        t0 = time.perf_counter()
+                        it = r.iter_data(tiles)
+                        next(it)
+                        firsts.append(time.perf_counter() - t0)
+                        for _ in it:
+                            pass
+                        totals.append(time.perf_counter() - t0)
+                print('{:>8} trust_mtime_size={:<5} {:.1f}MB: first tile={:.3f}s all tiles={:.3f}s'.format(
+                    checksum, str(trust), size / 1024 ** 2, min(firsts), min(totals),
+                ))
+    finally:
+        shutil.rmtree(cache_dir)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Measure the cost of using Footprints as dict keys, and the throughput of the Dataset's scheduler,
+whose actors key many dicts and sets by Footprint.
+
+```sh
+$ python scripts/bench_footprint_hash.py --count 2000
+```
+
+Each measure is made three times:
+- `legacy`: With the previous implementation of `Footprint.__hash__` and `Footprint.equals`,
+  that converted the geo transform to a tuple at each call
+- `cached`: With the hash cached in the Footprint
+- `cached+interned`: Same, with `Dataset(intern_footprints=True)`
+
+"""
+
+import argparse
+import contextlib
+import functools
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+import buzzard as buzz
+
+def _legacy_hash(self):
+    return hash((
+        self._aff.to_gdal(),
+        tuple(self._rsize.tolist()),
+    ))
+
+def _legacy_equals(self, other):
+    if (self.gt != other.gt).any():
+        return False
+    if (self.rsize != other.rsize).any():
+        return False
+    return True
+
+@contextlib.contextmanager
+def _legacy_footprint():
+    hash_, equals = buzz.Footprint.__hash__, buzz.Footprint.equals
+    buzz.Footprint.__hash__, buzz.Footprint.equals = _legacy_hash, _legacy_equals
+    try:
+        yield
+    finally:
+        buzz.Footprint.__hash__, buzz.Footprint.equals = hash_, equals
+
+def _meshgrid_raster_in(fp, primitive_fps, primitive_arrays, raster, reffp):
+    x, y = fp.meshgrid_raster_in(reffp)
+    return np.stack([x, y], axis=2).astype('float32')
+
+def bench_dict(fp, tile_size):
+    tiles = fp.tile((tile_size, tile_size)).flatten()
+    copies = fp.tile((tile_size, tile_size)).flatten()
+    d = {tile: i for i, tile in enumerate(tiles)}
+    t0 = time.perf_counter()
+    for _ in range(10):
+        for tile in copies:
+            d[tile]
+    return (time.perf_counter() - t0) / (10 * len(copies))
+
+def bench_scheduler(fp, tile_size, count, cache_dir, intern_footprints):
+    tiles = fp.tile((tile_size, tile_size), boundary_effect='shrink').flatten()
+    rng = np.random.RandomState(42)
+    fps = [tiles[i] for i in rng.randint(0, tiles.size, count)]
+    with buzz.Dataset(intern_footprints=intern_footprints).close as ds:
+        r = ds.acreate_cached_raster_recipe(
+            fp=fp, dtype='float32', channel_count=2,
+            compute_array=functools.partial(_meshgrid_raster_in, reffp=fp),
+            cache_dir=cache_dir, cache_tiles=(tile_size, tile_size), cache_format='raw',
+            computation_pool=None, merge_pool=None, io_pool=None, resample_pool=None,
+        )
+        t0 = time.perf_counter()
+        for _ in r.iter_data(fps):
+            pass
+        return count / (time.perf_counter() - t0)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--count', type=int, default=2000, help='Number of queried tiles')
+    parser.add_argument('--tile-size', type=int, default=16, help='Width of the cache tiles')
+    parser.add_argument('--size', type=int, default=1024, help='Width of the raster')
+    args = parser.parse_args()
+
+    fp = buzz.Footprint(tl=(0, args.size), size=(args.size, args.size), rsize=(args.size, args.size))
+    cache_dir = tempfile.mkdtemp(prefix='buzz-bench-')
+    try:
+        # Fill the cache
+        with buzz.Dataset().close as ds:
+            ds.acreate_cached_raster_recipe(
+                fp=fp, dtype='float32', channel_count=2,
+                compute_array=functools.partial(_meshgrid_raster_in, reffp=fp),
+                cache_dir=cache_dir, cache_tiles=(args.tile_size, args.tile_size),
+                cache_format='raw',
+            ).get_data()
+
+        for name, ctx, intern_footprints in [
+                ('legacy', _legacy_footprint, False),
+                ('cached', contextlib.suppress, False),
+                ('cached+interned', contextlib.suppress, True),
+        ]:
+            with ctx():
+                lookup = bench_dict(fp, args.tile_size)
+                throughput = bench_scheduler(
+                    fp, args.tile_size, args.count, cache_dir, intern_footprints,
+                )
+            print('{:>16}: dict lookup {:.2f}us, scheduler {:.0f} tiles/s'.format(
+                name, lookup * 1e6, throughput,
+            ))
+    finally:
+        shutil.rmtree(cache_dir)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Measure the cost of the binary predicates of north-up Footprints, and the time taken by the
+Dataset's scheduler to prepare a `queue_data` of many Footprints, a step that calls
+`share_area`, `same_grid` and `intersection` several times per queried Footprint.
+
+```sh
+$ python scripts/bench_footprint_predicates.py --count 100000
+```
+
+Each measure is made twice:
+- `shapely`: With the previous implementation, that built shapely polygons for all Footprints
+- `arithmetic`: With the comparisons of bounds used for north-up Footprints
+
+"""
+
+import argparse
+import contextlib
+import functools
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+import buzzard as buzz
+
+class _NeverNorthUp(object):
+    """Data descriptor replacing the `_north_up` slot of Footprint"""
+    def __get__(self, obj, cls):
+        return False
+
+    def __set__(self, obj, value):
+        pass
+
+@contextlib.contextmanager
+def _shapely_footprint():
+    slot = buzz.Footprint.__dict__['_north_up']
+    buzz.Footprint._north_up = _NeverNorthUp()
+    try:
+        yield
+    finally:
+        buzz.Footprint._north_up = slot
+
+def _meshgrid_raster_in(fp, primitive_fps, primitive_arrays, raster, reffp):
+    x, y = fp.meshgrid_raster_in(reffp)
+    return np.stack([x, y], axis=2).astype('float32')
+
+def bench_predicates(fp, tile_size):
+    # Horizontal neighbors that overlap by 2 pixels
+    tiles = fp.tile((tile_size, tile_size), 2, 2, boundary_effect='shrink')
+    pairs = list(zip(tiles[:, :-1].flatten(), tiles[:, 1:].flatten()))[:1000]
+    times = {}
+    for name, f in [
+            ('share_area', lambda a, b: a.share_area(b)),
+            ('same_grid', lambda a, b: a.same_grid(b)),
+            ('contains', lambda a, b: fp.contains(b)),
+            ('intersection', lambda a, b: a & b),
+    ]:
+        t0 = time.perf_counter()
+        for a, b in pairs:
+            f(a, b)
+        times[name] = (time.perf_counter() - t0) / len(pairs)
+    return times
+
+def bench_queue_data(fp, tile_size, count, cache_dir):
+    tiles = fp.tile((tile_size, tile_size), boundary_effect='shrink').flatten()
+    rng = np.random.RandomState(42)
+    fps = [tiles[i] for i in rng.randint(0, tiles.size, count)]
+    with buzz.Dataset().close as ds:
+        r = ds.acreate_cached_raster_recipe(
+            fp=fp, dtype='float32', channel_count=2,
+            compute_array=functools.partial(_meshgrid_raster_in, reffp=fp),
+            cache_dir=cache_dir, cache_tiles=(256, 256), cache_format='raw',
+            computation_pool=None, merge_pool=None, io_pool=None, resample_pool=None,
+        )
+        # The first array is only produced once the query was prepared
+        t0 = time.perf_counter()
+        q = r.queue_data(fps, max_queue_size=1)
+        q.get()
+        return time.perf_counter() - t0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--count', type=int, default=100000, help='Number of queried Footprints')
+    parser.add_argument('--tile-size', type=int, default=16, help='Width of the queried Footprints')
+    parser.add_argument('--size', type=int, default=1024, help='Width of the raster')
+    args = parser.parse_args()
+
+    fp = buzz.Footprint(tl=(0, args.size), size=(args.size, args.size), rsize=(args.size, args.size))
+    cache_dir = tempfile.mkdtemp(prefix='buzz-bench-')
+    try:
+        # Fill the cache
+        with buzz.Dataset().close as ds:
+            ds.acreate_cached_raster_recipe(
+                fp=fp, dtype='float32', channel_count=2,
+                compute_array=functools.partial(_meshgrid_raster_in, reffp=fp),
+                cache_dir=cache_dir, cache_tiles=(256, 256), cache_format='raw',
+            ).get_data()
+
+        for name, ctx in [
+                ('shapely', _shapely_footprint),
+                ('arithmetic', contextlib.suppress),
+        ]:
+            with ctx():
+                times = bench_predicates(fp, args.tile_size)
+                total = bench_queue_data(fp, args.tile_size, args.count, cache_dir)
+            print('{:>10}: {}'.format(name, ', '.join(
+                '{} {:.1f}us'.format(k, v * 1e6) for k, v in times.items()
+            )))
+            print('{:>10}  queue_data of {} Footprints, first array after {:.3f}s'.format(
+                '', args.count, total,
+            ))
+    finally:
+        shutil.rmtree(cache_dir)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Measure the time spent by the Dataset's scheduler to plan a `queue_data` of many Footprints on a
+cached raster recipe, i.e. to build the `CachedQueryInfos` of the query, and the time until the
+first array is received.
+
+```sh
+$ python scripts/bench_query_planning.py --count 250000
+```
+
+"""
+
+import argparse
+import functools
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+import buzzard as buzz
+from buzzard._actors.cached.query_infos import CachedQueryInfos
+
+def _meshgrid_raster_in(fp, primitive_fps, primitive_arrays, raster, reffp):
+    x, y = fp.meshgrid_raster_in(reffp)
+    return np.stack([x, y], axis=2).astype('float32')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--count', type=int, default=250000, help='Number of queried Footprints')
+    parser.add_argument('--tile-size', type=int, default=16, help='Width of the queried Footprints')
+    parser.add_argument('--size', type=int, default=1024, help='Width of the raster')
+    args = parser.parse_args()
+
+    fp = buzz.Footprint(tl=(0, args.size), size=(args.size, args.size), rsize=(args.size, args.size))
+    tiles = fp.tile((args.tile_size, args.tile_size), boundary_effect='shrink').flatten()
+    rng = np.random.RandomState(42)
+    fps = [tiles[i] for i in rng.randint(0, tiles.size, args.count)]
+
+    cache_dir = tempfile.mkdtemp(prefix='buzz-bench-')
+    try:
+        with buzz.Dataset().close as ds:
+            r = ds.acreate_cached_raster_recipe(
+                fp=fp, dtype='float32', channel_count=2,
+                compute_array=functools.partial(_meshgrid_raster_in, reffp=fp),
+                cache_dir=cache_dir, cache_tiles=(256, 256), cache_format='raw',
+            )
+            # Fill the cache
+            r.get_data()
+
+            t0 = time.perf_counter()
+            qi = CachedQueryInfos(r._back, fps, [0, 1], False, 0, 'cv_area', 5, 0, None)
+            planning = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            for pi in qi.prod:
+                pass
+            all_prod = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            q = r.queue_data(fps, max_queue_size=1)
+            q.get()
+            first_array = time.perf_counter() - t0
+    finally:
+        shutil.rmtree(cache_dir)
+
+    print('{} Footprints of {}x{} pixels'.format(len(fps), args.tile_size, args.tile_size))
+    print('  planning of the query: {:.3f}s'.format(planning))
+    print('  building all the CacheProduceInfos afterwards: {:.3f}s'.format(all_prod))
+    print('  queue_data, first array after: {:.3f}s'.format(first_array))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Measure the time spent to construct a cached raster recipe on a large tiling, and the cost of a
+lookup in the index of its cache tiles.
+
+```sh
+$ python scripts/bench_recipe_tilings.py --size 16384 --tile-size 16
+```
+
+Each measure is made twice:
+- `rtree`: With the previous implementation, that inserted all cache tiles in an R-tree
+- `grid`: With the arithmetic index of regular tilings
+
+"""
+
+import argparse
+import contextlib
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import rtree.index
+
+import buzzard as buzz
+from buzzard._cached_raster_recipe import BackCachedRasterRecipe
+
+def _rtree_cache_fps_of_compute_fps(self, compute_fps):
+    self._cache_footprint_index = rtree.index.Index()
+    bounds_inset = np.asarray([+1 / 4, +1 / 4, -1 / 4, -1 / 4])
+    for i, fp in enumerate(self.cache_fps.flat):
+        rtl = self.fp.spatial_to_raster(fp.tl, dtype=float)
+        self._cache_footprint_index.insert(i, np.r_[rtl, rtl + fp.rsize] + bounds_inset)
+    return {
+        compute_fp: self.cache_fps_of_fp(compute_fp)
+        for compute_fp in compute_fps.flat
+    }
+
+def _rtree_cache_fps_of_fp(self, fp):
+    rtl = self.fp.spatial_to_raster(fp.tl, dtype=float)
+    bounds = np.r_[rtl, rtl + fp.rsize]
+    return [
+        self.cache_fps.flat[i]
+        for i in list(self._cache_footprint_index.intersection(bounds))
+    ]
+
+@contextlib.contextmanager
+def _rtree_recipe():
+    cls = BackCachedRasterRecipe
+    methods = cls._cache_fps_of_compute_fps, cls.cache_fps_of_fp
+    cls._cache_fps_of_compute_fps = _rtree_cache_fps_of_compute_fps
+    cls.cache_fps_of_fp = _rtree_cache_fps_of_fp
+    try:
+        yield
+    finally:
+        cls._cache_fps_of_compute_fps, cls.cache_fps_of_fp = methods
+
+def _compute_array(fp, *_):
+    return np.zeros(fp.shape, 'uint8')
+
+def bench(fp, tile_size, queries, cache_dir):
+    with buzz.Dataset().close as ds:
+        t0 = time.perf_counter()
+        cache_tiles = fp.tile((tile_size, tile_size), boundary_effect='shrink')
+        tiling = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        r = ds.acreate_cached_raster_recipe(
+            fp=fp, dtype='uint8', channel_count=1, compute_array=_compute_array,
+            cache_dir=cache_dir, cache_tiles=(tile_size, tile_size),
+            computation_tiles=(tile_size * 3, tile_size * 3), cache_format='raw',
+        )
+        construction = time.perf_counter() - t0 - tiling
+
+        t0 = time.perf_counter()
+        for query in queries:
+            r._back.cache_fps_of_fp(query)
+        lookup = (time.perf_counter() - t0) / len(queries)
+    return cache_tiles.size, tiling, construction, lookup
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--size', type=int, default=16384, help='Width of the raster')
+    parser.add_argument('--tile-size', type=int, default=16, help='Width of the cache tiles')
+    parser.add_argument('--count', type=int, default=10000, help='Number of lookups')
+    args = parser.parse_args()
+
+    fp = buzz.Footprint(tl=(0, args.size), size=(args.size, args.size), rsize=(args.size, args.size))
+    rng = np.random.RandomState(42)
+    queries = [
+        buzz.Footprint(tl=fp.raster_to_spatial([x, y]), size=(100, 100), rsize=(100, 100))
+        for x, y in rng.randint(0, args.size - 100, (args.count, 2)).tolist()
+    ]
+
+    cache_dir = tempfile.mkdtemp(prefix='buzz-bench-')
+    try:
+        for name, ctx in [
+                ('rtree', _rtree_recipe),
+                ('grid', contextlib.suppress),
+        ]:
+            with ctx():
+                count, tiling, construction, lookup = bench(fp, args.tile_size, queries, cache_dir)
+            print('{:>6}: {} cache tiles, tiling {:.3f}s, rest of the construction {:.3f}s, '
+                  'lookup of 100x100 pixels {:.1f}us'.format(
+                      name, count, tiling, construction, lookup * 1e6,
+                  ))
+    finally:
+        shutil.rmtree(cache_dir)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Measure the latency of small `get_data` calls on a recipe, i.e. the time spent by the Dataset's
+scheduler to route a query and to wake up on the events that it waits for.
+
+```sh
+$ python scripts/bench_scheduler_latency.py --count 10000 --tile-size 16
+```
+
+By default a cached recipe is used, its cache is filled before the measures, so that each
+`get_data` only performs one cache file read. Use `--nocache` to measure a recipe without cache,
+where each `get_data` performs one computation instead.
+
+"""
+
+import argparse
+import functools
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+import buzzard as buzz
+
+def _meshgrid_raster_in(fp, primitive_fps, primitive_arrays, raster, reffp):
+    x, y = fp.meshgrid_raster_in(reffp)
+    return np.stack([x, y], axis=2).astype('float32')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--count', type=int, default=10000, help='Number of `get_data` calls')
+    parser.add_argument('--tile-size', type=int, default=16, help='Width of the queried arrays')
+    parser.add_argument('--pool', default='cpu', help="Pool alias, or 'none' for the scheduler")
+    parser.add_argument('--nocache', action='store_true', help='Use a recipe without cache')
+    args = parser.parse_args()
+
+    pool = None if args.pool.lower() == 'none' else args.pool
+    fp = buzz.Footprint(tl=(0, 1024), size=(1024, 1024), rsize=(1024, 1024))
+    tiles = fp.tile((args.tile_size, args.tile_size), boundary_effect='shrink').flatten()
+    rng = np.random.RandomState(42)
+    fps = [tiles[i] for i in rng.randint(0, tiles.size, args.count)]
+    kwargs = dict(
+        fp=fp, dtype='float32', channel_count=2,
+        compute_array=functools.partial(_meshgrid_raster_in, reffp=fp),
+        computation_pool=pool, merge_pool=pool, resample_pool=pool,
+    )
+
+    cache_dir = tempfile.mkdtemp(prefix='buzz-bench-')
+    try:
+        with buzz.Dataset().close as ds:
+            if args.nocache:
+                r = ds.acreate_raster_recipe(**kwargs)
+            else:
+                r = ds.acreate_cached_raster_recipe(
+                    cache_dir=cache_dir, cache_tiles=(256, 256), io_pool=pool, **kwargs
+                )
+                # Fill the cache
+                r.get_data()
+
+            latencies = np.empty(len(fps))
+            t0 = time.perf_counter()
+            for i, tile in enumerate(fps):
+                a = time.perf_counter()
+                r.get_data(fp=tile)
+                latencies[i] = time.perf_counter() - a
+            total = time.perf_counter() - t0
+    finally:
+        shutil.rmtree(cache_dir)
+
+    latencies *= 1000
+    print('{} get_data of {}x{} pixels on a {} recipe: {:.3f}s'.format(
+        len(fps), args.tile_size, args.tile_size, 'nocache' if args.nocache else 'cached', total,
+    ))
+    print('latency per tile (ms): mean={:.3f} median={:.3f} p90={:.3f} p99={:.3f} max={:.3f}'.format(
+        latencies.mean(),
+        np.median(latencies),
+        np.percentile(latencies, 90),
+        np.percentile(latencies, 99),
+        latencies.max(),
+    ))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Measure the throughput of the Dataset's scheduler, in messages handled per second, on small
+queries whose cost is dominated by the messages exchanged between the actors.
+
+```sh
+$ python scripts/bench_scheduler_throughput.py --count 2000
+```
+
+The queries are first performed with a debug observer that counts the messages, then without
+any observer to measure the time spent, the scheduler does not time the messages when nobody
+observes them. All the computations are performed on the scheduler's thread.
+
+"""
+
+import argparse
+import collections
+import functools
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+import buzzard as buzz
+
+class _MessageCounter(object):
+    def __init__(self):
+        self.count_per_title = collections.Counter()
+
+    def on_message_passed(self, actor_name, title, duration):
+        self.count_per_title[(actor_name, title)] += 1
+
+def _meshgrid_raster_in(fp, primitive_fps, primitive_arrays, raster, reffp):
+    x, y = fp.meshgrid_raster_in(reffp)
+    return np.stack([x, y], axis=2).astype('float32')
+
+def _run(fps, nocache, cache_dir, counter=None):
+    fp = buzz.Footprint(tl=(0, 1024), size=(1024, 1024), rsize=(1024, 1024))
+    kwargs = dict(
+        fp=fp, dtype='float32', channel_count=2,
+        compute_array=functools.partial(_meshgrid_raster_in, reffp=fp),
+        computation_pool=None, merge_pool=None, resample_pool=None,
+    )
+    debug_observers = [] if counter is None else [counter]
+    with buzz.Dataset(debug_observers=debug_observers).close as ds:
+        if nocache:
+            r = ds.acreate_raster_recipe(**kwargs)
+        else:
+            r = ds.acreate_cached_raster_recipe(
+                cache_dir=cache_dir, cache_tiles=(128, 128), cache_format='raw', io_pool=None,
+                **kwargs,
+            )
+            # Fill the cache
+            r.get_data()
+        if counter is not None:
+            counter.count_per_title.clear()
+
+        t0 = time.perf_counter()
+        for _ in r.iter_data(fps, max_queue_size=16):
+            pass
+        return time.perf_counter() - t0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--count', type=int, default=2000, help='Number of arrays queried')
+    parser.add_argument('--tile-size', type=int, default=8, help='Width of the queried arrays')
+    parser.add_argument('--nocache', action='store_true', help='Use a recipe without cache')
+    args = parser.parse_args()
+
+    fp = buzz.Footprint(tl=(0, 1024), size=(1024, 1024), rsize=(1024, 1024))
+    tiles = fp.tile((args.tile_size, args.tile_size), boundary_effect='shrink').flatten()
+    rng = np.random.RandomState(42)
+    fps = [tiles[i] for i in rng.randint(0, tiles.size, args.count)]
+
+    cache_dir = tempfile.mkdtemp(prefix='buzz-bench-')
+    try:
+        counter = _MessageCounter()
+        _run(fps, args.nocache, cache_dir, counter)
+        total = _run(fps, args.nocache, cache_dir)
+    finally:
+        shutil.rmtree(cache_dir)
+
+    msg_count = sum(counter.count_per_title.values())
+    print('{} arrays of {}x{} pixels on a {} recipe: {:.3f}s'.format(
+        len(fps), args.tile_size, args.tile_size, 'nocache' if args.nocache else 'cached', total,
+    ))
+    print('{} messages, {:.1f} per array, {:.0f} messages/s'.format(
+        msg_count, msg_count / len(fps), msg_count / total,
+    ))
+    print('most frequent messages:')
+    for (actor_name, title), count in counter.count_per_title.most_common(10):
+        print('  {:>8} {}.{}'.format(count, actor_name, title))
+
+if __name__ == '__main__':
+    main()